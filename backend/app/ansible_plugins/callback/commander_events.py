@@ -0,0 +1,119 @@
+"""
+Proxmox Commander - Strukturierte Ansible-Events
+
+Callback-Plugin, das kompakte JSON-Events (eine Zeile pro Event) auf einen
+Seitenkanal schreibt. Das Backend reicht den Schreib-Fd per
+COMMANDER_EVENTS_FD herein, liest die Events parallel zum Text-Output und
+speichert pro Host/Task ein Ergebnis.
+
+Events:
+- play_start:   {"event": "play_start", "play": ...}
+- task_start:   {"event": "task_start", "play": ..., "task": ..., "task_id": ...}
+- host_result:  {"event": "host_result", "host": ..., "task": ..., "status": ...}
+- recap:        {"event": "recap", "host": ..., "ok": ..., "failed": ...}
+"""
+import json
+import os
+import time
+
+from ansible.plugins.callback import CallbackBase
+
+DOCUMENTATION = """
+    name: commander_events
+    type: notification
+    short_description: Strukturierte Events fuer Proxmox Commander
+    description:
+      - Schreibt Play-, Task-, Host- und Recap-Events als JSON-Zeilen
+        auf den per COMMANDER_EVENTS_FD uebergebenen File-Descriptor.
+    requirements:
+      - In ANSIBLE_CALLBACKS_ENABLED aktivieren
+"""
+
+# Maximale Laenge von Fehlermeldungen in Events
+MAX_MESSAGE_LENGTH = 1000
+
+
+class CallbackModule(CallbackBase):
+    """Schreibt strukturierte Events auf einen Seitenkanal"""
+
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = "notification"
+    CALLBACK_NAME = "commander_events"
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self):
+        super().__init__()
+        self._stream = None
+        self._play = None
+        self._task_started = {}
+
+        fd = os.environ.get("COMMANDER_EVENTS_FD")
+        if fd:
+            try:
+                # Nicht an ssh & Co. vererben, sonst bleibt der Kanal offen
+                os.set_inheritable(int(fd), False)
+                self._stream = os.fdopen(int(fd), "w", buffering=1)
+            except (OSError, ValueError):
+                self._stream = None
+
+    def _emit(self, event, **data):
+        """Schreibt ein Event als JSON-Zeile"""
+        if self._stream is None:
+            return
+        data["event"] = event
+        data["ts"] = round(time.time(), 3)
+        try:
+            self._stream.write(json.dumps(data, separators=(",", ":"), default=str) + "\n")
+        except (OSError, ValueError):
+            # Backend liest nicht mehr mit - Playbook trotzdem fortsetzen
+            self._stream = None
+
+    def _host_result(self, result, status, message=None):
+        """Event fuer das Ergebnis eines Tasks auf einem Host"""
+        task = result._task
+        started = self._task_started.get(task._uuid)
+        self._emit(
+            "host_result",
+            host=result._host.get_name(),
+            play=self._play,
+            task=task.get_name(),
+            task_id=task._uuid,
+            action=task.action,
+            status=status,
+            changed=bool(result._result.get("changed", False)),
+            duration=round(time.time() - started, 3) if started else None,
+            message=message[:MAX_MESSAGE_LENGTH] if message else None,
+        )
+
+    def v2_playbook_on_play_start(self, play):
+        self._play = play.get_name()
+        self._emit("play_start", play=self._play)
+
+    def v2_playbook_on_task_start(self, task, is_conditional):
+        self._task_started[task._uuid] = time.time()
+        self._emit("task_start", play=self._play, task=task.get_name(), task_id=task._uuid)
+
+    def v2_playbook_on_handler_task_start(self, task):
+        self.v2_playbook_on_task_start(task, False)
+
+    def v2_runner_on_ok(self, result):
+        status = "changed" if result._result.get("changed", False) else "ok"
+        self._host_result(result, status)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        status = "ignored" if ignore_errors else "failed"
+        message = result._result.get("msg") or result._result.get("stderr")
+        self._host_result(result, status, str(message) if message else None)
+
+    def v2_runner_on_unreachable(self, result):
+        message = result._result.get("msg")
+        self._host_result(result, "unreachable", str(message) if message else None)
+
+    def v2_runner_on_skipped(self, result):
+        self._host_result(result, "skipped")
+
+    def v2_playbook_on_stats(self, stats):
+        for host in sorted(stats.processed.keys()):
+            self._emit("recap", host=host, **stats.summarize(host))
+        if self._stream is not None:
+            self._stream.flush()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Proxmox Commander - Dynamisches Ansible Inventory
+
+Liefert den vom Backend vorberechneten JSON-Cache (Format von
+`ansible-inventory --list` inkl. `_meta.hostvars`) unveraendert aus.
+Dadurch muss Ansible die hosts.yml nicht bei jedem Lauf neu parsen.
+
+Der Pfad zum Cache kommt aus COMMANDER_INVENTORY_JSON (pro Execution
+ggf. auf das Limit vorgefiltert), sonst .cache/inventory.json neben
+diesem Script.
+
+Wird vom Backend ins Inventory-Verzeichnis installiert, damit Ansible
+group_vars/ und host_vars/ weiterhin relativ zur hosts.yml findet.
+"""
+import os
+import sys
+
+
+def main() -> int:
+    cache_path = os.environ.get("COMMANDER_INVENTORY_JSON") or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), ".cache", "inventory.json"
+    )
+
+    if len(sys.argv) > 1 and sys.argv[1] == "--host":
+        # Alle Host-Variablen stehen bereits in _meta.hostvars
+        sys.stdout.write("{}\n")
+        return 0
+
+    try:
+        with open(cache_path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        sys.stderr.write(f"Inventory-Cache nicht lesbar: {cache_path}: {e}\n")
+        return 1
+
+    # Rohdaten durchreichen - kein json.loads/dumps noetig
+    sys.stdout.buffer.write(data)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
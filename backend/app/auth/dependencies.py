@@ -1,12 +1,17 @@
 """
 Auth Dependencies für FastAPI
 """
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
+from app.config import settings
 from app.database import get_db
 from app.auth.security import decode_token
 from app.models.user import User
@@ -14,6 +19,68 @@ from app.models.user import User
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
+class PrincipalCache:
+    """
+    Prozessweiter LRU/TTL-Cache für aufgelöste User (inkl. group_access
+    und playbook_access), Key ist der Username.
+
+    Gespeichert werden von der Session gelöste User-Objekte. Pro Request
+    wird per merge(load=False) eine Kopie ohne SQL an die Request-Session
+    gehängt, Änderungen der Route landen also nie im Cache.
+
+    Jede Änderung an User oder Zugriffsrechten muss invalidate() aufrufen,
+    die TTL (AUTH_CACHE_TTL) begrenzt die Veraltung bei Änderungen aus
+    anderen Prozessen.
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, Tuple[float, User]]" = OrderedDict()
+
+    def get(self, username: str) -> Optional[User]:
+        entry = self._entries.get(username)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at <= time.monotonic():
+            del self._entries[username]
+            return None
+        self._entries.move_to_end(username)
+        return user
+
+    def put(self, username: str, user: User):
+        ttl = settings.auth_cache_ttl
+        if ttl <= 0:
+            return
+        self._entries[username] = (time.monotonic() + ttl, user)
+        self._entries.move_to_end(username)
+        while len(self._entries) > max(1, settings.auth_cache_size):
+            self._entries.popitem(last=False)
+
+    def invalidate(self, username: Optional[str] = None, user_id: Optional[int] = None):
+        """
+        Verwirft gecachte User.
+
+        Args:
+            username: Nur diesen User verwerfen
+            user_id: Nur den User mit dieser ID verwerfen
+            (ohne Argumente wird der gesamte Cache geleert)
+        """
+        if username is None and user_id is None:
+            self._entries.clear()
+            return
+        for key, (_, user) in list(self._entries.items()):
+            if key == username or (user_id is not None and user.id == user_id):
+                del self._entries[key]
+
+
+principal_cache = PrincipalCache()
+
+
+def invalidate_principal(username: Optional[str] = None, user_id: Optional[int] = None):
+    """Verwirft gecachte User nach Änderungen (siehe PrincipalCache.invalidate)"""
+    principal_cache.invalidate(username=username, user_id=user_id)
+
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db),
@@ -22,6 +89,7 @@ async def get_current_user(
     Holt den aktuellen User aus dem JWT Token.
 
     Lädt auch die group_access und playbook_access Relationships.
+    Aufgelöste User kommen aus dem PrincipalCache (kein SQL bei Treffern).
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -33,20 +101,26 @@ async def get_current_user(
     if token_data is None or token_data.username is None:
         raise credentials_exception
 
-    result = await db.execute(
-        select(User)
-        .options(
-            selectinload(User.group_access),
-            selectinload(User.playbook_access),
+    cached = principal_cache.get(token_data.username)
+    if cached is None:
+        result = await db.execute(
+            select(User)
+            .options(
+                selectinload(User.group_access),
+                selectinload(User.playbook_access),
+            )
+            .where(User.username == token_data.username)
         )
-        .where(User.username == token_data.username)
-    )
-    user = result.scalar_one_or_none()
+        cached = result.scalar_one_or_none()
 
-    if user is None:
-        raise credentials_exception
+        if cached is None:
+            raise credentials_exception
+
+        # Aus der Session lösen, der Cache hält nur unveränderte Objekte
+        db.expunge(cached)
+        principal_cache.put(token_data.username, cached)
 
-    return user
+    return await db.merge(cached, load=False)
 
 
 async def get_current_active_user(
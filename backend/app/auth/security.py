@@ -1,8 +1,14 @@
 """
 Security utilities für JWT und Password Hashing
+
+bcrypt kostet pro Hash/Verifikation ~250 ms CPU. In async Handlern immer die
+*_async Varianten verwenden: sie laufen in einem eigenen, begrenzten
+Thread-Pool (PASSWORD_HASH_WORKERS) und blockieren den Event-Loop nicht.
 """
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Tuple
 
 from jose import jwt, JWTError
 from passlib.context import CryptContext
@@ -12,17 +18,114 @@ from app.schemas.user import TokenData
 
 
 # Password Hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+_pwd_context: Optional[CryptContext] = None
+_pwd_rounds: Optional[int] = None
+
+_hash_executor: Optional[ThreadPoolExecutor] = None
+_hash_workers: Optional[int] = None
+
+_login_semaphore: Optional[asyncio.Semaphore] = None
+_login_slots: Optional[int] = None
+
+
+def get_pwd_context() -> CryptContext:
+    """
+    Gibt den CryptContext für den konfigurierten Kostenfaktor zurück.
+
+    Hashes mit abweichendem Kostenfaktor gelten als veraltet
+    (needs_update) und werden beim nächsten Login neu erzeugt.
+    """
+    global _pwd_context, _pwd_rounds
+    rounds = settings.bcrypt_rounds
+    if _pwd_context is None or _pwd_rounds != rounds:
+        _pwd_context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=rounds,
+        )
+        _pwd_rounds = rounds
+    return _pwd_context
+
+
+def _get_hash_executor() -> ThreadPoolExecutor:
+    """Thread-Pool für Hashing/Verifikation (neu bei geänderter Größe)"""
+    global _hash_executor, _hash_workers
+    workers = max(1, settings.password_hash_workers)
+    if _hash_executor is None or _hash_workers != workers:
+        if _hash_executor is not None:
+            _hash_executor.shutdown(wait=False)
+        _hash_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwhash")
+        _hash_workers = workers
+    return _hash_executor
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verifiziert ein Passwort gegen einen Hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    """Verifiziert ein Passwort gegen einen Hash (blockierend)"""
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    """Erstellt einen Password-Hash"""
-    return pwd_context.hash(password)
+    """Erstellt einen Password-Hash (blockierend)"""
+    return get_pwd_context().hash(password)
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verifiziert ein Passwort und erzeugt bei veraltetem Kostenfaktor einen
+    neuen Hash (blockierend).
+
+    Returns:
+        (gültig, neuer Hash oder None)
+    """
+    return get_pwd_context().verify_and_update(plain_password, hashed_password)
+
+
+async def _run_in_hash_executor(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_hash_executor(), func, *args)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verifiziert ein Passwort im Hash-Thread-Pool"""
+    return await _run_in_hash_executor(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Erstellt einen Password-Hash im Hash-Thread-Pool"""
+    return await _run_in_hash_executor(get_password_hash, password)
+
+
+async def verify_and_update_password_async(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """verify_and_update_password im Hash-Thread-Pool"""
+    return await _run_in_hash_executor(verify_and_update_password, plain_password, hashed_password)
+
+
+def get_login_semaphore() -> asyncio.Semaphore:
+    """
+    Begrenzt gleichzeitige Passwort-Prüfungen beim Login (LOGIN_CONCURRENCY).
+
+    Schützt den Hash-Thread-Pool vor Login-Stürmen, damit Benutzerverwaltung
+    und Passwort-Änderungen nicht hinter hunderten Logins warten.
+    """
+    global _login_semaphore, _login_slots
+    slots = max(1, settings.login_concurrency)
+    if _login_semaphore is None or _login_slots != slots:
+        _login_semaphore = asyncio.Semaphore(slots)
+        _login_slots = slots
+    return _login_semaphore
+
+
+def shutdown_hash_executor():
+    """Beendet den Hash-Thread-Pool (App-Shutdown)"""
+    global _hash_executor, _hash_workers
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False)
+    _hash_executor = None
+    _hash_workers = None
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
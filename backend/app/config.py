@@ -29,6 +29,16 @@ class Settings(BaseSettings):
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 60 * 24  # 24 Stunden
 
+    # Cache fuer aufgeloeste User in get_current_user (0 = deaktiviert)
+    auth_cache_ttl: int = 30  # Sekunden
+    auth_cache_size: int = 512
+
+    # Passwort-Hashing (bcrypt)
+    bcrypt_rounds: int = 12  # Kostenfaktor, bestehende Hashes werden beim Login angepasst
+    password_hash_workers: int = 2  # Threads fuer Hashing/Verifikation
+    login_concurrency: int = 4  # Max. gleichzeitige Passwort-Pruefungen beim Login
+    login_queue_timeout: int = 10  # Sekunden Wartezeit auf einen Login-Slot
+
     # App Admin (aus Setup-Wizard)
     app_admin_user: str = "admin"
     app_admin_password: Optional[str] = None  # Wenn None, wird generiert
@@ -71,6 +81,14 @@ class Settings(BaseSettings):
     netbox_token: Optional[str] = None
     # Externe URL fuer Frontend (konfigurierbar im Setup-Wizard)
     netbox_external_url: Optional[str] = None
+    # Gueltigkeit des Antwort-Caches fuer VLANs, Prefixes und Cluster (Sekunden, 0 = aus)
+    netbox_cache_ttl: int = 60
+    # Maximale Anzahl parallel geladener Seiten bei paginierten Listen
+    netbox_page_concurrency: int = 4
+    # Lokaler IPAM-Index: Abgleich mit NetBox nach X Sekunden
+    netbox_ipam_refresh: int = 120
+    # Lokale Sperre gewaehlter, noch nicht reservierter IPs (Sekunden)
+    netbox_ip_lease_seconds: int = 300
 
     # ==========================================================================
     # Proxmox API
@@ -107,6 +125,27 @@ class Settings(BaseSettings):
     ansible_remote_user: str = "ansible"
     ansible_ssh_key: str = "id_ed25519"
     ansible_host_key_checking: bool = False
+    # JSON-Cache statt hosts.yml an ansible-playbook uebergeben (schnellerer Start)
+    ansible_dynamic_inventory: bool = True
+    # Maximale Anzahl paralleler ansible-playbook Prozesse im Sharding-Modus
+    ansible_max_shards: int = 8
+    # Strukturierte Events (Callback-Plugin) pro Host/Task speichern und streamen
+    ansible_structured_events: bool = True
+    # Performance-Profil wenn weder Execution noch Playbook eines vorgeben
+    # ('standard' oder 'performance', siehe ansible_profile_service)
+    ansible_default_profile: str = "standard"
+
+    # ==========================================================================
+    # Erreichbarkeits-Monitor (SSH-Port aller Inventory-Hosts)
+    # ==========================================================================
+    # Intervall in Sekunden (0 = aus)
+    host_monitor_interval: int = 120
+    # Gleichzeitige Probes ueber alle Hosts
+    host_monitor_concurrency: int = 64
+    # Timeout pro Probe in Sekunden
+    host_monitor_timeout: float = 3.0
+    # Zusaetzlich den SSH-Login pruefen (ssh BatchMode, deutlich teurer)
+    host_monitor_check_auth: bool = False
 
     # ==========================================================================
     # VM Deployment Defaults
@@ -116,6 +155,39 @@ class Settings(BaseSettings):
     default_storage: str = "local-ssd"
     default_vlan: int = 60
 
+    # ==========================================================================
+    # Backup
+    # ==========================================================================
+    # I/O-Limit beim Erstellen von Backups in MB/s (0 = unbegrenzt)
+    backup_io_rate_mb: int = 0
+    # Deflate-Level fuer ZIP-Backups (1-9)
+    backup_compress_level: int = 6
+    # zstd-Level fuer tar.zst-Backups (1-22)
+    backup_zstd_level: int = 3
+    # Threads fuer zstd (0 = alle Kerne)
+    backup_compress_threads: int = 0
+    # pg_dump/pg_restore im Directory-Format mit so vielen Jobs (0 = Plain-SQL-Strom)
+    backup_pg_jobs: int = 0
+    # Seiten pro Schritt beim SQLite-Snapshot (0 = in einem Schritt)
+    backup_sqlite_step_pages: int = 1024
+    # Inkrementelle App-DB: spaetestens nach so vielen Differenzen wieder voll sichern
+    backup_sqlite_full_every: int = 7
+    # Externes Backup-Ziel ("" = nur lokal, "s3" = S3-kompatibler Object Storage)
+    backup_target: str = ""
+    backup_s3_endpoint: str = ""  # z.B. https://s3.eu-central-1.amazonaws.com, http://minio:9000
+    backup_s3_region: str = "us-east-1"
+    backup_s3_bucket: str = ""
+    backup_s3_access_key: str = ""
+    backup_s3_secret_key: str = ""
+    backup_s3_prefix: str = "proxmox-commander"
+    # Teilgroesse (MB, min. 5) und parallele Teile beim Multipart-Upload
+    backup_s3_part_size_mb: int = 16
+    backup_s3_upload_threads: int = 4
+    # Aufbewahrung im Backup-Ziel in Tagen, unabhaengig von der lokalen (0 = unbegrenzt)
+    backup_remote_retention_days: int = 0
+    # Gueltigkeit des zwischengespeicherten Remote-Katalogs in Sekunden
+    backup_remote_index_ttl: int = 300
+
     # ==========================================================================
     # CORS
     # ==========================================================================
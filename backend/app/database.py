@@ -105,6 +105,88 @@ async def run_migrations():
             except Exception as e:
                 logger.debug(f"Migration sidebar_logo fehlgeschlagen: {e}")
 
+        # Spalten der executions-Tabelle ermitteln
+        result = await conn.execute(text("PRAGMA table_info(executions)"))
+        execution_columns = [row[1] for row in result.fetchall()]
+
+        # Migration: shards Spalte zu executions hinzufügen
+        if "shards" not in execution_columns:
+            try:
+                logger.info("Migration: Füge shards Spalte zu executions hinzu...")
+                await conn.execute(text("ALTER TABLE executions ADD COLUMN shards INTEGER"))
+                logger.info("Migration erfolgreich: shards hinzugefügt")
+            except Exception as e:
+                logger.debug(f"Migration shards fehlgeschlagen: {e}")
+
+        # Migration: ansible_profile Spalte zu executions hinzufügen
+        if "ansible_profile" not in execution_columns:
+            try:
+                logger.info("Migration: Füge ansible_profile Spalte zu executions hinzu...")
+                await conn.execute(text("ALTER TABLE executions ADD COLUMN ansible_profile TEXT"))
+                logger.info("Migration erfolgreich: ansible_profile hinzugefügt")
+            except Exception as e:
+                logger.debug(f"Migration ansible_profile fehlgeschlagen: {e}")
+
+        # Spalten der backup_history-Tabelle ermitteln
+        result = await conn.execute(text("PRAGMA table_info(backup_history)"))
+        backup_columns = [row[1] for row in result.fetchall()]
+
+        # Migration: checksum Spalte zu backup_history hinzufügen
+        if backup_columns and "checksum" not in backup_columns:
+            try:
+                logger.info("Migration: Füge checksum Spalte zu backup_history hinzu...")
+                await conn.execute(text("ALTER TABLE backup_history ADD COLUMN checksum VARCHAR(71)"))
+                logger.info("Migration erfolgreich: checksum hinzugefügt")
+            except Exception as e:
+                logger.debug(f"Migration checksum fehlgeschlagen: {e}")
+
+        # Migration: base_backup_id Spalte zu backup_history hinzufügen
+        if backup_columns and "base_backup_id" not in backup_columns:
+            try:
+                logger.info("Migration: Füge base_backup_id Spalte zu backup_history hinzu...")
+                await conn.execute(text("ALTER TABLE backup_history ADD COLUMN base_backup_id VARCHAR(36)"))
+                logger.info("Migration erfolgreich: base_backup_id hinzugefügt")
+            except Exception as e:
+                logger.debug(f"Migration base_backup_id fehlgeschlagen: {e}")
+
+        # Migration: storage und logical_size Spalten zu backup_history hinzufügen
+        if backup_columns and "storage" not in backup_columns:
+            try:
+                logger.info("Migration: Füge storage Spalte zu backup_history hinzu...")
+                await conn.execute(text(
+                    "ALTER TABLE backup_history ADD COLUMN storage VARCHAR(20) NOT NULL DEFAULT 'zip'"
+                ))
+                logger.info("Migration erfolgreich: storage hinzugefügt")
+            except Exception as e:
+                logger.debug(f"Migration storage fehlgeschlagen: {e}")
+
+        if backup_columns and "logical_size" not in backup_columns:
+            try:
+                logger.info("Migration: Füge logical_size Spalte zu backup_history hinzu...")
+                await conn.execute(text("ALTER TABLE backup_history ADD COLUMN logical_size INTEGER"))
+                logger.info("Migration erfolgreich: logical_size hinzugefügt")
+            except Exception as e:
+                logger.debug(f"Migration logical_size fehlgeschlagen: {e}")
+
+        # Migration: location und remote_status Spalten zu backup_history hinzufügen
+        if backup_columns and "location" not in backup_columns:
+            try:
+                logger.info("Migration: Füge location Spalte zu backup_history hinzu...")
+                await conn.execute(text(
+                    "ALTER TABLE backup_history ADD COLUMN location VARCHAR(20) NOT NULL DEFAULT 'local'"
+                ))
+                logger.info("Migration erfolgreich: location hinzugefügt")
+            except Exception as e:
+                logger.debug(f"Migration location fehlgeschlagen: {e}")
+
+        if backup_columns and "remote_status" not in backup_columns:
+            try:
+                logger.info("Migration: Füge remote_status Spalte zu backup_history hinzu...")
+                await conn.execute(text("ALTER TABLE backup_history ADD COLUMN remote_status VARCHAR(20)"))
+                logger.info("Migration erfolgreich: remote_status hinzugefügt")
+            except Exception as e:
+                logger.debug(f"Migration remote_status fehlgeschlagen: {e}")
+
 
 async def create_default_admin():
     """Erstellt oder aktualisiert den Admin-User basierend auf Settings (fuer App-Start)"""
@@ -138,7 +220,7 @@ async def ensure_admin_exists(
         dict mit: success, action ("created"/"updated"/"skipped"), message
     """
     from app.models.user import User
-    from app.auth.security import get_password_hash, verify_password
+    from app.auth.security import get_password_hash_async, verify_password_async
 
     # Defaults
     admin_user = username or "admin"
@@ -166,7 +248,7 @@ async def ensure_admin_exists(
 
             admin = User(
                 username=admin_user,
-                password_hash=get_password_hash(password),
+                password_hash=await get_password_hash_async(password),
                 email=admin_email,
                 is_admin=True,
                 is_super_admin=True,
@@ -201,13 +283,15 @@ async def ensure_admin_exists(
                 update_reasons.append("email")
 
             # Passwort pruefen/aktualisieren
-            if not verify_password(password, super_admin.password_hash):
-                super_admin.password_hash = get_password_hash(password)
+            if not await verify_password_async(password, super_admin.password_hash):
+                super_admin.password_hash = await get_password_hash_async(password)
                 needs_update = True
                 update_reasons.append("password")
 
             if needs_update:
                 await session.commit()
+                from app.auth.dependencies import invalidate_principal
+                invalidate_principal(user_id=super_admin.id)
                 msg = f"Admin-User aktualisiert ({', '.join(update_reasons)})"
                 logger.info(msg)
                 return {
@@ -18,6 +18,14 @@ from app.routers.cloud_init_settings import router as cloud_init_settings_router
 from app.routers.backup import router as backup_router
 from app.services.inventory_sync_service import get_sync_service
 from app.services.backup_scheduler import start_backup_scheduler, stop_backup_scheduler
+from app.services.netbox_client import get_netbox_client
+from app.services.ipam_allocator import get_ipam_allocator
+from app.services.proxmox_service import proxmox_service
+from app.auth.security import shutdown_hash_executor
+from app.services.snippet_transport import snippet_transport
+from app.services.host_monitor_service import host_monitor
+from app.services.notification_dispatcher import notification_dispatcher
+from app.services.ansible_profile_service import default_profile_name
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +36,9 @@ async def lifespan(app: FastAPI):
     # Startup
     await init_db()
 
+    # ANSIBLE_DEFAULT_PROFILE pruefen (unbekannt: Warnung, Fallback 'standard')
+    logger.info(f"Ansible Default-Profil: {default_profile_name()}")
+
     # Background Inventory-Sync starten
     sync_service = get_sync_service()
     await sync_service.start_background_sync()
@@ -37,6 +48,18 @@ async def lifespan(app: FastAPI):
     await start_backup_scheduler()
     logger.info("Backup-Scheduler gestartet")
 
+    # VLAN-Scan im Hintergrund (Setup-Wizard und VLAN-Auswahl lesen den Cache)
+    await proxmox_service.start_vlan_refresh()
+
+    # Erreichbarkeits-Monitor (Hostliste und Playbook-Start lesen den Stand)
+    await host_monitor.start()
+
+    # Zustellung der Notification-Outbox
+    await notification_dispatcher.start()
+
+    # Periodischer Abgleich des lokalen IPAM-Index mit NetBox
+    await get_ipam_allocator().start_refresh()
+
     yield
 
     # Shutdown
@@ -46,6 +69,20 @@ async def lifespan(app: FastAPI):
     await sync_service.stop_background_sync()
     logger.info("Background Inventory-Sync gestoppt")
 
+    await proxmox_service.stop_vlan_refresh()
+
+    await host_monitor.stop()
+
+    await notification_dispatcher.stop()
+
+    await get_ipam_allocator().stop_refresh()
+
+    await get_netbox_client().close()
+
+    await snippet_transport.close()
+
+    shutdown_hash_executor()
+
 
 app = FastAPI(
     title=settings.app_name,
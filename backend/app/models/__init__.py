@@ -7,6 +7,7 @@ from app.models.user_playbook_access import UserPlaybookAccess
 from app.models.app_settings import AppSettings
 from app.models.execution import Execution
 from app.models.execution_log import ExecutionLog
+from app.models.execution_host_result import ExecutionHostResult
 from app.models.vm_template import VMTemplate
 from app.models.vm_history import VMHistory
 
@@ -16,6 +17,7 @@ from app.models.user_notification_preferences import UserNotificationPreferences
 from app.models.password_reset_token import PasswordResetToken
 from app.models.webhook import Webhook
 from app.models.notification_log import NotificationLog
+from app.models.notification_outbox import NotificationOutbox
 
 # Cloud-Init Settings
 from app.models.cloud_init_settings import CloudInitSettings
@@ -23,6 +25,9 @@ from app.models.cloud_init_settings import CloudInitSettings
 # Backup Models
 from app.models.backup import BackupHistory, BackupSchedule
 
+# Erreichbarkeits-Monitor
+from app.models.host_status import HostStatus
+
 __all__ = [
     "User",
     "UserGroupAccess",
@@ -30,6 +35,7 @@ __all__ = [
     "AppSettings",
     "Execution",
     "ExecutionLog",
+    "ExecutionHostResult",
     "VMTemplate",
     "VMHistory",
     # Benachrichtigungs-Models
@@ -38,9 +44,12 @@ __all__ = [
     "PasswordResetToken",
     "Webhook",
     "NotificationLog",
+    "NotificationOutbox",
     # Cloud-Init Settings
     "CloudInitSettings",
     # Backup Models
     "BackupHistory",
     "BackupSchedule",
+    # Erreichbarkeits-Monitor
+    "HostStatus",
 ]
@@ -23,3 +23,4 @@ class AppSettings(Base):
 SETTING_DEFAULT_GROUPS = "default_groups"  # JSON-Array der Standard-Gruppen
 SETTING_DEFAULT_PLAYBOOKS = "default_playbooks"  # JSON-Array der Standard-Playbooks
 SETTING_NETBOX_EXTERNAL_URL = "netbox_external_url"  # Externe URL fuer NetBox UI
+SETTING_ANSIBLE_PLAYBOOK_PROFILES = "ansible_playbook_profiles"  # JSON-Objekt Playbook -> Profil
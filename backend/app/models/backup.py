@@ -15,7 +15,13 @@ class BackupHistory(Base):
     filename = Column(String(255), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     size_bytes = Column(Integer, nullable=True)
+    logical_size = Column(Integer, nullable=True)  # unkomprimierte Groesse aller Dateien
     components = Column(Text, nullable=True)  # JSON array
+    checksum = Column(String(71), nullable=True)  # sha256:<hex> des Archivs
+    base_backup_id = Column(String(36), nullable=True)  # Basis einer inkrementellen App-DB
+    storage = Column(String(20), default="zip", nullable=False)  # zip, repository
+    location = Column(String(20), default="local", nullable=False)  # local, remote, both
+    remote_status = Column(String(20), nullable=True)  # uploading, uploaded, failed
     is_scheduled = Column(Boolean, default=False, nullable=False)
     status = Column(String(50), default="completed", nullable=False)  # completed, failed, in_progress
 
@@ -29,7 +35,7 @@ class BackupSchedule(Base):
 
     id = Column(Integer, primary_key=True, default=1)
     enabled = Column(Boolean, default=False, nullable=False)
-    frequency = Column(String(20), default="daily", nullable=False)  # daily, weekly
+    frequency = Column(String(20), default="daily", nullable=False)  # hourly, daily, weekly
     time = Column(String(5), default="02:00", nullable=False)  # HH:MM
     retention_days = Column(Integer, default=7, nullable=False)
     options = Column(Text, nullable=True)  # JSON BackupOptions
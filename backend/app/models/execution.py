@@ -25,6 +25,8 @@ class Execution(Base):
     target_hosts = Column(Text, nullable=True)  # JSON array
     target_groups = Column(Text, nullable=True)  # JSON array
     extra_vars = Column(Text, nullable=True)  # JSON object
+    shards = Column(Integer, nullable=True)  # Parallele Controller-Prozesse (Sharding)
+    ansible_profile = Column(Text, nullable=True)  # JSON: effektives Performance-Profil
 
     # Terraform-spezifisch
     tf_action = Column(String(20), nullable=True)  # 'plan', 'apply', 'destroy'
@@ -42,3 +44,4 @@ class Execution(Base):
     # Relationships
     user = relationship("User", back_populates="executions")
     logs = relationship("ExecutionLog", back_populates="execution", cascade="all, delete-orphan")
+    host_results = relationship("ExecutionHostResult", back_populates="execution", cascade="all, delete-orphan")
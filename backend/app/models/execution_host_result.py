@@ -0,0 +1,37 @@
+"""
+ExecutionHostResult Model - Strukturierte Ergebnisse pro Host und Task
+"""
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Boolean, ForeignKey, Index
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+
+from app.database import Base
+
+
+class ExecutionHostResult(Base):
+    """Ergebnis eines Ansible-Tasks auf einem Host (aus dem Callback-Plugin)"""
+    __tablename__ = "execution_host_results"
+    __table_args__ = (
+        # "Welche Hosts sind fehlgeschlagen" als Index-Abfrage
+        Index("ix_execution_host_results_execution_status", "execution_id", "status"),
+        Index("ix_execution_host_results_execution_host", "execution_id", "host"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    execution_id = Column(Integer, ForeignKey("executions.id", ondelete="CASCADE"), nullable=False)
+    host = Column(String(255), nullable=False)
+    play = Column(String(255), nullable=True)
+    task = Column(String(255), nullable=True)
+    task_id = Column(String(64), nullable=True)
+    action = Column(String(100), nullable=True)
+
+    # Status: 'ok', 'changed', 'failed', 'ignored', 'unreachable', 'skipped'
+    status = Column(String(20), nullable=False)
+    changed = Column(Boolean, default=False, nullable=False)
+    duration_seconds = Column(Float, nullable=True)
+    message = Column(Text, nullable=True)
+    shard = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationship
+    execution = relationship("Execution", back_populates="host_results")
@@ -0,0 +1,25 @@
+"""
+HostStatus Model - Letzter Stand des Erreichbarkeits-Monitors pro Host
+"""
+from sqlalchemy import Column, String, Boolean, Integer, DateTime, Text
+
+from app.database import Base
+
+
+class HostStatus(Base):
+    """Erreichbarkeit eines Inventory-Hosts (TCP/SSH-Port, optional Login)"""
+    __tablename__ = "host_status"
+
+    host = Column(String(255), primary_key=True)  # Inventory-Name
+    address = Column(String(255), nullable=False)  # ansible_host oder Name
+
+    reachable = Column(Boolean, nullable=False, default=False)
+    auth_ok = Column(Boolean, nullable=True)  # None = nicht geprueft
+    latency_ms = Column(Integer, nullable=True)  # Dauer des TCP-Connects
+    error = Column(Text, nullable=True)
+
+    last_checked = Column(DateTime(timezone=True), nullable=False)
+    last_seen = Column(DateTime(timezone=True), nullable=True)  # Letzte erfolgreiche Probe
+
+    def __repr__(self):
+        return f"<HostStatus {self.host}: {'up' if self.reachable else 'down'}>"
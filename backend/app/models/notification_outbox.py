@@ -0,0 +1,45 @@
+"""
+NotificationOutbox Model - Warteschlange fuer ausgehende Benachrichtigungen
+"""
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class NotificationOutbox(Base):
+    """
+    Eine zuzustellende Benachrichtigung (ein Kanal, ein Empfaenger).
+
+    Geheimnisse werden nicht gespeichert: Gotify-Token und Webhook-URL/Secret
+    loest der Dispatcher erst beim Senden ueber user_id bzw. webhook_id auf.
+    """
+    __tablename__ = "notification_outbox"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    # Kanal und Empfaenger
+    channel = Column(String(20), nullable=False, index=True)  # 'email', 'gotify', 'webhook'
+    recipient = Column(String(255), nullable=True)  # E-Mail-Adresse, Benutzername, Webhook-Name
+    user_id = Column(Integer, nullable=True)  # Gotify: Benutzer-Token
+    webhook_id = Column(Integer, nullable=True)
+
+    # Inhalt
+    event_type = Column(String(50), nullable=False)
+    subject = Column(String(255), nullable=True)
+    message = Column(Text, nullable=False)
+    html_message = Column(Text, nullable=True)
+    priority = Column(Integer, nullable=True)  # Gotify
+    payload = Column(Text, nullable=True)  # JSON fuer Webhooks
+
+    # Zustellung
+    status = Column(String(20), nullable=False, default="pending", index=True)  # pending, sending, sent, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, server_default=func.now())
+    sent_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<NotificationOutbox {self.id}: {self.channel} {self.event_type} ({self.status})>"
@@ -1,6 +1,7 @@
 """
 Auth Router - Login, Profil, Passwort-Änderung
 """
+import asyncio
 import logging
 from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -8,6 +9,7 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
+from app.config import settings
 from app.database import get_db
 from app.models.user import User
 from app.schemas.user import (
@@ -19,8 +21,14 @@ from app.schemas.user import (
     UserPreferencesUpdate,
     UserPreferencesResponse,
 )
-from app.auth.security import verify_password, get_password_hash, create_access_token
-from app.auth.dependencies import get_current_user, get_current_active_user
+from app.auth.security import (
+    create_access_token,
+    get_login_semaphore,
+    get_password_hash_async,
+    verify_and_update_password_async,
+    verify_password_async,
+)
+from app.auth.dependencies import get_current_user, get_current_active_user, invalidate_principal
 from app.services.permission_service import get_permission_service
 from app.services.netbox_user_service import netbox_user_service
 
@@ -41,7 +49,27 @@ async def login(
     )
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(form_data.password, user.password_hash):
+    # Passwort-Prüfung mit begrenzter Parallelität im Hash-Thread-Pool
+    valid = False
+    new_hash = None
+    if user:
+        semaphore = get_login_semaphore()
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=settings.login_queue_timeout)
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Zu viele gleichzeitige Anmeldungen, bitte erneut versuchen",
+                headers={"Retry-After": "5"},
+            )
+        try:
+            valid, new_hash = await verify_and_update_password_async(
+                form_data.password, user.password_hash
+            )
+        finally:
+            semaphore.release()
+
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Falscher Benutzername oder Passwort",
@@ -55,9 +83,15 @@ async def login(
             detail="Benutzer ist deaktiviert",
         )
 
+    # Hash mit geändertem Kostenfaktor transparent erneuern
+    if new_hash:
+        user.password_hash = new_hash
+        logger.info(f"Passwort-Hash für User '{user.username}' auf aktuellen Kostenfaktor aktualisiert")
+
     # Last Login aktualisieren
     user.last_login = datetime.now(timezone.utc)
     await db.commit()
+    invalidate_principal(username=user.username)
 
     access_token = create_access_token(
         data={"sub": user.username, "user_id": user.id}
@@ -121,14 +155,14 @@ async def change_password(
     Optional: Synchronisiert das Passwort auch nach NetBox.
     """
     # Aktuelles Passwort verifizieren
-    if not verify_password(password_data.current_password, current_user.password_hash):
+    if not await verify_password_async(password_data.current_password, current_user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Aktuelles Passwort ist falsch",
         )
 
     # Neues Passwort setzen
-    current_user.password_hash = get_password_hash(password_data.new_password)
+    current_user.password_hash = await get_password_hash_async(password_data.new_password)
 
     # NetBox-Passwort synchronisieren (wenn aktiviert und verknüpft)
     netbox_synced = False
@@ -145,6 +179,7 @@ async def change_password(
             logger.warning(f"NetBox-Passwort-Sync fehlgeschlagen: {e}")
 
     await db.commit()
+    invalidate_principal(username=current_user.username)
 
     message = "Passwort erfolgreich geändert"
     if password_data.sync_to_netbox:
@@ -190,7 +225,7 @@ async def init_admin(
 
     admin = User(
         username=admin_user,
-        password_hash=get_password_hash(admin_password),
+        password_hash=await get_password_hash_async(admin_password),
         email=admin_email,
         is_admin=True,  # Legacy
         is_super_admin=True,
@@ -239,6 +274,7 @@ async def update_my_preferences(
         current_user.sidebar_logo = preferences.sidebar_logo
 
     await db.commit()
+    invalidate_principal(username=current_user.username)
     await db.refresh(current_user)
 
     return UserPreferencesResponse(
@@ -8,14 +8,19 @@ from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status
 from fastapi.responses import FileResponse
+from starlette.background import BackgroundTask
 
 from app.auth.dependencies import get_current_super_admin_user
+from app.config import settings
 from app.models.user import User
+from app.services.backup_archive import ARCHIVE_FORMATS
 from app.services.backup_service import (
     backup_service,
     BackupOptions,
     BackupInfo,
+    BackupProgress,
     BackupResult,
+    RepositoryStats,
     RestoreResult,
     ScheduleInfo,
 )
@@ -55,6 +60,19 @@ async def create_backup(
     return result
 
 
+@router.get("/progress", response_model=BackupProgress)
+async def get_backup_progress(
+    current_user: User = Depends(get_current_super_admin_user),
+):
+    """
+    Fortschritt des laufenden (oder zuletzt gelaufenen) Backups.
+
+    Das Backup laeuft im Hintergrund-Thread, die UI kann diesen
+    Endpunkt waehrend POST /create abfragen.
+    """
+    return backup_service.get_progress()
+
+
 # =============================================================================
 # Backup herunterladen
 # =============================================================================
@@ -67,20 +85,23 @@ async def download_backup(
     """
     Laesst ein Backup herunterladen.
 
-    Gibt die Backup-ZIP-Datei zum Download zurueck.
+    Gibt die Backup-ZIP-Datei zum Download zurueck. Snapshots aus dem
+    Backup-Repository werden dafuer als ZIP exportiert.
     """
-    backup_path = await backup_service.get_backup_path(backup_id)
+    export = await backup_service.export_backup(backup_id)
 
-    if not backup_path:
+    if not export:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Backup nicht gefunden"
         )
 
+    backup_path, temporary = export
     return FileResponse(
         path=backup_path,
-        filename=backup_path.name,
-        media_type="application/zip"
+        filename=f"{backup_id}.zip" if temporary else backup_path.name,
+        media_type="application/zstd" if backup_path.name.endswith(".tar.zst") else "application/zip",
+        background=BackgroundTask(backup_path.unlink, missing_ok=True) if temporary else None,
     )
 
 
@@ -100,6 +121,18 @@ async def list_backups(
     return await backup_service.list_backups()
 
 
+@router.get("/repository", response_model=RepositoryStats)
+async def get_repository_stats(
+    current_user: User = Depends(get_current_super_admin_user),
+):
+    """
+    Kennzahlen des deduplizierten Backup-Repositorys.
+
+    logical_bytes: Summe aller Snapshots, physical_bytes: tatsaechlich belegt.
+    """
+    return await backup_service.get_repository_stats()
+
+
 # =============================================================================
 # Backup loeschen
 # =============================================================================
@@ -112,7 +145,7 @@ async def delete_backup(
     """
     Loescht ein Backup.
 
-    Entfernt sowohl die Backup-Datei als auch den Datenbank-Eintrag.
+    Entfernt die Backup-Datei (lokal und im Backup-Ziel) und den Datenbank-Eintrag.
     """
     success = await backup_service.delete_backup(backup_id)
 
@@ -125,6 +158,35 @@ async def delete_backup(
     return {"success": True, "message": "Backup geloescht"}
 
 
+# =============================================================================
+# Backup-Ziel (Remote)
+# =============================================================================
+
+@router.post("/{backup_id}/upload")
+async def upload_backup(
+    backup_id: str,
+    current_user: User = Depends(get_current_super_admin_user),
+):
+    """
+    Laedt ein Backup in das konfigurierte Backup-Ziel hoch.
+
+    Ein abgebrochener Upload wird fortgesetzt.
+    """
+    if not settings.backup_target:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Kein Backup-Ziel konfiguriert (BACKUP_TARGET)"
+        )
+
+    if not await backup_service.upload_backup(backup_id):
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Upload fehlgeschlagen"
+        )
+
+    return {"success": True, "message": "Backup hochgeladen"}
+
+
 # =============================================================================
 # Backup wiederherstellen
 # =============================================================================
@@ -132,29 +194,35 @@ async def delete_backup(
 @router.post("/restore", response_model=RestoreResult)
 async def restore_backup(
     file: UploadFile = File(...),
+    dry_run: bool = False,
     current_user: User = Depends(get_current_super_admin_user),
 ):
     """
-    Stellt ein Backup aus einer hochgeladenen ZIP-Datei wieder her.
+    Stellt ein Backup aus einer hochgeladenen Datei (.zip oder .tar.zst) wieder her.
 
     ACHTUNG: Dies ueberschreibt die aktuellen Daten!
     Vor dem Wiederherstellen wird automatisch ein Backup der
     aktuellen Daten erstellt (.pre-restore Dateien).
+
+    Mit dry_run=true wird nur geprueft und vorbereitet (Dauer je Komponente).
     """
-    if not file.filename.endswith(".zip"):
+    suffix = next(
+        (ext for ext in ARCHIVE_FORMATS.values() if file.filename.endswith(ext)), None
+    )
+    if suffix is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Nur ZIP-Dateien werden unterstuetzt"
+            detail="Nur ZIP- und tar.zst-Dateien werden unterstuetzt"
         )
 
-    # Temporaere Datei erstellen
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".zip") as tmp:
+    # Temporaere Datei erstellen (Endung bestimmt das Format)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
         content = await file.read()
         tmp.write(content)
         tmp_path = Path(tmp.name)
 
     try:
-        result = await backup_service.restore_backup(tmp_path)
+        result = await backup_service.restore_backup(tmp_path, dry_run=dry_run)
 
         if not result.success:
             raise HTTPException(
@@ -173,12 +241,14 @@ async def restore_backup(
 @router.post("/restore/{backup_id}", response_model=RestoreResult)
 async def restore_backup_by_id(
     backup_id: str,
+    dry_run: bool = False,
     current_user: User = Depends(get_current_super_admin_user),
 ):
     """
     Stellt ein Backup anhand seiner ID wieder her.
 
     ACHTUNG: Dies ueberschreibt die aktuellen Daten!
+    Mit dry_run=true wird nur geprueft und vorbereitet (Dauer je Komponente).
     """
     backup_path = await backup_service.get_backup_path(backup_id)
 
@@ -188,7 +258,7 @@ async def restore_backup_by_id(
             detail="Backup nicht gefunden"
         )
 
-    result = await backup_service.restore_backup(backup_path)
+    result = await backup_service.restore_backup(backup_path, dry_run=dry_run)
 
     if not result.success:
         raise HTTPException(
@@ -222,6 +292,7 @@ async def update_schedule(
     Aktualisiert den Backup-Zeitplan.
 
     Frequenz-Optionen:
+    - hourly: Stuendliches Backup (Minute aus der Zeit, empfohlen mit deduplicate)
     - daily: Taegliches Backup
     - weekly: Woechentliches Backup (Sonntag)
 
@@ -10,19 +10,23 @@ import json
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, desc
-from typing import Optional
+from typing import Dict, List, Optional
 
 from app.database import get_db
 from app.auth.dependencies import get_current_active_user
 from app.models.user import User
 from app.models.execution import Execution
+from app.models.execution_host_result import ExecutionHostResult
 from app.schemas.execution import (
     ExecutionResponse,
     ExecutionListResponse,
+    ExecutionHostResultResponse,
+    ExecutionHostSummary,
     AnsibleExecutionCreate,
     TerraformExecutionCreate,
 )
 from app.services.ansible_service import AnsibleService
+from app.services.ansible_profile_service import resolve_execution_profile, dump_profile
 from app.services.terraform_service import TerraformService
 from app.services.permission_service import get_permission_service
 
@@ -110,6 +114,102 @@ async def get_execution(
     return execution
 
 
+async def _get_visible_execution(
+    execution_id: int,
+    current_user: User,
+    db: AsyncSession,
+) -> Execution:
+    """Lädt eine Execution und prüft die Berechtigung"""
+    perm_service = get_permission_service(current_user)
+
+    result = await db.execute(
+        select(Execution).where(Execution.id == execution_id)
+    )
+    execution = result.scalar_one_or_none()
+
+    if not execution:
+        raise HTTPException(status_code=404, detail="Execution nicht gefunden")
+
+    if not perm_service.can_view_execution(execution.user_id):
+        raise HTTPException(status_code=403, detail="Keine Berechtigung für diese Execution")
+
+    return execution
+
+
+@router.get("/{execution_id}/results", response_model=List[ExecutionHostResultResponse])
+async def get_execution_results(
+    execution_id: int,
+    status: Optional[str] = None,
+    host: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Strukturierte Ergebnisse pro Host und Task (aus dem Callback-Plugin).
+
+    Optional gefiltert nach Status (z.B. 'failed') und Host.
+    """
+    await _get_visible_execution(execution_id, current_user, db)
+
+    query = select(ExecutionHostResult).where(ExecutionHostResult.execution_id == execution_id)
+    if status:
+        query = query.where(ExecutionHostResult.status == status)
+    if host:
+        query = query.where(ExecutionHostResult.host == host)
+
+    result = await db.execute(query.order_by(ExecutionHostResult.id))
+    return result.scalars().all()
+
+
+@router.get("/{execution_id}/hosts", response_model=List[ExecutionHostSummary])
+async def get_execution_host_summary(
+    execution_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Zusammenfassung pro Host (Anzahl Tasks je Status)"""
+    await _get_visible_execution(execution_id, current_user, db)
+
+    result = await db.execute(
+        select(
+            ExecutionHostResult.host,
+            ExecutionHostResult.status,
+            func.count(),
+        )
+        .where(ExecutionHostResult.execution_id == execution_id)
+        .group_by(ExecutionHostResult.host, ExecutionHostResult.status)
+    )
+
+    summaries: Dict[str, ExecutionHostSummary] = {}
+    for host, status, count in result.all():
+        summary = summaries.setdefault(host, ExecutionHostSummary(host=host))
+        if hasattr(summary, status):
+            setattr(summary, status, count)
+
+    return [summaries[host] for host in sorted(summaries)]
+
+
+@router.get("/{execution_id}/failed-hosts", response_model=List[str])
+async def get_failed_hosts(
+    execution_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Hosts mit fehlgeschlagenen oder unerreichbaren Tasks"""
+    await _get_visible_execution(execution_id, current_user, db)
+
+    result = await db.execute(
+        select(ExecutionHostResult.host)
+        .where(
+            ExecutionHostResult.execution_id == execution_id,
+            ExecutionHostResult.status.in_(["failed", "unreachable"]),
+        )
+        .distinct()
+        .order_by(ExecutionHostResult.host)
+    )
+    return [row[0] for row in result.all()]
+
+
 @router.post("/ansible", response_model=ExecutionResponse)
 async def run_ansible(
     data: AnsibleExecutionCreate,
@@ -146,6 +246,18 @@ async def run_ansible(
                         detail=f"Keine Berechtigung für Gruppe '{group}'",
                     )
 
+    # Performance-Profil ermitteln (Execution > Playbook > Default)
+    try:
+        profile = await resolve_execution_profile(
+            db,
+            data.playbook_name,
+            profile=data.profile,
+            forks=data.forks,
+            strategy=data.strategy,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     # Execution erstellen
     execution = Execution(
         execution_type="ansible",
@@ -154,6 +266,8 @@ async def run_ansible(
         target_hosts=json.dumps(data.target_hosts) if data.target_hosts else None,
         target_groups=json.dumps(data.target_groups) if data.target_groups else None,
         extra_vars=json.dumps(data.extra_vars) if data.extra_vars else None,
+        shards=data.shards if data.shards and data.shards > 1 else None,
+        ansible_profile=dump_profile(profile),
         user_id=current_user.id,
     )
 
@@ -170,6 +284,9 @@ async def run_ansible(
         target_hosts=data.target_hosts,
         target_groups=data.target_groups,
         extra_vars=data.extra_vars,
+        shards=data.shards,
+        profile=profile,
+        skip_unreachable=data.skip_unreachable,
     )
 
     return execution
@@ -286,10 +403,13 @@ async def delete_all_executions(
         execution_ids = [row[0] for row in result.fetchall()]
 
         if execution_ids:
-            # Logs löschen
+            # Logs und Host-Ergebnisse löschen
             await db.execute(
                 delete(ExecutionLog).where(ExecutionLog.execution_id.in_(execution_ids))
             )
+            await db.execute(
+                delete(ExecutionHostResult).where(ExecutionHostResult.execution_id.in_(execution_ids))
+            )
             # Executions löschen
             await db.execute(
                 delete(Execution).where(Execution.user_id == user_filter_id)
@@ -301,8 +421,9 @@ async def delete_all_executions(
         count_result = await db.execute(select(func.count()).select_from(Execution))
         count = count_result.scalar()
 
-        # Alle Logs löschen
+        # Alle Logs und Host-Ergebnisse löschen
         await db.execute(delete(ExecutionLog))
+        await db.execute(delete(ExecutionHostResult))
         # Alle Executions löschen
         await db.execute(delete(Execution))
 
@@ -17,6 +17,7 @@ from app.auth.dependencies import get_current_active_user
 from app.models.user import User
 from app.schemas.inventory import (
     HostInfo,
+    HostReachability,
     GroupInfo,
     InventoryTree,
     GroupCreate,
@@ -30,6 +31,7 @@ from app.schemas.inventory import (
 from app.services.inventory_parser import InventoryParser
 from app.services.inventory_editor import get_inventory_editor, InventoryEditor
 from app.services.permission_service import get_permission_service
+from app.services.host_monitor_service import host_monitor
 from app.config import settings
 
 router = APIRouter(prefix="/api/inventory", tags=["inventory"])
@@ -46,6 +48,14 @@ def get_parser() -> InventoryParser:
     return _parser
 
 
+def _with_reachability(hosts: List[HostInfo]) -> List[HostInfo]:
+    """Ergänzt den Stand des Erreichbarkeits-Monitors (Kopien, Parser-Cache bleibt unverändert)"""
+    return [
+        host.model_copy(update={"reachability": host_monitor.get(host.name)})
+        for host in hosts
+    ]
+
+
 @router.get("/hosts", response_model=List[HostInfo])
 async def get_hosts(
     current_user: User = Depends(get_current_active_user),
@@ -59,17 +69,36 @@ async def get_hosts(
     - Regulärer User: Nur Hosts aus zugewiesenen Gruppen
     """
     perm_service = get_permission_service(current_user)
-    all_hosts = parser.get_hosts()
 
     # Super-Admin sieht alles
     if perm_service.is_super_admin:
-        return all_hosts
+        return _with_reachability(parser.get_hosts())
+
+    # Nur Hosts aus zugänglichen Gruppen (vorberechnet pro Zugriffsprofil)
+    return _with_reachability(perm_service.get_inventory_view(parser).hosts)
+
+
+@router.get("/reachability", response_model=List[HostReachability])
+async def get_reachability(
+    unreachable_only: bool = False,
+    current_user: User = Depends(get_current_active_user),
+    parser: InventoryParser = Depends(get_parser),
+):
+    """
+    Letzter Stand des Erreichbarkeits-Monitors (aus dem Speicher, ohne Probe).
+
+    Gefiltert nach Berechtigungen wie /hosts.
+    """
+    perm_service = get_permission_service(current_user)
+    if perm_service.is_super_admin:
+        visible = None
+    else:
+        visible = {host.name for host in perm_service.get_inventory_view(parser).hosts}
 
-    # Nur Hosts aus zugänglichen Gruppen
-    accessible_groups = perm_service.get_accessible_groups()
     return [
-        host for host in all_hosts
-        if any(group in accessible_groups for group in host.groups)
+        status for status in host_monitor.get_all()
+        if (visible is None or status.host in visible)
+        and (not unreachable_only or not status.reachable)
     ]
 
 
@@ -86,18 +115,13 @@ async def get_groups(
     - Regulärer User: Nur zugewiesene Gruppen
     """
     perm_service = get_permission_service(current_user)
-    all_groups = parser.get_groups()
 
     # Super-Admin sieht alles
     if perm_service.is_super_admin:
-        return all_groups
+        return parser.get_groups()
 
-    # Nur zugängliche Gruppen
-    accessible_groups = perm_service.get_accessible_groups()
-    return [
-        group for group in all_groups
-        if group.name in accessible_groups
-    ]
+    # Nur zugängliche Gruppen (vorberechnet pro Zugriffsprofil)
+    return perm_service.get_inventory_view(parser).groups
 
 
 @router.get("/tree", response_model=InventoryTree)
@@ -111,20 +135,13 @@ async def get_tree(
     Gefiltert nach Berechtigungen.
     """
     perm_service = get_permission_service(current_user)
-    tree = parser.get_tree()
 
     # Super-Admin sieht alles
     if perm_service.is_super_admin:
-        return tree
-
-    # Filtern: Nur zugängliche Gruppen
-    accessible_groups = perm_service.get_accessible_groups()
-    filtered_groups = [
-        group for group in tree.groups
-        if group.name in accessible_groups
-    ]
+        return parser.get_tree()
 
-    return InventoryTree(groups=filtered_groups)
+    # Filtern: Nur zugängliche Gruppen und deren Hosts
+    return perm_service.get_inventory_view(parser).tree
 
 
 @router.get("/hosts/{host_name}", response_model=HostInfo)
@@ -145,7 +162,7 @@ async def get_host(
         if not perm_service.can_access_any_group(host.groups):
             raise HTTPException(status_code=403, detail="Keine Berechtigung für diesen Host")
 
-    return host
+    return _with_reachability([host])[0]
 
 
 @router.get("/groups/{group_name}", response_model=GroupInfo)
@@ -591,6 +608,26 @@ async def get_sync_status(
     return sync_service.get_status()
 
 
+@router.get("/reachability/status")
+async def get_reachability_status(
+    current_user: User = Depends(require_super_admin),
+):
+    """Status des Erreichbarkeits-Monitors (Intervall, letzter Lauf, Dauer)"""
+    return host_monitor.get_status()
+
+
+@router.post("/reachability/check", response_model=List[HostReachability])
+async def check_reachability(
+    current_user: User = Depends(require_super_admin),
+):
+    """
+    Prüft sofort alle Hosts (statt auf das nächste Intervall zu warten).
+
+    - Nur Super-Admin
+    """
+    return await host_monitor.check_all()
+
+
 @router.post("/sync-background/start")
 async def start_background_sync(
     current_user: User = Depends(require_super_admin),
@@ -3,13 +3,19 @@ NetBox Router - VLANs und Prefixes verwalten, Import von Proxmox
 """
 import logging
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 
 from app.auth.dependencies import get_current_active_user, get_current_admin_user
 from app.models.user import User
+from app.schemas.ip_reconciliation import (
+    ReconciliationFixRequest,
+    ReconciliationFixResult,
+    ReconciliationReport,
+)
 from app.services.netbox_service import netbox_service
 from app.services.proxmox_service import proxmox_service
+from app.services.ip_reconciliation_service import get_reconciliation_service
 
 logger = logging.getLogger(__name__)
 
@@ -129,6 +135,7 @@ async def get_prefixes(
 
 @router.get("/proxmox-vlans", response_model=list[ProxmoxVLAN])
 async def scan_proxmox_vlans(
+    refresh: bool = Query(False, description="Cache ignorieren und neu scannen"),
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -137,10 +144,12 @@ async def scan_proxmox_vlans(
     Findet:
     - Bridges mit VLAN-Namen (vmbr60 -> VLAN 60)
     - VLAN-Tags in VM-Konfigurationen
+
+    Das Ergebnis kommt aus dem periodisch aktualisierten Cache.
     """
     try:
-        # Proxmox scannen
-        proxmox_vlans = await proxmox_service.scan_network_vlans()
+        # Proxmox scannen (gecacht)
+        proxmox_vlans = await proxmox_service.scan_network_vlans(refresh=refresh)
 
         # NetBox VLANs abrufen zum Abgleich
         netbox_vlans = await netbox_service.get_vlans()
@@ -251,25 +260,31 @@ async def sync_ips_from_proxmox(
         # 3. Alle aktiven IPs aus NetBox holen
         netbox_active_ips = await netbox_service.get_active_ips()
 
-        # 4. Verwaiste IPs finden und freigeben
-        for netbox_ip in netbox_active_ips:
-            ip_addr = netbox_ip.get("address")
-            if ip_addr and ip_addr not in proxmox_ip_set:
-                # IP ist in NetBox aktiv, aber keine VM hat diese IP
-                try:
-                    await netbox_service.release_ip(ip_addr)
+        # 4. Verwaiste IPs finden und gesammelt freigeben (Bulk-DELETE)
+        # IP ist in NetBox aktiv, aber keine VM hat diese IP
+        orphaned = [
+            netbox_ip for netbox_ip in netbox_active_ips
+            if netbox_ip.get("address") and netbox_ip.get("address") not in proxmox_ip_set
+        ]
+        if orphaned:
+            try:
+                deleted = set(await netbox_service.release_ips([ip["address"] for ip in orphaned]))
+                for netbox_ip in orphaned:
+                    if netbox_ip["address"] not in deleted:
+                        continue
                     released += 1
                     released_ips.append(ReleasedIP(
-                        ip=ip_addr,
+                        ip=netbox_ip["address"],
                         description=netbox_ip.get("description", ""),
                         reason="Keine VM mit dieser IP in Proxmox gefunden",
                     ))
-                    logger.info(f"Verwaiste IP {ip_addr} freigegeben")
-                except Exception as e:
-                    errors.append(f"Release {ip_addr}: {str(e)}")
-                    logger.error(f"Fehler beim Freigeben von IP {ip_addr}: {e}")
+                    logger.info(f"Verwaiste IP {netbox_ip['address']} freigegeben")
+            except Exception as e:
+                errors.append(f"Release: {str(e)}")
+                logger.error(f"Fehler beim Freigeben verwaister IPs: {e}")
 
-        # 5. Proxmox IPs verarbeiten (neue anlegen)
+        # 5. Proxmox IPs verarbeiten (neue gesammelt anlegen)
+        to_create = []
         for vm_ip in proxmox_ips:
             ip = vm_ip.get("ip")
             if not ip:
@@ -303,21 +318,24 @@ async def sync_ips_from_proxmox(
                 skipped += 1
                 continue
 
-            # IP in NetBox anlegen
+            to_create.append({
+                "address": ip,
+                "description": f"{vm_ip.get('name', '')} (VMID: {vm_ip.get('vmid')})",
+                "dns_name": vm_ip.get("name", ""),
+                # Status active wenn die VM laeuft
+                "status": "active" if vm_ip.get("status") == "running" else "reserved",
+            })
+
+        # IPs in NetBox anlegen (Bulk-POST)
+        if to_create:
             try:
-                await netbox_service.reserve_ip(
-                    ip_address=ip,
-                    description=f"{vm_ip.get('name', '')} (VMID: {vm_ip.get('vmid')})",
-                    dns_name=vm_ip.get("name", ""),
-                )
-                # Status auf active setzen (VM laeuft ja)
-                if vm_ip.get("status") == "running":
-                    await netbox_service.activate_ip(ip)
-                created += 1
-                logger.info(f"IP {ip} fuer VM {vm_ip.get('name')} in NetBox angelegt")
+                created_ips = await netbox_service.register_ips(to_create)
+                created = len(created_ips)
+                for ip in created_ips:
+                    logger.info(f"IP {ip} in NetBox angelegt")
             except Exception as e:
-                errors.append(f"{ip}: {str(e)}")
-                logger.error(f"Fehler beim Anlegen von IP {ip}: {e}")
+                errors.append(f"Anlegen: {str(e)}")
+                logger.error(f"Fehler beim Anlegen der IPs: {e}")
 
         return IPSyncResult(
             scanned=len(proxmox_ips),
@@ -334,6 +352,44 @@ async def sync_ips_from_proxmox(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/reconciliation", response_model=ReconciliationReport)
+async def get_reconciliation(
+    refresh: bool = False,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Abweichungen zwischen Proxmox und NetBox (IP-Abgleich).
+
+    Liefert den gecachten Bericht, mit refresh=true wird neu abgeglichen.
+    Typen: orphaned_reservation, unregistered_ip, name_mismatch, stale_deploying
+    """
+    try:
+        return await get_reconciliation_service().get_report(refresh=refresh)
+    except Exception as e:
+        logger.error(f"Fehler beim IP-Abgleich: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/reconciliation/fix", response_model=ReconciliationFixResult)
+async def fix_reconciliation(
+    request: ReconciliationFixRequest,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Korrigiert die Abweichungen per Bulk-Requests (nur Admin).
+
+    Die zu korrigierenden Typen (types) sind Pflicht:
+    - Verwaiste Reservierungen werden freigegeben
+    - Fehlende IPs werden angelegt
+    - Namen und "(deploying)"-Beschreibungen werden korrigiert
+    """
+    try:
+        return await get_reconciliation_service().fix(request)
+    except Exception as e:
+        logger.error(f"Fehler bei der IP-Korrektur: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 def _ip_in_prefix(ip: str, prefix: str) -> bool:
     """Prueft ob eine IP in einem Prefix liegt."""
     import ipaddress
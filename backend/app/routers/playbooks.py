@@ -10,9 +10,11 @@ Schreiboperationen (nur Super-Admin):
 - Nur custom-* Playbooks können bearbeitet werden
 """
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 import re
 
+from app.database import get_db
 from app.auth.dependencies import get_current_active_user
 from app.models.user import User
 from app.schemas.playbook import (
@@ -26,10 +28,15 @@ from app.schemas.playbook import (
     PlaybookTemplate,
     PlaybookHistoryEntry,
     PlaybookOperationResponse,
+    AnsibleProfileInfo,
+    PlaybookProfilesResponse,
+    PlaybookProfileUpdate,
 )
 from app.services.playbook_scanner import PlaybookScanner
 from app.services.playbook_editor import get_playbook_editor, PlaybookEditor, CUSTOM_PREFIX
 from app.services.permission_service import get_permission_service
+from app.services.settings_service import get_settings_service
+from app.services.ansible_profile_service import default_profile_name, get_profiles
 from app.config import settings
 
 router = APIRouter(prefix="/api/playbooks", tags=["playbooks"])
@@ -82,22 +89,16 @@ async def get_playbooks(
     Enthält is_system Flag für Schreibschutz-Anzeige.
     """
     perm_service = get_permission_service(current_user)
-    all_playbooks = scanner.get_playbooks()
+
+    # Super-Admin sieht alles, sonst nur zugängliche Playbooks
+    # (vorberechnet pro Zugriffsprofil)
+    playbooks = perm_service.get_visible_playbooks(scanner)
 
     # is_system Flag hinzufügen
-    for playbook in all_playbooks:
+    for playbook in playbooks:
         playbook.is_system = editor.is_system_playbook(playbook.name)
 
-    # Super-Admin sieht alles
-    if perm_service.is_super_admin:
-        return all_playbooks
-
-    # Nur zugängliche Playbooks
-    accessible_playbooks = perm_service.get_accessible_playbooks()
-    return [
-        playbook for playbook in all_playbooks
-        if playbook.name in accessible_playbooks
-    ]
+    return playbooks
 
 
 @router.get("/templates", response_model=List[PlaybookTemplate])
@@ -113,6 +114,27 @@ async def get_templates(
     return [PlaybookTemplate(**t) for t in editor.get_templates()]
 
 
+@router.get("/profiles", response_model=PlaybookProfilesResponse)
+async def get_playbook_profiles(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Verfügbare Ansible-Performance-Profile und Zuordnung pro Playbook.
+
+    Profile steuern ControlPersist, Pipelining, Fact-Cache, Forks und Strategy.
+    """
+    playbook_profiles = await get_settings_service(db).get_playbook_profiles()
+    return PlaybookProfilesResponse(
+        default_profile=default_profile_name(),
+        profiles=[
+            AnsibleProfileInfo(name=name, **values)
+            for name, values in get_profiles().items()
+        ],
+        playbooks=playbook_profiles,
+    )
+
+
 @router.get("/{playbook_name}", response_model=PlaybookDetail)
 async def get_playbook(
     playbook_name: str,
@@ -186,6 +208,34 @@ async def validate_playbook(
 # Schreib-Operationen (nur Super-Admin)
 # =============================================================================
 
+@router.put("/{playbook_name}/profile", response_model=PlaybookProfilesResponse)
+async def set_playbook_profile(
+    playbook_name: str,
+    data: PlaybookProfileUpdate,
+    current_user: User = Depends(require_super_admin),
+    db: AsyncSession = Depends(get_db),
+    scanner: PlaybookScanner = Depends(get_scanner),
+):
+    """
+    Performance-Profil eines Playbooks setzen (nur Super-Admin).
+
+    - profile=None setzt das Playbook auf den globalen Default zurück
+      (auch für gelöschte Playbooks mit gespeichertem Profil)
+    - Ein Profil im Execution-Request hat weiterhin Vorrang
+    """
+    if data.profile is not None and data.profile not in get_profiles():
+        raise HTTPException(status_code=400, detail=f"Unbekanntes Ansible-Profil: {data.profile}")
+
+    settings_service = get_settings_service(db)
+    if not any(p.name == playbook_name for p in scanner.get_playbooks()):
+        stale = data.profile is None and playbook_name in await settings_service.get_playbook_profiles()
+        if not stale:
+            raise HTTPException(status_code=404, detail=f"Playbook '{playbook_name}' nicht gefunden")
+
+    await settings_service.set_playbook_profile(playbook_name, data.profile)
+    return await get_playbook_profiles(current_user=current_user, db=db)
+
+
 @router.post("", response_model=PlaybookOperationResponse)
 async def create_playbook(
     data: PlaybookCreate,
@@ -107,6 +107,33 @@ async def get_used_ips(
         raise HTTPException(status_code=500, detail=f"NetBox-Fehler: {str(e)}")
 
 
+class IPAllocationRequest(BaseModel):
+    """Request für das Sperren mehrerer freier IPs"""
+    vlan: int
+    count: int = Field(default=1, ge=1, le=256)
+    owner: str = ""
+
+
+@router.post("/allocate-ips", response_model=list[AvailableIP])
+async def allocate_ips(
+    request: IPAllocationRequest,
+    current_user: User = Depends(get_current_admin_user),
+):
+    """
+    Mehrere freie IPs in einem Schritt wählen und lokal sperren (nur Admin).
+
+    Die IPs sind für NETBOX_IP_LEASE_SECONDS für andere Anfragen gesperrt
+    und werden beim Deploy in NetBox reserviert.
+    """
+    try:
+        ips = await netbox_service.allocate_ips(request.vlan, request.count, request.owner)
+        return [AvailableIP(**ip) for ip in ips]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"NetBox-Fehler: {str(e)}")
+
+
 @router.post("/reserve-ip")
 async def reserve_ip(
     ip_address: str,
@@ -555,7 +582,9 @@ async def apply_vm(
 
     # IP-Konflikt-Check: Ist die IP noch verfügbar?
     try:
-        is_available = await netbox_service.check_ip_available(vm_config.ip_address)
+        is_available = await netbox_service.check_ip_available(
+            vm_config.ip_address, vm_config.vlan, owner=name
+        )
         if not is_available:
             raise HTTPException(
                 status_code=409,  # Conflict
@@ -758,7 +787,9 @@ async def batch_apply(
 
             # IP-Konflikt-Check
             try:
-                is_available = await netbox_service.check_ip_available(vm_config.ip_address)
+                is_available = await netbox_service.check_ip_available(
+                    vm_config.ip_address, vm_config.vlan, owner=name
+                )
                 if not is_available:
                     failed.append(BatchFailedItem(
                         name=name,
@@ -1476,6 +1507,29 @@ async def import_vm(
     return VMImportResult(**result)
 
 
+class VMBatchImportRequest(BaseModel):
+    """Request für den Import mehrerer VMs"""
+    vms: List[VMImportRequest] = Field(..., min_length=1)
+
+
+@router.post("/import/batch", response_model=list[VMImportResult])
+async def import_vms_batch(
+    request: VMBatchImportRequest,
+    current_user: User = Depends(get_current_admin_user),
+):
+    """
+    Importiert mehrere Proxmox-VMs in die Terraform-Verwaltung (nur Admin).
+
+    Terraform-Imports laufen nacheinander, die NetBox-Registrierung aller
+    importierten VMs erfolgt gesammelt per Bulk-Request.
+    """
+    results = await vm_deployment_service.import_existing_vms(
+        [vm.model_dump() for vm in request.vms],
+        user_id=current_user.id,
+    )
+    return [VMImportResult(**result) for result in results]
+
+
 # =============================================================================
 # VM History Endpoints
 # =============================================================================
@@ -25,8 +25,8 @@ from app.schemas.user import (
     UserPlaybookAccessRead,
     PasswordResetRequest,
 )
-from app.auth.security import get_password_hash
-from app.auth.dependencies import get_current_super_admin_user
+from app.auth.security import get_password_hash_async
+from app.auth.dependencies import get_current_super_admin_user, invalidate_principal
 from app.services.settings_service import get_settings_service
 from app.services.netbox_user_service import netbox_user_service
 
@@ -152,7 +152,7 @@ async def create_user(
     # User erstellen
     user = User(
         username=user_data.username,
-        password_hash=get_password_hash(user_data.password),
+        password_hash=await get_password_hash_async(user_data.password),
         email=user_data.email,
         is_admin=user_data.is_super_admin,  # Legacy-Kompatibilität
         is_super_admin=user_data.is_super_admin,
@@ -268,6 +268,7 @@ async def update_user(
         user.is_active = user_data.is_active
 
     await db.commit()
+    invalidate_principal(user_id=user_id)
     await db.refresh(user)
 
     return UserResponseWithAccess(
@@ -339,6 +340,7 @@ async def delete_user(
 
     await db.delete(user)
     await db.commit()
+    invalidate_principal(user_id=user_id)
 
 
 @router.post("/{user_id}/reset-password")
@@ -360,8 +362,9 @@ async def reset_user_password(
             detail="Benutzer nicht gefunden",
         )
 
-    user.password_hash = get_password_hash(password_data.new_password)
+    user.password_hash = await get_password_hash_async(password_data.new_password)
     await db.commit()
+    invalidate_principal(user_id=user_id)
 
     return {"message": "Passwort erfolgreich zurückgesetzt"}
 
@@ -416,6 +419,7 @@ async def add_user_group(
     )
     db.add(access)
     await db.commit()
+    invalidate_principal(user_id=user_id)
     await db.refresh(access)
 
     return access
@@ -445,6 +449,7 @@ async def remove_user_group(
 
     await db.delete(access)
     await db.commit()
+    invalidate_principal(user_id=user_id)
 
 
 @router.put("/{user_id}/groups", response_model=List[UserGroupAccessRead])
@@ -478,6 +483,7 @@ async def set_user_groups(
         new_accesses.append(access)
 
     await db.commit()
+    invalidate_principal(user_id=user_id)
 
     # Refresh
     for access in new_accesses:
@@ -536,6 +542,7 @@ async def add_user_playbook(
     )
     db.add(access)
     await db.commit()
+    invalidate_principal(user_id=user_id)
     await db.refresh(access)
 
     return access
@@ -565,6 +572,7 @@ async def remove_user_playbook(
 
     await db.delete(access)
     await db.commit()
+    invalidate_principal(user_id=user_id)
 
 
 @router.put("/{user_id}/playbooks", response_model=List[UserPlaybookAccessRead])
@@ -598,6 +606,7 @@ async def set_user_playbooks(
         new_accesses.append(access)
 
     await db.commit()
+    invalidate_principal(user_id=user_id)
 
     # Refresh
     for access in new_accesses:
@@ -678,6 +687,7 @@ async def sync_all_users_to_netbox(
             logger.error(f"Sync für User '{user.username}' fehlgeschlagen: {e}")
 
     await db.commit()
+    invalidate_principal()
 
     return NetBoxSyncResult(
         success=failed_count == 0,
@@ -719,6 +729,7 @@ async def sync_single_user_to_netbox(
         if netbox_user:
             user.netbox_user_id = netbox_user["id"]
             await db.commit()
+            invalidate_principal(user_id=user_id)
             return {
                 "success": True,
                 "message": f"NetBox User erstellt/aktualisiert (ID: {netbox_user['id']})",
@@ -29,6 +29,9 @@ async def websocket_execution(
     {"type": "stdout", "content": "...", "sequence_num": 1}
     {"type": "stderr", "content": "...", "sequence_num": 2}
     {"type": "finished", "status": "success", "exit_code": 0}
+
+    Ansible-Executions senden zusätzlich strukturierte Events als Deltas:
+    {"type": "event", "event": "host_result", "host": "...", "task": "...", "status": "failed"}
     """
     await OutputStreamer.connect(execution_id, websocket)
 
@@ -1,7 +1,7 @@
 """
 Execution Schemas
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional, List
 
@@ -17,6 +17,14 @@ class AnsibleExecutionCreate(BaseModel):
     target_hosts: Optional[List[str]] = None
     target_groups: Optional[List[str]] = None
     extra_vars: Optional[dict] = None
+    # Opt-in: Hostliste auf mehrere parallele ansible-playbook Prozesse verteilen
+    shards: Optional[int] = Field(default=None, ge=1, le=64)
+    # Performance-Profil ('standard', 'performance'); None = Playbook-/Globaler Default
+    profile: Optional[str] = None
+    forks: Optional[int] = Field(default=None, ge=1, le=500)
+    strategy: Optional[str] = None
+    # Laut Erreichbarkeits-Monitor nicht erreichbare Hosts auslassen (sonst nur Warnung)
+    skip_unreachable: bool = False
 
 
 class TerraformExecutionCreate(BaseModel):
@@ -38,6 +46,34 @@ class ExecutionLogResponse(BaseModel):
         from_attributes = True
 
 
+class ExecutionHostResultResponse(BaseModel):
+    """Schema für strukturierte Ergebnisse pro Host und Task"""
+    id: int
+    host: str
+    play: Optional[str] = None
+    task: Optional[str] = None
+    action: Optional[str] = None
+    status: str
+    changed: bool
+    duration_seconds: Optional[float] = None
+    message: Optional[str] = None
+    shard: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ExecutionHostSummary(BaseModel):
+    """Schema für die Zusammenfassung pro Host"""
+    host: str
+    ok: int = 0
+    changed: int = 0
+    failed: int = 0
+    ignored: int = 0
+    unreachable: int = 0
+    skipped: int = 0
+
+
 class ExecutionResponse(BaseModel):
     """Schema für Execution Response"""
     id: int
@@ -47,6 +83,8 @@ class ExecutionResponse(BaseModel):
     target_hosts: Optional[str] = None
     target_groups: Optional[str] = None
     extra_vars: Optional[str] = None
+    shards: Optional[int] = None
+    ansible_profile: Optional[str] = None
     tf_action: Optional[str] = None
     tf_module: Optional[str] = None
     tf_vars: Optional[str] = None
@@ -6,6 +6,21 @@ from pydantic import BaseModel, Field
 from typing import Optional, List, Dict
 
 
+class HostReachability(BaseModel):
+    """Schema für den letzten Stand des Erreichbarkeits-Monitors"""
+    host: str
+    address: str
+    reachable: bool
+    auth_ok: Optional[bool] = None  # None = Login nicht geprüft
+    latency_ms: Optional[int] = None
+    error: Optional[str] = None
+    last_checked: datetime
+    last_seen: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
 class HostInfo(BaseModel):
     """Schema für Host-Information"""
     name: str
@@ -14,6 +29,8 @@ class HostInfo(BaseModel):
     pve_node: Optional[str] = None
     groups: List[str] = []
     vars: Dict[str, str] = {}
+    # Vom Erreichbarkeits-Monitor (None = noch nicht geprüft)
+    reachability: Optional[HostReachability] = None
 
 
 class GroupInfo(BaseModel):
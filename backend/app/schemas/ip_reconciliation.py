@@ -0,0 +1,67 @@
+"""
+IP-Reconciliation Schemas - Abgleich Proxmox <-> NetBox
+"""
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class DriftType(str, Enum):
+    """Art einer Abweichung zwischen Proxmox und NetBox"""
+    # IP in NetBox (von uns verwaltet), aber keine VM in Proxmox
+    ORPHANED_RESERVATION = "orphaned_reservation"
+    # IP einer Proxmox-VM, aber nicht in NetBox
+    UNREGISTERED_IP = "unregistered_ip"
+    # IP auf beiden Seiten, aber unterschiedlicher VM-Name
+    NAME_MISMATCH = "name_mismatch"
+    # Beschreibung steht noch auf "(deploying)"
+    STALE_DEPLOYING = "stale_deploying"
+
+
+class DriftItem(BaseModel):
+    """Einzelne Abweichung"""
+    type: DriftType
+    ip: str
+    # Proxmox-Seite
+    vmid: Optional[int] = None
+    proxmox_name: Optional[str] = None
+    proxmox_status: Optional[str] = None
+    # NetBox-Seite
+    netbox_id: Optional[int] = None
+    netbox_name: Optional[str] = None
+    netbox_status: Optional[str] = None
+    netbox_description: Optional[str] = None
+    netbox_dns_name: Optional[str] = None
+    # Vorgeschlagene Korrektur
+    action: str
+
+
+class ReconciliationReport(BaseModel):
+    """Ergebnis eines Abgleichs"""
+    generated_at: datetime
+    duration_ms: int
+    proxmox_ips: int
+    netbox_ips: int
+    in_sync: int
+    counts: dict[str, int] = {}
+    items: list[DriftItem] = []
+    errors: list[str] = []
+
+
+class ReconciliationFixRequest(BaseModel):
+    """Anfrage für die Bulk-Korrektur"""
+    # Zu korrigierende Typen, explizit anzugeben (orphaned_reservation löscht in NetBox)
+    types: list[DriftType] = Field(min_length=1)
+    # Nur diese IPs korrigieren (None = alle)
+    ips: Optional[list[str]] = Field(default=None)
+
+
+class ReconciliationFixResult(BaseModel):
+    """Ergebnis der Bulk-Korrektur"""
+    released: list[str] = []
+    registered: list[str] = []
+    updated: list[str] = []
+    errors: list[str] = []
+    report: ReconciliationReport
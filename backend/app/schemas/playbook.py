@@ -108,3 +108,27 @@ class PlaybookOperationResponse(BaseModel):
     success: bool
     message: str
     playbook: Optional[PlaybookDetail] = None
+
+
+class AnsibleProfileInfo(BaseModel):
+    """Schema für ein Ansible-Performance-Profil"""
+    name: str
+    description: str
+    control_persist: Optional[int] = None
+    pipelining: bool = False
+    fact_cache: bool = False
+    fact_cache_ttl: Optional[int] = None
+    forks: Optional[int] = None
+    strategy: Optional[str] = None
+
+
+class PlaybookProfilesResponse(BaseModel):
+    """Schema für verfügbare Profile und Zuordnung pro Playbook"""
+    default_profile: str
+    profiles: List[AnsibleProfileInfo]
+    playbooks: Dict[str, str] = {}
+
+
+class PlaybookProfileUpdate(BaseModel):
+    """Schema zum Setzen des Profils eines Playbooks (None = Default)"""
+    profile: Optional[str] = None
@@ -42,6 +42,10 @@ class AnsibleInventoryService:
                 indent=2,
             )
 
+        # JSON-Cache für das dynamische Inventory aktualisieren
+        from app.services.dynamic_inventory_service import refresh_inventory_cache
+        refresh_inventory_cache()
+
     def get_groups(self) -> list[str]:
         """Gibt alle verfügbaren Gruppen zurück"""
         try:
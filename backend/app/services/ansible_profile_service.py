@@ -0,0 +1,176 @@
+"""
+Ansible Profile Service - Performance-Profile fuer Ansible-Laeufe
+
+Ein Profil bestimmt, wie ansible-playbook mit den Hosts spricht:
+- SSH ControlMaster/ControlPersist mit persistentem Socket-Verzeichnis
+- Pipelining (weniger SSH-Roundtrips pro Task)
+- jsonfile Fact-Cache mit TTL (gathering: smart)
+- Forks und Strategy
+
+Auswahl (hoechste Prioritaet zuerst):
+1. Pro Execution (profile, forks, strategy im Request)
+2. Pro Playbook (AppSettings, siehe SettingsService)
+3. Globaler Default (ANSIBLE_DEFAULT_PROFILE)
+
+Die effektiven Werte werden als JSON an der Execution gespeichert.
+"""
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Erlaubte Ansible-Strategien
+STRATEGIES = ["linear", "free", "host_pinned"]
+
+# Vordefinierte Profile
+PROFILES: Dict[str, dict] = {
+    "standard": {
+        "description": "Ansible-Defaults (keine zusaetzlichen Optimierungen)",
+        "control_persist": None,
+        "pipelining": False,
+        "fact_cache": False,
+        "fact_cache_ttl": None,
+        "forks": None,
+        "strategy": None,
+    },
+    "performance": {
+        "description": "SSH-Wiederverwendung, Pipelining und Fact-Cache",
+        "control_persist": 600,
+        "pipelining": True,
+        "fact_cache": True,
+        "fact_cache_ttl": 3600,
+        "forks": 25,
+        "strategy": "linear",
+    },
+}
+
+
+def default_profile_name() -> str:
+    """
+    Globaler Default (ANSIBLE_DEFAULT_PROFILE).
+
+    Ein Tippfehler in der Konfiguration darf Playbook-Starts nicht im
+    Hintergrund scheitern lassen: unbekannte Namen fallen mit Warnung auf
+    'standard' zurueck.
+    """
+    name = settings.ansible_default_profile
+    if name not in PROFILES:
+        logger.warning(f"ANSIBLE_DEFAULT_PROFILE '{name}' unbekannt, verwende 'standard'")
+        return "standard"
+    return name
+
+
+def resolve_profile(
+    profile: Optional[str] = None,
+    forks: Optional[int] = None,
+    strategy: Optional[str] = None,
+) -> dict:
+    """
+    Ermittelt die effektiven Einstellungen eines Profils.
+
+    Args:
+        profile: Profilname (None = globaler Default)
+        forks: Optionale Ueberschreibung der Forks
+        strategy: Optionale Ueberschreibung der Strategy
+
+    Returns:
+        Dict mit den effektiven Werten (inkl. 'profile')
+
+    Raises:
+        ValueError: Bei unbekanntem Profil oder ungueltigen Werten
+    """
+    name = profile or default_profile_name()
+    if name not in PROFILES:
+        raise ValueError(f"Unbekanntes Ansible-Profil: {name}")
+
+    effective = {"profile": name}
+    effective.update({k: v for k, v in PROFILES[name].items() if k != "description"})
+
+    if forks is not None:
+        if forks < 1 or forks > 500:
+            raise ValueError("Forks muss zwischen 1 und 500 liegen")
+        effective["forks"] = forks
+
+    if strategy is not None:
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unbekannte Strategy: {strategy}")
+        effective["strategy"] = strategy
+
+    return effective
+
+
+async def resolve_execution_profile(
+    db: AsyncSession,
+    playbook_name: str,
+    profile: Optional[str] = None,
+    forks: Optional[int] = None,
+    strategy: Optional[str] = None,
+) -> dict:
+    """
+    Ermittelt das Profil fuer eine Execution (Execution > Playbook > Default).
+
+    Returns:
+        Effektive Einstellungen (siehe resolve_profile)
+    """
+    from app.services.settings_service import get_settings_service
+
+    if profile is None:
+        playbook_profiles = await get_settings_service(db).get_playbook_profiles()
+        profile = playbook_profiles.get(playbook_name)
+        if profile is not None and profile not in PROFILES:
+            logger.warning(f"Playbook '{playbook_name}' verweist auf unbekanntes Profil '{profile}'")
+            profile = None
+
+    return resolve_profile(profile, forks, strategy)
+
+
+def apply_profile(env: Dict[str, str], effective: dict):
+    """
+    Setzt die Ansible-Umgebungsvariablen fuer ein effektives Profil.
+
+    Args:
+        env: Umgebungsvariablen (werden veraendert)
+        effective: Ergebnis von resolve_profile()
+    """
+    ansible_dir = Path(settings.data_dir) / "ansible"
+
+    if effective.get("control_persist"):
+        control_dir = ansible_dir / "cp"
+        control_dir.mkdir(parents=True, exist_ok=True, mode=0o700)
+        env["ANSIBLE_SSH_CONTROL_PATH_DIR"] = str(control_dir)
+        env["ANSIBLE_SSH_ARGS"] = (
+            f"-C -o ControlMaster=auto -o ControlPersist={effective['control_persist']}s"
+        )
+
+    if effective.get("pipelining"):
+        env["ANSIBLE_PIPELINING"] = "True"
+
+    if effective.get("fact_cache"):
+        facts_dir = ansible_dir / "facts"
+        facts_dir.mkdir(parents=True, exist_ok=True)
+        env["ANSIBLE_GATHERING"] = "smart"
+        env["ANSIBLE_CACHE_PLUGIN"] = "jsonfile"
+        env["ANSIBLE_CACHE_PLUGIN_CONNECTION"] = str(facts_dir)
+        env["ANSIBLE_CACHE_PLUGIN_TIMEOUT"] = str(effective.get("fact_cache_ttl") or 3600)
+
+    if effective.get("forks"):
+        env["ANSIBLE_FORKS"] = str(effective["forks"])
+
+    if effective.get("strategy"):
+        env["ANSIBLE_STRATEGY"] = effective["strategy"]
+
+
+def get_profiles() -> Dict[str, dict]:
+    """Gibt alle verfuegbaren Profile zurueck"""
+    return {name: dict(values) for name, values in PROFILES.items()}
+
+
+def dump_profile(effective: dict) -> str:
+    """Serialisiert ein effektives Profil fuer die Execution-Tabelle"""
+    return json.dumps(effective, sort_keys=True)
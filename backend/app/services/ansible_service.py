@@ -5,7 +5,7 @@ import asyncio
 import json
 import logging
 import os
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 
 from sqlalchemy import select
@@ -14,9 +14,21 @@ from app.database import async_session
 from app.models.execution import Execution
 from app.config import settings
 from app.services.execution_runner import ExecutionRunner
+from app.services import ssh_probe
+from app.services.host_monitor_service import host_monitor
+from app.services.dynamic_inventory_service import get_dynamic_inventory_service
+from app.services.ansible_profile_service import (
+    apply_profile,
+    dump_profile,
+    resolve_execution_profile,
+    resolve_profile,
+)
 
 logger = logging.getLogger(__name__)
 
+# Mitgelieferte Callback-Plugins (commander_events)
+CALLBACK_PLUGIN_DIR = Path(__file__).resolve().parent.parent / "ansible_plugins" / "callback"
+
 
 class AnsibleService:
     """Service für Ansible-Ausführungen"""
@@ -32,21 +44,74 @@ class AnsibleService:
         target_hosts: Optional[List[str]] = None,
         target_groups: Optional[List[str]] = None,
         extra_vars: Optional[dict] = None,
+        shards: Optional[int] = None,
+        profile: Optional[dict] = None,
+        skip_unreachable: bool = False,
     ):
-        """Führt ein Playbook aus"""
+        """
+        Führt ein Playbook aus.
+
+        Mit shards > 1 wird die aufgelöste Hostliste auf mehrere parallele
+        ansible-playbook Prozesse verteilt (Logs unter derselben Execution).
+
+        profile ist das effektive Performance-Profil (resolve_profile);
+        ohne Angabe wird der globale Default verwendet.
+
+        Hosts, die laut Erreichbarkeits-Monitor nicht erreichbar sind, werden
+        im Log gemeldet und mit skip_unreachable per Limit ausgeschlossen.
+        """
+        # Umgebungsvariablen für Ansible
+        env = os.environ.copy()
+        env["ANSIBLE_FORCE_COLOR"] = "1"
+        env["PYTHONUNBUFFERED"] = "1"
+        env["ANSIBLE_HOST_KEY_CHECKING"] = "False"
+        if settings.ansible_structured_events:
+            self._enable_event_callback(env)
+
+        # Performance-Profil (ControlPersist, Pipelining, Fact-Cache, Forks, Strategy)
+        apply_profile(env, profile or resolve_profile())
+
+        # Inventory-Quelle (JSON-Cache oder hosts.yml)
+        limits = self._get_limits(target_hosts, target_groups)
+        inventory, inventory_json = await self._prepare_inventory(execution_id, limits)
+        if inventory_json:
+            env["COMMANDER_INVENTORY_JSON"] = inventory_json
+
+        # Bekannt unerreichbare Hosts melden bzw. auslassen
+        notices = []
+        exclude_hosts = None
+        unreachable = await self._find_unreachable(limits)
+        if unreachable:
+            names = ", ".join(unreachable)
+            if skip_unreachable:
+                exclude_hosts = unreachable
+                notices.append(f"Nicht erreichbar, ausgelassen: {names}")
+            else:
+                notices.append(f"Warnung: Laut letzter Prüfung nicht erreichbar: {names}")
+
         # Kommando bauen
         cmd = self._build_command(
             playbook_name,
             target_hosts,
             target_groups,
             extra_vars,
+            inventory=inventory,
+            exclude_hosts=exclude_hosts,
         )
 
-        # Umgebungsvariablen für Ansible
-        env = os.environ.copy()
-        env["ANSIBLE_FORCE_COLOR"] = "1"
-        env["PYTHONUNBUFFERED"] = "1"
-        env["ANSIBLE_HOST_KEY_CHECKING"] = "False"
+        # Optional: Hostliste auf mehrere Controller-Prozesse verteilen
+        shard_commands = None
+        if shards and shards > 1:
+            shard_commands = await self._build_shards(
+                execution_id,
+                playbook_name,
+                limits,
+                extra_vars,
+                env,
+                inventory,
+                shards,
+                exclude_hosts=exclude_hosts,
+            )
 
         # ExecutionRunner übernimmt Status-Tracking, Log-Streaming und DB-Speicherung
         runner = ExecutionRunner(
@@ -54,8 +119,140 @@ class AnsibleService:
             cmd=cmd,
             cwd=str(self.playbook_dir.parent),
             env=env,
+            shards=shard_commands,
+            structured_events=settings.ansible_structured_events,
+            notices=notices,
+        )
+        try:
+            await runner.run()
+        finally:
+            if settings.ansible_dynamic_inventory:
+                get_dynamic_inventory_service().cleanup_execution(execution_id)
+
+    async def _build_shards(
+        self,
+        execution_id: int,
+        playbook_name: str,
+        limits: List[str],
+        extra_vars: Optional[dict],
+        env: Dict[str, str],
+        inventory: str,
+        shard_count: int,
+        exclude_hosts: Optional[List[str]] = None,
+    ) -> Optional[List[Tuple[List[str], Dict[str, str]]]]:
+        """
+        Teilt die aufgelöste Hostliste in Batches und baut pro Batch ein Kommando.
+
+        Returns:
+            Liste von (cmd, env) Paaren oder None wenn nicht gesharded wird
+            (Limit mit Patterns, zu wenige Hosts)
+        """
+        service = get_dynamic_inventory_service()
+        try:
+            hosts = await asyncio.to_thread(service.resolve_hosts, limits)
+        except Exception as e:
+            logger.warning(f"Sharding nicht möglich, Hostliste nicht auflösbar: {e}")
+            return None
+
+        if exclude_hosts:
+            hosts = [host for host in hosts if host not in exclude_hosts]
+
+        if not hosts:
+            return None
+
+        shard_count = min(shard_count, settings.ansible_max_shards, len(hosts))
+        if shard_count < 2:
+            return None
+
+        # Round-Robin verteilen, damit die Batches gleich groß sind
+        batches = [hosts[i::shard_count] for i in range(shard_count)]
+
+        shard_commands = []
+        for index, batch in enumerate(batches, start=1):
+            shard_env = env.copy()
+            shard_inventory = inventory
+
+            if settings.ansible_dynamic_inventory:
+                try:
+                    shard_inventory, shard_env["COMMANDER_INVENTORY_JSON"] = await asyncio.to_thread(
+                        service.prepare_shard, execution_id, index, batch
+                    )
+                except Exception as e:
+                    logger.warning(f"Shard-Inventory {index} nicht erstellt, nutze Gesamt-Inventory: {e}")
+
+            cmd = self._build_command(
+                playbook_name,
+                target_hosts=batch,
+                extra_vars=extra_vars,
+                inventory=shard_inventory,
+            )
+            shard_commands.append((cmd, shard_env))
+
+        logger.info(
+            f"Execution {execution_id}: {len(hosts)} Hosts auf {shard_count} Shards verteilt"
         )
-        await runner.run()
+        return shard_commands
+
+    def _enable_event_callback(self, env: Dict[str, str]):
+        """Aktiviert das mitgelieferte Callback-Plugin für strukturierte Events"""
+        plugin_dirs = [str(CALLBACK_PLUGIN_DIR)]
+        if env.get("ANSIBLE_CALLBACK_PLUGINS"):
+            plugin_dirs.append(env["ANSIBLE_CALLBACK_PLUGINS"])
+        env["ANSIBLE_CALLBACK_PLUGINS"] = ":".join(plugin_dirs)
+
+        enabled = [c for c in env.get("ANSIBLE_CALLBACKS_ENABLED", "").split(",") if c]
+        if "commander_events" not in enabled:
+            enabled.append("commander_events")
+        env["ANSIBLE_CALLBACKS_ENABLED"] = ",".join(enabled)
+
+    async def _prepare_inventory(
+        self,
+        execution_id: int,
+        limits: List[str],
+    ) -> Tuple[str, Optional[str]]:
+        """
+        Ermittelt die Inventory-Quelle für ansible-playbook.
+
+        Returns:
+            Tuple[str, Optional[str]]: (Pfad für -i, Pfad zum JSON-Cache oder None)
+        """
+        if not settings.ansible_dynamic_inventory:
+            return str(self.inventory_path), None
+
+        try:
+            return await asyncio.to_thread(
+                get_dynamic_inventory_service().prepare_execution,
+                execution_id,
+                limits,
+            )
+        except Exception as e:
+            logger.warning(f"Dynamisches Inventory nicht verfügbar, nutze hosts.yml: {e}")
+            return str(self.inventory_path), None
+
+    async def _find_unreachable(self, limits: List[str]) -> List[str]:
+        """Ziel-Hosts, die bei der letzten Prüfung des Monitors nicht erreichbar waren"""
+        if settings.host_monitor_interval <= 0:
+            return []
+        try:
+            hosts = await asyncio.to_thread(get_dynamic_inventory_service().resolve_hosts, limits)
+        except Exception as e:
+            logger.debug(f"Hostliste für Erreichbarkeitsprüfung nicht auflösbar: {e}")
+            return []
+        # None = Limit mit Patterns, nicht auflösbar
+        return host_monitor.unreachable(hosts) if hosts else []
+
+    def _get_limits(
+        self,
+        target_hosts: Optional[List[str]] = None,
+        target_groups: Optional[List[str]] = None,
+    ) -> List[str]:
+        """Kombiniert Hosts und Gruppen zur -l Liste"""
+        limits = []
+        if target_hosts:
+            limits.extend(target_hosts)
+        if target_groups:
+            limits.extend(target_groups)
+        return limits
 
     def _build_command(
         self,
@@ -63,6 +260,8 @@ class AnsibleService:
         target_hosts: Optional[List[str]] = None,
         target_groups: Optional[List[str]] = None,
         extra_vars: Optional[dict] = None,
+        inventory: Optional[str] = None,
+        exclude_hosts: Optional[List[str]] = None,
     ) -> List[str]:
         """Baut das ansible-playbook Kommando"""
         playbook_path = self.playbook_dir / f"{playbook_name}.yml"
@@ -72,18 +271,15 @@ class AnsibleService:
         cmd = [
             "ansible-playbook",
             str(playbook_path),
-            "-i", str(self.inventory_path),
+            "-i", inventory or str(self.inventory_path),
             "--private-key", settings.ssh_key_path,
             "-u", settings.ansible_remote_user,
         ]
 
         # Limit (Hosts und Gruppen kombinieren)
-        limits = []
-        if target_hosts:
-            limits.extend(target_hosts)
-        if target_groups:
-            limits.extend(target_groups)
-
+        limits = self._get_limits(target_hosts, target_groups)
+        if exclude_hosts:
+            limits = (limits or ["all"]) + [f"!{host}" for host in exclude_hosts]
         if limits:
             cmd.extend(["-l", ",".join(limits)])
 
@@ -98,29 +294,20 @@ class AnsibleService:
         host: str,
         port: int = 22,
         timeout: int = 300,
-        interval: int = 10,
+        interval: int = 5,
+        vmid: Optional[int] = None,
+        node: Optional[str] = None,
     ) -> bool:
-        """Wartet bis SSH auf dem Host erreichbar ist"""
-        import socket
-        start_time = asyncio.get_event_loop().time()
+        """
+        Wartet bis SSH auf dem Host erreichbar ist (SSH-Banner empfangen).
 
-        while (asyncio.get_event_loop().time() - start_time) < timeout:
-            try:
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(5)
-                result = sock.connect_ex((host, port))
-                sock.close()
-
-                if result == 0:
-                    # SSH Port ist offen, kurz warten für SSH-Daemon
-                    await asyncio.sleep(5)
-                    return True
-            except Exception:
-                pass
-
-            await asyncio.sleep(interval)
-
-        return False
+        interval ist die Obergrenze des Backoffs; mit vmid/node wird der
+        QEMU Guest Agent als zusaetzliches Signal genutzt.
+        """
+        result = await ssh_probe.wait_for_ssh(
+            host, port=port, timeout=timeout, max_delay=interval, vmid=vmid, node=node,
+        )
+        return result.ready
 
     async def create_and_run_playbook(
         self,
@@ -132,11 +319,13 @@ class AnsibleService:
     ) -> int:
         """Erstellt Execution und führt Playbook aus - Utility für Post-Deploy"""
         async with async_session() as db:
+            profile = await resolve_execution_profile(db, playbook_name)
             execution = Execution(
                 execution_type="ansible",
                 playbook_name=playbook_name,
                 target_hosts=target_host,
                 extra_vars=json.dumps(extra_vars) if extra_vars else None,
+                ansible_profile=dump_profile(profile),
                 status="pending",
                 user_id=user_id,
             )
@@ -152,6 +341,7 @@ class AnsibleService:
                 playbook_name=playbook_name,
                 target_hosts=[target_host],
                 extra_vars=extra_vars,
+                profile=profile,
             )
         )
 
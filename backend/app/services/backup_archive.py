@@ -0,0 +1,637 @@
+"""
+Backup-Archiv - Streaming-Writer fuer Backup-Archive
+
+Schreibt Dateien und Datenstroeme direkt aus der Quelle in das Archiv
+(kein Temp-Verzeichnis), berechnet dabei die SHA-256-Checksummen der
+einzelnen Eintraege und des gesamten Archivs und meldet den Fortschritt.
+
+Formate:
+- zip: Deflate mit einstellbarem Level (BACKUP_COMPRESS_LEVEL)
+- tar.zst: zstd, mehrere Threads (BACKUP_ZSTD_LEVEL, BACKUP_COMPRESS_THREADS),
+  benoetigt das optionale Paket zstandard
+
+Laeuft synchron und ist fuer einen Worker-Thread gedacht
+(siehe BackupService.create_backup).
+"""
+import hashlib
+import io
+import logging
+import os
+import queue
+import re
+import shutil
+import subprocess
+import tarfile
+import threading
+import time
+import zipfile
+import zlib
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Blockgroesse beim Lesen/Schreiben
+CHUNK_SIZE = 1024 * 1024
+
+# Archiv-Formate (Dateiendung)
+ARCHIVE_FORMATS = {"zip": ".zip", "tar.zst": ".tar.zst"}
+
+# tar braucht die Groesse im Header: Datenstroeme werden in Teilen dieser
+# Groesse im Speicher gepuffert (<name>.~part0000, ...)
+STREAM_PART_SIZE = 64 * 1024 * 1024
+_PART_RE = re.compile(r"^(?P<name>.+)\.~part(?P<index>\d{4})$")
+
+
+def _import_zstandard():
+    """Importiert das optionale Paket zstandard"""
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstandard nicht installiert (pip install zstandard)")
+    return zstandard
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterable[bytes]:
+    """Komprimiert einen Datenstrom blockweise im gzip-Format"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def threaded_chunks(chunks: Iterable[bytes], depth: int = 4) -> Iterable[bytes]:
+    """
+    Erzeugt einen Datenstrom in einem eigenen Thread.
+
+    Damit laufen z.B. gzip und das Schreiben des Archivs parallel (zlib gibt
+    den GIL frei). Die Queue begrenzt den Vorlauf auf depth Bloecke.
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=depth)
+    done = object()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for chunk in chunks:
+                if stop.is_set():
+                    return
+                buffer.put(chunk)
+            buffer.put(done)
+        except BaseException as e:
+            buffer.put(e)
+
+    thread = threading.Thread(target=produce, name="backup-stream", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # Abbruch durch den Verbraucher: Erzeuger freigeben
+        stop.set()
+        while thread.is_alive():
+            try:
+                buffer.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
+class ProcessStream:
+    """
+    stdout eines Prozesses als Datenstrom (z.B. pg_dump via docker exec).
+
+    stderr wird in einem Thread gesammelt (kein Deadlock bei vollem Puffer),
+    nach timeout Sekunden wird der Prozess beendet. Endet der Prozess mit
+    Fehler, wirft chunks() am Ende RuntimeError - bereits geschriebene Daten
+    sind dann unvollstaendig.
+    """
+
+    def __init__(self, cmd: List[str], timeout: float):
+        self.cmd = cmd
+        self.process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self._stderr = b""
+        self._stderr_thread = threading.Thread(target=self._read_stderr, daemon=True)
+        self._stderr_thread.start()
+        self._timer = threading.Timer(timeout, self._kill)
+        self._timer.start()
+        self.timed_out = False
+
+    def _read_stderr(self):
+        self._stderr = self.process.stderr.read()
+
+    def _kill(self):
+        self.timed_out = True
+        self.process.kill()
+
+    @property
+    def stderr(self) -> str:
+        return self._stderr.decode(errors="replace").strip()
+
+    def wait(self) -> int:
+        """Wartet auf das Prozessende und gibt den Exit-Code zurueck"""
+        returncode = self.process.wait()
+        self._timer.cancel()
+        self._stderr_thread.join()
+        return returncode
+
+    def first_chunk(self) -> Optional[bytes]:
+        """
+        Liest den ersten Block.
+
+        Returns:
+            Daten, b"" bei leerer Ausgabe oder None wenn der Prozess ohne
+            Ausgabe fehlgeschlagen ist (Abbruch ohne Teil-Daten moeglich)
+        """
+        data = self.process.stdout.read(CHUNK_SIZE)
+        if not data and self.wait() != 0:
+            return None
+        return data
+
+    def chunks(self, first: bytes) -> Iterable[bytes]:
+        """Restlicher Datenstrom (beginnend mit first)"""
+        try:
+            if first:
+                yield first
+                yield from iter(lambda: self.process.stdout.read(CHUNK_SIZE), b"")
+        except GeneratorExit:
+            # Verbraucher hat abgebrochen
+            self.kill()
+            raise
+        returncode = self.wait()
+        if returncode != 0:
+            raise RuntimeError(self.error(returncode))
+
+    def error(self, returncode: int) -> str:
+        if self.timed_out:
+            return f"{self.cmd[-1]}: Timeout"
+        return f"Prozess fehlgeschlagen ({returncode}): {self.stderr}"
+
+    def kill(self):
+        if self.process.poll() is None:
+            self.process.kill()
+        self.wait()
+
+
+class RateLimiter:
+    """
+    Token-Bucket fuer I/O in Bytes pro Sekunde.
+
+    Wird aus dem Worker-Thread aufgerufen und blockiert dort per sleep,
+    der Event-Loop ist nicht betroffen.
+    """
+
+    def __init__(self, bytes_per_second: int):
+        self.rate = bytes_per_second
+        self._allowance = float(bytes_per_second)
+        self._last = time.monotonic()
+
+    def consume(self, amount: int):
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        self._allowance = min(float(self.rate), self._allowance + (now - self._last) * self.rate)
+        self._last = now
+        self._allowance -= amount
+        if self._allowance < 0:
+            time.sleep(-self._allowance / self.rate)
+
+
+class BackupProgressTracker:
+    """
+    Fortschritt eines laufenden Backups.
+
+    Wird vom Worker-Thread geschrieben und von der API gelesen.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self, backup_id: Optional[str] = None, bytes_total: int = 0, files_total: int = 0):
+        with self._lock:
+            self.running = backup_id is not None
+            self.backup_id = backup_id
+            self.phase = "running" if backup_id else "idle"
+            self.component: Optional[str] = None
+            self.bytes_done = 0
+            self.bytes_total = bytes_total
+            self.files_done = 0
+            self.files_total = files_total
+            self.started_at = time.time() if backup_id else None
+
+    def set_component(self, component: str):
+        with self._lock:
+            self.component = component
+
+    def set_phase(self, phase: str):
+        with self._lock:
+            self.phase = phase
+
+    def add_bytes(self, amount: int):
+        with self._lock:
+            self.bytes_done += amount
+
+    def add_total(self, amount: int):
+        """Fuer Stroeme deren Groesse erst beim Schreiben bekannt wird"""
+        with self._lock:
+            self.bytes_total += amount
+
+    def file_done(self):
+        with self._lock:
+            self.files_done += 1
+
+    def finish(self, phase: str):
+        with self._lock:
+            self.running = False
+            self.phase = phase
+            self.component = None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            elapsed = time.time() - self.started_at if self.started_at else 0.0
+            return {
+                "running": self.running,
+                "backup_id": self.backup_id,
+                "phase": self.phase,
+                "component": self.component,
+                "bytes_done": self.bytes_done,
+                "bytes_total": self.bytes_total,
+                "files_done": self.files_done,
+                "files_total": self.files_total,
+                "percent": round(self.bytes_done * 100 / self.bytes_total, 1) if self.bytes_total else 0.0,
+                "elapsed_seconds": round(elapsed, 1),
+            }
+
+
+class _HashingStream:
+    """
+    Nicht-seekbarer Ausgabestrom, der alle geschriebenen Bytes hasht.
+
+    Ohne seek/tell schreibt zipfile rein sequentiell (Data Descriptors statt
+    nachtraeglicher Header-Korrektur), die Archiv-Checksumme entsteht also
+    vollstaendig beim Schreiben.
+    """
+
+    def __init__(self, raw: BinaryIO):
+        self._raw = raw
+        self.sha256 = hashlib.sha256()
+
+    def write(self, data) -> int:
+        self.sha256.update(data)
+        return self._raw.write(data)
+
+    def flush(self):
+        self._raw.flush()
+
+
+class ArchiveWriter:
+    """
+    Streaming-Writer fuer ZIP-Backups.
+
+    Eintraege werden blockweise aus der Quelle komprimiert geschrieben und
+    dabei gehasht. Das Archiv entsteht unter <name>.partial und wird erst
+    nach close() umbenannt.
+    """
+
+    # Grosse Datenstroeme (DB-Dump) vorab parallel gzippen und unkomprimiert
+    # ablegen - der Deflate-Strom des Archivs ist single-threaded
+    precompress_streams = True
+
+    def __init__(
+        self,
+        path: Path,
+        progress: Optional[BackupProgressTracker] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        compress_level: int = 6,
+    ):
+        self.path = path
+        self.partial_path = path.with_name(path.name + ".partial")
+        self.progress = progress or BackupProgressTracker()
+        self.rate_limiter = rate_limiter or RateLimiter(0)
+        self.compress_level = compress_level
+        self.checksums: dict = {}
+        # Unkomprimierte Groesse aller Eintraege
+        self.logical_size = 0
+        self._raw = open(self.partial_path, "wb")
+        self._stream = _HashingStream(self._raw)
+        self._zip = zipfile.ZipFile(self._stream, "w", zipfile.ZIP_DEFLATED)
+
+    def _zip_info(self, info: zipfile.ZipInfo, compress: bool) -> zipfile.ZipInfo:
+        if not compress:
+            info.compress_type = zipfile.ZIP_STORED
+            return info
+        info.compress_type = zipfile.ZIP_DEFLATED
+        # ZipFile.open() uebernimmt das Level nur aus dem ZipInfo
+        # (ab Python 3.13 compress_level, davor _compresslevel)
+        if hasattr(zipfile.ZipInfo, "compress_level"):
+            info.compress_level = self.compress_level
+        else:
+            info._compresslevel = self.compress_level
+        return info
+
+    def _copy(self, reader: Iterable[bytes], target: BinaryIO, count_total: bool = False) -> str:
+        sha256 = hashlib.sha256()
+        for chunk in reader:
+            self.rate_limiter.consume(len(chunk))
+            sha256.update(chunk)
+            target.write(chunk)
+            self.logical_size += len(chunk)
+            if count_total:
+                self.progress.add_total(len(chunk))
+            self.progress.add_bytes(len(chunk))
+        return f"sha256:{sha256.hexdigest()}"
+
+    def add_file(self, src: Path, arcname: str) -> str:
+        """Schreibt eine Datei direkt aus der Quelle ins Archiv"""
+        info = self._zip_info(zipfile.ZipInfo.from_file(src, arcname), compress=True)
+        size = src.stat().st_size
+        # Reserve fuer Dateien die waehrend des Backups wachsen
+        force_zip64 = size > zipfile.ZIP64_LIMIT // 2
+        with open(src, "rb") as f, self._zip.open(info, "w", force_zip64=force_zip64) as target:
+            checksum = self._copy(iter(lambda: f.read(CHUNK_SIZE), b""), target)
+        self.checksums[arcname] = checksum
+        self.progress.file_done()
+        return checksum
+
+    def add_stream(self, chunks: Iterable[bytes], arcname: str, compress: bool = True) -> str:
+        """
+        Schreibt einen Datenstrom unbekannter Laenge ins Archiv.
+
+        Args:
+            compress: False fuer bereits komprimierte Daten (ZIP_STORED)
+        """
+        info = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+        info = self._zip_info(info, compress)
+        info.external_attr = 0o644 << 16
+        with self._zip.open(info, "w", force_zip64=True) as target:
+            checksum = self._copy(chunks, target, count_total=True)
+        self.checksums[arcname] = checksum
+        self.progress.file_done()
+        return checksum
+
+    def add_bytes(self, data: bytes, arcname: str):
+        """Schreibt kleine Daten (z.B. Manifest) ohne Checksumme"""
+        self._zip.writestr(arcname, data)
+
+    def close(self) -> str:
+        """
+        Schliesst das Archiv und benennt es um.
+
+        Returns:
+            SHA-256 des Archivs ("sha256:...")
+        """
+        self._zip.close()
+        self._raw.close()
+        self.partial_path.replace(self.path)
+        return f"sha256:{self._stream.sha256.hexdigest()}"
+
+    def abort(self):
+        """Verwirft das unfertige Archiv"""
+        try:
+            self._zip.close()
+        except Exception:
+            pass
+        self._raw.close()
+        self.partial_path.unlink(missing_ok=True)
+
+
+class _SourceReader:
+    """Liest eine Quelldatei fuer tarfile, hasht und meldet den Fortschritt"""
+
+    def __init__(self, f: BinaryIO, writer: "TarZstWriter", size: int, name: str):
+        self._f = f
+        self._writer = writer
+        self._remaining = size
+        self._name = name
+        self.sha256 = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._f.read(size)
+        if size > 0 and len(data) < min(size, self._remaining):
+            # Datei ist waehrend des Backups geschrumpft - tar braucht die
+            # angekuendigte Groesse, Rest mit Nullen auffuellen
+            logger.warning(f"Datei waehrend des Backups geschrumpft: {self._name}")
+            data += b"\0" * (min(size, self._remaining) - len(data))
+        self._remaining -= len(data)
+        self._writer.rate_limiter.consume(len(data))
+        self.sha256.update(data)
+        self._writer.logical_size += len(data)
+        self._writer.progress.add_bytes(len(data))
+        return data
+
+
+class TarZstWriter:
+    """
+    Streaming-Writer fuer tar.zst-Backups.
+
+    Gleiche Schnittstelle wie ArchiveWriter. zstd komprimiert den Strom in
+    mehreren Threads (Jobs auf alle Kerne verteilt). Datenstroeme
+    unbekannter Laenge werden in Teilen von STREAM_PART_SIZE im Speicher
+    gepuffert, da tar die Groesse im Header braucht. Passt der Strom in einen
+    Teil, entsteht ein normaler Eintrag, sonst <name>.~part0000, ...
+    (extract_archive setzt die Teile wieder zusammen).
+    """
+
+    # zstd komprimiert selbst parallel
+    precompress_streams = False
+
+    def __init__(
+        self,
+        path: Path,
+        progress: Optional[BackupProgressTracker] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        level: int = 3,
+        threads: int = 0,
+    ):
+        zstandard = _import_zstandard()
+        self.path = path
+        self.partial_path = path.with_name(path.name + ".partial")
+        self.progress = progress or BackupProgressTracker()
+        self.rate_limiter = rate_limiter or RateLimiter(0)
+        self.checksums: dict = {}
+        self.logical_size = 0
+        self._raw = open(self.partial_path, "wb")
+        self._stream = _HashingStream(self._raw)
+        # threads=-1: alle Kerne
+        compressor = zstandard.ZstdCompressor(level=level, threads=threads or -1)
+        self._zst = compressor.stream_writer(self._stream, closefd=False)
+        self._tar = tarfile.open(fileobj=self._zst, mode="w|", format=tarfile.PAX_FORMAT)
+        self._tar.copybufsize = CHUNK_SIZE
+
+    def _add(self, info: tarfile.TarInfo, f: BinaryIO, arcname: str) -> str:
+        reader = _SourceReader(f, self, info.size, arcname)
+        self._tar.addfile(info, reader)
+        checksum = f"sha256:{reader.sha256.hexdigest()}"
+        self.checksums[arcname] = checksum
+        self.progress.file_done()
+        return checksum
+
+    def add_file(self, src: Path, arcname: str) -> str:
+        """Schreibt eine Datei direkt aus der Quelle ins Archiv"""
+        info = self._tar.gettarinfo(str(src), arcname)
+        with open(src, "rb") as f:
+            return self._add(info, f, arcname)
+
+    def _add_part(self, data: bytes, name: str, sha256):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        info.mode = 0o644
+        reader = _SourceReader(io.BytesIO(data), self, info.size, name)
+        self._tar.addfile(info, reader)
+        sha256.update(data)
+
+    def add_stream(self, chunks: Iterable[bytes], arcname: str, compress: bool = True) -> str:
+        """Schreibt einen Datenstrom unbekannter Laenge ins Archiv"""
+        sha256 = hashlib.sha256()
+        buffer = bytearray()
+        part = 0
+        for chunk in chunks:
+            self.progress.add_total(len(chunk))
+            buffer += chunk
+            if len(buffer) >= STREAM_PART_SIZE:
+                self._add_part(bytes(buffer[:STREAM_PART_SIZE]), f"{arcname}.~part{part:04d}", sha256)
+                del buffer[:STREAM_PART_SIZE]
+                part += 1
+        if part == 0:
+            self._add_part(bytes(buffer), arcname, sha256)
+        elif buffer:
+            self._add_part(bytes(buffer), f"{arcname}.~part{part:04d}", sha256)
+
+        checksum = f"sha256:{sha256.hexdigest()}"
+        self.checksums[arcname] = checksum
+        self.progress.file_done()
+        return checksum
+
+    def add_bytes(self, data: bytes, arcname: str):
+        """Schreibt kleine Daten (z.B. Manifest) ohne Checksumme"""
+        info = tarfile.TarInfo(arcname)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        info.mode = 0o644
+        self._tar.addfile(info, io.BytesIO(data))
+
+    def close(self) -> str:
+        """
+        Schliesst das Archiv und benennt es um.
+
+        Returns:
+            SHA-256 des Archivs ("sha256:...")
+        """
+        self._tar.close()
+        self._zst.close()
+        self._raw.close()
+        self.partial_path.replace(self.path)
+        return f"sha256:{self._stream.sha256.hexdigest()}"
+
+    def abort(self):
+        """Verwirft das unfertige Archiv"""
+        try:
+            self._tar.close()
+            self._zst.close()
+        except Exception:
+            pass
+        self._raw.close()
+        self.partial_path.unlink(missing_ok=True)
+
+
+def archive_format(path: Path) -> str:
+    """Archiv-Format anhand der Dateiendung"""
+    return "tar.zst" if path.name.endswith(".tar.zst") else "zip"
+
+
+def _target_path(target_dir: Path, name: str) -> Path:
+    """Zielpfad eines Eintrags, Pfade ausserhalb von target_dir sind verboten"""
+    dst = (target_dir / name).resolve()
+    if not dst.is_relative_to(target_dir.resolve()):
+        raise ValueError(f"Ungueltiger Pfad im Archiv: {name}")
+    return dst
+
+
+def _copy_hashing(src: BinaryIO, out: BinaryIO, sha256):
+    for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+        sha256.update(chunk)
+        out.write(chunk)
+
+
+def extract_archive(path: Path, target_dir: Path) -> Dict[str, str]:
+    """
+    Entpackt ein Backup-Archiv (zip oder tar.zst).
+
+    Die SHA-256-Checksummen werden beim Entpacken berechnet (kein zweiter
+    Lesedurchgang); Datenstroeme aus mehreren Teilen zaehlen als eine Datei.
+
+    Returns:
+        Checksummen der entpackten Dateien ("sha256:...") je Archivpfad
+    """
+    hashes = {}
+    target_dir.mkdir(parents=True, exist_ok=True)
+
+    if archive_format(path) == "zip":
+        with zipfile.ZipFile(path, "r") as zf:
+            for info in zf.infolist():
+                dst = _target_path(target_dir, info.filename)
+                if info.is_dir():
+                    dst.mkdir(parents=True, exist_ok=True)
+                    continue
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                sha256 = hashes[info.filename] = hashlib.sha256()
+                with zf.open(info) as src, open(dst, "wb") as out:
+                    _copy_hashing(src, out, sha256)
+        return {name: f"sha256:{sha256.hexdigest()}" for name, sha256 in hashes.items()}
+
+    zstandard = _import_zstandard()
+    with open(path, "rb") as f, zstandard.ZstdDecompressor().stream_reader(f) as reader:
+        with tarfile.open(fileobj=reader, mode="r|") as tar:
+            for member in tar:
+                if not member.isfile():
+                    tar.extract(member, target_dir, filter="data")
+                    continue
+                # Pfad- und Rechtepruefung wie tar.extract(filter="data")
+                checked = tarfile.data_filter(member, str(target_dir))
+                match = _PART_RE.match(member.name)
+                name = match.group("name") if match else member.name
+                dst = _target_path(target_dir, name)
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                # Teile eines Datenstroms an die Zieldatei anhaengen
+                append = bool(match and int(match.group("index")))
+                if not append:
+                    hashes[name] = hashlib.sha256()
+                with tar.extractfile(member) as src, open(dst, "ab" if append else "wb") as out:
+                    _copy_hashing(src, out, hashes[name])
+                if not match:
+                    os.chmod(dst, checked.mode)
+                    os.utime(dst, (member.mtime, member.mtime))
+    return {name: f"sha256:{sha256.hexdigest()}" for name, sha256 in hashes.items()}
+
+
+def extract_member(path: Path, name: str, dst: Path):
+    """Entpackt einen einzelnen Eintrag eines Backup-Archivs nach dst"""
+    if archive_format(path) == "zip":
+        with zipfile.ZipFile(path, "r") as zf, zf.open(name) as src, open(dst, "wb") as out:
+            shutil.copyfileobj(src, out, CHUNK_SIZE)
+        return
+
+    zstandard = _import_zstandard()
+    with open(path, "rb") as f, zstandard.ZstdDecompressor().stream_reader(f) as reader:
+        with tarfile.open(fileobj=reader, mode="r|") as tar:
+            found = False
+            for member in tar:
+                match = _PART_RE.match(member.name)
+                if member.name == name or (match and match.group("name") == name):
+                    mode = "ab" if match and int(match.group("index")) else "wb"
+                    with tar.extractfile(member) as src, open(dst, mode) as out:
+                        shutil.copyfileobj(src, out, CHUNK_SIZE)
+                    found = True
+                elif found:
+                    return
+            if found:
+                return
+    raise KeyError(f"{name} nicht im Archiv {path.name}")
@@ -0,0 +1,459 @@
+"""
+Backup-Repository - inhaltsadressierter, deduplizierter Backup-Speicher
+
+Dateien werden in Bloecke fester Groesse zerlegt und unter ihrem SHA-256
+abgelegt (chunks/ab/abcdef...). Jeder Snapshot ist ein Index der Dateien
+mit ihren Block-Listen (snapshots/<id>.json). Unveraenderte Bloecke werden
+nur einmal gespeichert, unveraenderte Dateien (gleiche Groesse, mtime,
+ctime und Inode wie im letzten Snapshot) werden gar nicht erst gelesen.
+
+Referenzzaehler pro Block (refcounts.json) bestimmen beim Loeschen eines
+Snapshots, welche Bloecke frei werden. Sie werden vor dem Index geschrieben,
+ein Absturz dazwischen fuehrt hoechstens zu verwaisten Bloecken. gc() zaehlt
+die Referenzen aus den Snapshot-Indizes neu und entfernt solche Bloecke.
+
+Die Bloecke sind vielfache der SQLite-Seitengroesse, unveraenderte Seiten
+der App-DB werden damit ebenfalls dedupliziert.
+
+Laeuft synchron und ist fuer einen Worker-Thread gedacht. Schreiben und
+Loeschen/GC duerfen nicht gleichzeitig laufen (siehe BackupService._lock).
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from app.services.backup_archive import BackupProgressTracker, RateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Blockgroesse im Repository (Vielfaches aller SQLite-Seitengroessen)
+REPO_CHUNK_SIZE = 256 * 1024
+
+# Kennung im ersten Byte eines Blocks
+_COMPRESSED = b"z"
+_RAW = b"r"
+
+
+def _write_atomic(path: Path, data: bytes, sync: bool = True):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        if sync:
+            f.flush()
+            os.fsync(f.fileno())
+    tmp.replace(path)
+
+
+def _rechunk(chunks: Iterable[bytes], size: int) -> Iterable[bytes]:
+    """Teilt einen Datenstrom in Bloecke fester Groesse"""
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        while len(buffer) >= size:
+            yield bytes(buffer[:size])
+            del buffer[:size]
+    if buffer:
+        yield bytes(buffer)
+
+
+class SnapshotWriter:
+    """
+    Schreibt einen Snapshot ins Repository.
+
+    Gleiche Schnittstelle wie ArchiveWriter (add_file, add_stream,
+    add_bytes, checksums, close, abort), BackupService._write_backup kann
+    beide verwenden.
+    """
+
+    # Bloecke werden einzeln komprimiert, vorab gzippte Stroeme
+    # wuerden die Deduplizierung verhindern
+    precompress_streams = False
+
+    def __init__(
+        self,
+        repository: "BackupRepository",
+        snapshot_id: str,
+        progress: Optional[BackupProgressTracker] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+    ):
+        self.repository = repository
+        self.snapshot_id = snapshot_id
+        self.progress = progress or BackupProgressTracker()
+        self.rate_limiter = rate_limiter or RateLimiter(0)
+        self.checksums: dict = {}
+        self.files: Dict[str, dict] = {}
+        # Unkomprimierte Groesse aller Dateien
+        self.logical_size = 0
+        # Neu gespeicherte Bytes (nach Kompression)
+        self.physical_size = 0
+        self._previous = repository.latest_files()
+
+    def _store_chunks(self, chunks: Iterable[bytes], count_total: bool = False) -> tuple:
+        sha256 = hashlib.sha256()
+        digests = []
+        size = 0
+        for chunk in chunks:
+            sha256.update(chunk)
+            digest, stored = self.repository.put_chunk(chunk)
+            self.rate_limiter.consume(len(chunk))
+            self.physical_size += stored
+            digests.append(digest)
+            size += len(chunk)
+            if count_total:
+                self.progress.add_total(len(chunk))
+            self.progress.add_bytes(len(chunk))
+        return digests, size, f"sha256:{sha256.hexdigest()}"
+
+    def _add(self, arcname: str, entry: dict):
+        self.files[arcname] = entry
+        self.checksums[arcname] = entry["sha256"]
+        self.logical_size += entry["size"]
+        self.progress.file_done()
+
+    def add_file(self, src: Path, arcname: str) -> str:
+        """Speichert eine Datei (unveraenderte Dateien ohne Lesen)"""
+        st = src.stat()
+        stat_key = [st.st_size, st.st_mtime_ns, st.st_ctime_ns, st.st_ino]
+
+        previous = self._previous.get(arcname)
+        if (
+            previous
+            and previous.get("stat") == stat_key
+            and all(self.repository.has_chunk(d) for d in previous["chunks"])
+        ):
+            self.progress.add_bytes(st.st_size)
+            self._add(arcname, previous)
+            return previous["sha256"]
+
+        with open(src, "rb") as f:
+            digests, size, checksum = self._store_chunks(
+                iter(lambda: f.read(REPO_CHUNK_SIZE), b"")
+            )
+        # Waehrend des Backups gewachsen/geschrumpft
+        self.progress.add_total(size - st.st_size)
+        self._add(arcname, {
+            "size": size,
+            "mode": st.st_mode & 0o777,
+            "mtime": st.st_mtime,
+            "stat": stat_key,
+            "sha256": checksum,
+            "chunks": digests,
+        })
+        return checksum
+
+    def add_stream(self, chunks: Iterable[bytes], arcname: str, compress: bool = True) -> str:
+        """Speichert einen Datenstrom unbekannter Laenge"""
+        digests, size, checksum = self._store_chunks(
+            _rechunk(chunks, REPO_CHUNK_SIZE), count_total=True
+        )
+        self._add(arcname, {
+            "size": size,
+            "mode": 0o644,
+            "mtime": time.time(),
+            "sha256": checksum,
+            "chunks": digests,
+        })
+        return checksum
+
+    def add_bytes(self, data: bytes, arcname: str):
+        """Speichert kleine Daten (z.B. Manifest)"""
+        digests, size, checksum = self._store_chunks(_rechunk([data], REPO_CHUNK_SIZE))
+        self.files[arcname] = {
+            "size": size,
+            "mode": 0o644,
+            "mtime": time.time(),
+            "sha256": checksum,
+            "chunks": digests,
+        }
+
+    def close(self) -> str:
+        """
+        Schreibt den Snapshot-Index und zaehlt die Referenzen hoch.
+
+        Returns:
+            SHA-256 des Snapshot-Index ("sha256:...")
+        """
+        index = {
+            "id": self.snapshot_id,
+            "created_at": time.time(),
+            "logical_size": self.logical_size,
+            "physical_size": self.physical_size,
+            "files": self.files,
+        }
+        data = json.dumps(index).encode()
+        self.repository.commit_snapshot(self.snapshot_id, data, self.files)
+        return f"sha256:{hashlib.sha256(data).hexdigest()}"
+
+    def abort(self):
+        """Verwirft den Snapshot (neue Bloecke entfernt gc())"""
+        logger.debug(f"Snapshot verworfen: {self.snapshot_id}")
+
+
+class BackupRepository:
+    """Inhaltsadressierter Speicher fuer deduplizierte Backups"""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.chunks_dir = root / "chunks"
+        self.snapshots_dir = root / "snapshots"
+        self._refcounts_path = root / "refcounts.json"
+        # digest -> [Referenzen, gespeicherte Bytes]
+        self._refcounts: Optional[Dict[str, list]] = None
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------------------------------
+    # Bloecke
+    # -------------------------------------------------------------------------
+
+    def _chunk_path(self, digest: str) -> Path:
+        return self.chunks_dir / digest[:2] / digest
+
+    def has_chunk(self, digest: str) -> bool:
+        return self._chunk_path(digest).exists()
+
+    def put_chunk(self, data: bytes) -> tuple:
+        """
+        Speichert einen Block falls noch nicht vorhanden.
+
+        Returns:
+            (digest, neu gespeicherte Bytes - 0 wenn bereits vorhanden)
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._chunk_path(digest)
+        if path.exists():
+            return digest, 0
+
+        compressed = zlib.compress(data, 6)
+        payload = _COMPRESSED + compressed if len(compressed) < len(data) else _RAW + data
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Index und Referenzzaehler werden synchronisiert geschrieben, Bloecke nicht
+        _write_atomic(path, payload, sync=False)
+        return digest, len(payload)
+
+    def get_chunk(self, digest: str) -> bytes:
+        """Liest einen Block und prueft seinen Hash"""
+        payload = self._chunk_path(digest).read_bytes()
+        data = zlib.decompress(payload[1:]) if payload[:1] == _COMPRESSED else payload[1:]
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"Beschaedigter Block im Backup-Repository: {digest}")
+        return data
+
+    # -------------------------------------------------------------------------
+    # Referenzzaehler
+    # -------------------------------------------------------------------------
+
+    def _load_refcounts(self) -> Dict[str, list]:
+        if self._refcounts is None:
+            try:
+                self._refcounts = json.loads(self._refcounts_path.read_text())
+            except FileNotFoundError:
+                self._refcounts = {}
+            except (OSError, ValueError) as e:
+                logger.warning(f"refcounts.json nicht lesbar, baue neu auf: {e}")
+                self._refcounts = self._rebuild_refcounts()
+        return self._refcounts
+
+    def _rebuild_refcounts(self) -> Dict[str, list]:
+        """Zaehlt die Referenzen aus allen Snapshot-Indizes neu"""
+        refcounts: Dict[str, list] = {}
+        for snapshot_id in self.list_snapshots():
+            for digest in self._snapshot_digests(self.load_snapshot(snapshot_id)["files"]):
+                path = self._chunk_path(digest)
+                if digest in refcounts:
+                    refcounts[digest][0] += 1
+                elif path.exists():
+                    refcounts[digest] = [1, path.stat().st_size]
+        return refcounts
+
+    def _save_refcounts(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        _write_atomic(self._refcounts_path, json.dumps(self._refcounts).encode())
+
+    @staticmethod
+    def _snapshot_digests(files: Dict[str, dict]) -> set:
+        return {digest for entry in files.values() for digest in entry["chunks"]}
+
+    # -------------------------------------------------------------------------
+    # Snapshots
+    # -------------------------------------------------------------------------
+
+    def open_snapshot(
+        self,
+        snapshot_id: str,
+        progress: Optional[BackupProgressTracker] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+    ) -> SnapshotWriter:
+        self.chunks_dir.mkdir(parents=True, exist_ok=True)
+        self.snapshots_dir.mkdir(parents=True, exist_ok=True)
+        return SnapshotWriter(self, snapshot_id, progress, rate_limiter)
+
+    def snapshot_path(self, snapshot_id: str) -> Path:
+        return self.snapshots_dir / f"{snapshot_id}.json"
+
+    def list_snapshots(self) -> List[str]:
+        if not self.snapshots_dir.exists():
+            return []
+        return [p.stem for p in self.snapshots_dir.glob("*.json")]
+
+    def load_snapshot(self, snapshot_id: str) -> dict:
+        return json.loads(self.snapshot_path(snapshot_id).read_text())
+
+    def latest_files(self) -> Dict[str, dict]:
+        """Datei-Eintraege des neuesten Snapshots (fuer den Stat-Vergleich)"""
+        paths = list(self.snapshots_dir.glob("*.json")) if self.snapshots_dir.exists() else []
+        if not paths:
+            return {}
+        latest = max(paths, key=lambda p: p.stat().st_mtime_ns)
+        try:
+            return json.loads(latest.read_text())["files"]
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    def commit_snapshot(self, snapshot_id: str, index: bytes, files: Dict[str, dict]):
+        """Erhoeht die Referenzzaehler und schreibt danach den Snapshot-Index"""
+        with self._lock:
+            refcounts = self._load_refcounts()
+            for entry in files.values():
+                for digest in entry["chunks"]:
+                    if digest not in refcounts:
+                        refcounts[digest] = [0, self._chunk_path(digest).stat().st_size]
+            for digest in self._snapshot_digests(files):
+                refcounts[digest][0] += 1
+            # Zaehler zuerst: ohne Index zaehlen sie hoechstens zu hoch,
+            # umgekehrt wuerde gc() Bloecke eines gueltigen Snapshots loeschen
+            self._save_refcounts()
+            _write_atomic(self.snapshot_path(snapshot_id), index)
+
+    def delete_snapshot(self, snapshot_id: str) -> int:
+        """
+        Loescht einen Snapshot und alle Bloecke ohne weitere Referenz.
+
+        Returns:
+            Freigegebene Bytes
+        """
+        path = self.snapshot_path(snapshot_id)
+        if not path.exists():
+            return 0
+
+        with self._lock:
+            refcounts = self._load_refcounts()
+            files = json.loads(path.read_text())["files"]
+            path.unlink()
+
+            freed = 0
+            for digest in self._snapshot_digests(files):
+                counts = refcounts.get(digest)
+                if counts is None:
+                    continue
+                counts[0] -= 1
+                if counts[0] <= 0:
+                    freed += counts[1]
+                    del refcounts[digest]
+                    self._chunk_path(digest).unlink(missing_ok=True)
+            self._save_refcounts()
+
+        logger.debug(f"Snapshot geloescht: {snapshot_id} ({freed} Bytes freigegeben)")
+        return freed
+
+    def gc(self) -> int:
+        """
+        Entfernt Bloecke ohne Referenz (z.B. von abgebrochenen Snapshots).
+
+        Massgeblich sind die Snapshot-Indizes, nicht refcounts.json: die
+        Zaehler werden daraus neu aufgebaut (korrigiert auch Zaehler, die
+        nach einem Absturz zu hoch stehen).
+
+        Returns:
+            Anzahl entfernter Bloecke
+        """
+        if not self.chunks_dir.exists():
+            return 0
+        removed = 0
+        with self._lock:
+            try:
+                refcounts = self._rebuild_refcounts()
+            except (OSError, ValueError, KeyError) as e:
+                # Ohne vollstaendige Indizes ist nicht sicher, was noch gebraucht wird
+                logger.warning(f"Backup-Repository: GC uebersprungen, Snapshot-Index nicht lesbar: {e}")
+                return 0
+            self._refcounts = refcounts
+            self._save_refcounts()
+            for path in self.chunks_dir.glob("*/*"):
+                if path.name not in refcounts:
+                    path.unlink(missing_ok=True)
+                    removed += 1
+        if removed:
+            logger.info(f"Backup-Repository: {removed} unreferenzierte Bloecke entfernt")
+        return removed
+
+    def stats(self) -> dict:
+        """Kennzahlen des Repositorys"""
+        with self._lock:
+            refcounts = self._load_refcounts()
+            physical = sum(counts[1] for counts in refcounts.values())
+            chunks = len(refcounts)
+        logical = 0
+        snapshots = self.list_snapshots()
+        for snapshot_id in snapshots:
+            try:
+                logical += self.load_snapshot(snapshot_id)["logical_size"]
+            except (OSError, ValueError, KeyError):
+                continue
+        return {
+            "snapshots": len(snapshots),
+            "chunks": chunks,
+            "logical_bytes": logical,
+            "physical_bytes": physical,
+            "dedup_ratio": round(logical / physical, 2) if physical else 0.0,
+        }
+
+    # -------------------------------------------------------------------------
+    # Wiederherstellen
+    # -------------------------------------------------------------------------
+
+    def materialize(self, snapshot_id: str, target_dir: Path) -> Dict[str, str]:
+        """
+        Schreibt alle Dateien eines Snapshots nach target_dir.
+
+        Die Bloecke werden beim Lesen gegen ihren Hash geprueft, die
+        SHA-256 der Dateien beim Schreiben berechnet.
+
+        Returns:
+            Checksummen der wiederhergestellten Dateien ("sha256:...") je Archivpfad
+        """
+        files = self.load_snapshot(snapshot_id)["files"]
+        target_root = target_dir.resolve()
+        checksums = {}
+        for arcname, entry in files.items():
+            dst = (target_dir / arcname).resolve()
+            if not dst.is_relative_to(target_root):
+                raise ValueError(f"Ungueltiger Pfad im Snapshot: {arcname}")
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            sha256 = hashlib.sha256()
+            with open(dst, "wb") as f:
+                for digest in entry["chunks"]:
+                    data = self.get_chunk(digest)
+                    sha256.update(data)
+                    f.write(data)
+            os.chmod(dst, entry.get("mode", 0o644))
+            os.utime(dst, (entry["mtime"], entry["mtime"]))
+            checksums[arcname] = f"sha256:{sha256.hexdigest()}"
+        return checksums
+
+    def export_zip(self, snapshot_id: str, writer) -> str:
+        """Schreibt einen Snapshot als ZIP-Archiv (ArchiveWriter)"""
+        files = self.load_snapshot(snapshot_id)["files"]
+        for arcname, entry in files.items():
+            if arcname == "manifest.json":
+                continue
+            writer.add_stream((self.get_chunk(d) for d in entry["chunks"]), arcname)
+        if "manifest.json" in files:
+            manifest = b"".join(self.get_chunk(d) for d in files["manifest.json"]["chunks"])
+            writer.add_bytes(manifest, "manifest.json")
+        return writer.close()
@@ -92,7 +92,10 @@ class BackupScheduler:
             hour = int(hour)
             minute = int(minute)
 
-            if frequency == "daily":
+            if frequency == "hourly":
+                # Jede Stunde zur angegebenen Minute
+                return CronTrigger(minute=minute)
+            elif frequency == "daily":
                 return CronTrigger(hour=hour, minute=minute)
             elif frequency == "weekly":
                 # Sonntag um die angegebene Zeit
@@ -186,6 +189,10 @@ class BackupScheduler:
                 if result.success:
                     logger.info(f"Geplantes Backup erfolgreich: {result.filename}")
 
+                    # Erst hochladen (auch fehlgeschlagene Uploads erneut),
+                    # damit die lokale Retention hochgeladene Backups findet
+                    await backup_service.sync_remote()
+
                     # Alte Backups aufraeumen
                     await backup_service.cleanup_old_backups(schedule.retention_days)
                 else:
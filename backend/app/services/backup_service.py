@@ -3,9 +3,18 @@ BackupService - Backup und Restore Funktionalitaet
 
 Features:
 - Selektives Backup (App-DB, NetBox-DB, Config, SSH, Playbooks, etc.)
-- ZIP-Format mit Manifest
-- PostgreSQL Backup via docker exec pg_dump
-- Restore mit Validierung
+- Optional dedupliziert im Backup-Repository (nur geaenderte Bloecke)
+- App-DB als konsistenter Online-Snapshot, optional inkrementell (nur
+  geaenderte Seiten gegenueber dem letzten Voll-Snapshot)
+- ZIP (Deflate) oder tar.zst (zstd, mehrere Threads) mit Manifest, direkt
+  aus den Quellen gestreamt (Worker-Thread)
+- Checksummen beim Schreiben, Fortschritt und I/O-Limit (BACKUP_IO_RATE_MB)
+- PostgreSQL Backup via docker exec pg_dump, direkt ins Archiv gestreamt
+  (optional Directory-Format mit --jobs fuer paralleles Dump/Restore)
+- Restore: Checksummen beim Entpacken geprueft, Komponenten parallel,
+  neben dem Ziel vorbereitet und per rename getauscht; Probelauf (dry_run)
+- Optionales externes Backup-Ziel (BACKUP_TARGET, z.B. S3): Upload im
+  Hintergrund, eigene Aufbewahrung, Katalog als zwischengespeicherter Index
 """
 import asyncio
 import gzip
@@ -14,12 +23,14 @@ import json
 import logging
 import os
 import shutil
+import sqlite3
 import subprocess
+import threading
+import time
 import uuid
-import zipfile
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from pydantic import BaseModel
 from sqlalchemy import select, delete
@@ -28,9 +39,79 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.config import settings
 from app.database import async_session
 from app.models.backup import BackupHistory, BackupSchedule
+from app.services.backup_archive import (
+    ARCHIVE_FORMATS,
+    CHUNK_SIZE,
+    ArchiveWriter,
+    BackupProgressTracker,
+    ProcessStream,
+    RateLimiter,
+    TarZstWriter,
+    extract_archive,
+    extract_member,
+    gzip_chunks,
+    threaded_chunks,
+)
+from app.services import sqlite_snapshot
+from app.services.backup_repository import BackupRepository
+from app.services.backup_target import BackupTargetError, create_target
 
 logger = logging.getLogger(__name__)
 
+# Gesicherte Dateien aus data/ssh und data/terraform
+SSH_KEY_FILES = ["id_ed25519", "id_ed25519.pub", "known_hosts"]
+# Private Keys: OpenSSH verweigert Keys, die fuer andere lesbar sind
+SSH_PRIVATE_KEY_FILES = {"id_ed25519"}
+TERRAFORM_STATE_FILES = ["terraform.tfstate", "terraform.tfstate.backup"]
+
+# NetBox PostgreSQL (docker exec)
+PG_CONTAINER = "proxmox-commander-postgres"
+PG_DUMP_TIMEOUT = 300
+PG_RESTORE_TIMEOUT = 600
+# Arbeitsverzeichnis im Container fuer das Directory-Format (--jobs)
+PG_DUMP_DIR = "/tmp/proxmox-commander-dump"
+
+# Seiten-Hashes des letzten Voll-Snapshots der App-DB (Basis fuer Differenzen)
+SQLITE_BASE_FILE = "sqlite_base.json"
+
+# Ab diesem Anteil geaenderter Seiten wird wieder voll gesichert
+SQLITE_DELTA_MAX_RATIO = 0.5
+
+# Katalog im Backup-Ziel und lokale Kopie davon
+REMOTE_INDEX_FILE = "remote_index.json"
+
+# Wiederherstellbare Komponenten (Name fuer Meldungen)
+RESTORE_COMPONENTS = {
+    "app_db": "App-Datenbank",
+    "netbox_db": "NetBox-Datenbank",
+    "config": "Konfiguration",
+    "ssh": "SSH-Keys",
+    "inventory": "Inventory",
+    "playbooks": "Playbooks",
+    "terraform_state": "Terraform State",
+    "terraform_modules": "Terraform-Module",
+    "roles": "Rollen",
+    "netbox_media": "NetBox-Medien",
+}
+
+# Verzeichnis-Komponenten: Pfad im Archiv = Pfad unter data/
+RESTORE_DIRECTORIES = {
+    "inventory": "inventory",
+    "playbooks": "playbooks",
+    "terraform_modules": "terraform/modules",
+    "roles": "roles",
+    "netbox_media": "netbox/media",
+}
+
+
+def _link_or_copy(src, dst):
+    """Hardlink (gleiches Dateisystem, keine Kopie), sonst kopieren"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+    return dst
+
 
 # =============================================================================
 # Pydantic Models
@@ -48,6 +129,12 @@ class BackupOptions(BaseModel):
     include_terraform_modules: bool = True
     include_roles: bool = True
     include_netbox_media: bool = False
+    # App-DB nur als Differenz zum letzten Voll-Snapshot sichern
+    app_db_incremental: bool = False
+    # Im deduplizierten Backup-Repository statt als Archiv speichern
+    deduplicate: bool = False
+    # Archiv-Format: zip (Deflate) oder tar.zst (zstd, benoetigt zstandard)
+    archive_format: str = "zip"
 
 
 class BackupInfo(BaseModel):
@@ -55,10 +142,16 @@ class BackupInfo(BaseModel):
     id: str
     filename: str
     created_at: datetime
-    size_bytes: int
+    size_bytes: int  # physisch belegt (Repository: neu gespeicherte Bloecke)
+    logical_size_bytes: Optional[int] = None  # unkomprimierte Groesse aller Dateien
+    storage: str = "zip"  # zip, repository
     components: List[str]
     is_scheduled: bool
     status: str
+    checksum: Optional[str] = None
+    base_backup_id: Optional[str] = None  # Basis einer inkrementellen App-DB
+    location: str = "local"  # local, remote, both
+    remote_status: Optional[str] = None  # uploading, uploaded, failed
 
 
 class BackupResult(BaseModel):
@@ -67,22 +160,49 @@ class BackupResult(BaseModel):
     backup_id: Optional[str] = None
     filename: Optional[str] = None
     size_bytes: Optional[int] = None
+    logical_size_bytes: Optional[int] = None
+    checksum: Optional[str] = None
     message: str
     components: List[str] = []
 
 
+class BackupProgress(BaseModel):
+    """Fortschritt eines laufenden Backups"""
+    running: bool = False
+    backup_id: Optional[str] = None
+    phase: str = "idle"  # idle, running, finalizing, completed, failed
+    component: Optional[str] = None
+    bytes_done: int = 0
+    bytes_total: int = 0
+    files_done: int = 0
+    files_total: int = 0
+    percent: float = 0.0
+    elapsed_seconds: float = 0.0
+
+
+class RepositoryStats(BaseModel):
+    """Kennzahlen des deduplizierten Backup-Repositorys"""
+    snapshots: int = 0
+    chunks: int = 0
+    logical_bytes: int = 0
+    physical_bytes: int = 0
+    dedup_ratio: float = 0.0
+
+
 class RestoreResult(BaseModel):
     """Ergebnis einer Restore-Operation"""
     success: bool
     message: str
     restored_components: List[str] = []
     warnings: List[str] = []
+    durations_ms: Dict[str, int] = {}
+    dry_run: bool = False
 
 
 class ScheduleInfo(BaseModel):
     """Informationen ueber den Backup-Zeitplan"""
     enabled: bool = False
-    frequency: str = "daily"
+    frequency: str = "daily"  # hourly, daily, weekly
     time: str = "02:00"
     retention_days: int = 7
     options: BackupOptions = BackupOptions()
@@ -101,6 +221,18 @@ class BackupService:
         self.data_dir = Path(settings.data_dir)
         self.backup_dir = self.data_dir / "backups"
         self.backup_dir.mkdir(parents=True, exist_ok=True)
+        self.repository = BackupRepository(self.backup_dir / "repository")
+        self.progress = BackupProgressTracker()
+        # Nur ein Backup gleichzeitig (auch gegen Loeschen/GC im Repository)
+        self._lock = asyncio.Lock()
+        # Uploads nacheinander (Teile innerhalb eines Uploads parallel)
+        self._upload_lock = asyncio.Lock()
+        self._upload_tasks = set()
+        # Remote-Katalog (Inhalt, Zeitpunkt des Ladens)
+        self._index_lock = asyncio.Lock()
+        self._remote_index: Optional[dict] = None
+        self._remote_index_at = 0.0
+        self._remote_refresh: Optional[asyncio.Task] = None
 
     # -------------------------------------------------------------------------
     # Backup erstellen
@@ -110,6 +242,10 @@ class BackupService:
         """
         Erstellt ein Backup mit den angegebenen Optionen.
 
+        Das Archiv wird in einem Worker-Thread direkt aus den Quelldateien
+        geschrieben (kein Temp-Verzeichnis), Checksummen entstehen beim
+        Schreiben. Fortschritt: get_progress().
+
         Args:
             options: BackupOptions mit den zu sichernden Komponenten
             is_scheduled: True wenn vom Scheduler aufgerufen
@@ -117,359 +253,545 @@ class BackupService:
         Returns:
             BackupResult mit Erfolg/Fehler und Details
         """
-        backup_id = str(uuid.uuid4())
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        filename = f"backup_{timestamp}.zip"
-        backup_path = self.backup_dir / filename
-        temp_dir = self.backup_dir / f"temp_{backup_id}"
+        if self._lock.locked():
+            return BackupResult(
+                success=False,
+                message="Es laeuft bereits ein Backup"
+            )
+        if options.archive_format not in ARCHIVE_FORMATS:
+            return BackupResult(
+                success=False,
+                message=f"Unbekanntes Archiv-Format: {options.archive_format}"
+            )
 
-        try:
-            # Temp-Verzeichnis erstellen
-            temp_dir.mkdir(parents=True, exist_ok=True)
-            components = []
-            checksums = {}
-
-            # Komponenten sichern
-            if options.include_app_db:
-                if await self._backup_sqlite(temp_dir):
-                    components.append("app_db")
-                    checksums["commander.db"] = self._calc_checksum(temp_dir / "commander.db")
-
-            if options.include_netbox_db:
-                if await self._backup_postgres(temp_dir):
-                    components.append("netbox_db")
-                    checksums["netbox.sql.gz"] = self._calc_checksum(temp_dir / "netbox.sql.gz")
-
-            if options.include_config:
-                if self._backup_config(temp_dir):
-                    components.append("config")
-
-            if options.include_ssh_keys:
-                if self._backup_ssh(temp_dir):
-                    components.append("ssh")
-
-            if options.include_inventory:
-                if self._backup_directory(self.data_dir / "inventory", temp_dir / "inventory"):
-                    components.append("inventory")
-
-            if options.include_playbooks:
-                if self._backup_directory(self.data_dir / "playbooks", temp_dir / "playbooks"):
-                    components.append("playbooks")
-
-            if options.include_terraform_state:
-                if self._backup_terraform_state(temp_dir):
-                    components.append("terraform_state")
-
-            if options.include_terraform_modules:
-                if self._backup_directory(
-                    self.data_dir / "terraform" / "modules",
-                    temp_dir / "terraform" / "modules"
-                ):
-                    components.append("terraform_modules")
+        async with self._lock:
+            backup_id = str(uuid.uuid4())
+            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+            if options.deduplicate:
+                filename = f"snapshot_{timestamp}"
+                backup_path = self.repository.snapshot_path(backup_id)
+            else:
+                filename = f"backup_{timestamp}{ARCHIVE_FORMATS[options.archive_format]}"
+                if (self.backup_dir / filename).exists():
+                    # Mehrere Backups in derselben Sekunde
+                    filename = f"backup_{timestamp}_{backup_id[:8]}{ARCHIVE_FORMATS[options.archive_format]}"
+                backup_path = self.backup_dir / filename
+
+            try:
+                plan = await asyncio.to_thread(self._plan_backup, options)
+                self.progress.reset(
+                    backup_id,
+                    bytes_total=sum(src.stat().st_size for _, entries in plan for src, _ in entries),
+                    # netbox_db wird als ein Strom geschrieben
+                    files_total=sum(len(entries) or component == "netbox_db" for component, entries in plan),
+                )
 
-            if options.include_roles:
-                if self._backup_directory(self.data_dir / "roles", temp_dir / "roles"):
-                    components.append("roles")
+                components, checksum, base_backup_id, logical_size, size_bytes = await asyncio.to_thread(
+                    self._write_backup, backup_id, backup_path, options, plan
+                )
 
-            if options.include_netbox_media:
-                if self._backup_directory(
-                    self.data_dir / "netbox" / "media",
-                    temp_dir / "netbox" / "media"
-                ):
-                    components.append("netbox_media")
+                # In Datenbank speichern
+                await self._save_backup_history(
+                    backup_id=backup_id,
+                    filename=filename,
+                    size_bytes=size_bytes,
+                    components=components,
+                    is_scheduled=is_scheduled,
+                    checksum=checksum,
+                    base_backup_id=base_backup_id,
+                    storage="repository" if options.deduplicate else "zip",
+                    logical_size=logical_size,
+                )
+                self.progress.finish("completed")
+
+                logger.info(f"Backup erstellt: {filename} ({size_bytes} bytes, {len(components)} Komponenten)")
+
+                if settings.backup_target:
+                    # Upload im Hintergrund, das Backup ist lokal bereits fertig
+                    task = asyncio.create_task(self.upload_backup(backup_id))
+                    self._upload_tasks.add(task)
+                    task.add_done_callback(self._upload_tasks.discard)
+
+                return BackupResult(
+                    success=True,
+                    backup_id=backup_id,
+                    filename=filename,
+                    size_bytes=size_bytes,
+                    logical_size_bytes=logical_size,
+                    checksum=checksum,
+                    message="Backup erfolgreich erstellt",
+                    components=components
+                )
 
-            # Manifest erstellen
-            manifest = {
-                "version": "1.0",
-                "app_version": os.getenv("VERSION", "unknown"),
-                "created_at": datetime.now().isoformat(),
-                "components": components,
-                "checksums": checksums,
-                "options": options.model_dump()
-            }
+            except Exception as e:
+                self.progress.finish("failed")
+                logger.error(f"Backup fehlgeschlagen: {e}")
+                return BackupResult(
+                    success=False,
+                    message=f"Backup fehlgeschlagen: {str(e)}"
+                )
 
-            with open(temp_dir / "manifest.json", "w") as f:
-                json.dump(manifest, f, indent=2)
+    def get_progress(self) -> "BackupProgress":
+        """Fortschritt des laufenden (oder letzten) Backups"""
+        return BackupProgress(**self.progress.snapshot())
 
-            # ZIP erstellen
-            with zipfile.ZipFile(backup_path, "w", zipfile.ZIP_DEFLATED) as zf:
-                for root, dirs, files in os.walk(temp_dir):
-                    for file in files:
-                        file_path = Path(root) / file
-                        arcname = file_path.relative_to(temp_dir)
-                        zf.write(file_path, arcname)
+    def _plan_backup(self, options: BackupOptions) -> List[Tuple[str, List[Tuple[Path, str]]]]:
+        """
+        Ermittelt die zu sichernden Dateien pro Komponente.
 
-            # Groesse ermitteln
-            size_bytes = backup_path.stat().st_size
+        Returns:
+            Liste von (Komponente, [(Quelldatei, Archivpfad)]) in Backup-Reihenfolge.
+            netbox_db hat keine Dateien, der Dump wird beim Schreiben erzeugt.
+        """
+        plan = []
 
-            # In Datenbank speichern
-            await self._save_backup_history(
-                backup_id=backup_id,
-                filename=filename,
-                size_bytes=size_bytes,
-                components=components,
-                is_scheduled=is_scheduled
-            )
+        if options.include_app_db:
+            src = self.data_dir / "db" / "commander.db"
+            if src.exists():
+                plan.append(("app_db", [(src, "commander.db")]))
+            else:
+                logger.warning("SQLite-Datenbank nicht gefunden")
 
-            logger.info(f"Backup erstellt: {filename} ({size_bytes} bytes, {len(components)} Komponenten)")
+        if options.include_netbox_db:
+            plan.append(("netbox_db", []))
 
-            return BackupResult(
-                success=True,
-                backup_id=backup_id,
-                filename=filename,
-                size_bytes=size_bytes,
-                message=f"Backup erfolgreich erstellt",
-                components=components
+        if options.include_config:
+            src = self.data_dir / "config" / ".env"
+            if src.exists():
+                plan.append(("config", [(src, "config/.env")]))
+            else:
+                logger.warning("Config-Datei nicht gefunden")
+
+        if options.include_ssh_keys:
+            src_dir = self.data_dir / "ssh"
+            if src_dir.exists():
+                plan.append(("ssh", self._existing_files(src_dir, "ssh", SSH_KEY_FILES)))
+            else:
+                logger.warning("SSH-Verzeichnis nicht gefunden")
+
+        directories = [
+            ("inventory", options.include_inventory, "inventory"),
+            ("playbooks", options.include_playbooks, "playbooks"),
+            ("terraform_state", options.include_terraform_state, None),
+            ("terraform_modules", options.include_terraform_modules, "terraform/modules"),
+            ("roles", options.include_roles, "roles"),
+            ("netbox_media", options.include_netbox_media, "netbox/media"),
+        ]
+        for component, enabled, rel_path in directories:
+            if not enabled:
+                continue
+            if component == "terraform_state":
+                src_dir = self.data_dir / "terraform"
+                if src_dir.exists():
+                    plan.append((component, self._existing_files(src_dir, "terraform", TERRAFORM_STATE_FILES)))
+                continue
+            src_dir = self.data_dir / rel_path
+            if src_dir.exists():
+                plan.append((component, self._walk_directory(src_dir, rel_path)))
+
+        return plan
+
+    def _existing_files(self, src_dir: Path, arc_dir: str, names: List[str]) -> List[Tuple[Path, str]]:
+        """Vorhandene Dateien aus einer festen Liste"""
+        return [
+            (src_dir / name, f"{arc_dir}/{name}")
+            for name in names
+            if (src_dir / name).exists()
+        ]
+
+    def _walk_directory(self, src_dir: Path, arc_dir: str) -> List[Tuple[Path, str]]:
+        """Alle Dateien eines Verzeichnisses (rekursiv)"""
+        entries = []
+        for root, dirs, files in os.walk(src_dir):
+            dirs.sort()
+            for file in sorted(files):
+                file_path = Path(root) / file
+                if file_path.is_file():
+                    entries.append((file_path, f"{arc_dir}/{file_path.relative_to(src_dir).as_posix()}"))
+        return entries
+
+    def _write_backup(
+        self,
+        backup_id: str,
+        backup_path: Path,
+        options: BackupOptions,
+        plan: List[Tuple[str, List[Tuple[Path, str]]]],
+    ) -> Tuple[List[str], str, Optional[str], int, int]:
+        """
+        Schreibt das Archiv bzw. den Repository-Snapshot (laeuft im Worker-Thread).
+
+        Returns:
+            (gesicherte Komponenten, Checksumme, Basis-Backup der App-DB,
+            logische Groesse, physische Groesse)
+        """
+        rate_limiter = RateLimiter(settings.backup_io_rate_mb * 1024 * 1024)
+        if options.deduplicate:
+            writer = self.repository.open_snapshot(backup_id, self.progress, rate_limiter)
+        elif options.archive_format == "tar.zst":
+            writer = TarZstWriter(
+                backup_path, self.progress, rate_limiter,
+                level=settings.backup_zstd_level,
+                threads=settings.backup_compress_threads,
+            )
+        else:
+            writer = ArchiveWriter(
+                backup_path, self.progress, rate_limiter,
+                compress_level=settings.backup_compress_level,
             )
+        components = []
+        sqlite_info = None
+        sqlite_base = None
 
-        except Exception as e:
-            logger.error(f"Backup fehlgeschlagen: {e}")
-            return BackupResult(
-                success=False,
-                message=f"Backup fehlgeschlagen: {str(e)}"
+        try:
+            for component, entries in plan:
+                self.progress.set_component(component)
+
+                if component == "app_db":
+                    src, _ = entries[0]
+                    # Im Repository dedupliziert bereits die Blockebene
+                    sqlite_info, sqlite_base = self._backup_sqlite(
+                        writer, src, backup_id, backup_path.name,
+                        options.app_db_incremental and not options.deduplicate,
+                    )
+                    components.append(component)
+                    continue
+
+                if component == "netbox_db":
+                    if self._backup_postgres(writer):
+                        components.append(component)
+                    continue
+
+                for src, arcname in entries:
+                    try:
+                        writer.add_file(src, arcname)
+                    except FileNotFoundError:
+                        # Waehrend des Backups geloescht
+                        logger.debug(f"Datei nicht mehr vorhanden: {src}")
+                components.append(component)
+                logger.debug(f"Komponente gesichert: {component} ({len(entries)} Dateien)")
+
+            # Manifest zuletzt (enthaelt alle Checksummen)
+            self.progress.set_phase("finalizing")
+            manifest = {
+                "version": "1.0",
+                "app_version": os.getenv("VERSION", "unknown"),
+                "created_at": datetime.now().isoformat(),
+                "components": components,
+                "checksums": writer.checksums,
+                "options": options.model_dump()
+            }
+            if sqlite_info:
+                manifest["sqlite"] = sqlite_info
+            writer.add_bytes(json.dumps(manifest, indent=2).encode(), "manifest.json")
+            checksum = writer.close()
+
+            # Basis erst nach erfolgreichem Abschluss fortschreiben
+            if sqlite_base:
+                self._save_sqlite_base(sqlite_base)
+
+            if options.deduplicate:
+                physical_size = writer.physical_size
+            else:
+                physical_size = backup_path.stat().st_size
+            return (
+                components,
+                checksum,
+                (sqlite_info or {}).get("base_backup_id"),
+                writer.logical_size,
+                physical_size,
             )
 
-        finally:
-            # Temp-Verzeichnis aufraeumen
-            if temp_dir.exists():
-                shutil.rmtree(temp_dir)
+        except Exception:
+            writer.abort()
+            raise
 
     # -------------------------------------------------------------------------
     # Einzelne Komponenten sichern
     # -------------------------------------------------------------------------
 
-    async def _backup_sqlite(self, temp_dir: Path) -> bool:
-        """Sichert die SQLite App-Datenbank"""
-        try:
-            src = self.data_dir / "db" / "commander.db"
-            if not src.exists():
-                logger.warning("SQLite-Datenbank nicht gefunden")
-                return False
-
-            dst = temp_dir / "commander.db"
-            shutil.copy2(src, dst)
-            logger.debug(f"SQLite gesichert: {dst}")
-            return True
+    def _backup_sqlite(
+        self,
+        writer: ArchiveWriter,
+        src: Path,
+        backup_id: str,
+        filename: str,
+        incremental: bool,
+    ) -> Tuple[dict, Optional[dict]]:
+        """
+        Sichert die SQLite App-DB als konsistenten Online-Snapshot.
 
-        except Exception as e:
-            logger.error(f"SQLite-Backup fehlgeschlagen: {e}")
-            return False
+        Der Snapshot entsteht schrittweise ueber die Backup-API (Writer werden
+        nicht blockiert). Inkrementell wird nur eine Differenz der geaenderten
+        Seiten zum letzten Voll-Snapshot geschrieben (commander.db.delta);
+        ohne gueltige Basis, bei zu vielen Aenderungen oder nach
+        BACKUP_SQLITE_FULL_EVERY Differenzen wird voll gesichert.
 
-    async def _backup_postgres(self, temp_dir: Path) -> bool:
-        """Sichert die PostgreSQL NetBox-Datenbank via docker exec"""
+        Returns:
+            (Manifest-Eintrag, neue Basis oder None)
+        """
+        snapshot = self.backup_dir / f".sqlite_snapshot_{backup_id}.db"
         try:
-            # pg_dump via docker exec
-            cmd = [
-                "docker", "exec", "proxmox-commander-postgres",
-                "pg_dump", "-U", "netbox", "netbox"
-            ]
-
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=300  # 5 Minuten Timeout
+            stats = sqlite_snapshot.take_snapshot(
+                src, snapshot, step_pages=settings.backup_sqlite_step_pages
             )
+            logger.debug(
+                f"SQLite-Snapshot: {stats['pages']} Seiten, {stats['restarts']} Neustarts, "
+                f"{stats['duration_ms']} ms"
+            )
+            # Fortschritt auf die Snapshot-Groesse korrigieren
+            snapshot_size = snapshot.stat().st_size
+            self.progress.add_total(snapshot_size - src.stat().st_size)
+
+            if not incremental:
+                writer.add_file(snapshot, "commander.db")
+                return {"mode": "full", "pages": stats["pages"]}, None
+
+            page_size = sqlite_snapshot.read_page_size(snapshot)
+            hashes = sqlite_snapshot.page_hashes(snapshot, page_size)
+            page_count = len(hashes) // sqlite_snapshot.PAGE_HASH_SIZE
+
+            base = self._load_sqlite_base(page_size)
+            if base is not None:
+                changed = sqlite_snapshot.changed_pages(hashes, bytes.fromhex(base["hashes"]))
+                if (
+                    base["deltas"] < settings.backup_sqlite_full_every
+                    and len(changed) <= page_count * SQLITE_DELTA_MAX_RATIO
+                ):
+                    header = {
+                        "page_size": page_size,
+                        "page_count": page_count,
+                        "base_backup_id": base["backup_id"],
+                    }
+                    self.progress.add_total(-snapshot_size)
+                    writer.add_stream(
+                        sqlite_snapshot.delta_chunks(snapshot, page_size, changed, header),
+                        "commander.db.delta",
+                    )
+                    logger.info(
+                        f"App-DB inkrementell gesichert: {len(changed)}/{page_count} Seiten geaendert"
+                    )
+                    base["deltas"] += 1
+                    return {
+                        "mode": "delta",
+                        "pages": page_count,
+                        "changed_pages": len(changed),
+                        "base_backup_id": base["backup_id"],
+                        "base_filename": base["filename"],
+                        "base_checksum": base["checksum"],
+                    }, base
+
+            checksum = writer.add_file(snapshot, "commander.db")
+            return {"mode": "full", "pages": page_count}, {
+                "backup_id": backup_id,
+                "filename": filename,
+                "checksum": checksum,
+                "page_size": page_size,
+                "deltas": 0,
+                "hashes": hashes.hex(),
+            }
 
-            if result.returncode != 0:
-                logger.error(f"pg_dump fehlgeschlagen: {result.stderr}")
-                return False
-
-            # Komprimieren und speichern
-            dst = temp_dir / "netbox.sql.gz"
-            with gzip.open(dst, "wt", encoding="utf-8") as f:
-                f.write(result.stdout)
-
-            logger.debug(f"PostgreSQL gesichert: {dst}")
-            return True
-
-        except subprocess.TimeoutExpired:
-            logger.error("PostgreSQL-Backup: Timeout")
-            return False
-        except Exception as e:
-            logger.error(f"PostgreSQL-Backup fehlgeschlagen: {e}")
-            return False
+        finally:
+            snapshot.unlink(missing_ok=True)
 
-    def _backup_config(self, temp_dir: Path) -> bool:
-        """Sichert die Konfigurationsdatei"""
+    def _load_sqlite_base(self, page_size: int) -> Optional[dict]:
+        """Basis fuer Differenzen (None wenn nicht vorhanden oder unbrauchbar)"""
+        path = self.backup_dir / SQLITE_BASE_FILE
         try:
-            src = self.data_dir / "config" / ".env"
-            if not src.exists():
-                logger.warning("Config-Datei nicht gefunden")
-                return False
-
-            dst_dir = temp_dir / "config"
-            dst_dir.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(src, dst_dir / ".env")
-            logger.debug(f"Config gesichert")
-            return True
-
-        except Exception as e:
-            logger.error(f"Config-Backup fehlgeschlagen: {e}")
-            return False
+            base = json.loads(path.read_text())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"SQLite-Basis nicht lesbar, sichere voll: {e}")
+            return None
 
-    def _backup_ssh(self, temp_dir: Path) -> bool:
-        """Sichert SSH-Keys"""
-        try:
-            src_dir = self.data_dir / "ssh"
-            if not src_dir.exists():
-                logger.warning("SSH-Verzeichnis nicht gefunden")
-                return False
+        if base.get("page_size") != page_size:
+            return None
+        if not (self.backup_dir / base.get("filename", "")).is_file():
+            logger.info("Basis-Backup der App-DB fehlt, sichere voll")
+            return None
+        return base
 
-            dst_dir = temp_dir / "ssh"
-            dst_dir.mkdir(parents=True, exist_ok=True)
+    def _save_sqlite_base(self, base: dict):
+        """Schreibt die Basis atomar"""
+        path = self.backup_dir / SQLITE_BASE_FILE
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(base))
+        tmp.replace(path)
 
-            for key_file in ["id_ed25519", "id_ed25519.pub", "known_hosts"]:
-                src = src_dir / key_file
-                if src.exists():
-                    shutil.copy2(src, dst_dir / key_file)
+    def _backup_postgres(self, writer) -> bool:
+        """
+        Sichert die PostgreSQL NetBox-Datenbank via docker exec.
 
-            logger.debug(f"SSH-Keys gesichert")
-            return True
+        Die Ausgabe von pg_dump wird direkt ins Archiv gestreamt und dabei
+        gehasht (kein Temp-File). Mit BACKUP_PG_JOBS > 0 wird das
+        Directory-Format parallel gedumpt und als tar-Strom gesichert
+        (netbox.dump.tar), sonst Plain-SQL (netbox.sql[.gz]).
 
-        except Exception as e:
-            logger.error(f"SSH-Backup fehlgeschlagen: {e}")
-            return False
+        Bricht pg_dump ab bevor Daten geflossen sind, wird die Komponente
+        uebersprungen; ein Abbruch mitten im Strom laesst das Backup scheitern.
+        """
+        jobs = settings.backup_pg_jobs
+        if jobs > 0:
+            # Directory-Format entsteht im Container und wird als tar gestreamt
+            script = (
+                f"rm -rf {PG_DUMP_DIR} && "
+                f"pg_dump -U netbox -Fd -j {jobs} -f {PG_DUMP_DIR} netbox && "
+                f"tar -C {PG_DUMP_DIR} -cf - .; rc=$?; rm -rf {PG_DUMP_DIR}; exit $rc"
+            )
+            cmd = ["docker", "exec", PG_CONTAINER, "sh", "-c", script]
+            # Dateien sind von pg_dump bereits komprimiert
+            arcname, precompress, compress = "netbox.dump.tar", False, False
+        else:
+            cmd = ["docker", "exec", PG_CONTAINER, "pg_dump", "-U", "netbox", "netbox"]
+            precompress = writer.precompress_streams
+            arcname = "netbox.sql.gz" if precompress else "netbox.sql"
+            compress = not precompress
 
-    def _backup_terraform_state(self, temp_dir: Path) -> bool:
-        """Sichert Terraform State-Dateien"""
         try:
-            src_dir = self.data_dir / "terraform"
-            if not src_dir.exists():
-                return False
-
-            dst_dir = temp_dir / "terraform"
-            dst_dir.mkdir(parents=True, exist_ok=True)
-
-            for state_file in ["terraform.tfstate", "terraform.tfstate.backup"]:
-                src = src_dir / state_file
-                if src.exists():
-                    shutil.copy2(src, dst_dir / state_file)
-
-            logger.debug(f"Terraform State gesichert")
-            return True
-
+            stream = ProcessStream(cmd, timeout=PG_DUMP_TIMEOUT)
         except Exception as e:
-            logger.error(f"Terraform-State-Backup fehlgeschlagen: {e}")
+            logger.error(f"PostgreSQL-Backup fehlgeschlagen: {e}")
             return False
 
-    def _backup_directory(self, src_dir: Path, dst_dir: Path) -> bool:
-        """Sichert ein komplettes Verzeichnis"""
         try:
-            if not src_dir.exists():
+            first = stream.first_chunk()
+            if first is None:
+                logger.error(f"pg_dump fehlgeschlagen: {stream.error(stream.process.returncode)}")
                 return False
 
-            shutil.copytree(src_dir, dst_dir, dirs_exist_ok=True)
-            logger.debug(f"Verzeichnis gesichert: {src_dir.name}")
-            return True
+            chunks = stream.chunks(first)
+            if precompress:
+                # gzip im eigenen Thread, parallel zum Schreiben des Archivs
+                chunks = threaded_chunks(gzip_chunks(chunks, settings.backup_compress_level))
+            writer.add_stream(chunks, arcname, compress=compress)
 
-        except Exception as e:
-            logger.error(f"Verzeichnis-Backup fehlgeschlagen ({src_dir}): {e}")
-            return False
+        except Exception:
+            stream.kill()
+            raise
+
+        logger.debug(f"PostgreSQL gesichert ({arcname})")
+        return True
 
     # -------------------------------------------------------------------------
     # Restore
     # -------------------------------------------------------------------------
 
-    async def restore_backup(self, backup_path: Path) -> RestoreResult:
+    async def restore_backup(self, backup_path: Path, dry_run: bool = False) -> RestoreResult:
         """
         Stellt ein Backup wieder her.
 
+        Ablauf:
+        1. Archiv bzw. Snapshot entpacken, Checksummen dabei berechnen und
+           gegen das Manifest pruefen. Bei einer Abweichung wird abgebrochen,
+           bevor Live-Daten angefasst werden.
+        2. Komponenten parallel wiederherstellen (Worker-Threads). Jede
+           Komponente wird neben dem Ziel vorbereitet und dann per rename
+           getauscht; ein Fehler laesst die bisherigen Daten unveraendert.
+
         Args:
-            backup_path: Pfad zur Backup-ZIP-Datei
+            backup_path: Pfad zum Backup-Archiv oder zum Repository-Snapshot
+            dry_run: Nur entpacken, pruefen und vorbereiten, nichts tauschen
 
         Returns:
-            RestoreResult mit Details
+            RestoreResult mit Details und Dauer je Komponente
         """
+        if self._lock.locked():
+            return RestoreResult(
+                success=False,
+                message="Es laeuft bereits ein Backup oder Restore",
+                dry_run=dry_run,
+            )
+
+        async with self._lock:
+            return await self._run_restore(backup_path, dry_run)
+
+    async def _run_restore(self, backup_path: Path, dry_run: bool) -> RestoreResult:
         temp_dir = self.backup_dir / f"restore_{uuid.uuid4()}"
         warnings = []
-        restored = []
+        durations = {}
 
         try:
-            # ZIP entpacken
-            with zipfile.ZipFile(backup_path, "r") as zf:
-                zf.extractall(temp_dir)
+            started = time.monotonic()
+            if backup_path.parent == self.repository.snapshots_dir:
+                # Snapshot aus den Bloecken zusammensetzen
+                actual = await asyncio.to_thread(self.repository.materialize, backup_path.stem, temp_dir)
+            else:
+                # Archiv entpacken (zip oder tar.zst)
+                actual = await asyncio.to_thread(extract_archive, backup_path, temp_dir)
+            durations["extract"] = int((time.monotonic() - started) * 1000)
 
             # Manifest lesen
             manifest_path = temp_dir / "manifest.json"
             if not manifest_path.exists():
                 return RestoreResult(
                     success=False,
-                    message="Ungueltige Backup-Datei: manifest.json fehlt"
+                    message="Ungueltige Backup-Datei: manifest.json fehlt",
+                    dry_run=dry_run,
                 )
 
             with open(manifest_path) as f:
                 manifest = json.load(f)
 
             components = manifest.get("components", [])
-            checksums = manifest.get("checksums", {})
-
-            # Checksums validieren
-            for filename, expected_checksum in checksums.items():
-                file_path = temp_dir / filename
-                if file_path.exists():
-                    actual_checksum = self._calc_checksum(file_path)
-                    if actual_checksum != expected_checksum:
-                        warnings.append(f"Checksum-Mismatch: {filename}")
-
-            # Komponenten wiederherstellen
-            if "app_db" in components:
-                if await self._restore_sqlite(temp_dir):
-                    restored.append("app_db")
-                else:
-                    warnings.append("App-Datenbank konnte nicht wiederhergestellt werden")
-
-            if "netbox_db" in components:
-                if await self._restore_postgres(temp_dir):
-                    restored.append("netbox_db")
-                else:
-                    warnings.append("NetBox-Datenbank konnte nicht wiederhergestellt werden")
-
-            if "config" in components:
-                if self._restore_config(temp_dir):
-                    restored.append("config")
-
-            if "ssh" in components:
-                if self._restore_ssh(temp_dir):
-                    restored.append("ssh")
 
-            if "inventory" in components:
-                if self._restore_directory(temp_dir / "inventory", self.data_dir / "inventory"):
-                    restored.append("inventory")
-
-            if "playbooks" in components:
-                if self._restore_directory(temp_dir / "playbooks", self.data_dir / "playbooks"):
-                    restored.append("playbooks")
-
-            if "terraform_state" in components:
-                if self._restore_terraform_state(temp_dir):
-                    restored.append("terraform_state")
-
-            if "terraform_modules" in components:
-                if self._restore_directory(
-                    temp_dir / "terraform" / "modules",
-                    self.data_dir / "terraform" / "modules"
-                ):
-                    restored.append("terraform_modules")
+            # Checksummen vor jeder Aenderung pruefen
+            errors = [
+                f"Checksum-Mismatch: {filename}" if filename in actual else f"Datei fehlt: {filename}"
+                for filename, expected in manifest.get("checksums", {}).items()
+                if actual.get(filename) != expected
+            ]
+            if errors:
+                logger.error(f"Restore abgebrochen, Backup ist beschaedigt: {', '.join(errors)}")
+                return RestoreResult(
+                    success=False,
+                    message="Backup ist beschaedigt, es wurde nichts wiederhergestellt",
+                    warnings=errors,
+                    durations_ms=durations,
+                    dry_run=dry_run,
+                )
 
-            if "roles" in components:
-                if self._restore_directory(temp_dir / "roles", self.data_dir / "roles"):
-                    restored.append("roles")
+            # Inkrementelle App-DB aus Basis + Differenz zusammensetzen
+            sqlite_info = manifest.get("sqlite") or {}
+            if "app_db" in components and sqlite_info.get("mode") == "delta":
+                try:
+                    await asyncio.to_thread(self._rebuild_sqlite, temp_dir, sqlite_info)
+                except Exception as e:
+                    logger.error(f"App-DB konnte nicht aus Basis-Backup aufgebaut werden: {e}")
+                    warnings.append(
+                        f"Basis-Backup der App-Datenbank fehlt oder ist ungueltig "
+                        f"({sqlite_info.get('base_filename')}): {e}"
+                    )
 
-            if "netbox_media" in components:
-                if self._restore_directory(
-                    temp_dir / "netbox" / "media",
-                    self.data_dir / "netbox" / "media"
-                ):
-                    restored.append("netbox_media")
+            # Komponenten sind unabhaengig voneinander
+            known = [c for c in components if c in RESTORE_COMPONENTS]
+            results = await asyncio.gather(*(
+                self._restore_component(component, temp_dir, dry_run) for component in known
+            ))
+
+            restored = []
+            for component, (ok, duration_ms) in zip(known, results):
+                durations[component] = duration_ms
+                if ok:
+                    restored.append(component)
+                else:
+                    warnings.append(
+                        f"{RESTORE_COMPONENTS[component]} konnte nicht "
+                        f"{'vorbereitet' if dry_run else 'wiederhergestellt'} werden"
+                    )
 
-            logger.info(f"Restore abgeschlossen: {len(restored)} Komponenten wiederhergestellt")
+            if dry_run:
+                message = f"Probelauf: {len(restored)} Komponenten koennen wiederhergestellt werden"
+            else:
+                message = f"{len(restored)} Komponenten wiederhergestellt"
+            logger.info(f"Restore abgeschlossen: {message} ({durations})")
 
             return RestoreResult(
                 success=True,
-                message=f"{len(restored)} Komponenten wiederhergestellt",
+                message=message,
                 restored_components=restored,
-                warnings=warnings
+                warnings=warnings,
+                durations_ms=durations,
+                dry_run=dry_run,
             )
 
         except Exception as e:
@@ -477,181 +799,311 @@ class BackupService:
             return RestoreResult(
                 success=False,
                 message=f"Restore fehlgeschlagen: {str(e)}",
-                warnings=warnings
+                warnings=warnings,
+                durations_ms=durations,
+                dry_run=dry_run,
             )
 
         finally:
             # Temp-Verzeichnis aufraeumen
             if temp_dir.exists():
-                shutil.rmtree(temp_dir)
+                await asyncio.to_thread(shutil.rmtree, temp_dir, True)
 
-    async def _restore_sqlite(self, temp_dir: Path) -> bool:
-        """Stellt SQLite-Datenbank wieder her"""
+    async def _restore_component(self, component: str, temp_dir: Path, dry_run: bool) -> Tuple[bool, int]:
+        """Stellt eine Komponente im Worker-Thread wieder her, liefert (Erfolg, Dauer in ms)"""
+        started = time.monotonic()
         try:
-            src = temp_dir / "commander.db"
-            if not src.exists():
-                return False
-
-            dst = self.data_dir / "db" / "commander.db"
-            dst.parent.mkdir(parents=True, exist_ok=True)
-
-            # Backup der aktuellen DB
-            if dst.exists():
-                shutil.copy2(dst, dst.with_suffix(".db.pre-restore"))
-
-            shutil.copy2(src, dst)
-            logger.info("SQLite-Datenbank wiederhergestellt")
-            return True
-
+            if component == "app_db":
+                ok = await asyncio.to_thread(self._restore_sqlite, temp_dir, dry_run)
+            elif component == "netbox_db":
+                ok = await asyncio.to_thread(self._restore_postgres, temp_dir, dry_run)
+            elif component == "config":
+                ok = await asyncio.to_thread(
+                    self._restore_files, temp_dir / "config", self.data_dir / "config", [".env"], dry_run
+                )
+            elif component == "ssh":
+                ok = await asyncio.to_thread(
+                    self._restore_files, temp_dir / "ssh", self.data_dir / "ssh", SSH_KEY_FILES, dry_run
+                )
+            elif component == "terraform_state":
+                ok = await asyncio.to_thread(
+                    self._restore_files, temp_dir / "terraform", self.data_dir / "terraform",
+                    TERRAFORM_STATE_FILES, dry_run
+                )
+            else:
+                rel_path = RESTORE_DIRECTORIES[component]
+                ok = await asyncio.to_thread(
+                    self._restore_directory, temp_dir / rel_path, self.data_dir / rel_path, dry_run
+                )
         except Exception as e:
-            logger.error(f"SQLite-Restore fehlgeschlagen: {e}")
-            return False
+            logger.error(f"Restore von {component} fehlgeschlagen: {e}")
+            ok = False
+        return ok, int((time.monotonic() - started) * 1000)
 
-    async def _restore_postgres(self, temp_dir: Path) -> bool:
-        """Stellt PostgreSQL-Datenbank wieder her"""
-        try:
-            src = temp_dir / "netbox.sql.gz"
-            if not src.exists():
-                return False
+    def _rebuild_sqlite(self, temp_dir: Path, sqlite_info: dict):
+        """Setzt commander.db aus Basis-Backup und commander.db.delta zusammen"""
+        base_path = self.backup_dir / sqlite_info["base_filename"]
+        if not base_path.exists() and settings.backup_target:
+            # Lokal bereits aufgeraeumt, aus dem Backup-Ziel holen
+            base_path = self._fetch_remote(sqlite_info["base_filename"])
+        base_db = temp_dir / "commander.base.db"
 
-            # Dekomprimieren
-            with gzip.open(src, "rt", encoding="utf-8") as f:
-                sql_content = f.read()
+        extract_member(base_path, "commander.db", base_db)
 
-            # psql via docker exec
-            cmd = [
-                "docker", "exec", "-i", "proxmox-commander-postgres",
-                "psql", "-U", "netbox", "netbox"
-            ]
+        if self._calc_checksum(base_db) != sqlite_info["base_checksum"]:
+            raise ValueError("Checksum-Mismatch im Basis-Backup")
 
-            result = subprocess.run(
-                cmd,
-                input=sql_content,
-                capture_output=True,
-                text=True,
-                timeout=600  # 10 Minuten Timeout
-            )
+        sqlite_snapshot.apply_delta(base_db, temp_dir / "commander.db.delta", temp_dir / "commander.db")
+        base_db.unlink()
 
-            if result.returncode != 0:
-                logger.error(f"psql fehlgeschlagen: {result.stderr}")
-                return False
-
-            logger.info("PostgreSQL-Datenbank wiederhergestellt")
-            return True
+    def _restore_sqlite(self, temp_dir: Path, dry_run: bool = False) -> bool:
+        """
+        Stellt die SQLite-Datenbank wieder her.
 
-        except Exception as e:
-            logger.error(f"PostgreSQL-Restore fehlgeschlagen: {e}")
+        Die Datei wird nicht ueberschrieben, sondern per Backup-API in einer
+        Transaktion in die Live-Datenbank kopiert: offene Verbindungen der App
+        sehen entweder den alten oder den neuen Stand.
+        """
+        src = temp_dir / "commander.db"
+        if not src.exists():
             return False
 
-    def _restore_config(self, temp_dir: Path) -> bool:
-        """Stellt Konfiguration wieder her"""
+        check = sqlite3.connect(str(src))
         try:
-            src = temp_dir / "config" / ".env"
-            if not src.exists():
-                return False
+            result = check.execute("PRAGMA integrity_check").fetchone()[0]
+        finally:
+            check.close()
+        if result != "ok":
+            logger.error(f"SQLite-Datenbank im Backup ist beschaedigt: {result}")
+            return False
+        if dry_run:
+            return True
 
-            dst = self.data_dir / "config" / ".env"
-            dst.parent.mkdir(parents=True, exist_ok=True)
+        dst = self.data_dir / "db" / "commander.db"
+        dst.parent.mkdir(parents=True, exist_ok=True)
 
-            if dst.exists():
-                shutil.copy2(dst, dst.with_suffix(".env.pre-restore"))
+        # Backup der aktuellen DB
+        if dst.exists():
+            sqlite_snapshot.take_snapshot(dst, dst.with_suffix(".db.pre-restore"), step_pages=0)
 
-            shutil.copy2(src, dst)
-            logger.info("Konfiguration wiederhergestellt")
-            return True
+        source = sqlite3.connect(str(src))
+        target = sqlite3.connect(str(dst), timeout=30)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
 
-        except Exception as e:
-            logger.error(f"Config-Restore fehlgeschlagen: {e}")
-            return False
+        logger.info("SQLite-Datenbank wiederhergestellt")
+        return True
 
-    def _restore_ssh(self, temp_dir: Path) -> bool:
-        """Stellt SSH-Keys wieder her"""
-        try:
-            src_dir = temp_dir / "ssh"
-            if not src_dir.exists():
-                return False
+    def _restore_postgres(self, temp_dir: Path, dry_run: bool = False) -> bool:
+        """
+        Streamt den Dump blockweise in psql bzw. pg_restore (Worker-Thread).
 
-            dst_dir = self.data_dir / "ssh"
-            dst_dir.mkdir(parents=True, exist_ok=True)
+        - netbox.dump.tar: Directory-Format, pg_restore mit --jobs
+        - netbox.sql.gz / netbox.sql: Plain-SQL via psql
 
-            for key_file in ["id_ed25519", "id_ed25519.pub", "known_hosts"]:
-                src = src_dir / key_file
-                if src.exists():
-                    dst = dst_dir / key_file
-                    shutil.copy2(src, dst)
-                    # Berechtigungen fuer Private Key setzen
-                    if key_file == "id_ed25519":
-                        os.chmod(dst, 0o600)
+        Im Probelauf wird der Dump nur vollstaendig gelesen (gzip-Pruefung).
+        """
+        psql = ["docker", "exec", "-i", PG_CONTAINER, "psql", "-U", "netbox", "netbox"]
+        if (temp_dir / "netbox.dump.tar").exists():
+            jobs = max(settings.backup_pg_jobs, 1)
+            script = (
+                f"rm -rf {PG_DUMP_DIR} && mkdir -p {PG_DUMP_DIR} && "
+                f"tar -C {PG_DUMP_DIR} -xf - && "
+                f"pg_restore -U netbox -d netbox --clean --if-exists -j {jobs} {PG_DUMP_DIR}; "
+                f"rc=$?; rm -rf {PG_DUMP_DIR}; exit $rc"
+            )
+            cmd = ["docker", "exec", "-i", PG_CONTAINER, "sh", "-c", script]
+            source = open(temp_dir / "netbox.dump.tar", "rb")
+        elif (temp_dir / "netbox.sql.gz").exists():
+            cmd = psql
+            source = gzip.open(temp_dir / "netbox.sql.gz", "rb")
+        elif (temp_dir / "netbox.sql").exists():
+            cmd = psql
+            source = open(temp_dir / "netbox.sql", "rb")
+        else:
+            return False
 
-            logger.info("SSH-Keys wiederhergestellt")
+        if dry_run:
+            with source:
+                for _ in iter(lambda: source.read(CHUNK_SIZE), b""):
+                    pass
             return True
 
-        except Exception as e:
-            logger.error(f"SSH-Restore fehlgeschlagen: {e}")
+        with source:
+            process = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+            )
+            stderr = []
+            reader = threading.Thread(target=lambda: stderr.append(process.stderr.read()), daemon=True)
+            reader.start()
+            timer = threading.Timer(PG_RESTORE_TIMEOUT, process.kill)
+            timer.start()
+            try:
+                try:
+                    shutil.copyfileobj(source, process.stdin, CHUNK_SIZE)
+                    process.stdin.close()
+                except BrokenPipeError:
+                    # Prozess beendet, Fehler kommt ueber den Exit-Code
+                    pass
+                returncode = process.wait()
+            finally:
+                timer.cancel()
+                reader.join()
+
+        if returncode != 0:
+            logger.error(f"psql fehlgeschlagen: {b''.join(stderr).decode(errors='replace')}")
             return False
 
-    def _restore_terraform_state(self, temp_dir: Path) -> bool:
-        """Stellt Terraform State wieder her"""
-        try:
-            src_dir = temp_dir / "terraform"
-            if not src_dir.exists():
-                return False
+        logger.info("PostgreSQL-Datenbank wiederhergestellt")
+        return True
 
-            dst_dir = self.data_dir / "terraform"
-            dst_dir.mkdir(parents=True, exist_ok=True)
-
-            for state_file in ["terraform.tfstate", "terraform.tfstate.backup"]:
-                src = src_dir / state_file
-                if src.exists():
-                    shutil.copy2(src, dst_dir / state_file)
+    def _restore_files(self, src_dir: Path, dst_dir: Path, names: List[str], dry_run: bool = False) -> bool:
+        """
+        Stellt einzelne Dateien wieder her (Config, SSH-Keys, Terraform State).
 
-            logger.info("Terraform State wiederhergestellt")
+        Jede Datei wird als .<name>.restore neben dem Ziel abgelegt und per
+        os.replace getauscht; die bisherige Datei bleibt als .pre-restore.
+        ZIP-Eintraege tragen keine Rechte, private SSH-Keys erhalten daher
+        vor dem Tausch wieder 0600.
+        """
+        files = [name for name in names if (src_dir / name).exists()]
+        if not files:
+            return False
+        if dry_run:
             return True
 
-        except Exception as e:
-            logger.error(f"Terraform-Restore fehlgeschlagen: {e}")
+        dst_dir.mkdir(parents=True, exist_ok=True)
+        for name in files:
+            dst = dst_dir / name
+            staged = dst_dir / f".{name}.restore"
+            shutil.copy2(src_dir / name, staged)
+            if name in SSH_PRIVATE_KEY_FILES:
+                os.chmod(staged, 0o600)
+            if dst.exists():
+                previous = dst_dir / f"{name}.pre-restore"
+                previous.unlink(missing_ok=True)
+                _link_or_copy(dst, previous)
+            os.replace(staged, dst)
+
+        logger.info(f"Dateien wiederhergestellt: {dst_dir.name} ({len(files)})")
+        return True
+
+    def _restore_directory(self, src_dir: Path, dst_dir: Path, dry_run: bool = False) -> bool:
+        """
+        Stellt ein Verzeichnis wieder her.
+
+        Das neue Verzeichnis entsteht als .<name>.restore neben dem Ziel:
+        Hardlinks auf den aktuellen Stand (nicht im Backup enthaltene Dateien
+        bleiben erhalten), darueber die Dateien aus dem Backup. Danach werden
+        die Verzeichnisse per rename getauscht.
+        """
+        if not src_dir.exists():
             return False
 
-    def _restore_directory(self, src_dir: Path, dst_dir: Path) -> bool:
-        """Stellt ein Verzeichnis wieder her"""
+        dst_dir.parent.mkdir(parents=True, exist_ok=True)
+        staged = dst_dir.with_name(f".{dst_dir.name}.restore")
+        previous = dst_dir.with_name(f".{dst_dir.name}.pre-restore")
+        for path in (staged, previous):
+            if path.exists():
+                shutil.rmtree(path)
+
         try:
-            if not src_dir.exists():
-                return False
+            if dst_dir.exists():
+                shutil.copytree(dst_dir, staged, symlinks=True, copy_function=_link_or_copy)
+            else:
+                staged.mkdir()
+
+            for src in src_dir.rglob("*"):
+                if src.is_dir():
+                    continue
+                target = staged / src.relative_to(src_dir)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                # Hardlink loesen, sonst aenderte sich die Live-Datei mit
+                target.unlink(missing_ok=True)
+                shutil.move(src, target)
+
+            if dry_run:
+                return True
 
-            dst_dir.mkdir(parents=True, exist_ok=True)
-            shutil.copytree(src_dir, dst_dir, dirs_exist_ok=True)
-            logger.info(f"Verzeichnis wiederhergestellt: {dst_dir.name}")
-            return True
+            if not dst_dir.exists():
+                os.rename(staged, dst_dir)
+            elif dst_dir.is_symlink() or os.path.ismount(dst_dir):
+                # Symlink/Mountpoint bleibt bestehen, Inhalt kopieren
+                shutil.copytree(staged, dst_dir, symlinks=True, dirs_exist_ok=True)
+            else:
+                try:
+                    os.rename(dst_dir, previous)
+                except OSError as e:
+                    # z.B. Bind-Mount im Container: nicht tauschbar
+                    logger.warning(f"{dst_dir} nicht tauschbar ({e}), kopiere Inhalt")
+                    shutil.copytree(staged, dst_dir, symlinks=True, dirs_exist_ok=True)
+                else:
+                    try:
+                        os.rename(staged, dst_dir)
+                    except OSError:
+                        os.rename(previous, dst_dir)
+                        raise
+                    shutil.rmtree(previous)
 
-        except Exception as e:
-            logger.error(f"Verzeichnis-Restore fehlgeschlagen: {e}")
-            return False
+        finally:
+            if staged.exists():
+                shutil.rmtree(staged)
+
+        logger.info(f"Verzeichnis wiederhergestellt: {dst_dir.name}")
+        return True
 
     # -------------------------------------------------------------------------
     # Backup-Verwaltung
     # -------------------------------------------------------------------------
 
     async def list_backups(self) -> List[BackupInfo]:
-        """Listet alle vorhandenen Backups"""
+        """
+        Listet alle vorhandenen Backups.
+
+        Lokale Historie plus Backups die nur im Backup-Ziel liegen (aus dem
+        zwischengespeicherten Remote-Katalog, kein Listing des Buckets).
+        """
         async with async_session() as session:
             result = await session.execute(
                 select(BackupHistory).order_by(BackupHistory.created_at.desc())
             )
             backups = result.scalars().all()
 
-            return [
+            infos = [
                 BackupInfo(
                     id=b.id,
                     filename=b.filename,
                     created_at=b.created_at,
                     size_bytes=b.size_bytes or 0,
+                    logical_size_bytes=b.logical_size,
+                    storage=b.storage or "zip",
                     components=json.loads(b.components) if b.components else [],
                     is_scheduled=b.is_scheduled,
-                    status=b.status
+                    status=b.status,
+                    checksum=b.checksum,
+                    base_backup_id=b.base_backup_id,
+                    location=b.location or "local",
+                    remote_status=b.remote_status
                 )
                 for b in backups
             ]
 
+        known = {info.id for info in infos}
+        remote = self._cached_remote_index()
+        infos.extend(
+            BackupInfo(**entry, location="remote", remote_status="uploaded")
+            for backup_id, entry in remote.items()
+            if backup_id not in known
+        )
+        infos.sort(key=lambda info: info.created_at, reverse=True)
+        return infos
+
     async def get_backup_path(self, backup_id: str) -> Optional[Path]:
         """Gibt den Pfad zu einem Backup zurueck"""
         async with async_session() as session:
@@ -661,11 +1113,74 @@ class BackupService:
             backup = result.scalar_one_or_none()
 
             if backup:
-                path = self.backup_dir / backup.filename
+                path = self._backup_file(backup)
                 if path.exists():
                     return path
+                if backup.location == "local":
+                    return None
 
+        # Nur im Backup-Ziel: herunterladen (lokaler Cache)
+        entry = (await self._load_remote_index()).get(backup_id)
+        if entry is None:
             return None
+        try:
+            return await asyncio.to_thread(self._fetch_remote, entry["filename"])
+        except Exception as e:
+            logger.error(f"Backup {entry['filename']} nicht aus dem Backup-Ziel ladbar: {e}")
+            return None
+
+    async def export_backup(
+        self, backup_id: str, export_path: Optional[Path] = None
+    ) -> Optional[Tuple[Path, bool]]:
+        """
+        Liefert ein Backup als ZIP-Datei (z.B. fuer den Download).
+
+        Repository-Snapshots werden dafuer in eine temporaere ZIP exportiert.
+
+        Args:
+            export_path: Ziel des Exports; ein dort bereits vorhandener
+                Export wird wiederverwendet (Fortsetzen eines Uploads)
+
+        Returns:
+            (Pfad, temporaer) oder None
+        """
+        path = await self.get_backup_path(backup_id)
+        if path is None or path.parent != self.repository.snapshots_dir:
+            return (path, False) if path else None
+
+        if export_path is None:
+            export_path = self.backup_dir / f".export_{backup_id}.zip"
+        elif export_path.exists():
+            # ArchiveWriter benennt erst nach close() um, die Datei ist vollstaendig
+            return export_path, True
+        writer = ArchiveWriter(export_path)
+        try:
+            await asyncio.to_thread(self.repository.export_zip, backup_id, writer)
+        except Exception:
+            writer.abort()
+            raise
+        return export_path, True
+
+    async def get_repository_stats(self) -> RepositoryStats:
+        """Kennzahlen des deduplizierten Backup-Repositorys"""
+        return RepositoryStats(**await asyncio.to_thread(self.repository.stats))
+
+    def _backup_file(self, backup: BackupHistory) -> Path:
+        """Datei eines Backups (ZIP oder Snapshot-Index)"""
+        if backup.storage == "repository":
+            return self.repository.snapshot_path(backup.id)
+        return self.backup_dir / backup.filename
+
+    async def _delete_backup_file(self, backup: BackupHistory):
+        """Loescht die Datei bzw. den Snapshot samt freigewordener Bloecke"""
+        if backup.storage == "repository":
+            async with self._lock:
+                await asyncio.to_thread(self.repository.delete_snapshot, backup.id)
+            return
+        backup_path = self.backup_dir / backup.filename
+        if backup_path.exists():
+            backup_path.unlink()
+        self._forget_sqlite_base(backup.id)
 
     async def delete_backup(self, backup_id: str) -> bool:
         """Loescht ein Backup"""
@@ -675,14 +1190,21 @@ class BackupService:
                     select(BackupHistory).where(BackupHistory.id == backup_id)
                 )
                 backup = result.scalar_one_or_none()
+                remote = await self._load_remote_index()
 
                 if not backup:
-                    return False
-
-                # Datei loeschen
-                backup_path = self.backup_dir / backup.filename
-                if backup_path.exists():
-                    backup_path.unlink()
+                    if backup_id not in remote:
+                        return False
+                    # Nur im Backup-Ziel vorhanden
+                    await self._delete_remote(backup_id, remote[backup_id]["filename"])
+                    logger.info(f"Backup im Backup-Ziel geloescht: {remote[backup_id]['filename']}")
+                    return True
+
+                # Datei loeschen (lokal und im Backup-Ziel)
+                if backup.location != "remote":
+                    await self._delete_backup_file(backup)
+                if backup.location != "local" or backup_id in remote:
+                    await self._delete_remote(backup_id, self._remote_filename(backup))
 
                 # DB-Eintrag loeschen
                 await session.execute(
@@ -690,6 +1212,10 @@ class BackupService:
                 )
                 await session.commit()
 
+                # Export und Status eines abgebrochenen Uploads
+                for leftover in (f"{backup_id}.zip", f"{backup_id}.json"):
+                    (self.backup_dir / ".uploads" / leftover).unlink(missing_ok=True)
+
                 logger.info(f"Backup geloescht: {backup.filename}")
                 return True
 
@@ -698,7 +1224,14 @@ class BackupService:
             return False
 
     async def cleanup_old_backups(self, retention_days: int) -> int:
-        """Loescht alte Backups basierend auf Retention"""
+        """
+        Loescht alte Backups basierend auf Retention.
+
+        retention_days gilt nur lokal: hochgeladene Backups verlieren die
+        lokale Datei und bleiben im Backup-Ziel, noch nicht hochgeladene
+        bleiben erhalten. Die Aufbewahrung im Backup-Ziel regelt
+        BACKUP_REMOTE_RETENTION_DAYS (cleanup_remote_backups).
+        """
         from datetime import timedelta
 
         cutoff = datetime.now() - timedelta(days=retention_days)
@@ -708,15 +1241,35 @@ class BackupService:
             result = await session.execute(
                 select(BackupHistory).where(
                     BackupHistory.created_at < cutoff,
-                    BackupHistory.is_scheduled == True
+                    BackupHistory.is_scheduled == True,
+                    BackupHistory.location != "remote"
                 )
             )
             old_backups = result.scalars().all()
 
+            # Basis-Backups die von verbleibenden Differenzen benoetigt werden behalten
+            old_ids = [b.id for b in old_backups]
+            result = await session.execute(
+                select(BackupHistory.base_backup_id).where(
+                    BackupHistory.base_backup_id.is_not(None),
+                    BackupHistory.id.not_in(old_ids),
+                )
+            )
+            referenced = set(result.scalars().all())
+
             for backup in old_backups:
-                backup_path = self.backup_dir / backup.filename
-                if backup_path.exists():
-                    backup_path.unlink()
+                if backup.id in referenced:
+                    continue
+                if backup.location == "both":
+                    # Bleibt im Backup-Ziel
+                    await self._delete_backup_file(backup)
+                    backup.location = "remote"
+                    deleted += 1
+                    continue
+                if settings.backup_target:
+                    logger.warning(f"Backup {backup.filename} noch nicht hochgeladen, bleibt lokal")
+                    continue
+                await self._delete_backup_file(backup)
 
                 await session.execute(
                     delete(BackupHistory).where(BackupHistory.id == backup.id)
@@ -725,11 +1278,299 @@ class BackupService:
 
             await session.commit()
 
+        # Bloecke abgebrochener Snapshots
+        async with self._lock:
+            await asyncio.to_thread(self.repository.gc)
+
+        # Aus dem Backup-Ziel geladene Kopien (jederzeit neu ladbar)
+        cache_dir = self.backup_dir / ".remote"
+        if cache_dir.exists():
+            for cached in cache_dir.iterdir():
+                if cached.stat().st_mtime < cutoff.timestamp():
+                    cached.unlink(missing_ok=True)
+
         if deleted > 0:
-            logger.info(f"{deleted} alte Backups geloescht (Retention: {retention_days} Tage)")
+            logger.info(f"{deleted} alte Backups lokal geloescht (Retention: {retention_days} Tage)")
+
+        if settings.backup_target:
+            await self.cleanup_remote_backups()
+
+        return deleted
+
+    # -------------------------------------------------------------------------
+    # Backup-Ziel (Remote)
+    # -------------------------------------------------------------------------
+
+    def _remote_key(self, filename: str) -> str:
+        prefix = settings.backup_s3_prefix.strip("/")
+        return f"{prefix}/{filename}" if prefix else filename
+
+    def _remote_filename(self, backup: BackupHistory) -> str:
+        """Dateiname im Backup-Ziel (Repository-Snapshots als ZIP)"""
+        if backup.storage == "repository":
+            return f"{backup.filename}.zip"
+        return backup.filename
+
+    async def upload_backup(self, backup_id: str) -> bool:
+        """
+        Laedt ein lokales Backup in das Backup-Ziel hoch.
+
+        Ein abgebrochener Multipart-Upload wird beim naechsten Aufruf
+        fortgesetzt (Status unter backups/.uploads). Repository-Snapshots
+        werden als ZIP exportiert und hochgeladen; der Export bleibt bis zum
+        erfolgreichen Upload liegen, damit der Status zur Quelldatei passt.
+        """
+        async with self._upload_lock:
+            async with async_session() as session:
+                result = await session.execute(
+                    select(BackupHistory).where(BackupHistory.id == backup_id)
+                )
+                backup = result.scalar_one_or_none()
+                if not backup or backup.location != "local":
+                    return bool(backup)
+
+                backup.remote_status = "uploading"
+                await session.commit()
+
+                filename = self._remote_filename(backup)
+                exported = None
+                started = time.monotonic()
+                try:
+                    state_dir = self.backup_dir / ".uploads"
+                    state_dir.mkdir(exist_ok=True)
+                    export = await self.export_backup(backup_id, state_dir / f"{backup_id}.zip")
+                    if export is None:
+                        raise FileNotFoundError(f"Backup-Datei fehlt: {backup.filename}")
+                    path, temporary = export
+                    exported = path if temporary else None
+                    size = path.stat().st_size
+
+                    await asyncio.to_thread(
+                        self._upload_sync, path, self._remote_key(filename), state_dir / f"{backup_id}.json"
+                    )
+                    if exported:
+                        exported.unlink(missing_ok=True)
+
+                    entry = {
+                        "id": backup.id,
+                        "filename": filename,
+                        "created_at": backup.created_at.isoformat(),
+                        "size_bytes": size,
+                        "logical_size_bytes": backup.logical_size,
+                        "storage": "zip",
+                        "components": json.loads(backup.components) if backup.components else [],
+                        "is_scheduled": backup.is_scheduled,
+                        "status": backup.status,
+                        "checksum": backup.checksum if not exported else None,
+                        "base_backup_id": backup.base_backup_id,
+                    }
+                    await self._update_remote_index(lambda index: index.__setitem__(backup_id, entry))
+
+                    backup.location = "both"
+                    backup.remote_status = "uploaded"
+                    await session.commit()
+
+                    duration = time.monotonic() - started
+                    logger.info(
+                        f"Backup hochgeladen: {filename} ({size / 1024 / 1024:.1f} MB in {duration:.1f} s, "
+                        f"{size / 1024 / 1024 / max(duration, 0.001):.1f} MB/s)"
+                    )
+                    return True
+
+                except Exception as e:
+                    logger.error(f"Upload von {filename} fehlgeschlagen: {e}")
+                    backup.remote_status = "failed"
+                    await session.commit()
+                    return False
+
+    async def sync_remote(self) -> int:
+        """Laedt alle noch nicht hochgeladenen Backups hoch (setzt Abbrueche fort)"""
+        if not settings.backup_target:
+            return 0
+        async with async_session() as session:
+            result = await session.execute(
+                select(BackupHistory.id).where(BackupHistory.location == "local")
+            )
+            pending = result.scalars().all()
 
+        uploaded = 0
+        for backup_id in pending:
+            if await self.upload_backup(backup_id):
+                uploaded += 1
+        return uploaded
+
+    async def cleanup_remote_backups(self) -> int:
+        """Loescht Backups im Backup-Ziel nach BACKUP_REMOTE_RETENTION_DAYS"""
+        from datetime import timedelta
+
+        retention_days = settings.backup_remote_retention_days
+        if retention_days <= 0:
+            return 0
+
+        cutoff = datetime.now() - timedelta(days=retention_days)
+        remote = await self._load_remote_index(refresh=True)
+        old = {
+            backup_id: entry for backup_id, entry in remote.items()
+            if entry.get("is_scheduled") and datetime.fromisoformat(entry["created_at"]) < cutoff
+        }
+        # Basis-Backups verbleibender Differenzen behalten
+        referenced = {
+            entry.get("base_backup_id") for backup_id, entry in remote.items() if backup_id not in old
+        }
+
+        deleted = 0
+        for backup_id, entry in old.items():
+            if backup_id in referenced:
+                continue
+            try:
+                await self._delete_remote(backup_id, entry["filename"])
+                deleted += 1
+            except Exception as e:
+                logger.error(f"Backup {entry['filename']} im Backup-Ziel nicht geloescht: {e}")
+
+        if deleted > 0:
+            logger.info(f"{deleted} alte Backups im Backup-Ziel geloescht (Retention: {retention_days} Tage)")
         return deleted
 
+    async def _delete_remote(self, backup_id: str, filename: str):
+        """Loescht ein Backup im Backup-Ziel und passt Katalog und Historie an"""
+        await asyncio.to_thread(self._with_target, lambda target: target.delete(self._remote_key(filename)))
+        await self._update_remote_index(lambda index: index.pop(backup_id, None))
+        (self.backup_dir / ".remote" / filename).unlink(missing_ok=True)
+
+        async with async_session() as session:
+            result = await session.execute(
+                select(BackupHistory).where(BackupHistory.id == backup_id)
+            )
+            backup = result.scalar_one_or_none()
+            if backup is None:
+                return
+            if backup.location == "remote":
+                await session.execute(delete(BackupHistory).where(BackupHistory.id == backup_id))
+            else:
+                backup.location = "local"
+                backup.remote_status = None
+            await session.commit()
+
+    async def _load_remote_index(self, refresh: bool = False) -> dict:
+        """
+        Remote-Katalog {backup_id: Eintrag}.
+
+        Wird aus dem Speicher bzw. backups/remote_index.json bedient und erst
+        nach BACKUP_REMOTE_INDEX_TTL Sekunden neu aus dem Backup-Ziel gelesen;
+        ist das Ziel nicht erreichbar, gilt der letzte bekannte Stand.
+        """
+        if not settings.backup_target:
+            return {}
+
+        ttl = settings.backup_remote_index_ttl
+        if not refresh and self._remote_index is not None and time.monotonic() - self._remote_index_at < ttl:
+            return self._remote_index
+
+        cache = self.backup_dir / REMOTE_INDEX_FILE
+        if not refresh and self._remote_index is None and cache.exists():
+            try:
+                if time.time() - cache.stat().st_mtime < ttl:
+                    self._remote_index = json.loads(cache.read_text())["backups"]
+                    self._remote_index_at = time.monotonic()
+                    return self._remote_index
+            except (OSError, ValueError, KeyError):
+                pass
+
+        async with self._index_lock:
+            try:
+                index = await asyncio.to_thread(self._with_target, self._read_remote_index)
+                self._store_remote_index(index)
+            except Exception as e:
+                logger.warning(f"Remote-Katalog nicht ladbar, verwende letzten Stand: {e}")
+                if self._remote_index is None:
+                    try:
+                        self._remote_index = json.loads(cache.read_text())["backups"]
+                    except (OSError, ValueError, KeyError):
+                        self._remote_index = {}
+                # Nicht bei jedem Aufruf erneut versuchen
+                self._remote_index_at = time.monotonic()
+        return self._remote_index
+
+    def _cached_remote_index(self) -> dict:
+        """
+        Remote-Katalog ohne Warten auf das Backup-Ziel (fuer die Backup-Liste).
+
+        Liefert den letzten bekannten Stand (Speicher bzw. remote_index.json)
+        und stoesst eine Aktualisierung im Hintergrund an, wenn er veraltet
+        ist - ein nicht erreichbares Ziel blockiert die Liste so nicht.
+        """
+        if not settings.backup_target:
+            return {}
+
+        if self._remote_index is None:
+            try:
+                cache = self.backup_dir / REMOTE_INDEX_FILE
+                index = json.loads(cache.read_text())["backups"]
+            except (OSError, ValueError, KeyError):
+                index = {}
+        else:
+            index = self._remote_index
+
+        stale = (
+            self._remote_index is None
+            or time.monotonic() - self._remote_index_at >= settings.backup_remote_index_ttl
+        )
+        if stale and (self._remote_refresh is None or self._remote_refresh.done()):
+            self._remote_refresh = asyncio.create_task(self._load_remote_index())
+        return index
+
+    async def _update_remote_index(self, change):
+        """Liest den Katalog aus dem Backup-Ziel, wendet change an und schreibt ihn zurueck"""
+        def update(target):
+            index = self._read_remote_index(target)
+            change(index)
+            target.put_bytes(
+                self._remote_key("index.json"),
+                json.dumps({"version": 1, "backups": index}, indent=2).encode(),
+            )
+            return index
+
+        async with self._index_lock:
+            self._store_remote_index(await asyncio.to_thread(self._with_target, update))
+
+    def _read_remote_index(self, target) -> dict:
+        data = target.get_bytes(self._remote_key("index.json"))
+        return json.loads(data)["backups"] if data else {}
+
+    def _store_remote_index(self, index: dict):
+        """Katalog im Speicher und als lokale Kopie ablegen"""
+        self._remote_index = index
+        self._remote_index_at = time.monotonic()
+        cache = self.backup_dir / REMOTE_INDEX_FILE
+        tmp = cache.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version": 1, "backups": index}, indent=2))
+        tmp.replace(cache)
+
+    def _with_target(self, action):
+        """Fuehrt action(target) mit einem neu erzeugten Backup-Ziel aus (Worker-Thread)"""
+        target = create_target()
+        if target is None:
+            raise BackupTargetError("Kein Backup-Ziel konfiguriert")
+        try:
+            return action(target)
+        finally:
+            target.close()
+
+    def _upload_sync(self, path: Path, key: str, state_path: Path):
+        self._with_target(lambda target: target.upload_file(path, key, state_path))
+
+    def _fetch_remote(self, filename: str) -> Path:
+        """Laedt ein Backup aus dem Backup-Ziel nach backups/.remote (Worker-Thread)"""
+        cache_dir = self.backup_dir / ".remote"
+        cache_dir.mkdir(exist_ok=True)
+        dst = cache_dir / filename
+        if not dst.exists():
+            started = time.monotonic()
+            self._with_target(lambda target: target.download_file(self._remote_key(filename), dst))
+            logger.info(f"Backup aus dem Backup-Ziel geladen: {filename} ({time.monotonic() - started:.1f} s)")
+        return dst
+
     # -------------------------------------------------------------------------
     # Zeitplan
     # -------------------------------------------------------------------------
@@ -794,6 +1635,16 @@ class BackupService:
     # Hilfsfunktionen
     # -------------------------------------------------------------------------
 
+    def _forget_sqlite_base(self, backup_id: str):
+        """Verwirft die SQLite-Basis wenn ihr Backup geloescht wird"""
+        path = self.backup_dir / SQLITE_BASE_FILE
+        try:
+            if json.loads(path.read_text()).get("backup_id") == backup_id:
+                path.unlink()
+                logger.info("SQLite-Basis verworfen, naechstes inkrementelles Backup ist voll")
+        except (OSError, ValueError):
+            pass
+
     def _calc_checksum(self, file_path: Path) -> str:
         """Berechnet SHA256-Checksum einer Datei"""
         sha256 = hashlib.sha256()
@@ -808,7 +1659,11 @@ class BackupService:
         filename: str,
         size_bytes: int,
         components: List[str],
-        is_scheduled: bool
+        is_scheduled: bool,
+        checksum: Optional[str] = None,
+        base_backup_id: Optional[str] = None,
+        storage: str = "zip",
+        logical_size: Optional[int] = None
     ):
         """Speichert Backup in der Historie"""
         async with async_session() as session:
@@ -819,7 +1674,11 @@ class BackupService:
                 size_bytes=size_bytes,
                 components=json.dumps(components),
                 is_scheduled=is_scheduled,
-                status="completed"
+                status="completed",
+                checksum=checksum,
+                base_backup_id=base_backup_id,
+                storage=storage,
+                logical_size=logical_size
             )
             session.add(history)
             await session.commit()
@@ -0,0 +1,429 @@
+"""
+Backup-Ziele - externe Ablage fuer Backup-Archive
+
+Ein Backup-Ziel nimmt fertige Archive auf (upload_file), liefert sie fuer
+Download/Restore zurueck (download_file) und speichert kleine Objekte wie
+den Katalog (get_bytes/put_bytes).
+
+Implementierungen:
+- s3: S3-kompatibler Object Storage (AWS, MinIO, Ceph RGW, ...), eigene
+  Signatur (SigV4) ueber httpx, keine zusaetzliche Abhaengigkeit.
+  Grosse Dateien als Multipart-Upload: Teile werden blockweise gelesen und
+  parallel hochgeladen, der Stand liegt in einer Status-Datei und ein
+  abgebrochener Upload wird beim naechsten Versuch fortgesetzt.
+
+Laeuft synchron und ist fuer einen Worker-Thread gedacht.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import math
+import threading
+import time
+import xml.etree.ElementTree as ET
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Optional
+from urllib.parse import quote
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# S3-Grenzen fuer Multipart-Uploads
+S3_MIN_PART_SIZE = 5 * 1024 * 1024
+S3_MAX_PARTS = 10000
+
+# Versuche pro Teil bzw. Anfrage
+S3_RETRIES = 3
+
+# Blockgroesse beim Download
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class BackupTargetError(Exception):
+    """Fehler beim Zugriff auf ein Backup-Ziel"""
+
+
+class BackupTarget(ABC):
+    """Abstrakte Basisklasse fuer Backup-Ziele"""
+
+    name = ""
+
+    @abstractmethod
+    def upload_file(
+        self,
+        path: Path,
+        key: str,
+        state_path: Optional[Path] = None,
+        progress: Optional[Callable[[int], None]] = None,
+    ):
+        """Laedt path unter key hoch (state_path: Status fuer Fortsetzung)"""
+        pass
+
+    @abstractmethod
+    def download_file(self, key: str, dst: Path):
+        """Laedt key nach dst herunter"""
+        pass
+
+    @abstractmethod
+    def delete(self, key: str):
+        """Loescht key (fehlende Objekte sind kein Fehler)"""
+        pass
+
+    @abstractmethod
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        """Kleines Objekt lesen, None wenn nicht vorhanden"""
+        pass
+
+    @abstractmethod
+    def put_bytes(self, key: str, data: bytes):
+        """Kleines Objekt schreiben"""
+        pass
+
+    def close(self):
+        pass
+
+
+def _xml_strip(root: ET.Element) -> ET.Element:
+    """Entfernt XML-Namespaces (S3 antwortet mit xmlns)"""
+    for element in root.iter():
+        if "}" in element.tag:
+            element.tag = element.tag.split("}", 1)[1]
+    return root
+
+
+class S3Target(BackupTarget):
+    """S3-kompatibles Backup-Ziel (Path-Style, Signature V4)"""
+
+    name = "s3"
+
+    def __init__(
+        self,
+        endpoint: str,
+        bucket: str,
+        access_key: str,
+        secret_key: str,
+        region: str = "us-east-1",
+        part_size: int = 16 * 1024 * 1024,
+        threads: int = 4,
+        timeout: float = 60.0,
+    ):
+        if not endpoint or not bucket:
+            raise BackupTargetError("S3-Endpunkt und Bucket muessen konfiguriert sein")
+        self.endpoint = endpoint.rstrip("/")
+        self.host = httpx.URL(self.endpoint).netloc.decode()
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.part_size = max(part_size, S3_MIN_PART_SIZE)
+        self.threads = max(threads, 1)
+        self._client = httpx.Client(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=self.threads + 2),
+        )
+
+    @classmethod
+    def from_settings(cls) -> "S3Target":
+        return cls(
+            endpoint=settings.backup_s3_endpoint,
+            bucket=settings.backup_s3_bucket,
+            access_key=settings.backup_s3_access_key,
+            secret_key=settings.backup_s3_secret_key,
+            region=settings.backup_s3_region,
+            part_size=settings.backup_s3_part_size_mb * 1024 * 1024,
+            threads=settings.backup_s3_upload_threads,
+        )
+
+    # -------------------------------------------------------------------------
+    # Signatur und Anfragen
+    # -------------------------------------------------------------------------
+
+    def _signing_key(self, date: str) -> bytes:
+        key = ("AWS4" + self.secret_key).encode()
+        for part in (date, self.region, "s3", "aws4_request"):
+            key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+        return key
+
+    def _authorization(self, method: str, path: str, canonical_query: str, headers: Dict[str, str]) -> str:
+        """Authorization-Header (SigV4) ueber alle uebergebenen Header"""
+        amz_date = headers["x-amz-date"]
+        signed_headers = ";".join(sorted(headers))
+        canonical_request = "\n".join([
+            method,
+            path,
+            canonical_query,
+            "".join(f"{name}:{headers[name]}\n" for name in sorted(headers)),
+            signed_headers,
+            headers["x-amz-content-sha256"],
+        ])
+        scope = f"{amz_date[:8]}/{self.region}/s3/aws4_request"
+        string_to_sign = "\n".join([
+            "AWS4-HMAC-SHA256",
+            amz_date,
+            scope,
+            hashlib.sha256(canonical_request.encode()).hexdigest(),
+        ])
+        signature = hmac.new(
+            self._signing_key(amz_date[:8]), string_to_sign.encode(), hashlib.sha256
+        ).hexdigest()
+        return (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key}/{scope}, "
+            f"SignedHeaders={signed_headers}, Signature={signature}"
+        )
+
+    def _request(
+        self,
+        method: str,
+        key: str = "",
+        query: Optional[Dict[str, str]] = None,
+        body: bytes = b"",
+        stream: bool = False,
+    ) -> httpx.Response:
+        """Signierte Anfrage (SigV4), wiederholt bei Netzwerk- und 5xx-Fehlern"""
+        path = "/" + quote(self.bucket, safe="") + ("/" + quote(key, safe="/~") if key else "")
+        canonical_query = "&".join(
+            f"{quote(k, safe='-_.~')}={quote(v, safe='-_.~')}"
+            for k, v in sorted((query or {}).items())
+        )
+        url = self.endpoint + path + (f"?{canonical_query}" if canonical_query else "")
+        payload_hash = hashlib.sha256(body).hexdigest()
+
+        for attempt in range(1, S3_RETRIES + 1):
+            headers = {
+                "host": self.host,
+                "x-amz-content-sha256": payload_hash,
+                "x-amz-date": datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ"),
+            }
+            headers["authorization"] = self._authorization(method, path, canonical_query, headers)
+
+            try:
+                request = self._client.build_request(method, url, headers=headers, content=body)
+                response = self._client.send(request, stream=stream)
+            except httpx.TransportError as e:
+                if attempt == S3_RETRIES:
+                    raise BackupTargetError(f"S3 nicht erreichbar: {e}") from e
+            else:
+                if response.status_code < 500 or attempt == S3_RETRIES:
+                    return response
+                response.close()
+            time.sleep(2 ** attempt)
+
+    def _check(self, response: httpx.Response, action: str) -> httpx.Response:
+        if response.is_success:
+            return response
+        code = str(response.status_code)
+        try:
+            response.read()
+            code = _xml_strip(ET.fromstring(response.content)).findtext("Code") or code
+        except ET.ParseError:
+            pass
+        finally:
+            response.close()
+        raise BackupTargetError(f"S3 {action} fehlgeschlagen: {code}")
+
+    # -------------------------------------------------------------------------
+    # Objekte
+    # -------------------------------------------------------------------------
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        response = self._request("GET", key)
+        if response.status_code == 404:
+            return None
+        return self._check(response, f"GET {key}").content
+
+    def put_bytes(self, key: str, data: bytes):
+        self._check(self._request("PUT", key, body=data), f"PUT {key}")
+
+    def delete(self, key: str):
+        response = self._request("DELETE", key)
+        if response.status_code != 404:
+            self._check(response, f"DELETE {key}")
+
+    def download_file(self, key: str, dst: Path):
+        partial = dst.with_name(dst.name + ".partial")
+        response = self._check(self._request("GET", key, stream=True), f"GET {key}")
+        try:
+            with open(partial, "wb") as f:
+                for chunk in response.iter_bytes(DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+        except Exception:
+            partial.unlink(missing_ok=True)
+            raise
+        finally:
+            response.close()
+        partial.replace(dst)
+
+    # -------------------------------------------------------------------------
+    # Upload
+    # -------------------------------------------------------------------------
+
+    def upload_file(
+        self,
+        path: Path,
+        key: str,
+        state_path: Optional[Path] = None,
+        progress: Optional[Callable[[int], None]] = None,
+    ):
+        """
+        Laedt eine Datei hoch: einteilig bis zur Teilgroesse, sonst als
+        Multipart-Upload mit parallelen Teilen.
+
+        state_path haelt Upload-ID und fertige Teile; existiert die Datei
+        und passt sie zur Quelle, wird der Upload fortgesetzt statt neu
+        begonnen. Nach Abschluss wird sie geloescht.
+        """
+        stat = path.stat()
+        if stat.st_size <= self.part_size:
+            self.put_bytes(key, path.read_bytes())
+            if progress:
+                progress(stat.st_size)
+            return
+
+        part_size = max(self.part_size, math.ceil(stat.st_size / S3_MAX_PARTS))
+        part_count = math.ceil(stat.st_size / part_size)
+        source = {"key": key, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "part_size": part_size}
+
+        state = self._load_state(state_path, source)
+        if state is None:
+            state = dict(source, upload_id=self._create_upload(key), parts={})
+            self._save_state(state_path, state)
+        else:
+            logger.info(f"Setze Upload von {key} fort ({len(state['parts'])}/{part_count} Teile)")
+        upload_id = state["upload_id"]
+        if progress and state["parts"]:
+            progress(sum(min(part_size, stat.st_size - (int(n) - 1) * part_size) for n in state["parts"]))
+
+        lock = threading.Lock()
+        # Hoechstens threads Teile im Speicher in Arbeit (plus einer beim Lesen)
+        slots = threading.BoundedSemaphore(self.threads)
+        errors = []
+
+        def upload_part(number: int, data: bytes):
+            try:
+                if errors:
+                    return
+                response = self._request(
+                    "PUT", key, {"partNumber": str(number), "uploadId": upload_id}, body=data
+                )
+                etag = self._check(response, f"Upload Teil {number}").headers.get("etag", "")
+                with lock:
+                    state["parts"][str(number)] = etag
+                    self._save_state(state_path, state)
+                if progress:
+                    progress(len(data))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                slots.release()
+
+        with open(path, "rb") as f, ThreadPoolExecutor(max_workers=self.threads) as pool:
+            for number in range(1, part_count + 1):
+                if errors:
+                    break
+                if str(number) in state["parts"]:
+                    continue
+                slots.acquire()
+                f.seek((number - 1) * part_size)
+                pool.submit(upload_part, number, f.read(part_size))
+
+        if errors:
+            # Upload bleibt offen und kann fortgesetzt werden
+            raise errors[0]
+
+        parts = "".join(
+            f"<Part><PartNumber>{n}</PartNumber><ETag>{state['parts'][str(n)]}</ETag></Part>"
+            for n in range(1, part_count + 1)
+        )
+        body = f"<CompleteMultipartUpload>{parts}</CompleteMultipartUpload>".encode()
+        response = self._check(
+            self._request("POST", key, {"uploadId": upload_id}, body=body), f"Abschluss {key}"
+        )
+        # S3 meldet Fehler beim Abschluss teils mit Status 200
+        if b"<Error>" in response.content:
+            raise BackupTargetError(f"S3 Abschluss {key} fehlgeschlagen: {response.text[:200]}")
+        if state_path:
+            state_path.unlink(missing_ok=True)
+
+    def _create_upload(self, key: str) -> str:
+        response = self._check(self._request("POST", key, {"uploads": ""}), f"Multipart-Start {key}")
+        upload_id = _xml_strip(ET.fromstring(response.content)).findtext("UploadId")
+        if not upload_id:
+            raise BackupTargetError("S3 lieferte keine UploadId")
+        return upload_id
+
+    def _uploaded_parts(self, key: str, upload_id: str) -> Optional[Dict[str, str]]:
+        """Bereits hochgeladene Teile laut Server, None wenn der Upload nicht mehr existiert"""
+        parts = {}
+        marker = "0"
+        while True:
+            response = self._request(
+                "GET", key, {"uploadId": upload_id, "part-number-marker": marker}
+            )
+            if response.status_code == 404:
+                return None
+            root = _xml_strip(ET.fromstring(self._check(response, f"Teile {key}").content))
+            for part in root.iter("Part"):
+                parts[part.findtext("PartNumber")] = part.findtext("ETag")
+            if root.findtext("IsTruncated") != "true":
+                return parts
+            marker = root.findtext("NextPartNumberMarker") or str(max(map(int, parts)))
+
+    def _load_state(self, state_path: Optional[Path], source: dict) -> Optional[dict]:
+        """Status eines offenen Uploads derselben Quelldatei"""
+        if state_path is None or not state_path.exists():
+            return None
+        try:
+            state = json.loads(state_path.read_text())
+        except (OSError, ValueError):
+            return None
+        if any(state.get(name) != value for name, value in source.items()):
+            # Quelle hat sich geaendert, alten Upload verwerfen
+            self._abort_upload(state.get("key"), state.get("upload_id"))
+            return None
+        parts = self._uploaded_parts(state["key"], state["upload_id"])
+        if parts is None:
+            return None
+        # Der Server ist massgeblich (dort fehlende Teile werden neu geladen)
+        state["parts"] = parts
+        return state
+
+    def _save_state(self, state_path: Optional[Path], state: dict):
+        if state_path is None:
+            return
+        tmp = state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(state))
+        tmp.replace(state_path)
+
+    def _abort_upload(self, key: Optional[str], upload_id: Optional[str]):
+        if not key or not upload_id:
+            return
+        try:
+            self._request("DELETE", key, {"uploadId": upload_id}).close()
+        except Exception as e:
+            logger.debug(f"Multipart-Upload {upload_id} nicht abgebrochen: {e}")
+
+    def close(self):
+        self._client.close()
+
+
+# Verfuegbare Backup-Ziele (BACKUP_TARGET)
+BACKUP_TARGETS: Dict[str, Callable[[], BackupTarget]] = {
+    "s3": S3Target.from_settings,
+}
+
+
+def create_target() -> Optional[BackupTarget]:
+    """Backup-Ziel aus den Settings, None wenn nur lokal gesichert wird"""
+    name = (settings.backup_target or "").lower()
+    if not name:
+        return None
+    if name not in BACKUP_TARGETS:
+        raise BackupTargetError(f"Unbekanntes Backup-Ziel: {settings.backup_target}")
+    return BACKUP_TARGETS[name]()
@@ -5,22 +5,25 @@ Die Konfiguration (SSH-Keys, Phone-Home URL, Admin-Username) wird aus der
 Datenbank geladen (CloudInitSettings). Fallback-Defaults werden verwendet,
 wenn keine DB-Session verfuegbar ist.
 """
+import asyncio
 import yaml
-import subprocess
-import tempfile
-import os
 import logging
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Set, Tuple
 from datetime import datetime
 from pathlib import Path
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.database import async_session
 from app.schemas.cloud_init import CloudInitProfile, CLOUD_INIT_PROFILES
 from app.services.cloud_init_settings_service import CloudInitSettingsService
+from app.services.snippet_transport import TransferResult, snippet_transport
 
 logger = logging.getLogger(__name__)
 
+# Sammelfenster fuer Snippet-Uebertragungen paralleler Deploys/Destroys (Sekunden)
+SNIPPET_BATCH_WINDOW = 0.5
+
 
 class CloudInitService:
     """Service fuer Cloud-Init Konfiguration"""
@@ -33,6 +36,12 @@ class CloudInitService:
     FALLBACK_NAS_SNIPPETS_PATH: Optional[str] = None
     FALLBACK_NAS_SNIPPETS_REF: Optional[str] = None
 
+    def __init__(self):
+        # (Aktion, Node) -> [(VM-Name, Inhalt, Future)] fuer die Sammel-Uebertragung
+        self._pending: Dict[Tuple[str, str], List[tuple]] = {}
+        # Laufende _flush()-Tasks (Referenz haelt sie bis zum Ende am Leben)
+        self._flush_tasks: Set[asyncio.Task] = set()
+
     def get_profiles(self) -> List[Dict[str, Any]]:
         """Gibt alle verfuegbaren Profile zurueck"""
         return [
@@ -588,6 +597,50 @@ EOF
 
         return None
 
+    async def _get_nas_path(self, db: Optional[AsyncSession]) -> Optional[str]:
+        """NAS Snippets-Pfad aus Settings (DB) bzw. Fallback"""
+        if db:
+            settings_service = CloudInitSettingsService(db)
+            nas_config = await settings_service.get_nas_snippets_config()
+            return nas_config.get("path")
+        return self.FALLBACK_NAS_SNIPPETS_PATH
+
+    async def write_snippets_to_nas(
+        self,
+        snippets: Dict[str, str],
+        proxmox_node: str,
+        db: Optional[AsyncSession] = None,
+    ) -> List[TransferResult]:
+        """
+        Schreibt mehrere Cloud-Init Snippets ueber eine gepoolte SSH-Verbindung
+        zum Proxmox-Node (parallel, ohne Handshake pro Datei).
+
+        Args:
+            snippets: {VM-Name: Cloud-Init YAML Inhalt}
+            proxmox_node: Proxmox-Node mit NAS-Zugriff
+            db: Datenbank-Session (fuer Settings aus DB)
+
+        Returns:
+            Ergebnis mit Dauer pro Snippet (leer wenn NAS nicht konfiguriert)
+        """
+        nas_path = await self._get_nas_path(db)
+        if not nas_path:
+            logger.warning("NAS Snippets-Pfad nicht konfiguriert - ueberspringe Snippet-Upload")
+            return []
+
+        files = {
+            f"{nas_path}/{self.get_snippet_filename(vm_name)}": content
+            for vm_name, content in snippets.items()
+        }
+        results = await snippet_transport.write_files(self._get_node_ip(proxmox_node), files)
+
+        for result in results:
+            if result.success:
+                logger.info(f"Cloud-Init Snippet {result.path} auf NAS geschrieben ({result.duration_ms} ms)")
+            else:
+                logger.error(f"Fehler beim Schreiben des Cloud-Init Snippets {result.path}: {result.error}")
+        return results
+
     async def write_snippet_to_nas(
         self,
         vm_name: str,
@@ -607,53 +660,35 @@ EOF
         Returns:
             True bei Erfolg, False bei Fehler
         """
-        # NAS-Pfad aus Settings laden
-        if db:
-            settings_service = CloudInitSettingsService(db)
-            nas_config = await settings_service.get_nas_snippets_config()
-            nas_path = nas_config.get("path")
-        else:
-            nas_path = self.FALLBACK_NAS_SNIPPETS_PATH
+        results = await self.write_snippets_to_nas({vm_name: content}, proxmox_node, db)
+        return bool(results) and all(result.success for result in results)
 
-        if not nas_path:
-            logger.warning("NAS Snippets-Pfad nicht konfiguriert - ueberspringe Snippet-Upload")
-            return False
+    async def delete_snippets_from_nas(
+        self,
+        vm_names: List[str],
+        proxmox_node: str,
+        db: Optional[AsyncSession] = None,
+    ) -> List[TransferResult]:
+        """
+        Loescht mehrere Cloud-Init Snippets mit einem Befehl vom NAS.
 
-        filename = self.get_snippet_filename(vm_name)
-        remote_path = f"{nas_path}/{filename}"
+        Returns:
+            Ergebnis pro Snippet (leer wenn NAS nicht konfiguriert)
+        """
+        nas_path = await self._get_nas_path(db)
+        if not nas_path:
+            logger.warning("NAS Snippets-Pfad nicht konfiguriert - ueberspringe Snippet-Loeschung")
+            return []
 
-        try:
-            # Schreibe Content in temporaere Datei
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.yaml', delete=False) as f:
-                f.write(content)
-                temp_path = f.name
-
-            # Kopiere via SCP zum Proxmox-Node
-            node_ip = self._get_node_ip(proxmox_node)
-            scp_cmd = [
-                "scp",
-                "-i", "/root/.ssh/ansible_id",
-                "-o", "StrictHostKeyChecking=no",
-                "-o", "BatchMode=yes",
-                temp_path,
-                f"root@{node_ip}:{remote_path}"
-            ]
-
-            result = subprocess.run(scp_cmd, capture_output=True, text=True, timeout=30)
-
-            # Temporaere Datei loeschen
-            os.unlink(temp_path)
-
-            if result.returncode != 0:
-                logger.error(f"SCP Fehler: {result.stderr}")
-                return False
-
-            logger.info(f"Cloud-Init Snippet {filename} erfolgreich auf NAS geschrieben")
-            return True
+        paths = [f"{nas_path}/{self.get_snippet_filename(vm_name)}" for vm_name in vm_names]
+        results = await snippet_transport.delete_files(self._get_node_ip(proxmox_node), paths)
 
-        except Exception as e:
-            logger.error(f"Fehler beim Schreiben des Cloud-Init Snippets: {e}")
-            return False
+        for result in results:
+            if result.success:
+                logger.info(f"Cloud-Init Snippet {result.path} vom NAS geloescht ({result.duration_ms} ms)")
+            else:
+                logger.error(f"SSH Fehler beim Loeschen von {result.path}: {result.error}")
+        return results
 
     async def delete_snippet_from_nas(
         self,
@@ -672,44 +707,70 @@ EOF
         Returns:
             True bei Erfolg oder wenn Datei nicht existiert
         """
-        # NAS-Pfad aus Settings laden
-        if db:
-            settings_service = CloudInitSettingsService(db)
-            nas_config = await settings_service.get_nas_snippets_config()
-            nas_path = nas_config.get("path")
-        else:
-            nas_path = self.FALLBACK_NAS_SNIPPETS_PATH
-
-        if not nas_path:
-            logger.warning("NAS Snippets-Pfad nicht konfiguriert - ueberspringe Snippet-Loeschung")
-            return True  # Kein Fehler, nur nicht konfiguriert
+        results = await self.delete_snippets_from_nas([vm_name], proxmox_node, db)
+        # Nicht konfiguriert ist kein Fehler
+        return all(result.success for result in results)
 
-        filename = self.get_snippet_filename(vm_name)
-        remote_path = f"{nas_path}/{filename}"
-
-        try:
-            node_ip = self._get_node_ip(proxmox_node)
-            ssh_cmd = [
-                "ssh",
-                "-i", "/root/.ssh/ansible_id",
-                "-o", "StrictHostKeyChecking=no",
-                "-o", "BatchMode=yes",
-                f"root@{node_ip}",
-                f"rm -f {remote_path}"
-            ]
+    async def write_snippet_batched(self, vm_name: str, content: str, proxmox_node: str) -> bool:
+        """
+        Schreibt einen Snippet ueber die Sammel-Uebertragung.
 
-            result = subprocess.run(ssh_cmd, capture_output=True, text=True, timeout=30)
+        Zeitgleiche Aufrufe fuer denselben Node (z.B. mehrere VMs auf einmal
+        anlegen) gehen als ein write_snippets_to_nas() ueber eine Verbindung.
 
-            if result.returncode != 0:
-                logger.error(f"SSH Fehler beim Loeschen: {result.stderr}")
-                return False
+        Returns:
+            True bei Erfolg, False bei Fehler oder fehlender NAS-Konfiguration
+        """
+        return await self._submit("write", proxmox_node, vm_name, content)
 
-            logger.info(f"Cloud-Init Snippet {filename} vom NAS geloescht")
-            return True
+    async def delete_snippet_batched(self, vm_name: str, proxmox_node: str) -> bool:
+        """
+        Loescht einen Snippet ueber die Sammel-Uebertragung (z.B. Batch-Destroy).
 
+        Returns:
+            True bei Erfolg oder wenn das NAS nicht konfiguriert ist
+        """
+        return await self._submit("delete", proxmox_node, vm_name)
+
+    async def _submit(self, action: str, proxmox_node: str, vm_name: str, content: Optional[str] = None) -> bool:
+        key = (action, proxmox_node)
+        future = asyncio.get_running_loop().create_future()
+        pending = self._pending.setdefault(key, [])
+        pending.append((vm_name, content, future))
+        if len(pending) == 1:
+            task = asyncio.create_task(self._flush(key))
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+        return await future
+
+    async def _flush(self, key: Tuple[str, str]):
+        """Uebertraegt alle gesammelten Snippets einer Aktion und eines Nodes"""
+        await asyncio.sleep(SNIPPET_BATCH_WINDOW)
+        batch = self._pending.pop(key, [])
+        action, proxmox_node = key
+        try:
+            async with async_session() as db:
+                if action == "write":
+                    snippets = {vm_name: content for vm_name, content, _ in batch}
+                    results = await self.write_snippets_to_nas(snippets, proxmox_node, db)
+                else:
+                    vm_names = [vm_name for vm_name, _, _ in batch]
+                    results = await self.delete_snippets_from_nas(vm_names, proxmox_node, db)
         except Exception as e:
-            logger.error(f"Fehler beim Loeschen des Cloud-Init Snippets: {e}")
-            return False
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        success = {Path(result.path).name: result.success for result in results}
+        for vm_name, _, future in batch:
+            if future.done():
+                continue
+            if not results:
+                # NAS nicht konfiguriert: Schreiben gescheitert, Loeschen kein Fehler
+                future.set_result(action == "delete")
+            else:
+                future.set_result(success.get(self.get_snippet_filename(vm_name), False))
 
     def _get_node_ip(self, node_name: str) -> str:
         """Gibt die IP-Adresse eines Proxmox-Nodes zurueck"""
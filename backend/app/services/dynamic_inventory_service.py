@@ -0,0 +1,209 @@
+"""
+Dynamic Inventory Service - Exportiert das Inventory als JSON-Cache fuer Ansible
+
+Statt ansible-playbook bei jedem Lauf die komplette hosts.yml parsen zu
+lassen, schreibt das Backend einen vorberechneten JSON-Cache im Format von
+`ansible-inventory --list` (inkl. `_meta.hostvars`). Ein kleines
+Inventory-Script reicht diesen Cache nur noch durch.
+
+Features:
+- Atomares Schreiben (temp-Datei → rename) bei jeder Inventory-Aenderung
+- Pro Execution optional auf das -l Limit vorgefiltert
+- Pro Shard (paralleles Sharding) auf die Hosts des Shards reduziert
+- Fallback auf hosts.yml wenn der Export fehlschlaegt
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from app.config import settings
+from app.services.inventory_parser import InventoryParser
+
+logger = logging.getLogger(__name__)
+
+# Mitgeliefertes Inventory-Script (wird ins Inventory-Verzeichnis installiert)
+BUNDLED_SCRIPT = Path(__file__).resolve().parent.parent / "ansible_plugins" / "inventory" / "commander_inventory.py"
+
+
+class DynamicInventoryService:
+    """Service fuer den JSON-Export des Inventorys"""
+
+    def __init__(self):
+        self.inventory_path = Path(settings.ansible_inventory_path)
+        self.inventory_dir = self.inventory_path.parent
+        self.cache_dir = self.inventory_dir / ".cache"
+        self.cache_path = self.cache_dir / "inventory.json"
+        self.executions_dir = self.cache_dir / "executions"
+        # Script liegt neben der hosts.yml, damit group_vars/ und host_vars/
+        # weiterhin relativ zur Inventory-Quelle gefunden werden
+        self.script_path = self.inventory_dir / ".commander_inventory.py"
+
+        self._parser: Optional[InventoryParser] = None
+        self._exported_mtime: float = 0
+        self._lock = threading.Lock()
+
+    def _get_parser(self) -> InventoryParser:
+        """Gibt den internen Parser zurück (lazy, da hosts.yml fehlen kann)"""
+        if self._parser is None:
+            self._parser = InventoryParser(str(self.inventory_path))
+        return self._parser
+
+    def export(self, force: bool = False) -> Path:
+        """
+        Schreibt den JSON-Cache neu, falls sich die hosts.yml geändert hat.
+
+        Args:
+            force: Immer neu laden und schreiben (nach eigenen Schreibzugriffen)
+
+        Returns:
+            Pfad zum JSON-Cache
+        """
+        with self._lock:
+            parser = self._get_parser()
+            if force:
+                parser.reload()
+            self._install_script()
+
+            if (
+                not force
+                and self.cache_path.exists()
+                and parser.last_modified == self._exported_mtime
+            ):
+                return self.cache_path
+
+            self._write_atomic(self.cache_path, parser.to_ansible_json())
+            self._exported_mtime = parser.last_modified
+
+            logger.debug(f"Inventory-Cache geschrieben: {self.cache_path}")
+            return self.cache_path
+
+    def prepare_execution(
+        self,
+        execution_id: int,
+        limits: Optional[List[str]] = None,
+    ) -> Tuple[str, str]:
+        """
+        Bereitet die Inventory-Quelle für eine Execution vor.
+
+        Lässt sich das Limit exakt auflösen (nur Host- und Gruppennamen),
+        wird ein auf diese Hosts reduzierter Cache geschrieben. Das verkürzt
+        den Ansible-Start bei großen Inventories.
+
+        Returns:
+            Tuple[str, str]: (Pfad für -i, Pfad für COMMANDER_INVENTORY_JSON)
+        """
+        cache_path = self.export()
+
+        if not limits:
+            return str(self.script_path), str(cache_path)
+
+        with self._lock:
+            parser = self._get_parser()
+            selected = parser.resolve_limit(limits)
+            if selected is None:
+                return str(self.script_path), str(cache_path)
+
+            execution_path = self.executions_dir / f"{execution_id}.json"
+            self._write_atomic(execution_path, parser.to_ansible_json(only_hosts=selected))
+
+        return str(self.script_path), str(execution_path)
+
+    def resolve_hosts(self, limits: Optional[List[str]] = None) -> Optional[List[str]]:
+        """
+        Löst ein -l Limit in eine sortierte Hostliste auf.
+
+        Returns:
+            Alle Hosts ohne Limit, None wenn das Limit Patterns enthält
+        """
+        with self._lock:
+            parser = self._get_parser()
+            if not limits:
+                return sorted(host.name for host in parser.get_hosts())
+            selected = parser.resolve_limit(limits)
+            return sorted(selected) if selected is not None else None
+
+    def prepare_shard(self, execution_id: int, shard_index: int, hosts: List[str]) -> Tuple[str, str]:
+        """
+        Schreibt einen auf die Hosts eines Shards reduzierten Cache.
+
+        Returns:
+            Tuple[str, str]: (Pfad für -i, Pfad für COMMANDER_INVENTORY_JSON)
+        """
+        self.export()
+
+        with self._lock:
+            shard_path = self.executions_dir / f"{execution_id}-{shard_index}.json"
+            data = self._get_parser().to_ansible_json(only_hosts=set(hosts))
+            self._write_atomic(shard_path, data)
+
+        return str(self.script_path), str(shard_path)
+
+    def cleanup_execution(self, execution_id: int):
+        """Entfernt die vorgefilterten Caches einer Execution (inkl. Shards)"""
+        paths = [self.executions_dir / f"{execution_id}.json"]
+        paths.extend(self.executions_dir.glob(f"{execution_id}-*.json"))
+        for path in paths:
+            try:
+                path.unlink(missing_ok=True)
+            except Exception as e:
+                logger.debug(f"Execution-Inventory {path.name} nicht entfernt: {e}")
+
+    def _write_atomic(self, path: Path, data: dict):
+        """Schreibt JSON atomar (temp-Datei → rename)"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(suffix=".json", prefix=".inventory_", dir=path.parent)
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f, separators=(",", ":"), default=str)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    def _install_script(self):
+        """Installiert das Inventory-Script falls es fehlt oder veraltet ist"""
+        bundled = BUNDLED_SCRIPT.read_bytes()
+        if self.script_path.exists() and self.script_path.read_bytes() == bundled:
+            return
+
+        fd, temp_path = tempfile.mkstemp(suffix=".py", prefix=".inventory_", dir=self.inventory_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(bundled)
+            os.chmod(temp_path, 0o755)
+            os.replace(temp_path, self.script_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+
+# Singleton-Instanz
+_dynamic_inventory: Optional[DynamicInventoryService] = None
+
+
+def get_dynamic_inventory_service() -> DynamicInventoryService:
+    """Gibt die Singleton-Instanz des Dynamic-Inventory-Service zurück"""
+    global _dynamic_inventory
+    if _dynamic_inventory is None:
+        _dynamic_inventory = DynamicInventoryService()
+    return _dynamic_inventory
+
+
+def refresh_inventory_cache():
+    """
+    Aktualisiert den JSON-Cache nach einer Inventory-Änderung.
+
+    Fehler werden nur geloggt - Ansible-Läufe fallen dann auf hosts.yml zurück.
+    """
+    if not settings.ansible_dynamic_inventory:
+        return
+    try:
+        get_dynamic_inventory_service().export(force=True)
+    except Exception as e:
+        logger.warning(f"Inventory-Cache konnte nicht aktualisiert werden: {e}")
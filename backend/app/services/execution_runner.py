@@ -4,18 +4,42 @@ Execution Runner - Gemeinsame Logik für Prozess-Ausführung mit Log-Streaming
 Wird von AnsibleService und TerraformService verwendet.
 """
 import asyncio
+import json
+import logging
 import os
+import re
 from datetime import datetime
-from typing import List, Optional, Callable, Dict, Any
+from typing import List, Optional, Callable, Dict, Any, Tuple
 
 from sqlalchemy import select
 
 from app.database import async_session
 from app.models.execution import Execution
 from app.models.execution_log import ExecutionLog
+from app.models.execution_host_result import ExecutionHostResult
 from app.services.output_streamer import OutputStreamer
 from app.services.notification_service import NotificationService
 
+logger = logging.getLogger(__name__)
+
+# ANSI-Farbcodes (ANSIBLE_FORCE_COLOR=1) für das Recap-Parsing entfernen
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*m")
+
+# Ansible PLAY RECAP Zeile: "host : ok=3 changed=1 unreachable=0 failed=0 ..."
+RECAP_LINE = re.compile(r"^(\S+)\s+:\s+((?:[a-z]+=\d+\s*)+)$")
+
+
+def _collect_recap_line(content: str, recap: Dict[str, Dict[str, int]]):
+    """Addiert die Zähler einer PLAY RECAP Zeile zum gesammelten Recap"""
+    match = RECAP_LINE.match(ANSI_ESCAPE.sub("", content).strip())
+    if not match:
+        return
+
+    counters = recap.setdefault(match.group(1), {})
+    for pair in match.group(2).split():
+        key, value = pair.split("=", 1)
+        counters[key] = counters.get(key, 0) + int(value)
+
 
 class ExecutionRunner:
     """
@@ -27,6 +51,8 @@ class ExecutionRunner:
     - Batch-Speicherung der Logs in die DB
     - Execution-Status-Tracking
     - Callbacks für Erfolg/Fehler
+    - Optional mehrere Prozesse (Shards) unter einer Execution
+    - Optional strukturierte Events über einen Seitenkanal (COMMANDER_EVENTS_FD)
     """
 
     def __init__(
@@ -37,6 +63,9 @@ class ExecutionRunner:
         env: Optional[Dict[str, str]] = None,
         on_success: Optional[Callable] = None,
         on_failure: Optional[Callable] = None,
+        shards: Optional[List[Tuple[List[str], Dict[str, str]]]] = None,
+        structured_events: bool = False,
+        notices: Optional[List[str]] = None,
     ):
         self.execution_id = execution_id
         self.cmd = cmd
@@ -44,9 +73,16 @@ class ExecutionRunner:
         self.env = env or os.environ.copy()
         self.on_success = on_success
         self.on_failure = on_failure
+        # Optional: mehrere (cmd, env) Paare, die parallel laufen
+        self.shards = shards
+        # Pipe für JSON-Events (Ansible Callback-Plugin commander_events)
+        self.structured_events = structured_events
+        # Hinweise, die vor der Prozess-Ausgabe ins Log geschrieben werden
+        self.notices = notices or []
 
         self.sequence_num = 0
         self.logs_buffer: List[Dict[str, Any]] = []
+        self.results_buffer: List[Dict[str, Any]] = []
 
     async def run(self) -> int:
         """
@@ -59,66 +95,152 @@ class ExecutionRunner:
         await self._set_status("running")
 
         try:
-            # Prozess starten
+            for notice in self.notices:
+                await self._emit_log("stderr", f"{notice}\n")
+
+            if self.shards:
+                return_code = await self._run_shards()
+            else:
+                return_code = await self._run_process(self.cmd, self.env)
+
+            # Logs in DB speichern
+            await self._save_logs()
+
+            # Execution finalisieren
+            await self._finalize(return_code)
+
+            return return_code
+
+        except Exception as e:
+            await self._handle_error(e)
+            return -1
+
+    async def _run_shards(self) -> int:
+        """
+        Führt alle Shards parallel aus (Ansible-Sharding).
+
+        Jede Log-Zeile wird mit einem Shard-Tag versehen, die PLAY RECAP
+        Zeilen aller Shards werden am Ende zu einem Recap zusammengeführt.
+
+        Returns:
+            Erster Exit-Code ungleich 0 (auch negative Codes bei Signalen),
+            0 wenn alle Shards erfolgreich waren
+        """
+        total = len(self.shards)
+        recap: Dict[str, Dict[str, int]] = {}
+
+        tasks = [
+            asyncio.create_task(self._run_process(cmd, env, shard=(index, total), recap=recap))
+            for index, (cmd, env) in enumerate(self.shards, start=1)
+        ]
+        try:
+            return_codes = await asyncio.gather(*tasks)
+        except BaseException:
+            # Ein Shard liess sich nicht starten (oder Abbruch): uebrige
+            # Shards beenden, _run_process killt dabei seinen Prozess
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        if recap:
+            await self._emit_log("stdout", f"\nPLAY RECAP ({total} Shards) {'*' * 60}\n")
+            for host in sorted(recap):
+                counters = " ".join(f"{key}={value}" for key, value in recap[host].items())
+                await self._emit_log("stdout", f"{host:<26} : {counters}\n")
+
+        for index, code in enumerate(return_codes, start=1):
+            if code != 0:
+                await self._emit_log("stderr", f"Shard {index}/{total} beendet mit Exit-Code {code}\n")
+
+        return next((code for code in return_codes if code != 0), 0)
+
+    async def _run_process(
+        self,
+        cmd: List[str],
+        env: Dict[str, str],
+        shard: Optional[Tuple[int, int]] = None,
+        recap: Optional[Dict[str, Dict[str, int]]] = None,
+    ) -> int:
+        """
+        Startet einen Prozess und streamt stdout/stderr.
+
+        Args:
+            cmd: Kommando
+            env: Umgebungsvariablen
+            shard: Optional (Index, Anzahl) für Shard-Tags
+            recap: Optional Dict zum Sammeln der PLAY RECAP Zeilen
+
+        Returns:
+            Exit-Code des Prozesses
+        """
+        # Seitenkanal für strukturierte Events: Schreib-Ende an den Prozess vererben
+        event_read_fd = event_write_fd = None
+        if self.structured_events:
+            event_read_fd, event_write_fd = os.pipe()
+            env = {**env, "COMMANDER_EVENTS_FD": str(event_write_fd)}
+
+        # Prozess starten
+        try:
             process = await asyncio.create_subprocess_exec(
-                *self.cmd,
+                *cmd,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
                 cwd=self.cwd,
-                env=self.env,
+                env=env,
+                pass_fds=(event_write_fd,) if event_write_fd is not None else (),
+            )
+        except Exception:
+            if event_read_fd is not None:
+                os.close(event_read_fd)
+            raise
+        finally:
+            if event_write_fd is not None:
+                os.close(event_write_fd)
+
+        events_task = None
+        if event_read_fd is not None:
+            events_task = asyncio.create_task(
+                self._read_events(event_read_fd, shard[0] if shard else None)
             )
 
-            # Log-Queue für Thread-sichere Kommunikation
-            log_queue: asyncio.Queue = asyncio.Queue()
-            streams_done = [False, False]
+        prefix = f"[shard {shard[0]}/{shard[1]}] " if shard else ""
 
-            async def read_stream(stream, log_type: str, stream_idx: int):
-                """Liest einen Stream und schreibt in die Queue"""
-                try:
-                    while True:
-                        line = await stream.readline()
-                        if not line:
-                            break
-                        content = line.decode("utf-8", errors="replace")
-                        await log_queue.put((log_type, content))
-                finally:
-                    streams_done[stream_idx] = True
-
-            async def process_logs():
-                """Verarbeitet Logs aus der Queue"""
-                while True:
-                    try:
-                        log_type, content = await asyncio.wait_for(
-                            log_queue.get(), timeout=0.5
-                        )
-                        self.sequence_num += 1
-
-                        # Log für späteres Speichern vormerken
-                        self.logs_buffer.append({
-                            "execution_id": self.execution_id,
-                            "log_type": log_type,
-                            "content": content,
-                            "sequence_num": self.sequence_num,
-                        })
-
-                        # WebSocket broadcast (sofort)
-                        await OutputStreamer.broadcast(
-                            self.execution_id,
-                            {
-                                "type": log_type,
-                                "content": content,
-                                "sequence_num": self.sequence_num,
-                            }
-                        )
+        # Log-Queue für Thread-sichere Kommunikation
+        log_queue: asyncio.Queue = asyncio.Queue()
+        streams_done = [False, False]
 
-                        log_queue.task_done()
-                    except asyncio.TimeoutError:
-                        # Prüfen ob beide Streams fertig sind
-                        if all(streams_done):
-                            # Queue leeren
-                            await self._drain_queue(log_queue)
-                            break
+        async def read_stream(stream, log_type: str, stream_idx: int):
+            """Liest einen Stream und schreibt in die Queue"""
+            try:
+                while True:
+                    line = await stream.readline()
+                    if not line:
+                        break
+                    content = line.decode("utf-8", errors="replace")
+                    if recap is not None and log_type == "stdout":
+                        _collect_recap_line(content, recap)
+                    await log_queue.put((log_type, prefix + content))
+            finally:
+                streams_done[stream_idx] = True
+
+        async def process_logs():
+            """Verarbeitet Logs aus der Queue"""
+            while True:
+                try:
+                    log_type, content = await asyncio.wait_for(
+                        log_queue.get(), timeout=0.5
+                    )
+                    await self._emit_log(log_type, content)
+                    log_queue.task_done()
+                except asyncio.TimeoutError:
+                    # Prüfen ob beide Streams fertig sind
+                    if all(streams_done):
+                        # Queue leeren
+                        await self._drain_queue(log_queue)
+                        break
 
+        try:
             # Streams parallel lesen, Logs verarbeiten
             await asyncio.gather(
                 read_stream(process.stdout, "stdout", 0),
@@ -128,39 +250,104 @@ class ExecutionRunner:
 
             # Auf Prozess-Ende warten
             return_code = await process.wait()
-
-            # Logs in DB speichern
-            await self._save_logs()
-
-            # Execution finalisieren
-            await self._finalize(return_code)
-
-            return return_code
-
-        except Exception as e:
-            await self._handle_error(e)
-            return -1
+        except asyncio.CancelledError:
+            # Abgebrochen (z.B. anderer Shard gescheitert): Prozess nicht verwaist zuruecklassen
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            if events_task:
+                events_task.cancel()
+            raise
+
+        if events_task:
+            # Restliche Events abholen; Kanal kann von Kindprozessen offen gehalten werden
+            done, _ = await asyncio.wait({events_task}, timeout=5)
+            if not done:
+                # Leser beenden (schliesst den Pipe-Transport im finally)
+                events_task.cancel()
+                try:
+                    await events_task
+                except asyncio.CancelledError:
+                    pass
+            elif events_task.exception():
+                logger.warning(f"Event-Kanal fehlerhaft beendet: {events_task.exception()}")
+
+        return return_code
+
+    async def _read_events(self, read_fd: int, shard: Optional[int] = None):
+        """Liest JSON-Events (eine Zeile pro Event) vom Seitenkanal"""
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=2 ** 20)
+        pipe = os.fdopen(read_fd, "rb", 0)
+        transport, _ = await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader), pipe
+        )
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                await self._handle_event(event, shard)
+        finally:
+            transport.close()
+
+    async def _handle_event(self, event: Dict[str, Any], shard: Optional[int] = None):
+        """Merkt Host-Ergebnisse zum Speichern vor und sendet das Event als Delta"""
+        if shard is not None:
+            event["shard"] = shard
+
+        if event.get("event") == "host_result" and event.get("host"):
+            self.results_buffer.append({
+                "execution_id": self.execution_id,
+                "host": str(event["host"])[:255],
+                "play": (event.get("play") or "")[:255] or None,
+                "task": (event.get("task") or "")[:255] or None,
+                "task_id": event.get("task_id"),
+                "action": event.get("action"),
+                "status": event.get("status") or "unknown",
+                "changed": bool(event.get("changed")),
+                "duration_seconds": event.get("duration"),
+                "message": event.get("message"),
+                "shard": shard,
+            })
+
+        await OutputStreamer.broadcast(
+            self.execution_id,
+            {"type": "event", **event},
+        )
+
+    async def _emit_log(self, log_type: str, content: str):
+        """Merkt eine Log-Zeile zum Speichern vor und sendet sie per WebSocket"""
+        self.sequence_num += 1
+
+        # Log für späteres Speichern vormerken
+        self.logs_buffer.append({
+            "execution_id": self.execution_id,
+            "log_type": log_type,
+            "content": content,
+            "sequence_num": self.sequence_num,
+        })
+
+        # WebSocket broadcast (sofort)
+        await OutputStreamer.broadcast(
+            self.execution_id,
+            {
+                "type": log_type,
+                "content": content,
+                "sequence_num": self.sequence_num,
+            }
+        )
 
     async def _drain_queue(self, queue: asyncio.Queue):
         """Leert die Queue und verarbeitet verbleibende Logs"""
         while not queue.empty():
             try:
                 log_type, content = queue.get_nowait()
-                self.sequence_num += 1
-                self.logs_buffer.append({
-                    "execution_id": self.execution_id,
-                    "log_type": log_type,
-                    "content": content,
-                    "sequence_num": self.sequence_num,
-                })
-                await OutputStreamer.broadcast(
-                    self.execution_id,
-                    {
-                        "type": log_type,
-                        "content": content,
-                        "sequence_num": self.sequence_num,
-                    }
-                )
+                await self._emit_log(log_type, content)
             except asyncio.QueueEmpty:
                 break
 
@@ -178,14 +365,16 @@ class ExecutionRunner:
                 await db.commit()
 
     async def _save_logs(self):
-        """Speichert alle Logs in die Datenbank (Batch)"""
-        if not self.logs_buffer:
+        """Speichert alle Logs und Host-Ergebnisse in die Datenbank (Batch)"""
+        if not self.logs_buffer and not self.results_buffer:
             return
 
         async with async_session() as db:
             for log_data in self.logs_buffer:
                 log_entry = ExecutionLog(**log_data)
                 db.add(log_entry)
+            for result_data in self.results_buffer:
+                db.add(ExecutionHostResult(**result_data))
             await db.commit()
 
     async def _finalize(self, return_code: int):
@@ -301,6 +490,8 @@ class ExecutionRunner:
             for log_data in self.logs_buffer:
                 log_entry = ExecutionLog(**log_data)
                 db.add(log_entry)
+            for result_data in self.results_buffer:
+                db.add(ExecutionHostResult(**result_data))
 
             # Fehler-Log hinzufügen
             error_log = ExecutionLog(
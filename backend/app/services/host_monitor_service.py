@@ -0,0 +1,297 @@
+"""
+Host Monitor - Periodische Erreichbarkeitspruefung aller Inventory-Hosts
+
+Prueft im Hintergrund den SSH-Port (TCP-Connect mit Latenz) und optional
+den SSH-Login aller Hosts aus dem Inventory. Die Probes laufen parallel
+mit einem globalen Limit (HOST_MONITOR_CONCURRENCY).
+
+Der letzte Stand liegt im Speicher (sofort fuer Hostliste und Playbook-
+Start verfuegbar) und in der Tabelle host_status (ueberlebt Neustarts).
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, delete
+
+from app.config import settings
+from app.database import async_session
+from app.models.host_status import HostStatus
+from app.schemas.inventory import HostReachability
+from app.services.inventory_parser import InventoryParser
+
+logger = logging.getLogger(__name__)
+
+
+class HostMonitor:
+    """Erreichbarkeits-Monitor fuer das Ansible-Inventory"""
+
+    def __init__(self):
+        self._status: Dict[str, HostReachability] = {}
+        self._parser: Optional[InventoryParser] = None
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+        self._check_lock = asyncio.Lock()
+        self.last_run: Optional[datetime] = None
+        self.last_duration_ms: Optional[int] = None
+
+    def _get_parser(self) -> InventoryParser:
+        if self._parser is None:
+            self._parser = InventoryParser(settings.ansible_inventory_path)
+        return self._parser
+
+    # =========================================================================
+    # Hintergrund-Loop
+    # =========================================================================
+
+    async def start(self):
+        """Laedt den gespeicherten Stand und startet die periodische Pruefung"""
+        await self._load_from_db()
+
+        if settings.host_monitor_interval <= 0:
+            logger.info("Erreichbarkeits-Monitor deaktiviert")
+            return
+        if self._running:
+            return
+
+        self._running = True
+        self._task = asyncio.create_task(self._loop())
+        logger.info(f"Erreichbarkeits-Monitor gestartet (Intervall: {settings.host_monitor_interval}s)")
+
+    async def stop(self):
+        """Stoppt die periodische Pruefung"""
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        """Hauptschleife: pruefen, speichern, warten"""
+        while self._running:
+            try:
+                await self.check_all()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.exception(f"Fehler im Erreichbarkeits-Monitor: {e}")
+            await asyncio.sleep(max(settings.host_monitor_interval, 10))
+
+    # =========================================================================
+    # Pruefung
+    # =========================================================================
+
+    async def check_all(self) -> List[HostReachability]:
+        """Prueft alle Inventory-Hosts parallel und speichert das Ergebnis"""
+        async with self._check_lock:
+            try:
+                hosts = await asyncio.to_thread(lambda: self._get_parser().get_hosts())
+            except FileNotFoundError as e:
+                logger.debug(f"Erreichbarkeit nicht geprueft: {e}")
+                return []
+            targets = {
+                host.name: (host.ansible_host or host.name, _ssh_port(host.vars))
+                for host in hosts
+            }
+
+            started = time.monotonic()
+            limit = asyncio.Semaphore(max(settings.host_monitor_concurrency, 1))
+
+            async def check(name: str, address: str, port: int) -> HostReachability:
+                async with limit:
+                    return await self._check_host(name, address, port)
+
+            results = await asyncio.gather(
+                *(check(name, address, port) for name, (address, port) in targets.items())
+            )
+
+            self._status = {result.host: result for result in results}
+            self.last_run = datetime.now(timezone.utc)
+            self.last_duration_ms = int((time.monotonic() - started) * 1000)
+
+            down = [result.host for result in results if not result.reachable]
+            logger.info(
+                f"Erreichbarkeit geprueft: {len(results) - len(down)}/{len(results)} Hosts erreichbar "
+                f"({self.last_duration_ms} ms)"
+            )
+
+            await self._save_to_db(results)
+            return list(results)
+
+    async def _check_host(self, name: str, address: str, port: int = 22) -> HostReachability:
+        """TCP-Connect auf den SSH-Port (Latenz), optional SSH-Login"""
+        now = datetime.now(timezone.utc)
+        previous = self._status.get(name)
+        timeout = settings.host_monitor_timeout
+
+        started = time.monotonic()
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(address, port), timeout)
+        except asyncio.TimeoutError:
+            error = f"Timeout nach {timeout:g}s"
+        except OSError as e:
+            error = e.strerror or str(e)
+        else:
+            latency_ms = int((time.monotonic() - started) * 1000)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+            auth_ok, error = None, None
+            if settings.host_monitor_check_auth:
+                auth_ok, error = await self._check_auth(address, port, timeout)
+            return HostReachability(
+                host=name,
+                address=address,
+                reachable=True,
+                auth_ok=auth_ok,
+                latency_ms=latency_ms,
+                error=error,
+                last_checked=now,
+                last_seen=now,
+            )
+
+        return HostReachability(
+            host=name,
+            address=address,
+            reachable=False,
+            error=error,
+            last_checked=now,
+            last_seen=previous.last_seen if previous else None,
+        )
+
+    async def _check_auth(self, address: str, port: int, timeout: float):
+        """Prueft den Login mit dem konfigurierten Key (BatchMode, ohne Kommando-Ausgabe)"""
+        cmd = [
+            "ssh",
+            "-i", settings.ssh_key_path,
+            "-o", "StrictHostKeyChecking=no",
+            "-o", "UserKnownHostsFile=/dev/null",
+            "-o", "BatchMode=yes",
+            "-o", f"ConnectTimeout={max(int(timeout), 1)}",
+            "-p", str(port),
+            f"{settings.ansible_remote_user}@{address}",
+            "true",
+        ]
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except OSError as e:
+            return None, f"ssh nicht ausfuehrbar: {e}"
+
+        try:
+            _, stderr = await asyncio.wait_for(process.communicate(), timeout * 3)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            return False, "SSH-Login: Timeout"
+
+        if process.returncode == 0:
+            return True, None
+        message = stderr.decode(errors="replace").strip().splitlines()
+        return False, message[-1] if message else f"SSH-Login: Exit-Code {process.returncode}"
+
+    # =========================================================================
+    # Abfragen
+    # =========================================================================
+
+    def get(self, host: str) -> Optional[HostReachability]:
+        """Letzter Stand eines Hosts (None = noch nicht geprueft)"""
+        return self._status.get(host)
+
+    def get_all(self) -> List[HostReachability]:
+        """Letzter Stand aller Hosts"""
+        return list(self._status.values())
+
+    def unreachable(self, hosts: List[str]) -> List[str]:
+        """
+        Hosts aus hosts, die bei der letzten Pruefung nicht erreichbar waren.
+
+        Veraltete Ergebnisse (aelter als drei Intervalle) zaehlen nicht, ein
+        Host wird nur aufgrund eines aktuellen Befunds uebersprungen.
+        """
+        interval = settings.host_monitor_interval
+        if interval <= 0:
+            return []
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=interval * 3)
+        result = []
+        for host in hosts:
+            status = self._status.get(host)
+            if status and not status.reachable and _as_utc(status.last_checked) >= cutoff:
+                result.append(host)
+        return result
+
+    def get_status(self) -> dict:
+        """Status des Monitors"""
+        return {
+            "running": self._running,
+            "interval_seconds": settings.host_monitor_interval,
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+            "last_duration_ms": self.last_duration_ms,
+            "hosts": len(self._status),
+            "unreachable": sum(1 for status in self._status.values() if not status.reachable),
+        }
+
+    # =========================================================================
+    # Persistenz
+    # =========================================================================
+
+    async def _load_from_db(self):
+        """Gespeicherten Stand laden (Hostliste ist nach Neustart sofort gefuellt)"""
+        try:
+            async with async_session() as db:
+                rows = (await db.execute(select(HostStatus))).scalars().all()
+            self._status = {row.host: HostReachability.model_validate(row) for row in rows}
+        except Exception as e:
+            logger.warning(f"Erreichbarkeits-Status nicht geladen: {e}")
+
+    async def _save_to_db(self, results: List[HostReachability]):
+        """Schreibt alle Ergebnisse in einer Transaktion, entfernt verschwundene Hosts"""
+        try:
+            async with async_session() as db:
+                existing = {
+                    row.host: row
+                    for row in (await db.execute(select(HostStatus))).scalars().all()
+                }
+                for result in results:
+                    row = existing.get(result.host)
+                    if row is None:
+                        row = HostStatus(host=result.host)
+                        db.add(row)
+                    for field, value in result.model_dump().items():
+                        setattr(row, field, value)
+
+                gone = set(existing) - {result.host for result in results}
+                if gone:
+                    await db.execute(delete(HostStatus).where(HostStatus.host.in_(gone)))
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Erreichbarkeits-Status nicht gespeichert: {e}")
+
+
+def _ssh_port(host_vars: Dict[str, str]) -> int:
+    """ansible_port aus den Host-Variablen (Default 22)"""
+    try:
+        return int(host_vars.get("ansible_port", 22))
+    except (TypeError, ValueError):
+        return 22
+
+
+def _as_utc(value: datetime) -> datetime:
+    """SQLite liefert Zeitstempel ohne Zeitzone zurueck"""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+# Singleton-Instanz
+host_monitor = HostMonitor()
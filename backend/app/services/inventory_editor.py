@@ -109,6 +109,10 @@ class InventoryEditor:
         # 5. Git-Commit erstellen
         self.git_commit(f"[Ansible Commander] {commit_message} (User: {username})", username)
 
+        # 6. JSON-Cache für das dynamische Inventory aktualisieren
+        from app.services.dynamic_inventory_service import refresh_inventory_cache
+        refresh_inventory_cache()
+
         return True, "Änderung erfolgreich gespeichert"
 
     def validate_yaml(self) -> Tuple[bool, str]:
@@ -3,7 +3,7 @@ Inventory Parser - Parst hosts.yml in strukturierte Daten
 """
 import yaml
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, FrozenSet, List, Optional, Set
 from app.schemas.inventory import HostInfo, GroupInfo, InventoryTree
 
 
@@ -16,7 +16,12 @@ class InventoryParser:
         self._hosts: Dict[str, HostInfo] = {}
         self._groups: Dict[str, GroupInfo] = {}
         self._host_groups: Dict[str, List[str]] = {}
+        # Rohe (typisierte) Variablen fuer den Ansible-JSON-Export
+        self._raw_host_vars: Dict[str, dict] = {}
+        self._raw_group_vars: Dict[str, dict] = {}
         self._last_modified: float = 0
+        # Wird bei jedem Parse erhöht (Snapshot-Kennung für Caches)
+        self._generation: int = 0
         self._load()
 
     def _check_and_reload(self):
@@ -43,9 +48,12 @@ class InventoryParser:
 
     def _parse(self):
         """Parst die Inventory-Struktur"""
+        self._generation += 1
         self._hosts = {}
         self._groups = {}
         self._host_groups = {}
+        self._raw_host_vars = {}
+        self._raw_group_vars = {}
 
         if not self._data:
             return
@@ -89,7 +97,19 @@ class InventoryParser:
                             [group_name] + parent_groups
                         )
 
+        existing = self._groups.get(group_name)
+        if existing is not None:
+            # Wie Ansible: mehrfach definierte Gruppen (z.B. 'web' unter dc1
+            # und dc2) werden zusammengefuehrt, nicht ueberschrieben
+            existing.hosts.extend(h for h in hosts if h not in existing.hosts)
+            existing.children.extend(c for c in children if c not in existing.children)
+            existing.hosts_count = len(existing.hosts)
+            existing.vars.update(group_vars)
+            self._raw_group_vars.setdefault(group_name, {}).update(group_vars)
+            return
+
         # Gruppe speichern (total_hosts_count wird später berechnet)
+        self._raw_group_vars[group_name] = dict(group_vars)
         self._groups[group_name] = GroupInfo(
             name=group_name,
             hosts=hosts,
@@ -100,35 +120,49 @@ class InventoryParser:
         )
 
     def _calculate_total_hosts(self):
-        """Berechnet total_hosts_count für alle Gruppen (inkl. Children)"""
-        # Cache für bereits berechnete Gruppen
-        calculated: Dict[str, int] = {}
-
-        def get_total(group_name: str) -> int:
-            """Rekursive Berechnung der Gesamtzahl"""
-            if group_name in calculated:
-                return calculated[group_name]
-
-            group = self._groups.get(group_name)
-            if not group:
-                return 0
-
-            # Direkte Hosts dieser Gruppe
-            total = group.hosts_count
+        """
+        Berechnet total_hosts_count für alle Gruppen (inkl. Children).
+
+        Gezählt werden eindeutige Hosts - zusammengeführte Gruppen hängen oft
+        unter mehreren Eltern und würden sonst doppelt gezählt. Die Host-Mengen
+        entstehen in einem Durchlauf von den Blättern aufwärts; jede Gruppe
+        wird nur einmal ausgewertet, Eltern übernehmen die Mengen der Kinder.
+        """
+        resolved: Dict[str, FrozenSet[str]] = {}
+        in_progress: Set[str] = set()
+
+        for root in self._groups:
+            # Iterative Tiefensuche: eine Gruppe wird erst aufgelöst, wenn
+            # alle Kinder aufgelöst sind (Zyklen und unbekannte Kinder leer)
+            stack = [root]
+            while stack:
+                group_name = stack[-1]
+                if group_name in resolved:
+                    stack.pop()
+                    continue
+                group = self._groups[group_name]
+                if group_name not in in_progress:
+                    in_progress.add(group_name)
+                    stack.extend(
+                        child for child in group.children
+                        if child in self._groups and child not in resolved and child not in in_progress
+                    )
+                    continue
+                hosts = set(group.hosts)
+                for child_name in group.children:
+                    hosts.update(resolved.get(child_name, ()))
+                resolved[group_name] = frozenset(hosts)
+                in_progress.discard(group_name)
+                stack.pop()
 
-            # Hosts aller Kinder-Gruppen hinzufügen
-            for child_name in group.children:
-                total += get_total(child_name)
-
-            calculated[group_name] = total
-            return total
-
-        # Berechne für alle Gruppen
         for group_name, group in self._groups.items():
-            group.total_hosts_count = get_total(group_name)
+            group.total_hosts_count = len(resolved[group_name])
 
     def _add_host(self, host_name: str, host_vars: dict, groups: List[str]):
         """Fügt einen Host hinzu oder aktualisiert seine Gruppen"""
+        # Wie Ansible: spaetere Definitionen ergaenzen/ueberschreiben Variablen
+        self._raw_host_vars.setdefault(host_name, {}).update(host_vars)
+
         if host_name in self._hosts:
             # Gruppen erweitern
             existing_groups = set(self._hosts[host_name].groups)
@@ -144,6 +178,94 @@ class InventoryParser:
                 vars={k: str(v) for k, v in host_vars.items()},
             )
 
+    @property
+    def last_modified(self) -> float:
+        """mtime der aktuell geladenen Inventory-Datei (lädt ggf. neu)"""
+        self._check_and_reload()
+        return self._last_modified
+
+    @property
+    def generation(self) -> int:
+        """Kennung des aktuell geladenen Snapshots (lädt ggf. neu)"""
+        self._check_and_reload()
+        return self._generation
+
+    def resolve_limit(self, limits: List[str]) -> Optional[Set[str]]:
+        """
+        Loest eine -l Liste (Host- und Gruppennamen) in konkrete Hosts auf.
+
+        Returns:
+            Menge der Hostnamen oder None wenn ein Eintrag ein Ansible-Pattern
+            ist (Wildcards, Ausschluesse, Schnittmengen, unbekannte Namen)
+            und daher nicht exakt vorgefiltert werden kann.
+        """
+        self._check_and_reload()
+        selected: Set[str] = set()
+
+        for name in limits:
+            if not name or any(c in name for c in "*?[]!&~:,@"):
+                return None
+            if name in self._hosts:
+                selected.add(name)
+            elif name in self._groups:
+                selected.update(self._collect_group_hosts(name, set()))
+            else:
+                return None
+
+        return selected
+
+    def _collect_group_hosts(self, group_name: str, visited: Set[str]) -> Set[str]:
+        """Sammelt alle Hosts einer Gruppe inkl. Kinder-Gruppen"""
+        if group_name in visited:
+            return set()
+        visited.add(group_name)
+
+        group = self._groups.get(group_name)
+        if not group:
+            return set()
+
+        hosts = set(group.hosts)
+        for child_name in group.children:
+            hosts.update(self._collect_group_hosts(child_name, visited))
+        return hosts
+
+    def to_ansible_json(self, only_hosts: Optional[Set[str]] = None) -> dict:
+        """
+        Exportiert das Inventory im Format von `ansible-inventory --list`.
+
+        Enthaelt `_meta.hostvars`, damit Ansible nicht pro Host erneut
+        das Inventory-Script aufruft.
+
+        Args:
+            only_hosts: Optional nur diese Hosts exportieren (Gruppen bleiben
+                erhalten, damit Play-Patterns weiterhin aufgeloest werden)
+        """
+        self._check_and_reload()
+
+        def keep(host_name: str) -> bool:
+            return only_hosts is None or host_name in only_hosts
+
+        result: Dict[str, dict] = {}
+        for group_name, group in self._groups.items():
+            entry: Dict[str, object] = {
+                "hosts": [h for h in group.hosts if keep(h)],
+            }
+            if group.children:
+                entry["children"] = list(group.children)
+            group_vars = self._raw_group_vars.get(group_name)
+            if group_vars:
+                entry["vars"] = group_vars
+            result[group_name] = entry
+
+        result["_meta"] = {
+            "hostvars": {
+                host_name: host_vars
+                for host_name, host_vars in self._raw_host_vars.items()
+                if keep(host_name)
+            }
+        }
+        return result
+
     def reload(self):
         """Lädt das Inventory neu"""
         self._load()
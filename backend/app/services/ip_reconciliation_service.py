@@ -0,0 +1,305 @@
+"""
+IP Reconciliation Service - Abgleich der IPs zwischen Proxmox und NetBox
+
+Lädt beide Seiten vollständig (Proxmox-Scan parallel, NetBox paginiert),
+verknüpft sie im Speicher über die IP-Adresse und erzeugt einen typisierten
+Diff (siehe DriftType). Optional werden die ausgewählten Abweichungstypen
+in einem Schritt per Bulk-Requests korrigiert.
+
+Nur von Proxmox Commander verwaltete NetBox-IPs (VM-Zuweisung oder
+Beschreibung "VM: ..." / "... (VMID: ...)") gelten als verwaiste
+Reservierungen - Gateways, Switches usw. bleiben unberührt.
+
+Das letzte Ergebnis wird gecacht und von der UI abgefragt.
+"""
+import asyncio
+import logging
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from app.schemas.ip_reconciliation import (
+    DriftItem,
+    DriftType,
+    ReconciliationFixRequest,
+    ReconciliationFixResult,
+    ReconciliationReport,
+)
+from app.services.netbox_service import netbox_service
+from app.services.proxmox_service import proxmox_service
+
+logger = logging.getLogger(__name__)
+
+# Gültigkeit des gecachten Berichts (Sekunden)
+REPORT_CACHE_TTL = 300
+
+# "(deploying)"-Einträge ohne VM gelten nach dieser Zeit als verwaist
+STALE_DEPLOYING_AFTER = timedelta(minutes=30)
+
+# Domain für DNS-Namen ohne Domain (wie beim Deploy, vm_deployment_service)
+DNS_DOMAIN = "newsxc.net"
+
+# Beschreibungen die Proxmox Commander selbst schreibt
+_DESCRIPTION_NAME = [
+    re.compile(r"^VM: (?P<name>[^\s(]+)"),
+    re.compile(r"^(?P<name>\S+) \(VMID: \d+\)"),
+]
+
+
+def _netbox_name(ip: dict) -> Optional[str]:
+    """Ermittelt den VM-Namen eines NetBox-Eintrags"""
+    if ip.get("vm_name"):
+        return ip["vm_name"]
+    description = ip.get("description") or ""
+    for pattern in _DESCRIPTION_NAME:
+        match = pattern.match(description)
+        if match:
+            return match.group("name")
+    dns_name = ip.get("dns_name") or ""
+    if dns_name:
+        return dns_name.split(".")[0]
+    return None
+
+
+def _is_managed(ip: dict) -> bool:
+    """Prüft ob ein NetBox-Eintrag von Proxmox Commander stammt"""
+    if ip.get("vm_name"):
+        return True
+    description = ip.get("description") or ""
+    return any(pattern.match(description) for pattern in _DESCRIPTION_NAME)
+
+
+def _is_deploying(ip: dict) -> bool:
+    return (ip.get("description") or "").endswith("(deploying)")
+
+
+def _older_than(timestamp: Optional[str], age: timedelta) -> bool:
+    """Prüft ob ein NetBox-Zeitstempel (ISO 8601) älter als age ist"""
+    if not timestamp:
+        return True
+    try:
+        updated = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    except ValueError:
+        return True
+    if updated.tzinfo is None:
+        updated = updated.replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc) - updated > age
+
+
+def _dns_name_for(vm_name: str, current: str = "") -> str:
+    """Ersetzt den Hostnamen im DNS-Namen, Domain bleibt erhalten (sonst DNS_DOMAIN)"""
+    if current and "." in current:
+        return f"{vm_name}.{current.split('.', 1)[1]}"
+    return f"{vm_name}.{DNS_DOMAIN}"
+
+
+class IPReconciliationService:
+    """Service für den Proxmox <-> NetBox IP-Abgleich"""
+
+    def __init__(self):
+        self._report: Optional[ReconciliationReport] = None
+        self._report_time: float = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get_report(self, refresh: bool = False) -> ReconciliationReport:
+        """
+        Gibt den gecachten Bericht zurück (neu erstellt wenn veraltet).
+
+        Args:
+            refresh: Abgleich immer neu ausführen
+        """
+        if (
+            not refresh
+            and self._report is not None
+            and time.monotonic() - self._report_time < REPORT_CACHE_TTL
+        ):
+            return self._report
+        return await self.reconcile()
+
+    async def reconcile(self) -> ReconciliationReport:
+        """Führt den Abgleich aus und cacht das Ergebnis"""
+        async with self._lock:
+            started = time.monotonic()
+            report = await self._build_report()
+            report.duration_ms = int((time.monotonic() - started) * 1000)
+            self._report = report
+            self._report_time = time.monotonic()
+            logger.info(
+                f"IP-Abgleich: {len(report.items)} Abweichungen, "
+                f"{report.in_sync} synchron ({report.duration_ms} ms)"
+            )
+            return report
+
+    async def _build_report(self) -> ReconciliationReport:
+        """Lädt beide Seiten parallel und berechnet den Diff"""
+        errors = []
+        proxmox_vms, netbox_ips = await asyncio.gather(
+            proxmox_service.scan_vm_ips(),
+            netbox_service.get_all_ips(),
+        )
+
+        # Hash-Maps: IP -> Eintrag
+        by_proxmox: dict[str, dict] = {}
+        for vm in proxmox_vms:
+            ip = vm.get("ip")
+            if not ip:
+                continue
+            if ip in by_proxmox:
+                errors.append(
+                    f"IP {ip} bei mehreren VMs ({by_proxmox[ip]['name']}, {vm.get('name')})"
+                )
+                continue
+            by_proxmox[ip] = vm
+
+        by_netbox: dict[str, dict] = {}
+        for ip in netbox_ips:
+            by_netbox.setdefault(ip["address"], ip)
+
+        items: list[DriftItem] = []
+        in_sync = 0
+
+        for address, vm in by_proxmox.items():
+            netbox_ip = by_netbox.get(address)
+            if netbox_ip is None:
+                items.append(DriftItem(
+                    type=DriftType.UNREGISTERED_IP,
+                    ip=address,
+                    vmid=vm.get("vmid"),
+                    proxmox_name=vm.get("name"),
+                    proxmox_status=vm.get("status"),
+                    action="register",
+                ))
+                continue
+
+            netbox_name = _netbox_name(netbox_ip)
+            common = dict(
+                ip=address,
+                vmid=vm.get("vmid"),
+                proxmox_name=vm.get("name"),
+                proxmox_status=vm.get("status"),
+                netbox_id=netbox_ip["id"],
+                netbox_name=netbox_name,
+                netbox_status=netbox_ip["status"],
+                netbox_description=netbox_ip["description"],
+                netbox_dns_name=netbox_ip["dns_name"],
+            )
+            if _is_deploying(netbox_ip):
+                # VM existiert, aber der Deploy-Callback hat die Beschreibung
+                # nicht aktualisiert (laufende Deploys nicht anfassen)
+                if _older_than(netbox_ip.get("last_updated"), STALE_DEPLOYING_AFTER):
+                    items.append(DriftItem(type=DriftType.STALE_DEPLOYING, action="update", **common))
+            elif netbox_name and netbox_name.lower() != (vm.get("name") or "").lower():
+                items.append(DriftItem(type=DriftType.NAME_MISMATCH, action="update", **common))
+            else:
+                in_sync += 1
+
+        if not by_proxmox:
+            # Leerer Scan (Proxmox nicht erreichbar) darf nicht alles als verwaist melden
+            errors.append("Proxmox-Scan lieferte keine VMs - verwaiste Reservierungen nicht geprüft")
+        else:
+            for address, netbox_ip in by_netbox.items():
+                if address in by_proxmox or not _is_managed(netbox_ip):
+                    continue
+                common = dict(
+                    ip=address,
+                    netbox_id=netbox_ip["id"],
+                    netbox_name=_netbox_name(netbox_ip),
+                    netbox_status=netbox_ip["status"],
+                    netbox_description=netbox_ip["description"],
+                    action="release",
+                )
+                if _is_deploying(netbox_ip):
+                    # Laufende Deploys nicht anfassen
+                    if _older_than(netbox_ip.get("last_updated"), STALE_DEPLOYING_AFTER):
+                        items.append(DriftItem(type=DriftType.STALE_DEPLOYING, **common))
+                else:
+                    items.append(DriftItem(type=DriftType.ORPHANED_RESERVATION, **common))
+
+        counts = {drift_type.value: 0 for drift_type in DriftType}
+        for item in items:
+            counts[item.type.value] += 1
+
+        return ReconciliationReport(
+            generated_at=datetime.now(timezone.utc),
+            duration_ms=0,
+            proxmox_ips=len(by_proxmox),
+            netbox_ips=len(by_netbox),
+            in_sync=in_sync,
+            counts=counts,
+            items=sorted(items, key=lambda i: (i.type.value, i.ip)),
+            errors=errors,
+        )
+
+    async def fix(self, request: ReconciliationFixRequest) -> ReconciliationFixResult:
+        """
+        Korrigiert die Abweichungen eines frischen Abgleichs per Bulk-Requests.
+
+        Nur die in request.types genannten Typen werden korrigiert; gelöscht
+        wird also nur, wenn orphaned_reservation ausdrücklich angefordert ist.
+
+        - release: verwaiste Reservierungen löschen (ein Listen-DELETE)
+        - register: fehlende IPs anlegen (ein Listen-POST)
+        - update: Beschreibung/DNS-Name/Status korrigieren (ein Listen-PATCH)
+
+        Returns:
+            Korrekturen und der Bericht nach der Korrektur
+        """
+        report = await self.reconcile()
+
+        types = set(request.types)
+        ips = set(request.ips) if request.ips else None
+        selected = [
+            item for item in report.items
+            if item.type in types and (ips is None or item.ip in ips)
+        ]
+
+        to_release = [item.ip for item in selected if item.action == "release"]
+        to_upsert = []
+        for item in selected:
+            if item.action == "register":
+                to_upsert.append({
+                    "address": item.ip,
+                    "description": f"VM: {item.proxmox_name}",
+                    "dns_name": _dns_name_for(item.proxmox_name),
+                    "status": "active" if item.proxmox_status == "running" else "reserved",
+                })
+            elif item.action == "update":
+                to_upsert.append({
+                    "address": item.ip,
+                    "description": f"VM: {item.proxmox_name}",
+                    "dns_name": _dns_name_for(item.proxmox_name, item.netbox_dns_name or ""),
+                    "status": "active" if item.proxmox_status == "running" else item.netbox_status,
+                })
+
+        result = ReconciliationFixResult(report=report)
+
+        if to_release:
+            try:
+                result.released = await netbox_service.release_ips(to_release)
+            except Exception as e:
+                result.errors.append(f"Freigabe fehlgeschlagen: {e}")
+
+        if to_upsert:
+            try:
+                written = await netbox_service.register_ips(to_upsert)
+                registered = {item.ip for item in selected if item.action == "register"}
+                result.registered = sorted(ip for ip in written if ip in registered)
+                result.updated = sorted(ip for ip in written if ip not in registered)
+            except Exception as e:
+                result.errors.append(f"Registrierung fehlgeschlagen: {e}")
+
+        result.report = await self.reconcile()
+        return result
+
+
+# Singleton-Instanz
+_reconciliation_service: Optional[IPReconciliationService] = None
+
+
+def get_reconciliation_service() -> IPReconciliationService:
+    """Gibt die Singleton-Instanz des Reconciliation-Service zurück"""
+    global _reconciliation_service
+    if _reconciliation_service is None:
+        _reconciliation_service = IPReconciliationService()
+    return _reconciliation_service
@@ -0,0 +1,347 @@
+"""
+IPAM Allocator - Lokaler Belegungs-Index pro Prefix
+
+Hält pro VLAN-Prefix eine Bitmap der belegten Adressen, damit freie IPs
+ohne Roundtrip zu NetBox gewählt und geprüft werden können.
+
+- Hydration: Prefix + alle IPs des Prefixes aus NetBox (eine paginierte Liste)
+- Aktualisierung: eigene Schreibzugriffe (reserve/activate/release) pflegen
+  die Bitmap direkt, nach NETBOX_IPAM_REFRESH Sekunden wird neu abgeglichen
+- Leases: gewählte, noch nicht in NetBox reservierte IPs werden für
+  NETBOX_IP_LEASE_SECONDS lokal gesperrt, damit parallele Deploys nie
+  dieselbe Adresse bekommen
+- Mehrere IPs werden atomar in einem Schritt gewählt
+
+Prefixes mit mehr als MAX_INDEX_ADDRESSES Adressen (z.B. IPv6 /64) werden
+nicht indiziert, dort bleibt es bei der NetBox-API.
+"""
+import asyncio
+import ipaddress
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.services.netbox_client import get_netbox_client
+
+logger = logging.getLogger(__name__)
+
+# Größte Prefix-Größe für die ein lokaler Index angelegt wird (/16 bei IPv4)
+MAX_INDEX_ADDRESSES = 65536
+
+
+@dataclass
+class PrefixIndex:
+    """Belegungs-Bitmap eines Prefixes"""
+    vlan: int
+    prefix_id: int
+    network: ipaddress.IPv4Network | ipaddress.IPv6Network
+    used: bytearray
+    # NetBox-IDs der belegten Adressen (Offset -> ID), spart GET vor PATCH/DELETE
+    ip_ids: Dict[int, int] = field(default_factory=dict)
+    # Lokale Leases: Offset -> (Ablaufzeit, Besitzer)
+    leases: Dict[int, Tuple[float, str]] = field(default_factory=dict)
+    hydrated_at: float = 0.0
+
+    def offset(self, address: str) -> Optional[int]:
+        """Offset einer Adresse im Prefix (None wenn außerhalb)"""
+        try:
+            ip = ipaddress.ip_address(address.split("/")[0])
+        except ValueError:
+            return None
+        if ip.version != self.network.version or ip not in self.network:
+            return None
+        return int(ip) - int(self.network.network_address)
+
+    def address(self, offset: int) -> str:
+        return str(self.network.network_address + offset)
+
+    def is_used(self, offset: int) -> bool:
+        return bool(self.used[offset >> 3] & (1 << (offset & 7)))
+
+    def set_used(self, offset: int, used: bool):
+        if used:
+            self.used[offset >> 3] |= 1 << (offset & 7)
+        else:
+            self.used[offset >> 3] &= ~(1 << (offset & 7)) & 0xFF
+
+    def is_leased(self, offset: int, now: float) -> bool:
+        lease = self.leases.get(offset)
+        if lease is None:
+            return False
+        if lease[0] <= now:
+            del self.leases[offset]
+            return False
+        return True
+
+    def usable_offsets(self):
+        """Alle vergebbaren Offsets (IPv4 ohne Netz- und Broadcast-Adresse)"""
+        size = self.network.num_addresses
+        if self.network.version == 4 and self.network.prefixlen < 31:
+            return range(1, size - 1)
+        return range(0, size)
+
+
+class IPAMAllocator:
+    """Lokaler Allocation-Cache für NetBox-Prefixes"""
+
+    def __init__(self):
+        self.client = get_netbox_client()
+        self._indexes: Dict[int, PrefixIndex] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def _lock(self, vlan: int) -> asyncio.Lock:
+        if vlan not in self._locks:
+            self._locks[vlan] = asyncio.Lock()
+        return self._locks[vlan]
+
+    async def _hydrate(self, vlan: int) -> Optional[PrefixIndex]:
+        """Lädt Prefix und belegte IPs eines VLANs aus NetBox"""
+        data = await self.client.get_json("/api/ipam/prefixes/", params={"vlan_vid": vlan})
+        if data["count"] == 0:
+            raise ValueError(f"Prefix für VLAN {vlan} nicht in NetBox gefunden")
+
+        prefix_info = data["results"][0]
+        network = ipaddress.ip_network(prefix_info["prefix"], strict=False)
+        if network.num_addresses > MAX_INDEX_ADDRESSES:
+            return None
+
+        ips = await self.client.get_all(
+            "/api/ipam/ip-addresses/",
+            params={"parent": prefix_info["prefix"], "brief": 1},
+            use_cache=False,
+        )
+
+        old = self._indexes.get(vlan)
+        index = PrefixIndex(
+            vlan=vlan,
+            prefix_id=prefix_info["id"],
+            network=network,
+            used=bytearray((network.num_addresses + 7) // 8),
+            # Laufende Leases überleben den Abgleich
+            leases=old.leases if old and old.network == network else {},
+            hydrated_at=time.monotonic(),
+        )
+        for ip in ips:
+            offset = index.offset(ip.get("address", ""))
+            if offset is not None:
+                index.set_used(offset, True)
+                index.ip_ids[offset] = ip["id"]
+
+        logger.debug(f"IPAM-Index VLAN {vlan}: {len(ips)} belegte IPs in {network}")
+        return index
+
+    async def get_index(self, vlan: int) -> Optional[PrefixIndex]:
+        """
+        Gibt den Index eines VLANs zurück (hydriert bei Bedarf).
+
+        Returns:
+            PrefixIndex oder None wenn der Prefix zu groß für einen Index ist
+
+        Raises:
+            ValueError: Wenn für das VLAN kein Prefix existiert
+        """
+        index = self._indexes.get(vlan)
+        if index and time.monotonic() - index.hydrated_at < settings.netbox_ipam_refresh:
+            return index
+
+        async with self._lock(vlan):
+            index = self._indexes.get(vlan)
+            if index and time.monotonic() - index.hydrated_at < settings.netbox_ipam_refresh:
+                return index
+            return await self._rehydrate(vlan)
+
+    async def _rehydrate(self, vlan: int) -> Optional[PrefixIndex]:
+        """Ersetzt den Index eines VLANs durch den aktuellen NetBox-Stand (Lock gehalten)"""
+        index = await self._hydrate(vlan)
+        if index is None:
+            self._indexes.pop(vlan, None)
+        else:
+            self._indexes[vlan] = index
+        return index
+
+    async def start_refresh(self):
+        """Startet den periodischen Abgleich aller bereits geladenen Indizes"""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop_refresh(self):
+        """Stoppt den periodischen Abgleich"""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+        self._refresh_task = None
+
+    async def _refresh_loop(self):
+        """
+        Gleicht alle NETBOX_IPAM_REFRESH Sekunden die geladenen Indizes mit
+        NetBox ab, damit extern angelegte IPs nicht erst beim nächsten
+        Zugriff auffallen.
+        """
+        while True:
+            await asyncio.sleep(max(settings.netbox_ipam_refresh, 10))
+            for vlan in list(self._indexes):
+                try:
+                    async with self._lock(vlan):
+                        await self._rehydrate(vlan)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"IPAM-Index VLAN {vlan} nicht abgeglichen: {e}")
+
+    def find(self, address: str) -> Tuple[Optional[PrefixIndex], Optional[int]]:
+        """Sucht den aktuellen Index, der eine Adresse enthält"""
+        now = time.monotonic()
+        for index in self._indexes.values():
+            if now - index.hydrated_at >= settings.netbox_ipam_refresh:
+                continue
+            offset = index.offset(address)
+            if offset is not None:
+                return index, offset
+        return None, None
+
+    async def peek(self, vlan: int, limit: int) -> Optional[List[str]]:
+        """
+        Gibt freie IPs zurück ohne sie zu sperren.
+
+        Returns:
+            Liste freier Adressen oder None wenn kein Index möglich ist
+        """
+        index = await self.get_index(vlan)
+        if index is None:
+            return None
+        now = time.monotonic()
+        result = []
+        for offset in index.usable_offsets():
+            if not index.is_used(offset) and not index.is_leased(offset, now):
+                result.append(index.address(offset))
+                if len(result) >= limit:
+                    break
+        return result
+
+    async def allocate(self, vlan: int, count: int, owner: str = "") -> Optional[List[str]]:
+        """
+        Wählt atomar mehrere freie IPs und sperrt sie per Lease.
+
+        Args:
+            vlan: VLAN-ID
+            count: Anzahl benötigter IPs
+            owner: Besitzer des Leases (z.B. VM-Name)
+
+        Returns:
+            Liste der gesperrten Adressen oder None wenn kein Index möglich ist
+
+        Raises:
+            ValueError: Wenn nicht genügend freie IPs vorhanden sind
+        """
+        index = await self.get_index(vlan)
+        if index is None:
+            return None
+
+        async with self._lock(vlan):
+            now = time.monotonic()
+            offsets = []
+            for offset in index.usable_offsets():
+                if not index.is_used(offset) and not index.is_leased(offset, now):
+                    offsets.append(offset)
+                    if len(offsets) >= count:
+                        break
+
+            if len(offsets) < count:
+                raise ValueError(
+                    f"Nur {len(offsets)} von {count} IPs in VLAN {vlan} frei"
+                )
+
+            expires_at = now + settings.netbox_ip_lease_seconds
+            for offset in offsets:
+                index.leases[offset] = (expires_at, owner)
+
+        return [index.address(offset) for offset in offsets]
+
+    def release_lease(self, address: str):
+        """Gibt einen lokalen Lease frei (IP wurde nicht verwendet)"""
+        index, offset = self.find(address)
+        if index is not None:
+            index.leases.pop(offset, None)
+
+    def is_available(self, address: str, owner: Optional[str] = None) -> Optional[bool]:
+        """
+        Prüft lokal ob eine IP in NetBox frei ist.
+
+        Ein aktiver Lease eines anderen Besitzers zählt als belegt, der
+        eigene Lease (owner) nicht.
+
+        Returns:
+            True/False, oder None wenn kein aktueller Index die IP kennt
+        """
+        index, offset = self.find(address)
+        if index is None:
+            return None
+        if index.is_used(offset):
+            return False
+        if index.is_leased(offset, time.monotonic()):
+            return index.leases[offset][1] == owner
+        return True
+
+    def get_ip_id(self, address: str) -> Optional[int]:
+        """NetBox-ID einer belegten IP aus dem Index (None wenn unbekannt)"""
+        index, offset = self.find(address)
+        if index is None:
+            return None
+        return index.ip_ids.get(offset)
+
+    def get_prefixlen(self, address: str) -> Optional[int]:
+        """Prefix-Länge des Index-Prefixes einer IP"""
+        index, _ = self.find(address)
+        return index.network.prefixlen if index else None
+
+    def mark_used(self, address: str, ip_id: Optional[int] = None):
+        """Markiert eine IP nach eigenem Schreibzugriff als belegt"""
+        index, offset = self.find(address)
+        if index is None:
+            return
+        index.set_used(offset, True)
+        index.leases.pop(offset, None)
+        if ip_id is not None:
+            index.ip_ids[offset] = ip_id
+
+    def mark_free(self, address: str):
+        """Markiert eine IP nach eigenem Löschen als frei"""
+        index, offset = self.find(address)
+        if index is None:
+            return
+        index.set_used(offset, False)
+        index.ip_ids.pop(offset, None)
+
+    def invalidate(self, address: Optional[str] = None):
+        """
+        Erzwingt einen neuen Abgleich.
+
+        Args:
+            address: Nur den Index dieser IP verwerfen (None = alle)
+        """
+        if address is None:
+            for index in self._indexes.values():
+                index.hydrated_at = 0.0
+            return
+        index, _ = self.find(address)
+        if index is not None:
+            index.hydrated_at = 0.0
+
+
+# Singleton-Instanz
+_ipam_allocator: Optional[IPAMAllocator] = None
+
+
+def get_ipam_allocator() -> IPAMAllocator:
+    """Gibt die Singleton-Instanz des IPAM-Allocators zurück"""
+    global _ipam_allocator
+    if _ipam_allocator is None:
+        _ipam_allocator = IPAMAllocator()
+    return _ipam_allocator
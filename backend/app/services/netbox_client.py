@@ -0,0 +1,252 @@
+"""
+NetBox Client - Gemeinsamer, gepoolter HTTP-Client fuer die NetBox API
+
+Wird von NetBoxService und NetBoxUserService verwendet.
+
+Features:
+- Ein httpx.AsyncClient mit Connection-Pool (Keep-Alive) statt einem
+  neuen Client pro Aufruf
+- Transparente Pagination: erste Seite liefert 'count', die restlichen
+  Seiten werden parallel geladen
+- TTL-Cache mit ETag/If-None-Match fuer selten geaenderte Objekte
+  (VLANs, Prefixes, Cluster)
+- Eigene Schreibzugriffe (POST/PATCH/PUT/DELETE) invalidieren den Cache
+  des betroffenen Endpunkts
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Endpunkte deren GET-Antworten gecacht werden duerfen
+CACHEABLE_PATHS = (
+    "/api/ipam/vlans/",
+    "/api/ipam/prefixes/",
+    "/api/virtualization/clusters/",
+    "/api/virtualization/cluster-types/",
+)
+
+# Seitengroesse fuer paginierte Listen (NetBox MAX_PAGE_SIZE Default: 1000)
+PAGE_SIZE = 1000
+
+
+@dataclass
+class _CacheEntry:
+    """Gecachte GET-Antwort"""
+    data: Any
+    etag: Optional[str]
+    expires_at: float
+
+
+def _collection_path(path: str) -> str:
+    """
+    Ermittelt den Listen-Endpunkt zu einem Pfad.
+
+    /api/ipam/prefixes/12/available-ips/ -> /api/ipam/prefixes/
+    """
+    parts = [p for p in path.split("/") if p]
+    return "/" + "/".join(parts[:3]) + "/"
+
+
+class NetBoxClient:
+    """Gepoolter HTTP-Client mit Pagination und Antwort-Cache"""
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_key: Optional[Tuple[str, Optional[str]]] = None
+        self._cache: Dict[Tuple[str, Tuple], _CacheEntry] = {}
+
+    @property
+    def base_url(self) -> str:
+        return settings.netbox_url
+
+    @property
+    def token(self) -> Optional[str]:
+        return settings.netbox_token
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """
+        Gibt den gepoolten Client zurück.
+
+        Ändern sich URL oder Token (Setup-Wizard, Hot-Reload), wird ein neuer
+        Client erstellt und der Cache verworfen.
+        """
+        key = (self.base_url, self.token)
+        if self._client is None or self._client.is_closed or self._client_key != key:
+            old_client = self._client
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={
+                    "Authorization": f"Token {self.token}",
+                    "Content-Type": "application/json",
+                    "Accept": "application/json",
+                },
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+                timeout=10.0,
+            )
+            self._client_key = key
+            self._cache.clear()
+            if old_client is not None and not old_client.is_closed:
+                asyncio.ensure_future(old_client.aclose())
+        return self._client
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[dict] = None,
+        json: Any = None,
+        timeout: float = 10.0,
+    ) -> httpx.Response:
+        """
+        Führt einen Request aus (ohne raise_for_status).
+
+        Schreibende Requests invalidieren den Cache des Endpunkts.
+        """
+        client = self._get_client()
+        response = await client.request(method, path, params=params, json=json, timeout=timeout)
+        if method.upper() != "GET":
+            self.invalidate(path)
+        return response
+
+    async def get(self, path: str, params: Optional[dict] = None, timeout: float = 10.0) -> httpx.Response:
+        return await self.request("GET", path, params=params, timeout=timeout)
+
+    async def post(self, path: str, json: Any = None, timeout: float = 10.0) -> httpx.Response:
+        return await self.request("POST", path, json=json, timeout=timeout)
+
+    async def patch(self, path: str, json: Any = None, timeout: float = 10.0) -> httpx.Response:
+        return await self.request("PATCH", path, json=json, timeout=timeout)
+
+    async def delete(self, path: str, json: Any = None, timeout: float = 10.0) -> httpx.Response:
+        return await self.request("DELETE", path, json=json, timeout=timeout)
+
+    async def get_json(
+        self,
+        path: str,
+        params: Optional[dict] = None,
+        timeout: float = 10.0,
+        use_cache: bool = True,
+    ) -> Any:
+        """
+        GET mit JSON-Antwort.
+
+        Für Endpunkte aus CACHEABLE_PATHS wird die Antwort für
+        NETBOX_CACHE_TTL Sekunden gecacht. Danach wird per If-None-Match
+        revalidiert, ein 304 verlängert den Eintrag ohne Body-Transfer.
+
+        Raises:
+            httpx.HTTPStatusError: Bei Fehler-Status
+        """
+        ttl = settings.netbox_cache_ttl
+        cacheable = use_cache and ttl > 0 and path.startswith(CACHEABLE_PATHS)
+        if not cacheable:
+            response = await self.get(path, params=params, timeout=timeout)
+            response.raise_for_status()
+            return response.json()
+
+        client = self._get_client()
+        key = (path, tuple(sorted((params or {}).items())))
+        entry = self._cache.get(key)
+        now = time.monotonic()
+        if entry and entry.expires_at > now:
+            return entry.data
+
+        headers = {"If-None-Match": entry.etag} if entry and entry.etag else None
+        response = await client.get(path, params=params, headers=headers, timeout=timeout)
+
+        if response.status_code == 304 and entry:
+            entry.expires_at = now + ttl
+            return entry.data
+
+        response.raise_for_status()
+        data = response.json()
+        # Nur speichern wenn der Client inzwischen nicht gewechselt wurde
+        if self._client is client:
+            self._cache[key] = _CacheEntry(
+                data=data,
+                etag=response.headers.get("ETag"),
+                expires_at=now + ttl,
+            )
+        return data
+
+    async def get_all(
+        self,
+        path: str,
+        params: Optional[dict] = None,
+        timeout: float = 30.0,
+        use_cache: bool = True,
+    ) -> List[dict]:
+        """
+        Lädt alle Seiten eines Listen-Endpunkts.
+
+        Die erste Seite liefert 'count', die weiteren Offsets werden mit
+        begrenzter Parallelität (NETBOX_PAGE_CONCURRENCY) geladen.
+
+        Returns:
+            Alle 'results' aller Seiten
+        """
+        base_params = dict(params or {})
+        base_params["limit"] = PAGE_SIZE
+
+        first = await self.get_json(path, {**base_params, "offset": 0}, timeout, use_cache)
+        results = list(first.get("results", []))
+        count = first.get("count", len(results))
+        # Der Server kann die Seitengröße kappen (MAX_PAGE_SIZE)
+        page_size = len(results)
+        if page_size == 0 or count <= page_size:
+            return results
+
+        semaphore = asyncio.Semaphore(max(1, settings.netbox_page_concurrency))
+
+        async def fetch(offset: int) -> List[dict]:
+            async with semaphore:
+                page = await self.get_json(
+                    path, {**base_params, "limit": page_size, "offset": offset}, timeout, use_cache
+                )
+                return page.get("results", [])
+
+        pages = await asyncio.gather(*[fetch(offset) for offset in range(page_size, count, page_size)])
+        for page in pages:
+            results.extend(page)
+        return results
+
+    def invalidate(self, path: Optional[str] = None):
+        """
+        Verwirft gecachte Antworten.
+
+        Args:
+            path: Pfad eines Endpunkts (None = gesamter Cache)
+        """
+        if path is None:
+            self._cache.clear()
+            return
+        collection = _collection_path(path)
+        for key in [k for k in self._cache if k[0].startswith(collection)]:
+            del self._cache[key]
+
+    async def close(self):
+        """Schließt den Connection-Pool (App-Shutdown)"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._cache.clear()
+
+
+# Singleton-Instanz
+_netbox_client: Optional[NetBoxClient] = None
+
+
+def get_netbox_client() -> NetBoxClient:
+    """Gibt die Singleton-Instanz des NetBox-Clients zurück"""
+    global _netbox_client
+    if _netbox_client is None:
+        _netbox_client = NetBoxClient()
+    return _netbox_client
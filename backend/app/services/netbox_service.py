@@ -3,22 +3,57 @@ NetBox Service - Integration mit NetBox IPAM für IP-Management
 
 Alle VLANs und Prefixes werden dynamisch aus NetBox geladen.
 Die Konfiguration erfolgt direkt in NetBox (nicht in der Applikation).
+
+Alle Requests laufen über den gemeinsamen NetBoxClient (Connection-Pool,
+Pagination, Cache für VLANs/Prefixes/Cluster).
 """
-import httpx
+import asyncio
+import ipaddress
+import logging
+import time
 from typing import Optional
+
+import httpx
+
 from app.config import settings
+from app.services.netbox_client import get_netbox_client
+from app.services.ipam_allocator import get_ipam_allocator
+
+logger = logging.getLogger(__name__)
+
+# Gültigkeit der gecachten Prefix-Auslastung (Sekunden)
+UTILIZATION_CACHE_TTL = 30
+
+# Max. Filterwerte pro Request bei Bulk-Abfragen (URL-Länge)
+BULK_FILTER_CHUNK = 50
+
+# Sammelfenster für Einzel-Registrierungen (Sekunden)
+BULK_QUEUE_WINDOW = 0.5
+
+# Interface-Name für die primäre IP einer VM
+VM_INTERFACE_NAME = "eth0"
 
 
 class NetBoxService:
     """Service für NetBox IPAM Integration"""
 
     def __init__(self):
-        self.base_url = settings.netbox_url
-        self.token = settings.netbox_token
-        self.headers = {
-            "Authorization": f"Token {self.token}",
-            "Content-Type": "application/json",
-        }
+        self.client = get_netbox_client()
+        self.allocator = get_ipam_allocator()
+        self._utilization_cache: Optional[tuple[float, list[dict]]] = None
+        # Cluster-IDs pro (NetBox-URL, Cluster-Name)
+        self._cluster_ids: dict[tuple[str, str], int] = {}
+        # Sammelt Einzel-Registrierungen paralleler Deploys/Destroys zu Bulk-Requests
+        self._register_queue = _BulkQueue(self.register_vms)
+        self._unregister_queue = _BulkQueue(self.unregister_vms)
+
+    @property
+    def base_url(self) -> str:
+        return settings.netbox_url
+
+    @property
+    def token(self) -> Optional[str]:
+        return settings.netbox_token
 
     def _check_token(self):
         """Prüft ob NetBox-Token konfiguriert ist"""
@@ -33,37 +68,29 @@ class NetBoxService:
         """
         self._check_token()
 
-        async with httpx.AsyncClient() as client:
-            # Alle Prefixes mit zugehörigen VLANs laden
-            response = await client.get(
-                f"{self.base_url}/api/ipam/prefixes/",
-                params={"limit": 100},
-                headers=self.headers,
-                timeout=10.0,
-            )
-            response.raise_for_status()
-            data = response.json()
-
-            result = []
-            for prefix_info in data["results"]:
-                vlan_info = prefix_info.get("vlan")
-                if vlan_info:
-                    vlan_id = vlan_info.get("vid", 0)
-                    prefix = prefix_info.get("prefix", "")
-
-                    # Bridge und Gateway aus VLAN-ID ableiten
-                    bridge = f"vmbr{vlan_id}"
-                    gateway = self._gateway_from_prefix(prefix)
-
-                    result.append({
-                        "id": vlan_id,
-                        "name": vlan_info.get("name", f"VLAN{vlan_id}"),
-                        "prefix": prefix,
-                        "bridge": bridge,
-                        "gateway": gateway,
-                    })
-
-            return sorted(result, key=lambda x: x["id"])
+        # Alle Prefixes mit zugehörigen VLANs laden (alle Seiten, gecacht)
+        prefixes = await self.client.get_all("/api/ipam/prefixes/")
+
+        result = []
+        for prefix_info in prefixes:
+            vlan_info = prefix_info.get("vlan")
+            if vlan_info:
+                vlan_id = vlan_info.get("vid", 0)
+                prefix = prefix_info.get("prefix", "")
+
+                # Bridge und Gateway aus VLAN-ID ableiten
+                bridge = f"vmbr{vlan_id}"
+                gateway = self._gateway_from_prefix(prefix)
+
+                result.append({
+                    "id": vlan_id,
+                    "name": vlan_info.get("name", f"VLAN{vlan_id}"),
+                    "prefix": prefix,
+                    "bridge": bridge,
+                    "gateway": gateway,
+                })
+
+        return sorted(result, key=lambda x: x["id"])
 
     def _gateway_from_prefix(self, prefix: str) -> str:
         """Leitet Gateway aus Prefix ab (erstes IP im Subnet)"""
@@ -81,71 +108,123 @@ class NetBoxService:
         """Holt den Prefix aus NetBox für ein VLAN"""
         self._check_token()
 
-        async with httpx.AsyncClient() as client:
-            # Prefix mit VLAN-ID suchen
-            response = await client.get(
-                f"{self.base_url}/api/ipam/prefixes/",
-                params={"vlan_vid": vlan},
-                headers=self.headers,
-                timeout=10.0,
-            )
-            response.raise_for_status()
-            data = response.json()
+        # Prefix mit VLAN-ID suchen (gecacht)
+        data = await self.client.get_json(
+            "/api/ipam/prefixes/",
+            params={"vlan_vid": vlan},
+        )
 
-            if data["count"] > 0:
-                return data["results"][0]["prefix"]
-            return None
+        if data["count"] > 0:
+            return data["results"][0]["prefix"]
+        return None
 
     async def get_prefix_id(self, vlan: int) -> Optional[int]:
         """Holt die Prefix-ID aus NetBox für ein VLAN"""
         self._check_token()
 
-        async with httpx.AsyncClient() as client:
-            # Prefix mit VLAN-ID suchen
-            response = await client.get(
-                f"{self.base_url}/api/ipam/prefixes/",
-                params={"vlan_vid": vlan},
-                headers=self.headers,
-                timeout=10.0,
-            )
-            response.raise_for_status()
-            data = response.json()
+        # Prefix mit VLAN-ID suchen (gecacht)
+        data = await self.client.get_json(
+            "/api/ipam/prefixes/",
+            params={"vlan_vid": vlan},
+        )
 
-            if data["count"] > 0:
-                return data["results"][0]["id"]
-            return None
+        if data["count"] > 0:
+            return data["results"][0]["id"]
+        return None
 
     async def get_available_ips(self, vlan: int, limit: int = 10) -> list[dict]:
-        """Holt freie IPs aus NetBox für ein VLAN"""
+        """
+        Holt freie IPs für ein VLAN.
+
+        Nutzt den lokalen IPAM-Index (ohne Roundtrip, gesperrte IPs
+        ausgenommen), bei zu großen Prefixes die NetBox-API.
+        """
+        self._check_token()
+
+        addresses = await self.allocator.peek(vlan, limit)
+        if addresses is None:
+            addresses = await self._fetch_available_ips(vlan, limit)
+
+        return [self._available_ip(address, vlan) for address in addresses]
+
+    async def allocate_ips(self, vlan: int, count: int, owner: str = "") -> list[dict]:
+        """
+        Wählt atomar mehrere freie IPs und sperrt sie lokal (Lease).
+
+        Parallele Aufrufe erhalten nie dieselbe Adresse. Die Sperre endet
+        mit reserve_ip() oder nach NETBOX_IP_LEASE_SECONDS.
+
+        Args:
+            vlan: VLAN-ID
+            count: Anzahl benötigter IPs
+            owner: Besitzer der Sperre (z.B. VM-Name)
+
+        Raises:
+            ValueError: Wenn nicht genügend freie IPs vorhanden sind
+        """
         self._check_token()
 
+        addresses = await self.allocator.allocate(vlan, count, owner)
+        if addresses is None:
+            # Prefix zu groß für den Index - ohne lokale Sperre
+            addresses = await self._fetch_available_ips(vlan, count)
+            if len(addresses) < count:
+                raise ValueError(f"Nur {len(addresses)} von {count} IPs in VLAN {vlan} frei")
+
+        return [self._available_ip(address, vlan) for address in addresses]
+
+    def release_allocation(self, ip_address: str):
+        """Gibt eine lokal gesperrte, nicht verwendete IP wieder frei"""
+        self.allocator.release_lease(ip_address)
+
+    async def _fetch_available_ips(self, vlan: int, limit: int) -> list[str]:
+        """Freie IPs direkt über die NetBox-API (available-ips)"""
         prefix_id = await self.get_prefix_id(vlan)
         if not prefix_id:
             raise ValueError(f"Prefix für VLAN {vlan} nicht in NetBox gefunden")
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/api/ipam/prefixes/{prefix_id}/available-ips/",
-                params={"limit": limit},
-                headers=self.headers,
-                timeout=10.0,
-            )
-            response.raise_for_status()
-            data = response.json()
+        response = await self.client.get(
+            f"/api/ipam/prefixes/{prefix_id}/available-ips/",
+            params={"limit": limit},
+        )
+        response.raise_for_status()
+        return [ip_info["address"].split("/")[0] for ip_info in response.json()]
 
-            result = []
-            for ip_info in data:
-                address = ip_info["address"].split("/")[0]
-                octets = address.split(".")
-                vmid = int(octets[2]) * 1000 + int(octets[3])
+    def _available_ip(self, address: str, vlan: int) -> dict:
+        """Baut den Eintrag einer freien IP (VMID aus den letzten Oktetten)"""
+        octets = address.split(".")
+        vmid = int(octets[2]) * 1000 + int(octets[3])
 
-                result.append({
-                    "address": address,
-                    "vmid": vmid,
-                    "vlan": vlan,
-                })
+        return {
+            "address": address,
+            "vmid": vmid,
+            "vlan": vlan,
+        }
 
-            return result
+    async def _find_ip_id(self, ip_address: str) -> Optional[int]:
+        """
+        Ermittelt die NetBox-ID einer IP.
+
+        Kennt der lokale Index die ID, entfällt der GET-Roundtrip. Gilt die
+        IP lokal als frei, wird trotzdem in NetBox nachgesehen - der Index
+        kann veraltet sein und ein Duplikat wäre schlimmer als ein GET.
+
+        Returns:
+            ID oder None wenn die IP nicht in NetBox existiert
+        """
+        ip_id = self.allocator.get_ip_id(ip_address)
+        if ip_id is not None:
+            return ip_id
+
+        response = await self.client.get(
+            "/api/ipam/ip-addresses/",
+            params={"address": ip_address},
+        )
+        response.raise_for_status()
+        existing = response.json()
+        if existing["count"] == 0:
+            return None
+        return existing["results"][0]["id"]
 
     async def get_used_ips(self, vlan: int, limit: int = 100) -> list[dict]:
         """Holt belegte IPs aus NetBox für ein VLAN"""
@@ -155,146 +234,142 @@ class NetBoxService:
         if not prefix:
             raise ValueError(f"VLAN {vlan} nicht in NetBox konfiguriert")
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/api/ipam/ip-addresses/",
-                params={"parent": prefix, "limit": limit},
-                headers=self.headers,
-                timeout=10.0,
-            )
-            response.raise_for_status()
-            data = response.json()
+        ips = await self.client.get_all(
+            "/api/ipam/ip-addresses/",
+            params={"parent": prefix},
+        )
 
-            result = []
-            for ip_info in data["results"]:
-                address = ip_info["address"].split("/")[0]
-                result.append({
-                    "address": address,
-                    "description": ip_info.get("description", ""),
-                    "status": ip_info.get("status", {}).get("value", "active"),
-                    "dns_name": ip_info.get("dns_name", ""),
-                })
+        result = []
+        for ip_info in ips:
+            address = ip_info["address"].split("/")[0]
+            result.append({
+                "address": address,
+                "description": ip_info.get("description", ""),
+                "status": ip_info.get("status", {}).get("value", "active"),
+                "dns_name": ip_info.get("dns_name", ""),
+            })
 
-            return sorted(result, key=lambda x: int(x["address"].split(".")[-1]))
+        return sorted(result, key=lambda x: int(x["address"].split(".")[-1]))[:limit]
 
     async def reserve_ip(self, ip_address: str, description: str, dns_name: str = "") -> dict:
         """Reserviert eine IP-Adresse in NetBox"""
         self._check_token()
+        self._invalidate_utilization()
+
+        # Prüfen ob IP bereits existiert (lokaler Index oder NetBox)
+        ip_id = await self._find_ip_id(ip_address)
 
-        async with httpx.AsyncClient() as client:
-            # Prüfen ob IP bereits existiert
-            check_response = await client.get(
-                f"{self.base_url}/api/ipam/ip-addresses/",
-                params={"address": ip_address},
-                headers=self.headers,
-                timeout=10.0,
+        if ip_id is not None:
+            # IP existiert bereits - aktualisieren
+            response = await self.client.patch(
+                f"/api/ipam/ip-addresses/{ip_id}/",
+                json={
+                    "description": description,
+                    "dns_name": dns_name,
+                    "status": "reserved",
+                },
+            )
+        else:
+            # Neue IP erstellen
+            prefixlen = self.allocator.get_prefixlen(ip_address) or 24
+            response = await self.client.post(
+                "/api/ipam/ip-addresses/",
+                json={
+                    "address": f"{ip_address}/{prefixlen}",
+                    "description": description,
+                    "dns_name": dns_name,
+                    "status": "reserved",
+                },
             )
-            check_response.raise_for_status()
-            existing = check_response.json()
-
-            if existing["count"] > 0:
-                # IP existiert bereits - aktualisieren
-                ip_id = existing["results"][0]["id"]
-                response = await client.patch(
-                    f"{self.base_url}/api/ipam/ip-addresses/{ip_id}/",
-                    json={
-                        "description": description,
-                        "dns_name": dns_name,
-                        "status": "reserved",
-                    },
-                    headers=self.headers,
-                    timeout=10.0,
-                )
-            else:
-                # Neue IP erstellen
-                response = await client.post(
-                    f"{self.base_url}/api/ipam/ip-addresses/",
-                    json={
-                        "address": f"{ip_address}/24",
-                        "description": description,
-                        "dns_name": dns_name,
-                        "status": "reserved",
-                    },
-                    headers=self.headers,
-                    timeout=10.0,
-                )
 
-            response.raise_for_status()
-            return response.json()
+        # Erst nach dem Schreiben verwerfen - eine parallel berechnete
+        # Auslastung würde sonst den Stand vor der Änderung cachen
+        self._invalidate_utilization()
+        if response.is_error:
+            # Index ggf. veraltet (z.B. IP extern angelegt oder gelöscht)
+            self.allocator.invalidate(ip_address)
+        response.raise_for_status()
+        data = response.json()
+        self.allocator.mark_used(ip_address, data.get("id"))
+        return data
 
     async def activate_ip(self, ip_address: str) -> dict:
         """Setzt IP-Status auf 'active' (nach erfolgreichem Deploy)"""
         self._check_token()
 
-        async with httpx.AsyncClient() as client:
-            # IP finden
-            check_response = await client.get(
-                f"{self.base_url}/api/ipam/ip-addresses/",
-                params={"address": ip_address},
-                headers=self.headers,
-                timeout=10.0,
-            )
-            check_response.raise_for_status()
-            existing = check_response.json()
-
-            if existing["count"] == 0:
-                raise ValueError(f"IP {ip_address} nicht in NetBox gefunden")
-
-            ip_id = existing["results"][0]["id"]
-
-            # Status auf active setzen
-            response = await client.patch(
-                f"{self.base_url}/api/ipam/ip-addresses/{ip_id}/",
-                json={"status": "active"},
-                headers=self.headers,
-                timeout=10.0,
-            )
-            response.raise_for_status()
-            return response.json()
+        # IP finden (lokaler Index oder NetBox)
+        ip_id = await self._find_ip_id(ip_address)
+        if ip_id is None:
+            raise ValueError(f"IP {ip_address} nicht in NetBox gefunden")
+
+        # Status auf active setzen
+        response = await self.client.patch(
+            f"/api/ipam/ip-addresses/{ip_id}/",
+            json={"status": "active"},
+        )
+        if response.is_error:
+            self.allocator.invalidate(ip_address)
+        response.raise_for_status()
+        return response.json()
 
     async def release_ip(self, ip_address: str) -> bool:
         """Gibt eine IP-Adresse frei (löscht sie aus NetBox)"""
         self._check_token()
+        self._invalidate_utilization()
+
+        # IP finden (lokaler Index oder NetBox)
+        ip_id = await self._find_ip_id(ip_address)
+        if ip_id is None:
+            return False
+
+        # IP löschen
+        response = await self.client.delete(
+            f"/api/ipam/ip-addresses/{ip_id}/",
+        )
+        self._invalidate_utilization()
+        if response.status_code == 204:
+            self.allocator.mark_free(ip_address)
+            return True
+        self.allocator.invalidate(ip_address)
+        return False
 
-        async with httpx.AsyncClient() as client:
-            # IP finden
-            check_response = await client.get(
-                f"{self.base_url}/api/ipam/ip-addresses/",
-                params={"address": ip_address},
-                headers=self.headers,
-                timeout=10.0,
-            )
-            check_response.raise_for_status()
-            existing = check_response.json()
-
-            if existing["count"] == 0:
-                return False
-
-            ip_id = existing["results"][0]["id"]
-
-            # IP löschen
-            response = await client.delete(
-                f"{self.base_url}/api/ipam/ip-addresses/{ip_id}/",
-                headers=self.headers,
-                timeout=10.0,
-            )
-            return response.status_code == 204
+    async def check_ip_available(
+        self, ip_address: str, vlan: Optional[int] = None, owner: Optional[str] = None
+    ) -> bool:
+        """
+        Prüft ob eine IP-Adresse verfügbar ist.
 
-    async def check_ip_available(self, ip_address: str) -> bool:
-        """Prüft ob eine IP-Adresse verfügbar ist"""
+        Args:
+            ip_address: IP-Adresse
+            vlan: Optional - VLAN der IP, hydriert den lokalen Index damit
+                  belegte IPs im selben VLAN ohne Roundtrip erkannt werden
+            owner: Optional - Besitzer eines lokalen Leases (z.B. VM-Name);
+                   Leases anderer Besitzer gelten als belegt
+        """
         self._check_token()
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/api/ipam/ip-addresses/",
-                params={"address": ip_address},
-                headers=self.headers,
-                timeout=10.0,
-            )
-            response.raise_for_status()
-            data = response.json()
-
-            return data["count"] == 0
+        if vlan is not None:
+            try:
+                await self.allocator.get_index(vlan)
+            except ValueError:
+                pass
+        # Index nur als negative Abkürzung: belegt bzw. fremd gesperrt ist
+        # sicher, "frei" wird vor Deploy/Apply in NetBox bestätigt
+        if self.allocator.is_available(ip_address, owner=owner) is False:
+            return False
+
+        response = await self.client.get(
+            "/api/ipam/ip-addresses/",
+            params={"address": ip_address},
+        )
+        response.raise_for_status()
+        data = response.json()
+
+        if data["count"] > 0:
+            # Index kannte die IP noch nicht (z.B. extern angelegt)
+            self.allocator.mark_used(ip_address, data["results"][0]["id"])
+            return False
+        return True
 
     async def get_active_ips(self, prefix: str = None) -> list[dict]:
         """
@@ -308,30 +383,49 @@ class NetBoxService:
         """
         self._check_token()
 
-        async with httpx.AsyncClient() as client:
-            params = {"status": "active", "limit": 1000}
-            if prefix:
-                params["parent"] = prefix
+        params = {"status": "active"}
+        if prefix:
+            params["parent"] = prefix
 
-            response = await client.get(
-                f"{self.base_url}/api/ipam/ip-addresses/",
-                params=params,
-                headers=self.headers,
-                timeout=30.0,
-            )
-            response.raise_for_status()
-            data = response.json()
+        ips = await self.client.get_all("/api/ipam/ip-addresses/", params=params)
 
-            return [
-                {
-                    "id": ip["id"],
-                    "address": ip["address"].split("/")[0],  # Ohne CIDR
-                    "description": ip.get("description", ""),
-                    "dns_name": ip.get("dns_name", ""),
-                    "status": ip["status"]["value"],
-                }
-                for ip in data.get("results", [])
-            ]
+        return [
+            {
+                "id": ip["id"],
+                "address": ip["address"].split("/")[0],  # Ohne CIDR
+                "description": ip.get("description", ""),
+                "dns_name": ip.get("dns_name", ""),
+                "status": ip["status"]["value"],
+            }
+            for ip in ips
+        ]
+
+    async def get_all_ips(self) -> list[dict]:
+        """
+        Holt alle IP-Adressen aus NetBox (alle Status, alle Seiten).
+
+        Returns:
+            Liste mit id, address, status, description, dns_name,
+            vm_name (zugewiesene VM) und last_updated
+        """
+        self._check_token()
+
+        ips = await self.client.get_all("/api/ipam/ip-addresses/")
+
+        result = []
+        for ip in ips:
+            assigned = ip.get("assigned_object") or {}
+            vm = assigned.get("virtual_machine") or {}
+            result.append({
+                "id": ip["id"],
+                "address": ip["address"].split("/")[0],
+                "status": (ip.get("status") or {}).get("value", "active"),
+                "description": ip.get("description", ""),
+                "dns_name": ip.get("dns_name", ""),
+                "vm_name": vm.get("name"),
+                "last_updated": ip.get("last_updated"),
+            })
+        return result
 
     # =========================================================================
     # Virtualization - VM Management
@@ -349,60 +443,62 @@ class NetBoxService:
         """
         self._check_token()
 
-        async with httpx.AsyncClient() as client:
-            # Cluster suchen
-            response = await client.get(
-                f"{self.base_url}/api/virtualization/clusters/",
-                params={"name": cluster_name},
-                headers=self.headers,
-                timeout=10.0,
-            )
-            response.raise_for_status()
-            data = response.json()
-
-            if data["count"] > 0:
-                return data["results"][0]["id"]
-
-            # Cluster-Type holen oder erstellen
-            type_response = await client.get(
-                f"{self.base_url}/api/virtualization/cluster-types/",
-                params={"name": "Proxmox VE"},
-                headers=self.headers,
-                timeout=10.0,
-            )
-            type_response.raise_for_status()
-            type_data = type_response.json()
-
-            if type_data["count"] > 0:
-                cluster_type_id = type_data["results"][0]["id"]
-            else:
-                # Cluster-Type erstellen
-                create_type_response = await client.post(
-                    f"{self.base_url}/api/virtualization/cluster-types/",
-                    json={
-                        "name": "Proxmox VE",
-                        "slug": "proxmox-ve",
-                        "description": "Proxmox Virtual Environment",
-                    },
-                    headers=self.headers,
-                    timeout=10.0,
-                )
-                create_type_response.raise_for_status()
-                cluster_type_id = create_type_response.json()["id"]
-
-            # Cluster erstellen
-            create_response = await client.post(
-                f"{self.base_url}/api/virtualization/clusters/",
+        memo_key = (self.base_url, cluster_name)
+        if memo_key in self._cluster_ids:
+            return self._cluster_ids[memo_key]
+
+        cluster_id = await self._get_or_create_cluster(cluster_name)
+        self._cluster_ids[memo_key] = cluster_id
+        return cluster_id
+
+    def _forget_cluster(self, cluster_name: str):
+        """Verwirft die gemerkte Cluster-ID (z.B. Cluster in NetBox gelöscht)"""
+        self._cluster_ids.pop((self.base_url, cluster_name), None)
+        self.client.invalidate("/api/virtualization/clusters/")
+
+    async def _get_or_create_cluster(self, cluster_name: str) -> int:
+        """Sucht bzw. erstellt den Cluster (ohne Memo)"""
+        # Cluster suchen (gecacht)
+        data = await self.client.get_json(
+            "/api/virtualization/clusters/",
+            params={"name": cluster_name},
+        )
+
+        if data["count"] > 0:
+            return data["results"][0]["id"]
+
+        # Cluster-Type holen oder erstellen
+        type_data = await self.client.get_json(
+            "/api/virtualization/cluster-types/",
+            params={"name": "Proxmox VE"},
+        )
+
+        if type_data["count"] > 0:
+            cluster_type_id = type_data["results"][0]["id"]
+        else:
+            # Cluster-Type erstellen
+            create_type_response = await self.client.post(
+                "/api/virtualization/cluster-types/",
                 json={
-                    "name": cluster_name,
-                    "type": cluster_type_id,
-                    "description": "Automatisch erstellt durch Proxmox Commander",
+                    "name": "Proxmox VE",
+                    "slug": "proxmox-ve",
+                    "description": "Proxmox Virtual Environment",
                 },
-                headers=self.headers,
-                timeout=10.0,
             )
-            create_response.raise_for_status()
-            return create_response.json()["id"]
+            create_type_response.raise_for_status()
+            cluster_type_id = create_type_response.json()["id"]
+
+        # Cluster erstellen
+        create_response = await self.client.post(
+            "/api/virtualization/clusters/",
+            json={
+                "name": cluster_name,
+                "type": cluster_type_id,
+                "description": "Automatisch erstellt durch Proxmox Commander",
+            },
+        )
+        create_response.raise_for_status()
+        return create_response.json()["id"]
 
     async def create_vm(
         self,
@@ -431,51 +527,47 @@ class NetBoxService:
 
         cluster_id = await self.get_or_create_cluster(cluster_name)
 
-        async with httpx.AsyncClient() as client:
-            # Pruefen ob VM bereits existiert
-            check_response = await client.get(
-                f"{self.base_url}/api/virtualization/virtual-machines/",
-                params={"name": name},
-                headers=self.headers,
-                timeout=10.0,
+        # Pruefen ob VM bereits existiert
+        check_response = await self.client.get(
+            "/api/virtualization/virtual-machines/",
+            params={"name": name},
+        )
+        check_response.raise_for_status()
+        existing = check_response.json()
+
+        if existing["count"] > 0:
+            # VM existiert - aktualisieren
+            vm_id = existing["results"][0]["id"]
+            response = await self.client.patch(
+                f"/api/virtualization/virtual-machines/{vm_id}/",
+                json={
+                    "vcpus": vcpus,
+                    "memory": memory_mb,
+                    "disk": disk_gb,
+                    "description": description,
+                    "status": "active",
+                },
             )
-            check_response.raise_for_status()
-            existing = check_response.json()
-
-            if existing["count"] > 0:
-                # VM existiert - aktualisieren
-                vm_id = existing["results"][0]["id"]
-                response = await client.patch(
-                    f"{self.base_url}/api/virtualization/virtual-machines/{vm_id}/",
-                    json={
-                        "vcpus": vcpus,
-                        "memory": memory_mb,
-                        "disk": disk_gb,
-                        "description": description,
-                        "status": "active",
-                    },
-                    headers=self.headers,
-                    timeout=10.0,
-                )
-            else:
-                # Neue VM erstellen
-                response = await client.post(
-                    f"{self.base_url}/api/virtualization/virtual-machines/",
-                    json={
-                        "name": name,
-                        "cluster": cluster_id,
-                        "vcpus": vcpus,
-                        "memory": memory_mb,
-                        "disk": disk_gb,
-                        "description": description,
-                        "status": "active",
-                    },
-                    headers=self.headers,
-                    timeout=10.0,
-                )
-
-            response.raise_for_status()
-            return response.json()
+        else:
+            # Neue VM erstellen
+            payload = {
+                "name": name,
+                "cluster": cluster_id,
+                "vcpus": vcpus,
+                "memory": memory_mb,
+                "disk": disk_gb,
+                "description": description,
+                "status": "active",
+            }
+            response = await self.client.post("/api/virtualization/virtual-machines/", json=payload)
+            if response.status_code in (400, 404):
+                # Gemerkte Cluster-ID evtl. veraltet: neu auflösen, einmal wiederholen
+                self._forget_cluster(cluster_name)
+                payload["cluster"] = await self.get_or_create_cluster(cluster_name)
+                response = await self.client.post("/api/virtualization/virtual-machines/", json=payload)
+
+        response.raise_for_status()
+        return response.json()
 
     async def assign_ip_to_vm(self, vm_name: str, ip_address: str) -> bool:
         """
@@ -490,58 +582,49 @@ class NetBoxService:
         """
         self._check_token()
 
-        async with httpx.AsyncClient() as client:
-            # VM finden
-            vm_response = await client.get(
-                f"{self.base_url}/api/virtualization/virtual-machines/",
-                params={"name": vm_name},
-                headers=self.headers,
-                timeout=10.0,
-            )
-            vm_response.raise_for_status()
-            vm_data = vm_response.json()
-
-            if vm_data["count"] == 0:
-                return False
-
-            vm_id = vm_data["results"][0]["id"]
-
-            # IP finden
-            ip_response = await client.get(
-                f"{self.base_url}/api/ipam/ip-addresses/",
-                params={"address": ip_address},
-                headers=self.headers,
-                timeout=10.0,
-            )
-            ip_response.raise_for_status()
-            ip_data = ip_response.json()
-
-            if ip_data["count"] == 0:
-                return False
-
-            ip_id = ip_data["results"][0]["id"]
-
-            # IP mit VM verknuepfen (assigned_object)
-            await client.patch(
-                f"{self.base_url}/api/ipam/ip-addresses/{ip_id}/",
-                json={
-                    "assigned_object_type": "virtualization.virtualmachine",
-                    "assigned_object_id": vm_id,
-                },
-                headers=self.headers,
-                timeout=10.0,
-            )
-
-            # VM aktualisieren mit primary_ip4
-            update_response = await client.patch(
-                f"{self.base_url}/api/virtualization/virtual-machines/{vm_id}/",
-                json={"primary_ip4": ip_id},
-                headers=self.headers,
-                timeout=10.0,
-            )
-            update_response.raise_for_status()
-
-            return True
+        # VM finden
+        vm_response = await self.client.get(
+            "/api/virtualization/virtual-machines/",
+            params={"name": vm_name},
+        )
+        vm_response.raise_for_status()
+        vm_data = vm_response.json()
+
+        if vm_data["count"] == 0:
+            return False
+
+        vm_id = vm_data["results"][0]["id"]
+
+        # IP finden
+        ip_response = await self.client.get(
+            "/api/ipam/ip-addresses/",
+            params={"address": ip_address},
+        )
+        ip_response.raise_for_status()
+        ip_data = ip_response.json()
+
+        if ip_data["count"] == 0:
+            return False
+
+        ip_id = ip_data["results"][0]["id"]
+
+        # IP mit VM verknuepfen (assigned_object)
+        await self.client.patch(
+            f"/api/ipam/ip-addresses/{ip_id}/",
+            json={
+                "assigned_object_type": "virtualization.virtualmachine",
+                "assigned_object_id": vm_id,
+            },
+        )
+
+        # VM aktualisieren mit primary_ip4
+        update_response = await self.client.patch(
+            f"/api/virtualization/virtual-machines/{vm_id}/",
+            json={"primary_ip4": ip_id},
+        )
+        update_response.raise_for_status()
+
+        return True
 
     async def create_vm_with_ip(
         self,
@@ -576,22 +659,19 @@ class NetBoxService:
         }
 
         try:
-            # VM erstellen
-            vm = await self.create_vm(
-                name=name,
-                vcpus=vcpus,
-                memory_mb=memory_mb,
-                disk_gb=disk_gb,
-                cluster_name=cluster_name,
-                description=description,
-            )
-            result["vm"] = vm
+            registered = await self.register_vms([{
+                "name": name,
+                "ip_address": ip_address,
+                "vcpus": vcpus,
+                "memory_mb": memory_mb,
+                "disk_gb": disk_gb,
+                "cluster_name": cluster_name,
+                "description": description,
+            }])
+            result["vm"] = registered[name]["vm"]
+            result["ip_assigned"] = registered[name]["ip_assigned"]
             result["success"] = True
 
-            # IP zuweisen
-            ip_assigned = await self.assign_ip_to_vm(name, ip_address)
-            result["ip_assigned"] = ip_assigned
-
         except Exception as e:
             result["error"] = str(e)
 
@@ -609,29 +689,24 @@ class NetBoxService:
         """
         self._check_token()
 
-        async with httpx.AsyncClient() as client:
-            # VM finden
-            response = await client.get(
-                f"{self.base_url}/api/virtualization/virtual-machines/",
-                params={"name": name},
-                headers=self.headers,
-                timeout=10.0,
-            )
-            response.raise_for_status()
-            data = response.json()
+        # VM finden
+        response = await self.client.get(
+            "/api/virtualization/virtual-machines/",
+            params={"name": name},
+        )
+        response.raise_for_status()
+        data = response.json()
 
-            if data["count"] == 0:
-                return False
+        if data["count"] == 0:
+            return False
 
-            vm_id = data["results"][0]["id"]
+        vm_id = data["results"][0]["id"]
 
-            # VM löschen
-            delete_response = await client.delete(
-                f"{self.base_url}/api/virtualization/virtual-machines/{vm_id}/",
-                headers=self.headers,
-                timeout=10.0,
-            )
-            return delete_response.status_code == 204
+        # VM löschen
+        delete_response = await self.client.delete(
+            f"/api/virtualization/virtual-machines/{vm_id}/",
+        )
+        return delete_response.status_code == 204
 
     async def delete_vm_and_ip(self, name: str, ip_address: str) -> dict:
         """
@@ -644,24 +719,319 @@ class NetBoxService:
         Returns:
             dict mit vm_deleted und ip_deleted Status
         """
-        vm_deleted = False
-        ip_deleted = False
-
         try:
-            vm_deleted = await self.delete_vm(name)
+            result = await self.unregister_vms([{"name": name, "ip_address": ip_address}])
+            return result[name]
         except Exception:
-            pass
+            return {
+                "vm_deleted": False,
+                "ip_deleted": False,
+            }
+
+    # =========================================================================
+    # Bulk-Operationen (Listen-POST/PATCH/DELETE)
+    # =========================================================================
+
+    async def _bulk_get(self, path: str, filter_name: str, values: list, params: dict = None) -> list[dict]:
+        """
+        Lädt Objekte für viele Filterwerte (z.B. name=a&name=b).
+
+        Die Werte werden in Blöcken von BULK_FILTER_CHUNK abgefragt, damit
+        die URL nicht zu lang wird.
+        """
+        values = list(dict.fromkeys(v for v in values if v))
+        if not values:
+            return []
+        chunks = [values[i:i + BULK_FILTER_CHUNK] for i in range(0, len(values), BULK_FILTER_CHUNK)]
+        pages = await asyncio.gather(*[
+            self.client.get_all(path, params={**(params or {}), filter_name: chunk}, use_cache=False)
+            for chunk in chunks
+        ])
+        return [obj for page in pages for obj in page]
+
+    async def _bulk_write(self, method: str, path: str, payload: list[dict]) -> list[dict]:
+        """Schreibt eine Liste von Objekten in einem Request"""
+        if not payload:
+            return []
+        response = await self.client.request(method, path, json=payload, timeout=30.0)
+        response.raise_for_status()
+        return response.json() if response.status_code != 204 else []
+
+    async def register_ips(self, entries: list[dict]) -> dict[str, dict]:
+        """
+        Legt viele IP-Adressen an bzw. aktualisiert sie (Upsert).
+
+        Args:
+            entries: Dicts mit address, description, dns_name, status
+                     ('reserved' oder 'active') und optional
+                     assigned_object_type/assigned_object_id
+
+        Returns:
+            Dict Adresse -> NetBox-Objekt
+        """
+        self._check_token()
+        self._invalidate_utilization()
+
+        if not entries:
+            return {}
+        entries = list({e["address"]: e for e in entries}.values())
+
+        existing = await self._bulk_get(
+            "/api/ipam/ip-addresses/", "address", [e["address"] for e in entries]
+        )
+        existing_ids = {ip["address"].split("/")[0]: ip["id"] for ip in existing}
+
+        to_create, to_update = [], []
+        for entry in entries:
+            address = entry["address"]
+            fields = {k: v for k, v in entry.items() if k != "address"}
+            if address in existing_ids:
+                to_update.append({"id": existing_ids[address], **fields})
+            else:
+                prefixlen = self.allocator.get_prefixlen(address) or 24
+                to_create.append({"address": f"{address}/{prefixlen}", **fields})
 
         try:
-            ip_deleted = await self.release_ip(ip_address)
+            created, updated = await asyncio.gather(
+                self._bulk_write("POST", "/api/ipam/ip-addresses/", to_create),
+                self._bulk_write("PATCH", "/api/ipam/ip-addresses/", to_update),
+            )
         except Exception:
-            pass
+            self.allocator.invalidate()
+            raise
+        finally:
+            self._invalidate_utilization()
+
+        result = {}
+        for ip in created + updated:
+            address = ip["address"].split("/")[0]
+            self.allocator.mark_used(address, ip["id"])
+            result[address] = ip
+        return result
+
+    async def release_ips(self, addresses: list[str]) -> list[str]:
+        """
+        Löscht viele IP-Adressen mit einem Listen-DELETE.
+
+        Gibt es eine Adresse mehrfach (z.B. in einem anderen VRF oder
+        Tenant), ist nicht klar, welches Objekt gemeint ist - sie wird dann
+        nicht gelöscht.
+
+        Returns:
+            Liste der gelöschten Adressen
+        """
+        self._check_token()
+        self._invalidate_utilization()
+
+        found = await self._bulk_get("/api/ipam/ip-addresses/", "address", addresses)
+        by_address: dict[str, list[dict]] = {}
+        for ip in found:
+            by_address.setdefault(ip["address"].split("/")[0], []).append(ip)
+
+        existing = []
+        for address, ips in by_address.items():
+            if len(ips) > 1:
+                logger.warning(
+                    f"IP {address} existiert {len(ips)}x in NetBox (VRF/Tenant), wird nicht gelöscht"
+                )
+                continue
+            existing.append(ips[0])
+        if not existing:
+            return []
+
+        try:
+            await self._bulk_write("DELETE", "/api/ipam/ip-addresses/", [{"id": ip["id"]} for ip in existing])
+        finally:
+            self._invalidate_utilization()
+
+        deleted = [ip["address"].split("/")[0] for ip in existing]
+        for address in deleted:
+            self.allocator.mark_free(address)
+        return deleted
+
+    async def register_vms(self, entries: list[dict]) -> dict[str, dict]:
+        """
+        Registriert viele VMs inkl. Interface und primärer IP in NetBox.
+
+        Unabhängig von der Anzahl VMs werden nur wenige Requests benötigt:
+        VMs suchen/anlegen/aktualisieren, Interfaces (eth0) suchen/anlegen,
+        IPs upserten und dem Interface zuweisen, primary_ip4 setzen.
+
+        Args:
+            entries: Dicts mit name und optional ip_address, vcpus,
+                     memory_mb, disk_gb, description, cluster_name,
+                     ip_description, dns_name, ip_status
+
+        Returns:
+            Dict VM-Name -> {"vm": dict, "ip_assigned": bool}
+        """
+        self._check_token()
+
+        if not entries:
+            return {}
+        # Doppelte Namen (z.B. aus der Sammel-Queue): letzter Eintrag gewinnt
+        entries = list({e["name"]: e for e in entries}.values())
+
+        # 1. Cluster-IDs (memoisiert)
+        cluster_names = {e.get("cluster_name", "Proxmox") for e in entries}
+        cluster_ids = {name: await self.get_or_create_cluster(name) for name in cluster_names}
+
+        # 2. VMs anlegen bzw. aktualisieren
+        existing_vms = await self._bulk_get(
+            "/api/virtualization/virtual-machines/", "name", [e["name"] for e in entries]
+        )
+        vm_ids = {vm["name"]: vm["id"] for vm in existing_vms}
+
+        to_create, to_update = [], []
+        for entry in entries:
+            fields = {
+                "vcpus": entry.get("vcpus", 2),
+                "memory": entry.get("memory_mb", 4096),
+                "disk": entry.get("disk_gb", 32),
+                "description": entry.get("description", ""),
+                "status": "active",
+            }
+            if entry["name"] in vm_ids:
+                to_update.append({"id": vm_ids[entry["name"]], **fields})
+            else:
+                to_create.append({
+                    "name": entry["name"],
+                    "cluster_name": entry.get("cluster_name", "Proxmox"),
+                    **fields,
+                })
+
+        def with_cluster(items: list[dict]) -> list[dict]:
+            return [
+                {**{k: v for k, v in item.items() if k != "cluster_name"},
+                 "cluster": cluster_ids[item["cluster_name"]]}
+                for item in items
+            ]
+
+        async def create_vms() -> list[dict]:
+            try:
+                return await self._bulk_write(
+                    "POST", "/api/virtualization/virtual-machines/", with_cluster(to_create)
+                )
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code not in (400, 404):
+                    raise
+            # Gemerkte Cluster-IDs evtl. veraltet: neu auflösen, einmal wiederholen
+            for name in cluster_names:
+                self._forget_cluster(name)
+            cluster_ids.update({name: await self.get_or_create_cluster(name) for name in cluster_names})
+            return await self._bulk_write(
+                "POST", "/api/virtualization/virtual-machines/", with_cluster(to_create)
+            )
+
+        created, updated = await asyncio.gather(
+            create_vms(),
+            self._bulk_write("PATCH", "/api/virtualization/virtual-machines/", to_update),
+        )
+        vms = {vm["name"]: vm for vm in created + updated}
+        result = {name: {"vm": vm, "ip_assigned": False} for name, vm in vms.items()}
+
+        with_ip = [e for e in entries if e.get("ip_address") and e["name"] in vms]
+        if not with_ip:
+            return result
+
+        # 3. Interface eth0 pro VM (IPs werden in NetBox Interfaces zugewiesen)
+        vm_id_list = [vms[e["name"]]["id"] for e in with_ip]
+        existing_ifaces = await self._bulk_get(
+            "/api/virtualization/interfaces/", "virtual_machine_id", vm_id_list, {"name": VM_INTERFACE_NAME}
+        )
+        iface_ids = {iface["virtual_machine"]["id"]: iface["id"] for iface in existing_ifaces}
+        new_ifaces = await self._bulk_write(
+            "POST",
+            "/api/virtualization/interfaces/",
+            [{"virtual_machine": vm_id, "name": VM_INTERFACE_NAME} for vm_id in vm_id_list if vm_id not in iface_ids],
+        )
+        for iface in new_ifaces:
+            iface_ids[iface["virtual_machine"]["id"]] = iface["id"]
+
+        # 4. IPs upserten und zuweisen
+        ips = await self.register_ips([
+            {
+                "address": e["ip_address"],
+                "description": e.get("ip_description", f"VM: {e['name']}"),
+                "dns_name": e.get("dns_name", ""),
+                "status": e.get("ip_status", "active"),
+                "assigned_object_type": "virtualization.vminterface",
+                "assigned_object_id": iface_ids[vms[e["name"]]["id"]],
+            }
+            for e in with_ip
+        ])
+
+        # 5. primary_ip4 setzen
+        primary = [
+            {"id": vms[e["name"]]["id"], "primary_ip4": ips[e["ip_address"]]["id"]}
+            for e in with_ip
+            if e["ip_address"] in ips
+        ]
+        await self._bulk_write("PATCH", "/api/virtualization/virtual-machines/", primary)
+
+        for e in with_ip:
+            result[e["name"]]["ip_assigned"] = e["ip_address"] in ips
+        return result
+
+    async def unregister_vms(self, entries: list[dict]) -> dict[str, dict]:
+        """
+        Entfernt viele VMs und deren IPs mit Listen-DELETEs aus NetBox.
+
+        Interfaces werden von NetBox mit der VM gelöscht.
+
+        Args:
+            entries: Dicts mit name und optional ip_address
+
+        Returns:
+            Dict VM-Name -> {"vm_deleted": bool, "ip_deleted": bool}
+        """
+        self._check_token()
+
+        if not entries:
+            return {}
+
+        # IPs zuerst (primary_ip4 verweist auf sie), dann VMs
+        deleted_ips = set(await self.release_ips([e.get("ip_address") for e in entries]))
+
+        existing_vms = await self._bulk_get(
+            "/api/virtualization/virtual-machines/", "name", [e["name"] for e in entries]
+        )
+        await self._bulk_write(
+            "DELETE", "/api/virtualization/virtual-machines/", [{"id": vm["id"]} for vm in existing_vms]
+        )
+        deleted_vms = {vm["name"] for vm in existing_vms}
 
         return {
-            "vm_deleted": vm_deleted,
-            "ip_deleted": ip_deleted,
+            e["name"]: {
+                "vm_deleted": e["name"] in deleted_vms,
+                "ip_deleted": e.get("ip_address") in deleted_ips,
+            }
+            for e in entries
         }
 
+    async def register_vm_batched(self, entry: dict) -> dict:
+        """
+        Registriert eine VM über die Sammel-Queue.
+
+        Zeitgleich abgeschlossene Deploys (z.B. Batch-Apply) werden zu
+        einem register_vms()-Aufruf zusammengefasst.
+
+        Returns:
+            {"vm": dict, "ip_assigned": bool}
+        """
+        result = await self._register_queue.submit(entry)
+        return result[entry["name"]]
+
+    async def unregister_vm_batched(self, name: str, ip_address: Optional[str] = None) -> dict:
+        """
+        Entfernt eine VM über die Sammel-Queue (siehe register_vm_batched).
+
+        Returns:
+            {"vm_deleted": bool, "ip_deleted": bool}
+        """
+        result = await self._unregister_queue.submit({"name": name, "ip_address": ip_address})
+        return result[name]
+
     async def check_ipam_status(self) -> dict:
         """
         Prüft den IPAM-Status in NetBox.
@@ -682,27 +1052,16 @@ class NetBoxService:
         }
 
         try:
-            async with httpx.AsyncClient() as client:
-                # Prefixes zählen
-                response = await client.get(
-                    f"{self.base_url}/api/ipam/prefixes/",
-                    headers=self.headers,
-                    timeout=10.0,
-                )
-                response.raise_for_status()
-                result["prefixes_count"] = response.json()["count"]
-
-                # VLANs zählen
-                response = await client.get(
-                    f"{self.base_url}/api/ipam/vlans/",
-                    headers=self.headers,
-                    timeout=10.0,
-                )
-                response.raise_for_status()
-                result["vlans_count"] = response.json()["count"]
+            # Prefixes zählen
+            data = await self.client.get_json("/api/ipam/prefixes/", params={"limit": 1})
+            result["prefixes_count"] = data["count"]
 
-                # Konfiguriert wenn mindestens ein Prefix existiert
-                result["configured"] = result["prefixes_count"] > 0
+            # VLANs zählen
+            data = await self.client.get_json("/api/ipam/vlans/", params={"limit": 1})
+            result["vlans_count"] = data["count"]
+
+            # Konfiguriert wenn mindestens ein Prefix existiert
+            result["configured"] = result["prefixes_count"] > 0
 
         except Exception as e:
             result["error"] = str(e)
@@ -721,17 +1080,12 @@ class NetBoxService:
         """
         self._check_token()
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/api/ipam/vlans/",
-                params={"vid": vlan_id},
-                headers=self.headers,
-                timeout=10.0,
-            )
-            response.raise_for_status()
-            data = response.json()
+        data = await self.client.get_json(
+            "/api/ipam/vlans/",
+            params={"vid": vlan_id},
+        )
 
-            return data["count"] > 0
+        return data["count"] > 0
 
     async def create_vlan(self, vlan_id: int, name: str = None) -> Optional[dict]:
         """
@@ -749,20 +1103,17 @@ class NetBoxService:
         if name is None:
             name = f"VLAN{vlan_id}"
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/api/ipam/vlans/",
-                json={
-                    "vid": vlan_id,
-                    "name": name,
-                    "status": "active",
-                    "description": "Importiert aus Proxmox",
-                },
-                headers=self.headers,
-                timeout=10.0,
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self.client.post(
+            "/api/ipam/vlans/",
+            json={
+                "vid": vlan_id,
+                "name": name,
+                "status": "active",
+                "description": "Importiert aus Proxmox",
+            },
+        )
+        response.raise_for_status()
+        return response.json()
 
     async def get_vlan_netbox_id(self, vlan_id: int) -> Optional[int]:
         """
@@ -776,19 +1127,14 @@ class NetBoxService:
         """
         self._check_token()
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/api/ipam/vlans/",
-                params={"vid": vlan_id},
-                headers=self.headers,
-                timeout=10.0,
-            )
-            response.raise_for_status()
-            data = response.json()
+        data = await self.client.get_json(
+            "/api/ipam/vlans/",
+            params={"vid": vlan_id},
+        )
 
-            if data["count"] > 0:
-                return data["results"][0]["id"]
-            return None
+        if data["count"] > 0:
+            return data["results"][0]["id"]
+        return None
 
     async def create_prefix_for_vlan(
         self, vlan_id: int, prefix: str = None
@@ -813,80 +1159,173 @@ class NetBoxService:
         if not vlan_netbox_id:
             raise ValueError(f"VLAN {vlan_id} nicht in NetBox gefunden")
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/api/ipam/prefixes/",
-                json={
-                    "prefix": prefix,
-                    "vlan": vlan_netbox_id,
-                    "status": "active",
-                    "is_pool": True,
-                    "description": "Automatisch erstellt",
-                },
-                headers=self.headers,
-                timeout=10.0,
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self.client.post(
+            "/api/ipam/prefixes/",
+            json={
+                "prefix": prefix,
+                "vlan": vlan_netbox_id,
+                "status": "active",
+                "is_pool": True,
+                "description": "Automatisch erstellt",
+            },
+        )
+        response.raise_for_status()
+        return response.json()
 
     async def get_prefixes_with_utilization(self) -> list[dict]:
         """
         Holt alle Prefixes aus NetBox mit Auslastungsdaten.
 
+        Prefixes und IP-Adressen werden mit je einer (paginierten) Liste
+        parallel geladen und lokal zugeordnet - keine Abfrage pro Prefix.
+        Das Ergebnis wird UTILIZATION_CACHE_TTL Sekunden gecacht.
+
         Returns:
-            Liste von Prefix-Objekten mit utilization
+            Liste von Prefix-Objekten mit utilization (IPv4 und IPv6)
         """
         self._check_token()
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/api/ipam/prefixes/",
-                params={"limit": 100},
-                headers=self.headers,
-                timeout=10.0,
-            )
-            response.raise_for_status()
-            data = response.json()
-
-            result = []
-            for prefix_info in data["results"]:
-                vlan_info = prefix_info.get("vlan")
-                vlan_id = vlan_info.get("vid") if vlan_info else None
-
-                # Utilization berechnen (falls children existiert)
-                utilization = 0
-                children = prefix_info.get("children", 0)
-                family = prefix_info.get("family", {}).get("value", 4)
-
-                # Vereinfachte Berechnung basierend auf Prefix-Größe
-                prefix_str = prefix_info.get("prefix", "")
-                if "/" in prefix_str:
-                    cidr = int(prefix_str.split("/")[1])
-                    if family == 4:
-                        total_ips = 2 ** (32 - cidr) - 2  # Netz + Broadcast abziehen
-                        if total_ips > 0:
-                            # Holen wir die Anzahl der verwendeten IPs
-                            try:
-                                ip_response = await client.get(
-                                    f"{self.base_url}/api/ipam/ip-addresses/",
-                                    params={"parent": prefix_str},
-                                    headers=self.headers,
-                                    timeout=10.0,
-                                )
-                                ip_response.raise_for_status()
-                                used_ips = ip_response.json()["count"]
-                                utilization = int((used_ips / total_ips) * 100)
-                            except Exception:
-                                utilization = 0
-
-                result.append({
-                    "prefix": prefix_str,
-                    "vlan": vlan_id,
-                    "description": prefix_info.get("description", ""),
-                    "utilization": utilization,
-                })
-
-            return sorted(result, key=lambda x: x["prefix"])
+        now = time.monotonic()
+        if self._utilization_cache and self._utilization_cache[0] > now:
+            return [dict(p) for p in self._utilization_cache[1]]
+
+        prefixes, ips = await asyncio.gather(
+            self.client.get_all("/api/ipam/prefixes/"),
+            self.client.get_all("/api/ipam/ip-addresses/", params={"brief": 1}, use_cache=False),
+        )
+
+        networks = []
+        for prefix_info in prefixes:
+            try:
+                networks.append(ipaddress.ip_network(prefix_info.get("prefix", ""), strict=False))
+            except ValueError:
+                networks.append(None)
+
+        used = _count_ips_per_network(networks, [ip.get("address", "") for ip in ips])
+
+        result = []
+        for index, prefix_info in enumerate(prefixes):
+            vlan_info = prefix_info.get("vlan")
+            vlan_id = vlan_info.get("vid") if vlan_info else None
+
+            utilization = 0
+            network = networks[index]
+            if network is not None:
+                total_ips = network.num_addresses
+                # IPv4: Netz + Broadcast abziehen (ausser /31 und /32)
+                if network.version == 4 and network.prefixlen < 31:
+                    total_ips -= 2
+                if total_ips > 0:
+                    utilization = min(100, int((used[index] / total_ips) * 100))
+
+            result.append({
+                "prefix": prefix_info.get("prefix", ""),
+                "vlan": vlan_id,
+                "description": prefix_info.get("description", ""),
+                "utilization": utilization,
+            })
+
+        result.sort(key=lambda x: x["prefix"])
+        self._utilization_cache = (now + UTILIZATION_CACHE_TTL, result)
+        return [dict(p) for p in result]
+
+    def _invalidate_utilization(self):
+        """Verwirft die gecachte Auslastung (nach eigenen IP-Änderungen)"""
+        self._utilization_cache = None
+
+
+class _BulkQueue:
+    """
+    Fasst Einzelaufrufe innerhalb von BULK_QUEUE_WINDOW zu einem Bulk-Aufruf zusammen.
+
+    Jeder Aufrufer erhält das Ergebnis des gemeinsamen Bulk-Aufrufs. Schlägt
+    dieser fehl, wird jeder Eintrag einzeln wiederholt - ein fehlerhafter
+    Eintrag reißt so nicht die übrigen mit.
+    """
+
+    def __init__(self, handler):
+        self._handler = handler
+        self._pending: list[tuple[dict, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def submit(self, entry: dict):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((entry, future))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush())
+        return await future
+
+    async def _flush(self):
+        await asyncio.sleep(BULK_QUEUE_WINDOW)
+        batch, self._pending = self._pending, []
+        # Neue Einträge während des Bulk-Aufrufs starten den nächsten Flush
+        self._flush_task = None
+        try:
+            result = await self._handler([entry for entry, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                self._resolve(batch[0][1], error=e)
+                return
+            await asyncio.gather(*(self._retry_single(entry, future) for entry, future in batch))
+            return
+        for _, future in batch:
+            self._resolve(future, result=result)
+
+    async def _retry_single(self, entry: dict, future: asyncio.Future):
+        """Wiederholt einen Eintrag eines fehlgeschlagenen Bulk-Aufrufs einzeln"""
+        try:
+            result = await self._handler([entry])
+        except Exception as e:
+            self._resolve(future, error=e)
+        else:
+            self._resolve(future, result=result)
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, result=None, error: Optional[Exception] = None):
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+
+def _count_ips_per_network(networks: list, addresses: list[str]) -> list[int]:
+    """
+    Zählt die IP-Adressen pro Prefix (wie NetBox 'parent=').
+
+    Index: pro (IP-Version, Prefix-Länge) ein Dict Netzadresse -> Prefix-Indizes.
+    Eine IP wird für jede vorkommende Prefix-Länge maskiert und nachgeschlagen,
+    verschachtelte Prefixes zählen die IP also jeweils mit.
+
+    Args:
+        networks: ip_network-Objekte (None für ungültige Prefixes)
+        addresses: IP-Adressen mit oder ohne CIDR
+
+    Returns:
+        Anzahl IPs pro Eintrag in networks
+    """
+    counts = [0] * len(networks)
+    index: dict[int, dict[int, dict[int, list[int]]]] = {4: {}, 6: {}}
+    for i, network in enumerate(networks):
+        if network is None:
+            continue
+        by_length = index[network.version].setdefault(network.prefixlen, {})
+        by_length.setdefault(int(network.network_address), []).append(i)
+
+    for address in addresses:
+        try:
+            ip = ipaddress.ip_address(address.split("/")[0])
+        except ValueError:
+            continue
+        bits = ip.max_prefixlen
+        value = int(ip)
+        for prefixlen, by_network in index[ip.version].items():
+            mask = ((1 << prefixlen) - 1) << (bits - prefixlen)
+            for i in by_network.get(value & mask, ()):
+                counts[i] += 1
+
+    return counts
 
 
 # Singleton-Instanz
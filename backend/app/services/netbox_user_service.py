@@ -6,6 +6,7 @@ from typing import Optional
 import httpx
 
 from app.config import settings
+from app.services.netbox_client import get_netbox_client
 
 logger = logging.getLogger(__name__)
 
@@ -14,16 +15,15 @@ class NetBoxUserService:
     """Service für NetBox User-Management"""
 
     def __init__(self):
-        self.base_url = settings.netbox_url
-        self.token = settings.netbox_token
+        self.client = get_netbox_client()
 
     @property
-    def headers(self) -> dict:
-        """HTTP Headers für NetBox API"""
-        return {
-            "Authorization": f"Token {self.token}",
-            "Content-Type": "application/json",
-        }
+    def base_url(self) -> str:
+        return settings.netbox_url
+
+    @property
+    def token(self) -> Optional[str]:
+        return settings.netbox_token
 
     def _check_config(self) -> bool:
         """Prüft ob NetBox konfiguriert ist"""
@@ -46,19 +46,16 @@ class NetBoxUserService:
             return None
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/api/users/users/",
-                    params={"username": username},
-                    headers=self.headers,
-                    timeout=10.0,
-                )
-                response.raise_for_status()
-                data = response.json()
-
-                if data.get("count", 0) > 0:
-                    return data["results"][0]
-                return None
+            response = await self.client.get(
+                "/api/users/users/",
+                params={"username": username},
+            )
+            response.raise_for_status()
+            data = response.json()
+
+            if data.get("count", 0) > 0:
+                return data["results"][0]
+            return None
 
         except Exception as e:
             logger.error(f"NetBox User-Suche fehlgeschlagen: {e}")
@@ -78,16 +75,13 @@ class NetBoxUserService:
             return None
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/api/users/users/{user_id}/",
-                    headers=self.headers,
-                    timeout=10.0,
-                )
-                if response.status_code == 404:
-                    return None
-                response.raise_for_status()
-                return response.json()
+            response = await self.client.get(
+                f"/api/users/users/{user_id}/",
+            )
+            if response.status_code == 404:
+                return None
+            response.raise_for_status()
+            return response.json()
 
         except Exception as e:
             logger.error(f"NetBox User abrufen fehlgeschlagen: {e}")
@@ -126,30 +120,27 @@ class NetBoxUserService:
             return existing
 
         try:
-            async with httpx.AsyncClient() as client:
-                payload = {
-                    "username": username,
-                    "email": email or f"{username}@local",
-                    "password": password,
-                    "is_staff": is_staff,
-                    "is_active": True,
-                }
-
-                if first_name:
-                    payload["first_name"] = first_name
-                if last_name:
-                    payload["last_name"] = last_name
-
-                response = await client.post(
-                    f"{self.base_url}/api/users/users/",
-                    json=payload,
-                    headers=self.headers,
-                    timeout=10.0,
-                )
-                response.raise_for_status()
-                user = response.json()
-                logger.info(f"NetBox User '{username}' erstellt (ID: {user['id']})")
-                return user
+            payload = {
+                "username": username,
+                "email": email or f"{username}@local",
+                "password": password,
+                "is_staff": is_staff,
+                "is_active": True,
+            }
+
+            if first_name:
+                payload["first_name"] = first_name
+            if last_name:
+                payload["last_name"] = last_name
+
+            response = await self.client.post(
+                "/api/users/users/",
+                json=payload,
+            )
+            response.raise_for_status()
+            user = response.json()
+            logger.info(f"NetBox User '{username}' erstellt (ID: {user['id']})")
+            return user
 
         except httpx.HTTPStatusError as e:
             logger.error(f"NetBox User-Erstellung fehlgeschlagen: {e.response.status_code} - {e.response.text}")
@@ -201,17 +192,14 @@ class NetBoxUserService:
                 logger.warning("Keine Felder zum Aktualisieren angegeben")
                 return await self.get_user_by_id(user_id)
 
-            async with httpx.AsyncClient() as client:
-                response = await client.patch(
-                    f"{self.base_url}/api/users/users/{user_id}/",
-                    json=payload,
-                    headers=self.headers,
-                    timeout=10.0,
-                )
-                response.raise_for_status()
-                user = response.json()
-                logger.info(f"NetBox User ID {user_id} aktualisiert")
-                return user
+            response = await self.client.patch(
+                f"/api/users/users/{user_id}/",
+                json=payload,
+            )
+            response.raise_for_status()
+            user = response.json()
+            logger.info(f"NetBox User ID {user_id} aktualisiert")
+            return user
 
         except Exception as e:
             logger.error(f"NetBox User-Update fehlgeschlagen: {e}")
@@ -232,16 +220,13 @@ class NetBoxUserService:
             return False
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.patch(
-                    f"{self.base_url}/api/users/users/{user_id}/",
-                    json={"password": password},
-                    headers=self.headers,
-                    timeout=10.0,
-                )
-                response.raise_for_status()
-                logger.info(f"NetBox Passwort für User ID {user_id} geändert")
-                return True
+            response = await self.client.patch(
+                f"/api/users/users/{user_id}/",
+                json={"password": password},
+            )
+            response.raise_for_status()
+            logger.info(f"NetBox Passwort für User ID {user_id} geändert")
+            return True
 
         except Exception as e:
             logger.error(f"NetBox Passwort-Änderung fehlgeschlagen: {e}")
@@ -261,16 +246,13 @@ class NetBoxUserService:
             return False
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.patch(
-                    f"{self.base_url}/api/users/users/{user_id}/",
-                    json={"is_active": False},
-                    headers=self.headers,
-                    timeout=10.0,
-                )
-                response.raise_for_status()
-                logger.info(f"NetBox User ID {user_id} deaktiviert")
-                return True
+            response = await self.client.patch(
+                f"/api/users/users/{user_id}/",
+                json={"is_active": False},
+            )
+            response.raise_for_status()
+            logger.info(f"NetBox User ID {user_id} deaktiviert")
+            return True
 
         except Exception as e:
             logger.error(f"NetBox User-Deaktivierung fehlgeschlagen: {e}")
@@ -292,16 +274,13 @@ class NetBoxUserService:
             return False
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.delete(
-                    f"{self.base_url}/api/users/users/{user_id}/",
-                    headers=self.headers,
-                    timeout=10.0,
-                )
-                if response.status_code == 204:
-                    logger.info(f"NetBox User ID {user_id} gelöscht")
-                    return True
-                return False
+            response = await self.client.delete(
+                f"/api/users/users/{user_id}/",
+            )
+            if response.status_code == 204:
+                logger.info(f"NetBox User ID {user_id} gelöscht")
+                return True
+            return False
 
         except Exception as e:
             logger.error(f"NetBox User-Löschung fehlgeschlagen: {e}")
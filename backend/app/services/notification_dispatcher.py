@@ -0,0 +1,351 @@
+"""
+Notification Dispatcher - Stellt Benachrichtigungen aus der Outbox zu
+
+NotificationService.notify reiht nur ein (Tabelle notification_outbox),
+dieser Dispatcher sendet im Hintergrund:
+
+- Faellige Eintraege werden stapelweise geholt und parallel zugestellt,
+  mit eigenem Limit pro Kanal (SMTP vertraegt weniger Verbindungen als
+  HTTP-Endpunkte)
+- Fehlgeschlagene Zustellungen werden mit exponentiellem Backoff und
+  Jitter erneut versucht, nach NOTIFY_MAX_ATTEMPTS endgueltig als failed
+  markiert; dauerhafte Fehler (Kanal deaktiviert, Webhook geloescht)
+  sofort
+- Status, Protokoll (notification_log) und Webhook-Statistik eines Stapels
+  werden in einer Transaktion geschrieben
+"""
+import asyncio
+import json
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update, delete
+
+from app.database import async_session
+from app.models.notification_log import NotificationLog
+from app.models.notification_outbox import NotificationOutbox
+from app.models.user_notification_preferences import UserNotificationPreferences
+from app.models.webhook import Webhook
+from app.services.crypto_service import decrypt_value
+from app.services.notification_service import (
+    EmailChannel,
+    GotifyChannel,
+    NotificationService,
+    WebhookChannel,
+)
+
+logger = logging.getLogger(__name__)
+
+# Gleichzeitige Zustellungen pro Kanal
+NOTIFY_CONCURRENCY = {"email": 4, "gotify": 8, "webhook": 8}
+
+# Eintraege pro Stapel
+NOTIFY_BATCH_SIZE = 100
+
+# Versuche pro Eintrag und Backoff (Sekunden, mit Jitter)
+NOTIFY_MAX_ATTEMPTS = 5
+NOTIFY_RETRY_BASE = 15
+NOTIFY_RETRY_MAX = 900
+
+# Wartezeit ohne Weckruf (faellige Wiederholungen werden so gefunden)
+NOTIFY_POLL_INTERVAL = 10
+
+# Zugestellte/endgueltig fehlgeschlagene Eintraege so lange behalten (Tage)
+NOTIFY_KEEP_DAYS = 7
+
+
+class PermanentDeliveryError(Exception):
+    """Zustellung kann auch bei Wiederholung nicht gelingen"""
+
+
+def _retry_delay(attempts: int) -> float:
+    """Backoff fuer den naechsten Versuch: Basis * 2^(n-1), +-50% Jitter"""
+    delay = min(NOTIFY_RETRY_BASE * 2 ** (attempts - 1), NOTIFY_RETRY_MAX)
+    return delay * random.uniform(0.5, 1.5)
+
+
+class NotificationDispatcher:
+    """Hintergrund-Zustellung der Notification-Outbox"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+        self._wakeup = asyncio.Event()
+        self._last_cleanup: Optional[datetime] = None
+
+    def wake(self):
+        """Weckt den Dispatcher (nach dem Einreihen neuer Eintraege)"""
+        self._wakeup.set()
+
+    async def start(self):
+        """Startet die Zustellung (haengengebliebene Eintraege werden wieder freigegeben)"""
+        if self._running:
+            return
+
+        try:
+            async with async_session() as db:
+                # Abbruch waehrend des Sendens (Neustart): erneut zustellen
+                await db.execute(
+                    update(NotificationOutbox)
+                    .where(NotificationOutbox.status == "sending")
+                    .values(status="pending")
+                )
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"Notification-Outbox nicht zurueckgesetzt: {e}")
+
+        self._running = True
+        self._task = asyncio.create_task(self._loop())
+        logger.info("Notification-Dispatcher gestartet")
+
+    async def stop(self):
+        """Stoppt die Zustellung (offene Eintraege bleiben in der Outbox)"""
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        """Hauptschleife: Stapel zustellen bis nichts mehr faellig ist, dann warten"""
+        while self._running:
+            try:
+                while await self.dispatch_batch():
+                    pass
+                await self._cleanup()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.exception(f"Fehler im Notification-Dispatcher: {e}")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), NOTIFY_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def dispatch_batch(self) -> int:
+        """
+        Stellt einen Stapel faelliger Eintraege zu.
+
+        Returns:
+            Anzahl bearbeiteter Eintraege (0 = nichts faellig)
+        """
+        now = datetime.utcnow()
+        async with async_session() as db:
+            result = await db.execute(
+                select(NotificationOutbox)
+                .where(
+                    NotificationOutbox.status == "pending",
+                    NotificationOutbox.next_attempt_at <= now,
+                )
+                .order_by(NotificationOutbox.next_attempt_at, NotificationOutbox.id)
+                .limit(NOTIFY_BATCH_SIZE)
+            )
+            entries = result.scalars().all()
+            if not entries:
+                return 0
+
+            for entry in entries:
+                entry.status = "sending"
+            await db.commit()
+
+            settings = await NotificationService(db).get_settings(force_refresh=True)
+            webhooks = await self._load_webhooks(db, entries)
+            gotify_tokens = await self._load_gotify_tokens(db, entries)
+
+        limits = {channel: asyncio.Semaphore(n) for channel, n in NOTIFY_CONCURRENCY.items()}
+
+        async def deliver(entry: NotificationOutbox):
+            # Unbekannte Kanaele haben kein Limit (scheitern ohnehin sofort)
+            async with limits.get(entry.channel) or asyncio.Semaphore(1):
+                try:
+                    return await self._send(entry, settings, webhooks, gotify_tokens), False
+                except PermanentDeliveryError as e:
+                    return str(e), True
+                except Exception as e:
+                    return str(e) or type(e).__name__, False
+
+        results = await asyncio.gather(*(deliver(entry) for entry in entries))
+        await self._store_results(entries, results)
+        return len(entries)
+
+    async def _send(
+        self,
+        entry: NotificationOutbox,
+        settings: dict,
+        webhooks: Dict[int, dict],
+        gotify_tokens: Dict[int, str],
+    ) -> Optional[str]:
+        """
+        Sendet einen Eintrag; gibt None oder die Fehlermeldung des Kanals zurueck.
+
+        Raises:
+            PermanentDeliveryError: Kanal deaktiviert bzw. Webhook geloescht
+        """
+        if entry.channel == "email":
+            if not settings.get("smtp_enabled"):
+                raise PermanentDeliveryError("E-Mail deaktiviert")
+            channel = EmailChannel(settings)
+            success = await channel.send(
+                recipient=entry.recipient,
+                subject=entry.subject,
+                message=entry.message,
+                html_message=entry.html_message,
+            )
+        elif entry.channel == "gotify":
+            if not settings.get("gotify_enabled"):
+                raise PermanentDeliveryError("Gotify deaktiviert")
+            channel = GotifyChannel(settings)
+            success = await channel.send(
+                recipient=gotify_tokens.get(entry.user_id) or "default",
+                subject=entry.subject,
+                message=entry.message,
+                priority=entry.priority,
+            )
+        elif entry.channel == "webhook":
+            webhook = webhooks.get(entry.webhook_id)
+            if webhook is None:
+                raise PermanentDeliveryError("Webhook geloescht oder deaktiviert")
+            channel = WebhookChannel(webhook)
+            success = await channel.send(
+                recipient=webhook["url"],
+                subject=entry.subject,
+                message=entry.message,
+                event_type=entry.event_type,
+                payload=json.loads(entry.payload) if entry.payload else None,
+            )
+        else:
+            raise PermanentDeliveryError(f"Unbekannter Kanal: {entry.channel}")
+
+        if success:
+            return None
+        return channel.last_error or "Zustellung fehlgeschlagen"
+
+    async def _load_webhooks(self, db, entries: List[NotificationOutbox]) -> Dict[int, dict]:
+        """URL und Secret der aktiven Webhooks eines Stapels"""
+        ids = {entry.webhook_id for entry in entries if entry.channel == "webhook" and entry.webhook_id}
+        if not ids:
+            return {}
+        result = await db.execute(
+            select(Webhook).where(Webhook.id.in_(ids), Webhook.enabled == True)
+        )
+        return {
+            w.id: {
+                "id": w.id,
+                "name": w.name,
+                "url": w.url,
+                "secret": decrypt_value(w.secret_encrypted) if w.secret_encrypted else None,
+            }
+            for w in result.scalars().all()
+        }
+
+    async def _load_gotify_tokens(self, db, entries: List[NotificationOutbox]) -> Dict[int, str]:
+        """Benutzer-spezifische Gotify-Token eines Stapels"""
+        ids = {entry.user_id for entry in entries if entry.channel == "gotify" and entry.user_id}
+        if not ids:
+            return {}
+        result = await db.execute(
+            select(UserNotificationPreferences).where(UserNotificationPreferences.user_id.in_(ids))
+        )
+        return {
+            prefs.user_id: decrypt_value(prefs.gotify_user_token_encrypted)
+            for prefs in result.scalars().all()
+            if prefs.gotify_user_token_encrypted
+        }
+
+    async def _store_results(
+        self,
+        entries: List[NotificationOutbox],
+        results: List[Tuple[Optional[str], bool]],
+    ):
+        """
+        Schreibt Status, Protokoll und Webhook-Statistik des Stapels in einer Transaktion.
+
+        Args:
+            results: Pro Eintrag (Fehlermeldung oder None, Fehler dauerhaft)
+        """
+        now = datetime.utcnow()
+        logs = []
+        webhook_results: Dict[int, List[bool]] = {}
+        retried = 0
+
+        async with async_session() as db:
+            for entry, (error, permanent) in zip(entries, results):
+                attempts = entry.attempts + 1
+                values = {"attempts": attempts, "last_error": error}
+
+                if error is None:
+                    values.update(status="sent", sent_at=now)
+                elif not permanent and attempts < NOTIFY_MAX_ATTEMPTS:
+                    values.update(
+                        status="pending",
+                        next_attempt_at=now + timedelta(seconds=_retry_delay(attempts)),
+                    )
+                    retried += 1
+                else:
+                    values.update(status="failed")
+
+                await db.execute(
+                    update(NotificationOutbox)
+                    .where(NotificationOutbox.id == entry.id)
+                    .values(**values)
+                )
+
+                if entry.channel == "webhook" and entry.webhook_id:
+                    webhook_results.setdefault(entry.webhook_id, []).append(error is None)
+
+                # Protokoll: Zustellung oder endgueltiger Fehlschlag
+                if values["status"] != "pending":
+                    logs.append(NotificationLog(
+                        channel=entry.channel,
+                        recipient=entry.recipient,
+                        subject=entry.subject,
+                        event_type=entry.event_type,
+                        status=values["status"],
+                        error_message=error,
+                    ))
+
+            for webhook_id, outcomes in webhook_results.items():
+                failures = outcomes.count(False)
+                await db.execute(
+                    update(Webhook).where(Webhook.id == webhook_id).values(
+                        last_triggered_at=now,
+                        last_status="success" if outcomes[-1] else "failed",
+                        failure_count=0 if outcomes[-1] else Webhook.failure_count + failures,
+                    )
+                )
+
+            db.add_all(logs)
+            await db.commit()
+
+        sent = sum(1 for error, _ in results if error is None)
+        logger.info(
+            f"Benachrichtigungen zugestellt: {sent}/{len(entries)}"
+            + (f", {retried} erneut eingeplant" if retried else "")
+        )
+
+    async def _cleanup(self):
+        """Entfernt alte zugestellte bzw. endgueltig fehlgeschlagene Eintraege (stuendlich)"""
+        now = datetime.utcnow()
+        if self._last_cleanup and now - self._last_cleanup < timedelta(hours=1):
+            return
+        self._last_cleanup = now
+
+        async with async_session() as db:
+            await db.execute(
+                delete(NotificationOutbox).where(
+                    NotificationOutbox.status.in_(["sent", "failed"]),
+                    NotificationOutbox.created_at < now - timedelta(days=NOTIFY_KEEP_DAYS),
+                )
+            )
+            await db.commit()
+
+
+# Singleton-Instanz
+notification_dispatcher = NotificationDispatcher()
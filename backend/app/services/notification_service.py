@@ -23,7 +23,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.notification_settings import NotificationSettings
 from app.models.user_notification_preferences import UserNotificationPreferences
 from app.models.webhook import Webhook
-from app.models.notification_log import NotificationLog
+from app.models.notification_outbox import NotificationOutbox
 from app.models.user import User
 from app.services.crypto_service import decrypt_value
 
@@ -35,6 +35,9 @@ logger = logging.getLogger(__name__)
 class NotificationChannel(ABC):
     """Abstrakte Basisklasse fuer Benachrichtigungskanaele"""
 
+    # Fehlermeldung des letzten fehlgeschlagenen send() (fuer Outbox und Protokoll)
+    last_error: Optional[str] = None
+
     @abstractmethod
     async def send(self, recipient: str, subject: str, message: str, **kwargs) -> bool:
         """Sendet eine Benachrichtigung"""
@@ -112,9 +115,11 @@ class EmailChannel(NotificationChannel):
 
         except ImportError:
             logger.error("aiosmtplib nicht installiert")
+            self.last_error = "aiosmtplib nicht installiert"
             return False
         except Exception as e:
             logger.error(f"E-Mail senden fehlgeschlagen an {recipient}: {e}")
+            self.last_error = str(e) or type(e).__name__
             return False
 
     async def test_connection(self) -> tuple[bool, str]:
@@ -166,6 +171,7 @@ class GotifyChannel(NotificationChannel):
         """Sendet eine Gotify-Benachrichtigung"""
         if not self.url or not self.token:
             logger.warning("Gotify nicht konfiguriert")
+            self.last_error = "Gotify nicht konfiguriert"
             return False
 
         # recipient kann ein user-spezifischer Token sein
@@ -188,10 +194,12 @@ class GotifyChannel(NotificationChannel):
                     return True
                 else:
                     logger.error(f"Gotify-Fehler: HTTP {response.status_code}")
+                    self.last_error = f"HTTP {response.status_code}: {response.text[:100]}"
                     return False
 
         except Exception as e:
             logger.error(f"Gotify senden fehlgeschlagen: {e}")
+            self.last_error = str(e) or type(e).__name__
             return False
 
     async def test_connection(self) -> tuple[bool, str]:
@@ -283,11 +291,13 @@ class WebhookChannel(NotificationChannel):
                     logger.info(f"Webhook '{self.name}' erfolgreich: {event_type}")
                 else:
                     logger.warning(f"Webhook '{self.name}' fehlgeschlagen: HTTP {response.status_code}")
+                    self.last_error = f"HTTP {response.status_code}: {response.text[:100]}"
 
                 return success
 
         except Exception as e:
             logger.error(f"Webhook '{self.name}' Fehler: {e}")
+            self.last_error = str(e) or type(e).__name__
             return False
 
     async def test_connection(self) -> tuple[bool, str]:
@@ -503,27 +513,6 @@ class NotificationService:
             for w in webhooks
         ]
 
-    async def _log_notification(
-        self,
-        channel: str,
-        recipient: str,
-        subject: str,
-        event_type: str,
-        status: str,
-        error_message: Optional[str] = None
-    ):
-        """Protokolliert eine Benachrichtigung"""
-        log_entry = NotificationLog(
-            channel=channel,
-            recipient=recipient,
-            subject=subject,
-            event_type=event_type,
-            status=status,
-            error_message=error_message
-        )
-        self.db.add(log_entry)
-        await self.db.commit()
-
     async def notify(
         self,
         event_type: str,
@@ -534,7 +523,11 @@ class NotificationService:
         payload: Optional[dict] = None
     ) -> Dict[str, Any]:
         """
-        Sendet Benachrichtigungen an alle konfigurierten Kanaele.
+        Stellt Benachrichtigungen fuer alle konfigurierten Kanaele in die Outbox.
+
+        Es wird nur eingereiht (ein Commit); das Senden uebernimmt der
+        NotificationDispatcher im Hintergrund. Langsame SMTP-Server oder
+        tote Webhooks verzoegern den Aufrufer daher nicht.
 
         Args:
             event_type: z.B. 'vm_created', 'ansible_failed'
@@ -545,108 +538,69 @@ class NotificationService:
             payload: Zusaetzliche Daten fuer Webhooks
 
         Returns:
-            Dict mit Statistiken (sent, failed, etc.)
+            Dict mit Anzahl eingereihter Nachrichten pro Kanal
         """
         settings = await self.get_settings()
         stats = {
-            'email_sent': 0,
-            'email_failed': 0,
-            'gotify_sent': 0,
-            'gotify_failed': 0,
-            'webhook_sent': 0,
-            'webhook_failed': 0,
+            'email_queued': 0,
+            'gotify_queued': 0,
+            'webhook_queued': 0,
         }
+        now = datetime.utcnow()
+        entries = []
+
+        def enqueue(channel: str, **fields):
+            entries.append(NotificationOutbox(
+                channel=channel,
+                event_type=event_type,
+                subject=subject,
+                message=message,
+                status='pending',
+                attempts=0,
+                next_attempt_at=now,
+                **fields,
+            ))
+            stats[f'{channel}_queued'] += 1
 
         # Benutzer mit aktivierten Benachrichtigungen fuer diesen Event-Typ
         users = await self._get_subscribed_users(event_type, user_id)
 
-        # E-Mail senden
+        # E-Mail
         if settings.get('smtp_enabled'):
-            email_channel = EmailChannel(settings)
             for user_info in users:
                 user = user_info['user']
                 if user.email and user_info['email_enabled']:
-                    success = await email_channel.send(
-                        recipient=user.email,
-                        subject=subject,
-                        message=message,
-                        html_message=html_message
-                    )
-                    if success:
-                        stats['email_sent'] += 1
-                    else:
-                        stats['email_failed'] += 1
-
-                    await self._log_notification(
-                        channel='email',
-                        recipient=user.email,
-                        subject=subject,
-                        event_type=event_type,
-                        status='sent' if success else 'failed'
-                    )
+                    enqueue('email', recipient=user.email, html_message=html_message)
 
-        # Gotify senden
+        # Gotify (Benutzer-Token wird beim Senden aufgeloest)
         if settings.get('gotify_enabled'):
-            gotify_channel = GotifyChannel(settings)
             for user_info in users:
                 user = user_info['user']
                 if user_info['gotify_enabled']:
-                    token = user_info['gotify_token'] or 'default'
-                    success = await gotify_channel.send(
-                        recipient=token,
-                        subject=subject,
-                        message=message,
-                        priority=self._get_priority_for_event(event_type)
-                    )
-                    if success:
-                        stats['gotify_sent'] += 1
-                    else:
-                        stats['gotify_failed'] += 1
-
-                    await self._log_notification(
-                        channel='gotify',
+                    enqueue(
+                        'gotify',
                         recipient=user.username,
-                        subject=subject,
-                        event_type=event_type,
-                        status='sent' if success else 'failed'
+                        user_id=user.id,
+                        priority=self._get_priority_for_event(event_type),
                     )
 
-        # Webhooks triggern
-        webhooks = await self._get_webhooks_for_event(event_type)
-        for webhook in webhooks:
-            channel = WebhookChannel(webhook)
-            success = await channel.send(
-                recipient=webhook['url'],
-                subject=subject,
-                message=message,
-                event_type=event_type,
-                payload=payload
+        # Webhooks (URL und Secret werden beim Senden geladen)
+        for webhook in await self._get_webhooks_for_event(event_type):
+            enqueue(
+                'webhook',
+                recipient=webhook['name'],
+                webhook_id=webhook['id'],
+                payload=json.dumps(payload) if payload else None,
             )
 
-            # Webhook-Status aktualisieren
-            await self.db.execute(
-                Webhook.__table__.update().where(Webhook.id == webhook['id']).values(
-                    last_triggered_at=datetime.utcnow(),
-                    last_status='success' if success else 'failed',
-                    failure_count=0 if success else Webhook.failure_count + 1
-                )
-            )
+        if entries:
+            self.db.add_all(entries)
             await self.db.commit()
 
-            if success:
-                stats['webhook_sent'] += 1
-            else:
-                stats['webhook_failed'] += 1
-
-            await self._log_notification(
-                channel='webhook',
-                recipient=webhook['name'],
-                subject=subject,
-                event_type=event_type,
-                status='sent' if success else 'failed'
-            )
+            from app.services.notification_dispatcher import notification_dispatcher
+            notification_dispatcher.wake()
 
-        logger.info(f"Benachrichtigung '{event_type}': {stats}")
+        logger.info(f"Benachrichtigung '{event_type}' eingereiht: {stats}")
         return stats
 
     def _get_priority_for_event(self, event_type: str) -> int:
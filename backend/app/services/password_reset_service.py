@@ -13,7 +13,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User
 from app.models.password_reset_token import PasswordResetToken
 from app.models.notification_settings import NotificationSettings
-from app.auth.security import get_password_hash
+from app.auth.security import get_password_hash_async
+from app.auth.dependencies import invalidate_principal
 from app.services.notification_service import NotificationService
 
 logger = logging.getLogger(__name__)
@@ -226,7 +227,7 @@ Proxmox Commander
         user_id = validation['user_id']
 
         # Passwort aendern
-        hashed = get_password_hash(new_password)
+        hashed = await get_password_hash_async(new_password)
         await self.db.execute(
             update(User).where(User.id == user_id).values(
                 password_hash=hashed
@@ -241,6 +242,7 @@ Proxmox Commander
         )
 
         await self.db.commit()
+        invalidate_principal(user_id=user_id)
 
         # Benutzer laden fuer Log
         result = await self.db.execute(
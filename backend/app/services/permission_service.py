@@ -7,13 +7,59 @@ Berechtigungskonzept:
 - Execution-History: User sehen nur eigene Executions (Super-Admins alle)
 """
 
-from typing import Set, Optional, List
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Set, Optional, List
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.models.user import User
 from app.models.user_group_access import UserGroupAccess
 from app.models.user_playbook_access import UserPlaybookAccess
+from app.schemas.inventory import GroupInfo, HostInfo, InventoryTree
+
+
+@dataclass
+class InventoryView:
+    """Vorberechnete Sicht eines Zugriffsprofils auf einen Inventory-Snapshot"""
+    hosts: List[HostInfo]
+    groups: List[GroupInfo]
+    tree: InventoryTree
+
+
+class _FilterMemo:
+    """
+    Memoisierte Filter-Ergebnisse pro Zugriffsprofil.
+
+    Ein Zugriffsprofil ist die Menge der zugewiesenen Gruppen bzw. Playbooks,
+    User mit gleichen Rechten teilen sich also einen Eintrag. Ändert sich
+    der Snapshot (Inventory neu geladen, Playbooks neu gescannt), werden alle
+    Einträge der Art verworfen.
+    """
+
+    def __init__(self, max_profiles: int = 256):
+        self.max_profiles = max_profiles
+        self._snapshots: Dict[str, Hashable] = {}
+        self._entries: Dict[str, "OrderedDict[FrozenSet[str], Any]"] = {}
+
+    def get(self, kind: str, snapshot: Hashable, profile: FrozenSet[str], build: Callable[[], Any]) -> Any:
+        if self._snapshots.get(kind) != snapshot:
+            self._snapshots[kind] = snapshot
+            self._entries[kind] = OrderedDict()
+
+        entries = self._entries[kind]
+        if profile in entries:
+            entries.move_to_end(profile)
+            return entries[profile]
+
+        value = build()
+        entries[profile] = value
+        while len(entries) > self.max_profiles:
+            entries.popitem(last=False)
+        return value
+
+
+_filter_memo = _FilterMemo()
 
 
 class PermissionService:
@@ -129,6 +175,34 @@ class PermissionService:
         accessible = self.get_accessible_groups()
         return [g for g in all_groups if g in accessible]
 
+    def get_inventory_view(self, parser) -> InventoryView:
+        """
+        Gibt die für den User sichtbaren Hosts und Gruppen zurück.
+
+        Wird pro Zugriffsprofil einmal gegen den aktuellen Inventory-Snapshot
+        berechnet und bis zum nächsten Reload des Inventories memoisiert.
+
+        Args:
+            parser: InventoryParser mit dem aktuellen Inventory
+
+        Returns:
+            InventoryView (Super-Admins: ungefiltert)
+        """
+        if self.is_super_admin:
+            tree = parser.get_tree()
+            return InventoryView(
+                hosts=list(tree.hosts.values()),
+                groups=[g for g in tree.groups.values() if g.name != "all"],
+                tree=tree,
+            )
+
+        accessible = frozenset(self.get_accessible_groups())
+        snapshot = (id(parser), parser.generation)
+        return _filter_memo.get(
+            "inventory", snapshot, accessible,
+            lambda: _build_inventory_view(parser.get_tree(), accessible),
+        )
+
     # ==================== Playbook-Berechtigungen ====================
 
     def get_accessible_playbooks(self) -> Set[str]:
@@ -183,6 +257,26 @@ class PermissionService:
         accessible = self.get_accessible_playbooks()
         return [p for p in all_playbooks if p.get("name") in accessible]
 
+    def get_visible_playbooks(self, scanner) -> list:
+        """
+        Gibt die für den User sichtbaren Playbooks zurück.
+
+        Memoisiert pro Zugriffsprofil bis zum nächsten Scan.
+
+        Args:
+            scanner: PlaybookScanner mit den aktuellen Playbooks
+        """
+        all_playbooks = scanner.get_playbooks()
+        if self.is_super_admin:
+            return all_playbooks
+
+        accessible = frozenset(self.get_accessible_playbooks())
+        snapshot = (id(scanner), scanner.generation)
+        return _filter_memo.get(
+            "playbooks", snapshot, accessible,
+            lambda: [p for p in all_playbooks if p.name in accessible],
+        )
+
     # ==================== Execution-Berechtigungen ====================
 
     def can_view_execution(self, execution_user_id: int) -> bool:
@@ -272,6 +366,28 @@ class PermissionService:
         }
 
 
+def _build_inventory_view(tree: InventoryTree, accessible: FrozenSet[str]) -> InventoryView:
+    """Filtert einen Inventory-Snapshot auf die zugänglichen Gruppen"""
+    hosts = {
+        name: host for name, host in tree.hosts.items()
+        if not accessible.isdisjoint(host.groups)
+    }
+    groups = {
+        name: group for name, group in tree.groups.items()
+        if name in accessible
+    }
+    return InventoryView(
+        hosts=list(hosts.values()),
+        groups=[g for g in groups.values() if g.name != "all"],
+        tree=InventoryTree(
+            groups=groups,
+            hosts=hosts,
+            all_hosts=list(hosts.keys()),
+            all_groups=[name for name in groups if name != "all"],
+        ),
+    )
+
+
 # ==================== Factory-Funktion ====================
 
 def get_permission_service(user: User) -> PermissionService:
@@ -18,6 +18,8 @@ class PlaybookScanner:
         self.playbook_dir = Path(playbook_dir)
         self._playbooks: List[PlaybookInfo] = []
         self._last_scan: float = 0
+        # Wird bei jedem Scan erhöht (Snapshot-Kennung für Caches)
+        self._generation: int = 0
         self._scan()
 
     def _check_and_rescan(self):
@@ -30,6 +32,7 @@ class PlaybookScanner:
         """Scannt das Playbook-Verzeichnis"""
         self._playbooks = []
         self._last_scan = time.time()
+        self._generation += 1
 
         if not self.playbook_dir.exists():
             return
@@ -77,6 +80,12 @@ class PlaybookScanner:
         """Scannt erneut"""
         self._scan()
 
+    @property
+    def generation(self) -> int:
+        """Kennung des aktuellen Scans (scannt ggf. neu)"""
+        self._check_and_rescan()
+        return self._generation
+
     def get_playbooks(self) -> List[PlaybookInfo]:
         """Gibt alle Playbooks zurück"""
         self._check_and_rescan()
@@ -2,10 +2,108 @@
 Proxmox Service - Integration mit Proxmox VE API für VM-Status-Abfragen
 """
 import asyncio
+import copy
+import hashlib
+import json
+import re
+import time
 import httpx
 from typing import Optional
 from app.config import settings
 
+# Max. parallele API-Requests bei Scans ueber alle VMs/Nodes
+SCAN_CONCURRENCY = 8
+
+# Intervall des VLAN-Abgleichs im Hintergrund (Sekunden)
+VLAN_SCAN_REFRESH = 300
+
+# Spätestens nach dieser Zeit werden die VM-Configs neu gescannt, auch wenn
+# sich Node-Netzwerke und VM-Liste nicht geändert haben (Tag-Änderungen)
+VLAN_SCAN_MAX_AGE = 1800
+
+_BRIDGE_RE = re.compile(r"vmbr(\d+)")
+_NET_BRIDGE_RE = re.compile(r"bridge=vmbr(\d+)")
+_NET_TAG_RE = re.compile(r"tag=(\d+)")
+
+
+def _vlan_scan_digest(nodes: list[str], node_networks: list, vms: list[dict]) -> str:
+    """Digest über Node-Netzwerke und VM-Verteilung des Clusters"""
+    payload = {
+        "networks": {
+            node: sorted(
+                (net.get("iface", ""), net.get("type", ""))
+                for net in networks
+            ) if networks is not None else None
+            for node, networks in zip(nodes, node_networks)
+        },
+        "vms": sorted((vm.get("vmid") or 0, vm.get("node") or "") for vm in vms),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def _merge_vlans(
+    nodes: list[str], node_networks: list, vms: list[dict], configs: list
+) -> list[dict]:
+    """Führt Bridges und VM-Netzwerkkarten zur VLAN-Liste zusammen"""
+    vlans = {}  # vlan_id -> {bridge, nodes, vm_count}
+
+    # 1. Bridges mit VLAN-Nummer (vmbr60, vmbr99, etc.)
+    for node, networks in zip(nodes, node_networks):
+        for net in networks or []:
+            iface = net.get("iface", "")
+            if net.get("type", "") != "bridge":
+                continue
+            match = _BRIDGE_RE.match(iface)
+            if not match:
+                continue
+            vlan_id = int(match.group(1))
+            # vmbr0 ist Standard-Bridge, keine VLAN
+            if vlan_id == 0:
+                continue
+            if vlan_id not in vlans:
+                vlans[vlan_id] = {
+                    "vlan_id": vlan_id,
+                    "bridge": iface,
+                    "nodes": [],
+                    "vm_count": 0,
+                }
+            if node not in vlans[vlan_id]["nodes"]:
+                vlans[vlan_id]["nodes"].append(node)
+
+    # 2. VLAN-Tags und VM-Count aus den net* Eintraegen der VMs
+    for vm, config in zip(vms, configs):
+        if not config:
+            continue
+        node = vm.get("node")
+        for key, value in config.items():
+            if not key.startswith("net") or not isinstance(value, str):
+                continue
+
+            bridge_match = _NET_BRIDGE_RE.search(value)
+            if bridge_match:
+                vlan_id = int(bridge_match.group(1))
+                if vlan_id > 0 and vlan_id in vlans:
+                    vlans[vlan_id]["vm_count"] += 1
+
+            tag_match = _NET_TAG_RE.search(value)
+            if tag_match:
+                vlan_id = int(tag_match.group(1))
+                if vlan_id > 0:
+                    if vlan_id not in vlans:
+                        # VLAN nur durch Tag bekannt, Bridge ist vmbr0
+                        vlans[vlan_id] = {
+                            "vlan_id": vlan_id,
+                            "bridge": "vmbr0 (tagged)",
+                            "nodes": [node] if node else [],
+                            "vm_count": 1,
+                        }
+                    else:
+                        vlans[vlan_id]["vm_count"] += 1
+                        if node and node not in vlans[vlan_id]["nodes"]:
+                            vlans[vlan_id]["nodes"].append(node)
+
+    return sorted(vlans.values(), key=lambda x: x["vlan_id"])
+
 
 class ProxmoxService:
     """Service für Proxmox VE API Integration"""
@@ -16,7 +114,12 @@ class ProxmoxService:
     def __init__(self):
         # Settings werden dynamisch gelesen, nicht gecached
         # Damit funktioniert der Hot-Reload nach dem Setup-Wizard
-        pass
+
+        # VLAN-Scan Cache (siehe scan_network_vlans)
+        self._vlan_cache: Optional[dict] = None
+        self._vlan_lock = asyncio.Lock()
+        self._vlan_refresh_task: Optional[asyncio.Task] = None
+        self._vlan_loop_task: Optional[asyncio.Task] = None
 
     @property
     def host(self) -> str:
@@ -1055,14 +1158,21 @@ class ProxmoxService:
 
     # ========== Network/VLAN Scan ==========
 
-    async def scan_network_vlans(self) -> list[dict]:
+    async def scan_network_vlans(self, refresh: bool = False) -> list[dict]:
         """
-        Scannt alle Proxmox-Nodes nach VLAN-Konfigurationen.
+        Gibt die VLAN-Konfigurationen aller Proxmox-Nodes zurück.
+
+        Das Ergebnis kommt aus dem Cache (Background-Refresh, siehe
+        start_vlan_refresh). Ist es älter als VLAN_SCAN_REFRESH Sekunden,
+        wird im Hintergrund neu abgeglichen und sofort der Cache geliefert.
 
         Findet VLANs durch:
         1. Bridge-Namen (vmbr60 -> VLAN 60)
         2. VLAN-Tags in VM-Konfigurationen (net0: ...,tag=100)
 
+        Args:
+            refresh: Cache ignorieren und vollständig neu scannen
+
         Returns:
             Liste von dicts mit:
             - vlan_id: int
@@ -1070,117 +1180,157 @@ class ProxmoxService:
             - nodes: list[str]
             - vm_count: int
         """
-        import re
-
         if not self.is_configured():
             return []
 
-        vlans = {}  # vlan_id -> {bridge, nodes, vm_count}
+        cache = self._vlan_cache
+        if not refresh and cache is not None and cache["base_url"] == self.base_url:
+            if time.monotonic() - cache["checked_at"] >= VLAN_SCAN_REFRESH:
+                self._schedule_vlan_refresh()
+            return copy.deepcopy(cache["vlans"])
 
-        try:
-            headers = self._get_headers()
+        return copy.deepcopy(await self.refresh_network_vlans(force=refresh))
 
-            async with httpx.AsyncClient(verify=self.verify_ssl) as client:
-                # 1. Alle Nodes durchgehen und Bridges scannen
-                for node in self.CLUSTER_NODES:
-                    try:
-                        response = await client.get(
-                            f"{self.base_url}/nodes/{node}/network",
-                            headers=headers,
-                            timeout=10.0,
-                        )
+    async def refresh_network_vlans(self, force: bool = False) -> list[dict]:
+        """
+        Gleicht den VLAN-Cache mit dem Cluster ab.
 
-                        if response.status_code == 200:
-                            networks = response.json().get("data", [])
-
-                            for net in networks:
-                                iface = net.get("iface", "")
-                                net_type = net.get("type", "")
-
-                                # Bridge mit VLAN-Nummer? (vmbr60, vmbr99, etc.)
-                                if net_type == "bridge" and iface.startswith("vmbr"):
-                                    match = re.match(r"vmbr(\d+)", iface)
-                                    if match:
-                                        vlan_id = int(match.group(1))
-                                        # vmbr0 ist Standard-Bridge, keine VLAN
-                                        if vlan_id == 0:
-                                            continue
-
-                                        if vlan_id not in vlans:
-                                            vlans[vlan_id] = {
-                                                "vlan_id": vlan_id,
-                                                "bridge": iface,
-                                                "nodes": [],
-                                                "vm_count": 0,
-                                            }
-
-                                        if node not in vlans[vlan_id]["nodes"]:
-                                            vlans[vlan_id]["nodes"].append(node)
-
-                    except Exception as e:
-                        print(f"Fehler beim Scannen von Node {node}: {e}")
-                        continue
+        Node-Netzwerke und VM-Liste werden parallel geladen und zu einem
+        Digest zusammengefasst. Ist der Digest unverändert (und der letzte
+        vollständige Scan jünger als VLAN_SCAN_MAX_AGE), entfällt der teure
+        Scan der VM-Konfigurationen. Sonst werden alle VM-Configs mit
+        begrenzter Parallelität (SCAN_CONCURRENCY) geladen.
 
-                # 2. VMs scannen fuer VLAN-Tags und VM-Count
-                all_vms = await self.get_all_vms()
+        Args:
+            force: VM-Konfigurationen immer neu scannen
+        """
+        requested_at = time.monotonic()
 
-                for vm in all_vms:
-                    vmid = vm.get("vmid")
-                    node = vm.get("node")
+        async with self._vlan_lock:
+            cache = self._vlan_cache
+            if cache is not None and cache["base_url"] != self.base_url:
+                cache = None
 
-                    if not vmid or not node:
-                        continue
+            # Parallel wartende Aufrufer nutzen das gerade erzeugte Ergebnis
+            if not force and cache is not None and cache["checked_at"] >= requested_at:
+                return cache["vlans"]
 
-                    try:
-                        config_result = await self.get_vm_config(vmid, node)
-                        if not config_result.get("success"):
-                            continue
+            try:
+                headers = self._get_headers()
 
-                        config = config_result.get("config", {})
-
-                        # Alle net* Eintraege durchgehen
-                        for key, value in config.items():
-                            if not key.startswith("net") or not isinstance(value, str):
-                                continue
-
-                            # Bridge extrahieren (bridge=vmbr60)
-                            bridge_match = re.search(r"bridge=(vmbr\d+)", value)
-                            if bridge_match:
-                                bridge = bridge_match.group(1)
-                                vlan_match = re.match(r"vmbr(\d+)", bridge)
-                                if vlan_match:
-                                    vlan_id = int(vlan_match.group(1))
-                                    if vlan_id > 0:
-                                        if vlan_id in vlans:
-                                            vlans[vlan_id]["vm_count"] += 1
-
-                            # VLAN-Tag extrahieren (tag=100)
-                            tag_match = re.search(r"tag=(\d+)", value)
-                            if tag_match:
-                                vlan_id = int(tag_match.group(1))
-                                if vlan_id > 0:
-                                    if vlan_id not in vlans:
-                                        # VLAN nur durch Tag bekannt, Bridge ist vmbr0
-                                        vlans[vlan_id] = {
-                                            "vlan_id": vlan_id,
-                                            "bridge": "vmbr0 (tagged)",
-                                            "nodes": [node] if node else [],
-                                            "vm_count": 1,
-                                        }
-                                    else:
-                                        vlans[vlan_id]["vm_count"] += 1
-                                        if node and node not in vlans[vlan_id]["nodes"]:
-                                            vlans[vlan_id]["nodes"].append(node)
-
-                    except Exception as e:
-                        print(f"Fehler beim Scannen von VM {vmid}: {e}")
-                        continue
+                async with httpx.AsyncClient(verify=self.verify_ssl) as client:
+                    # 1. Netzwerke aller Nodes parallel laden
+                    node_networks, all_vms = await asyncio.gather(
+                        asyncio.gather(*[
+                            self._get_node_networks(client, headers, node)
+                            for node in self.CLUSTER_NODES
+                        ]),
+                        self.get_all_vms(),
+                    )
 
-            return sorted(vlans.values(), key=lambda x: x["vlan_id"])
+                    if all(networks is None for networks in node_networks):
+                        # Cluster nicht erreichbar - letzten Stand behalten
+                        return cache["vlans"] if cache else []
+
+                    digest = _vlan_scan_digest(self.CLUSTER_NODES, node_networks, all_vms)
+                    now = time.monotonic()
+                    if (
+                        not force
+                        and cache is not None
+                        and cache["digest"] == digest
+                        and now - cache["scanned_at"] < VLAN_SCAN_MAX_AGE
+                    ):
+                        cache["checked_at"] = now
+                        return cache["vlans"]
+
+                    # 2. VM-Konfigurationen parallel laden
+                    semaphore = asyncio.Semaphore(SCAN_CONCURRENCY)
+
+                    async def fetch_config(vm: dict) -> Optional[dict]:
+                        vmid = vm.get("vmid")
+                        node = vm.get("node")
+                        if not vmid or not node:
+                            return None
+                        async with semaphore:
+                            try:
+                                response = await client.get(
+                                    f"{self.base_url}/nodes/{node}/qemu/{vmid}/config",
+                                    headers=headers,
+                                    timeout=10.0,
+                                )
+                                if response.status_code != 200:
+                                    return None
+                                return response.json().get("data", {})
+                            except Exception as e:
+                                print(f"Fehler beim Scannen von VM {vmid}: {e}")
+                                return None
+
+                    configs = await asyncio.gather(*[fetch_config(vm) for vm in all_vms])
+
+                vlans = _merge_vlans(self.CLUSTER_NODES, node_networks, all_vms, configs)
 
+            except Exception as e:
+                print(f"Fehler beim VLAN-Scan: {e}")
+                return cache["vlans"] if cache else []
+
+            now = time.monotonic()
+            self._vlan_cache = {
+                "base_url": self.base_url,
+                "digest": digest,
+                "vlans": vlans,
+                "scanned_at": now,
+                "checked_at": now,
+            }
+            return vlans
+
+    async def _get_node_networks(
+        self, client: httpx.AsyncClient, headers: dict, node: str
+    ) -> Optional[list[dict]]:
+        """Netzwerk-Interfaces eines Nodes (None bei Fehler)"""
+        try:
+            response = await client.get(
+                f"{self.base_url}/nodes/{node}/network",
+                headers=headers,
+                timeout=10.0,
+            )
+            if response.status_code == 200:
+                return response.json().get("data", [])
         except Exception as e:
-            print(f"Fehler beim VLAN-Scan: {e}")
-            return []
+            print(f"Fehler beim Scannen von Node {node}: {e}")
+        return None
+
+    def _schedule_vlan_refresh(self):
+        """Startet einen Abgleich im Hintergrund (falls keiner läuft)"""
+        if self._vlan_refresh_task is None or self._vlan_refresh_task.done():
+            self._vlan_refresh_task = asyncio.create_task(self.refresh_network_vlans())
+
+    async def start_vlan_refresh(self):
+        """Startet den periodischen VLAN-Abgleich (füllt den Cache beim Start)"""
+        if self._vlan_loop_task is not None and not self._vlan_loop_task.done():
+            return
+        self._vlan_loop_task = asyncio.create_task(self._vlan_refresh_loop())
+
+    async def stop_vlan_refresh(self):
+        """Stoppt den periodischen VLAN-Abgleich"""
+        for task in (self._vlan_loop_task, self._vlan_refresh_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._vlan_loop_task = None
+        self._vlan_refresh_task = None
+
+    async def _vlan_refresh_loop(self):
+        """Hauptschleife für den periodischen VLAN-Abgleich"""
+        while True:
+            if self.is_configured():
+                try:
+                    await self.refresh_network_vlans()
+                except Exception as e:
+                    print(f"Fehler beim VLAN-Abgleich: {e}")
+            await asyncio.sleep(VLAN_SCAN_REFRESH)
 
     async def scan_vm_ips(self) -> list[dict]:
         """
@@ -1203,23 +1353,21 @@ class ProxmoxService:
         if not self.is_configured():
             return []
 
-        results = []
+        semaphore = asyncio.Semaphore(SCAN_CONCURRENCY)
 
-        try:
-            all_vms = await self.get_all_vms()
+        async def scan_vm(vm: dict) -> Optional[dict]:
+            vmid = vm.get("vmid")
+            name = vm.get("name", f"VM-{vmid}")
+            node = vm.get("node")
+            status = vm.get("status")
 
-            for vm in all_vms:
-                vmid = vm.get("vmid")
-                name = vm.get("name", f"VM-{vmid}")
-                node = vm.get("node")
-                status = vm.get("status")
-
-                if not vmid or not node:
-                    continue
+            if not vmid or not node:
+                return None
 
-                ip = None
-                source = "unknown"
+            ip = None
+            source = "unknown"
 
+            async with semaphore:
                 # 1. Versuche QEMU Guest Agent (nur wenn VM laeuft)
                 if status == "running":
                     try:
@@ -1234,15 +1382,23 @@ class ProxmoxService:
                     except Exception:
                         pass
 
-                if ip:
-                    results.append({
-                        "vmid": vmid,
-                        "name": name,
-                        "node": node,
-                        "ip": ip,
-                        "status": status,
-                        "source": source,
-                    })
+            if not ip:
+                return None
+            return {
+                "vmid": vmid,
+                "name": name,
+                "node": node,
+                "ip": ip,
+                "status": status,
+                "source": source,
+            }
+
+        try:
+            all_vms = await self.get_all_vms()
+
+            # VMs parallel abfragen (begrenzt durch SCAN_CONCURRENCY)
+            scanned = await asyncio.gather(*[scan_vm(vm) for vm in all_vms])
+            results = [r for r in scanned if r]
 
             return sorted(results, key=lambda x: x["vmid"])
 
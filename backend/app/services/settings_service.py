@@ -4,10 +4,11 @@ SettingsService - Verwaltung von App-Einstellungen.
 Verwaltet Einstellungen wie:
 - Default-Gruppen für neue Benutzer
 - Default-Playbooks für neue Benutzer
+- Ansible-Profile pro Playbook
 """
 
 import json
-from typing import List, Optional
+from typing import Dict, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
@@ -16,6 +17,7 @@ from app.models.app_settings import (
     SETTING_DEFAULT_GROUPS,
     SETTING_DEFAULT_PLAYBOOKS,
     SETTING_NETBOX_EXTERNAL_URL,
+    SETTING_ANSIBLE_PLAYBOOK_PROFILES,
 )
 
 
@@ -188,6 +190,47 @@ class SettingsService:
                 await self.db.delete(setting)
                 await self.db.commit()
 
+    # ==================== Ansible-Profile pro Playbook ====================
+
+    async def get_playbook_profiles(self) -> Dict[str, str]:
+        """
+        Holt die Zuordnung Playbook -> Ansible-Profil.
+
+        Returns:
+            Dict mit Playbook-Name als Key und Profilname als Value
+        """
+        value = await self.get_setting(SETTING_ANSIBLE_PLAYBOOK_PROFILES)
+        if not value:
+            return {}
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            return {}
+
+    async def set_playbook_profile(self, playbook_name: str, profile: Optional[str]) -> Dict[str, str]:
+        """
+        Setzt das Ansible-Profil eines Playbooks.
+
+        Args:
+            playbook_name: Name des Playbooks
+            profile: Profilname oder None für den globalen Default
+
+        Returns:
+            Aktualisierte Zuordnung
+        """
+        profiles = await self.get_playbook_profiles()
+        if profile:
+            profiles[playbook_name] = profile
+        else:
+            profiles.pop(playbook_name, None)
+
+        await self.set_setting(
+            SETTING_ANSIBLE_PLAYBOOK_PROFILES,
+            json.dumps(profiles),
+            "Ansible-Performance-Profil pro Playbook"
+        )
+        return profiles
+
     # ==================== Kombinierte Methoden ====================
 
     async def get_default_access(self) -> dict:
@@ -0,0 +1,190 @@
+"""
+Snippet Transport - Cloud-Init Snippets per SSH auf den Proxmox-Node
+
+Schreibt und loescht Snippet-Dateien ueber eine gepoolte SSH-Verbindung
+pro Node (OpenSSH ControlMaster/ControlPersist, wie bei den Ansible-Profilen):
+der erste Zugriff baut die Master-Verbindung auf, alle weiteren laufen als
+eigene Sessions darueber (kein neuer Handshake). Mehrere Dateien werden
+parallel ueber dieselbe Verbindung uebertragen.
+
+Alle Aufrufe sind asynchron (asyncio-Subprozesse), der Event-Loop blockiert
+nicht. Jede Uebertragung meldet ihre Dauer (TransferResult).
+"""
+import asyncio
+import logging
+import shlex
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Key und Benutzer fuer den Zugriff auf die Proxmox-Nodes
+SNIPPET_SSH_KEY = "/root/.ssh/ansible_id"
+SNIPPET_SSH_USER = "root"
+
+# Master-Verbindung bleibt so lange nach der letzten Nutzung offen (Sekunden)
+SNIPPET_CONTROL_PERSIST = 300
+
+# Timeout pro Uebertragung bzw. Verbindungsaufbau (Sekunden)
+SNIPPET_TIMEOUT = 30
+
+# Gleichzeitige Sessions pro Verbindung (sshd MaxSessions Default: 10)
+SNIPPET_MAX_SESSIONS = 8
+
+
+@dataclass
+class TransferResult:
+    """Ergebnis einer einzelnen Snippet-Uebertragung"""
+    path: str
+    action: str  # write, delete
+    success: bool
+    duration_ms: int
+    error: Optional[str] = None
+
+
+class SnippetTransport:
+    """Gepoolte SSH-Verbindungen zu den Proxmox-Nodes"""
+
+    def __init__(self):
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._sessions: Dict[str, asyncio.Semaphore] = {}
+        self._masters: set = set()
+
+    @property
+    def control_dir(self) -> Path:
+        path = Path(settings.data_dir) / "ssh" / "cp"
+        path.mkdir(parents=True, exist_ok=True, mode=0o700)
+        return path
+
+    def _ssh_args(self, host: str) -> List[str]:
+        return [
+            "ssh",
+            "-i", SNIPPET_SSH_KEY,
+            "-o", "StrictHostKeyChecking=no",
+            "-o", "BatchMode=yes",
+            "-o", f"ConnectTimeout={SNIPPET_TIMEOUT}",
+            "-o", "ControlMaster=auto",
+            "-o", f"ControlPath={self.control_dir}/%C",
+            "-o", f"ControlPersist={SNIPPET_CONTROL_PERSIST}",
+            f"{SNIPPET_SSH_USER}@{host}",
+        ]
+
+    async def _ensure_master(self, host: str):
+        """Baut die Master-Verbindung zu host auf (einmal, auch bei parallelen Aufrufen)"""
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            if host in self._masters:
+                check = await asyncio.create_subprocess_exec(
+                    *self._ssh_args(host)[:-1], "-O", "check", self._ssh_args(host)[-1],
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.DEVNULL,
+                )
+                if await check.wait() == 0:
+                    return
+                self._masters.discard(host)
+
+            started = time.monotonic()
+            # Der Master laeuft im Hintergrund weiter und erbt stderr: in eine
+            # Datei statt in eine Pipe, sonst wartet communicate() auf EOF
+            with tempfile.TemporaryFile() as stderr:
+                process = await asyncio.create_subprocess_exec(
+                    *self._ssh_args(host), "-N", "-f",
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=stderr,
+                )
+                try:
+                    returncode = await asyncio.wait_for(process.wait(), SNIPPET_TIMEOUT)
+                except asyncio.TimeoutError:
+                    process.kill()
+                    raise RuntimeError(f"SSH-Verbindung zu {host}: Timeout")
+                if returncode != 0:
+                    stderr.seek(0)
+                    message = stderr.read().decode(errors="replace").strip()
+                    raise RuntimeError(f"SSH-Verbindung zu {host} fehlgeschlagen: {message}")
+
+            self._masters.add(host)
+            logger.debug(f"SSH-Master zu {host} aufgebaut ({(time.monotonic() - started) * 1000:.0f} ms)")
+
+    async def _run(self, host: str, command: str, stdin: Optional[bytes] = None):
+        """Fuehrt command als Session ueber die Master-Verbindung aus (RuntimeError mit stderr)"""
+        sessions = self._sessions.setdefault(host, asyncio.Semaphore(SNIPPET_MAX_SESSIONS))
+        async with sessions:
+            process = await asyncio.create_subprocess_exec(
+                *self._ssh_args(host), command,
+                stdin=asyncio.subprocess.PIPE if stdin is not None else asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            try:
+                _, stderr = await asyncio.wait_for(process.communicate(stdin), SNIPPET_TIMEOUT)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                raise RuntimeError("Timeout")
+            if process.returncode != 0:
+                raise RuntimeError(stderr.decode(errors="replace").strip() or f"Exit-Code {process.returncode}")
+
+    async def write_files(self, host: str, files: Dict[str, str]) -> List[TransferResult]:
+        """
+        Schreibt mehrere Dateien parallel ueber eine Verbindung.
+
+        Jede Datei wird als <pfad>.tmp geschrieben und dann umbenannt, ein
+        abgebrochener Transfer hinterlaesst keine halbe Datei.
+
+        Args:
+            host: Node-Adresse
+            files: {Zielpfad: Inhalt}
+        """
+        try:
+            await self._ensure_master(host)
+        except Exception as e:
+            return [TransferResult(path, "write", False, 0, str(e)) for path in files]
+
+        async def write(path: str, content: str) -> TransferResult:
+            started = time.monotonic()
+            tmp = shlex.quote(f"{path}.tmp")
+            command = f"cat > {tmp} && mv -f {tmp} {shlex.quote(path)}"
+            try:
+                await self._run(host, command, content.encode())
+                error = None
+            except Exception as e:
+                error = str(e)
+            return TransferResult(path, "write", error is None, int((time.monotonic() - started) * 1000), error)
+
+        return list(await asyncio.gather(*(write(path, content) for path, content in files.items())))
+
+    async def delete_files(self, host: str, paths: List[str]) -> List[TransferResult]:
+        """Loescht mehrere Dateien mit einem Befehl (fehlende Dateien sind kein Fehler)"""
+        if not paths:
+            return []
+        started = time.monotonic()
+        try:
+            await self._ensure_master(host)
+            await self._run(host, "rm -f " + " ".join(shlex.quote(path) for path in paths))
+            error = None
+        except Exception as e:
+            error = str(e)
+        duration_ms = int((time.monotonic() - started) * 1000)
+        return [TransferResult(path, "delete", error is None, duration_ms, error) for path in paths]
+
+    async def close(self):
+        """Beendet alle Master-Verbindungen"""
+        for host in list(self._masters):
+            args = self._ssh_args(host)
+            process = await asyncio.create_subprocess_exec(
+                *args[:-1], "-O", "exit", args[-1],
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            await process.wait()
+        self._masters.clear()
+
+
+# Singleton-Instanz
+snippet_transport = SnippetTransport()
@@ -0,0 +1,180 @@
+"""
+SQLite-Snapshot - konsistente Online-Sicherung der App-Datenbank
+
+Nutzt die Online-Backup-API von SQLite in Schritten von N Seiten: zwischen
+den Schritten ist die Datenbank nicht gesperrt, laufende Executions schreiben
+weiter. Aendert ein anderer Prozess die Datenbank waehrend der Sicherung,
+beginnt SQLite von vorn; nach zu vielen Neustarts (oder wenn Writer die
+Schritte zu lange blockieren) wird in einem einzigen Schritt kopiert
+(kurze Lesesperre statt Endlosschleife).
+
+Zusaetzlich: Seiten-Hashes und Differenz-Dateien (nur geaenderte Seiten
+gegenueber einem Basis-Snapshot) fuer inkrementelle Backups.
+
+Laeuft synchron und ist fuer einen Worker-Thread gedacht.
+"""
+import hashlib
+import json
+import logging
+import shutil
+import sqlite3
+import struct
+import time
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Dateikennung der Differenz-Dateien
+DELTA_MAGIC = b"PCSQLD1\n"
+
+# Laenge der Seiten-Hashes (BLAKE2b)
+PAGE_HASH_SIZE = 16
+
+# Pause zwischen zwei Backup-Schritten (Writer kommen dazwischen)
+STEP_SLEEP = 0.005
+
+# Neustarts bzw. Sekunden bis zur Kopie in einem Schritt
+MAX_RESTARTS = 10
+MAX_STEPPED_SECONDS = 30
+
+
+class _FallbackToSingleStep(Exception):
+    pass
+
+
+def take_snapshot(src: Path, dst: Path, step_pages: int = 1024) -> dict:
+    """
+    Erstellt einen konsistenten Snapshot der Datenbank src unter dst.
+
+    Args:
+        src: Live-Datenbank
+        dst: Zieldatei (wird ueberschrieben)
+        step_pages: Seiten pro Schritt (<= 0: alles in einem Schritt)
+
+    Returns:
+        Statistik (pages, restarts, steps, single_step, duration_ms)
+    """
+    started = time.monotonic()
+    stats = {"pages": 0, "restarts": 0, "steps": 0, "single_step": step_pages <= 0}
+    last_remaining: Optional[int] = None
+
+    def progress(status, remaining, total):
+        nonlocal last_remaining
+        stats["steps"] += 1
+        stats["pages"] = total
+        if last_remaining is not None and remaining > last_remaining:
+            # Quelle wurde geaendert, SQLite beginnt von vorn
+            stats["restarts"] += 1
+        last_remaining = remaining
+        if stats["restarts"] > MAX_RESTARTS or time.monotonic() - started > MAX_STEPPED_SECONDS:
+            raise _FallbackToSingleStep()
+
+    dst.unlink(missing_ok=True)
+    source = sqlite3.connect(str(src), timeout=30)
+    try:
+        if step_pages > 0:
+            target = sqlite3.connect(str(dst))
+            try:
+                source.backup(target, pages=step_pages, progress=progress, sleep=STEP_SLEEP)
+            except _FallbackToSingleStep:
+                logger.info(
+                    f"SQLite-Snapshot: {stats['restarts']} Neustarts nach "
+                    f"{time.monotonic() - started:.1f} s, kopiere in einem Schritt"
+                )
+                stats["single_step"] = True
+            finally:
+                target.close()
+
+        if stats["single_step"]:
+            dst.unlink(missing_ok=True)
+            target = sqlite3.connect(str(dst))
+            try:
+                source.backup(target)
+                stats["pages"] = target.execute("PRAGMA page_count").fetchone()[0]
+            finally:
+                target.close()
+    finally:
+        source.close()
+
+    stats["duration_ms"] = int((time.monotonic() - started) * 1000)
+    return stats
+
+
+def read_page_size(path: Path) -> int:
+    """Liest die Seitengroesse aus dem Datenbank-Header"""
+    with open(path, "rb") as f:
+        header = f.read(100)
+    if len(header) < 100 or not header.startswith(b"SQLite format 3\x00"):
+        raise ValueError(f"Keine SQLite-Datenbank: {path}")
+    page_size = struct.unpack(">H", header[16:18])[0]
+    return 65536 if page_size == 1 else page_size
+
+
+def _pages(f: BinaryIO, page_size: int) -> Iterator[bytes]:
+    return iter(lambda: f.read(page_size), b"")
+
+
+def _page_hash(page: bytes) -> bytes:
+    return hashlib.blake2b(page, digest_size=PAGE_HASH_SIZE).digest()
+
+
+def page_hashes(path: Path, page_size: int) -> bytes:
+    """Hashes aller Seiten, aneinandergehaengt (PAGE_HASH_SIZE Bytes pro Seite)"""
+    with open(path, "rb") as f:
+        return b"".join(_page_hash(page) for page in _pages(f, page_size))
+
+
+def changed_pages(hashes: bytes, base_hashes: bytes) -> List[int]:
+    """Seitennummern (ab 0) die sich gegenueber der Basis unterscheiden"""
+    changed = []
+    for index in range(len(hashes) // PAGE_HASH_SIZE):
+        offset = index * PAGE_HASH_SIZE
+        if hashes[offset:offset + PAGE_HASH_SIZE] != base_hashes[offset:offset + PAGE_HASH_SIZE]:
+            changed.append(index)
+    return changed
+
+
+def delta_chunks(path: Path, page_size: int, pages: List[int], header: dict) -> Iterable[bytes]:
+    """
+    Erzeugt eine Differenz-Datei aus den angegebenen Seiten von path.
+
+    Format: DELTA_MAGIC, Header-Laenge (uint32) + JSON-Header
+    (page_size, page_count, ...), dann je Seite Seitennummer (uint32) + Inhalt.
+    """
+    header_bytes = json.dumps(header).encode()
+    yield DELTA_MAGIC + struct.pack(">I", len(header_bytes)) + header_bytes
+    with open(path, "rb") as f:
+        for index in pages:
+            f.seek(index * page_size)
+            yield struct.pack(">I", index) + f.read(page_size)
+
+
+def apply_delta(base: Path, delta: Path, out: Path) -> dict:
+    """
+    Baut eine Datenbank aus Basis-Snapshot und Differenz-Datei.
+
+    Returns:
+        Header der Differenz-Datei
+    """
+    with open(delta, "rb") as f:
+        if f.read(len(DELTA_MAGIC)) != DELTA_MAGIC:
+            raise ValueError("Ungueltige SQLite-Differenz-Datei")
+        header_len = struct.unpack(">I", f.read(4))[0]
+        header = json.loads(f.read(header_len))
+        page_size = header["page_size"]
+
+        shutil.copyfile(base, out)
+        with open(out, "r+b") as target:
+            target.truncate(header["page_count"] * page_size)
+            while True:
+                record = f.read(4)
+                if not record:
+                    break
+                index = struct.unpack(">I", record)[0]
+                page = f.read(page_size)
+                if len(page) != page_size:
+                    raise ValueError("SQLite-Differenz-Datei ist unvollstaendig")
+                target.seek(index * page_size)
+                target.write(page)
+    return header
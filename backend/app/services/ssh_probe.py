@@ -0,0 +1,149 @@
+"""
+SSH Probe - Wartet nicht-blockierend bis ein Host per SSH erreichbar ist
+
+Verbindungsversuche laufen ueber asyncio (kein blockierender connect auf
+dem Event-Loop) mit schnellem exponentiellem Backoff. Bereit ist ein Host
+erst, wenn sshd seinen Banner ("SSH-2.0-...") sendet - ein offener Port
+allein reicht nicht, waehrend cloud-init sshd neu startet.
+
+Optional dient der QEMU Guest Agent als zusaetzliches Signal: meldet er die
+erwartete IP im Gast, ist das Netz oben und der Backoff wird auf das
+kurze Anfangsintervall zurueckgesetzt. Ohne Agent wird einfach weiter
+per SSH geprobt.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Timeout fuer Verbindungsaufbau bzw. Banner (Sekunden)
+SSH_PROBE_CONNECT_TIMEOUT = 2.0
+SSH_PROBE_BANNER_TIMEOUT = 5.0
+
+# Backoff zwischen den Versuchen (Sekunden)
+SSH_PROBE_INITIAL_DELAY = 0.25
+SSH_PROBE_MAX_DELAY = 5.0
+
+# Gleichzeitige Verbindungsversuche (ueber alle wartenden Hosts)
+SSH_PROBE_CONCURRENCY = 32
+
+_probe_limit = asyncio.Semaphore(SSH_PROBE_CONCURRENCY)
+
+
+@dataclass
+class ProbeResult:
+    """Ergebnis des Wartens auf einen Host"""
+    host: str
+    ready: bool
+    elapsed_ms: int
+    attempts: int
+    banner: Optional[str] = None
+    agent_ready: bool = False
+    error: Optional[str] = None
+
+
+async def probe_ssh(host: str, port: int = 22) -> Optional[str]:
+    """
+    Ein einzelner Versuch: verbindet sich und liest den SSH-Banner.
+
+    Returns:
+        Banner-Zeile oder None wenn der Host (noch) nicht bereit ist
+    """
+    async with _probe_limit:
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port),
+                SSH_PROBE_CONNECT_TIMEOUT,
+            )
+        except (OSError, asyncio.TimeoutError):
+            return None
+
+        try:
+            line = await asyncio.wait_for(reader.readline(), SSH_PROBE_BANNER_TIMEOUT)
+        except (OSError, asyncio.TimeoutError, ValueError):
+            line = b""
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    if not line.startswith(b"SSH-"):
+        return None
+    return line.decode(errors="replace").strip()
+
+
+async def _agent_ready(vmid: int, node: str, host: str) -> bool:
+    """Prueft ob der Guest Agent die erwartete IP im Gast meldet"""
+    from app.services.proxmox_service import proxmox_service
+
+    try:
+        result = await proxmox_service.get_vm_agent_network(vmid, node)
+    except Exception:
+        return False
+    if not result.get("success"):
+        return False
+    return any(host in iface.get("ipv4", []) for iface in result.get("interfaces", []))
+
+
+async def wait_for_ssh(
+    host: str,
+    port: int = 22,
+    timeout: float = 300,
+    max_delay: float = SSH_PROBE_MAX_DELAY,
+    vmid: Optional[int] = None,
+    node: Optional[str] = None,
+) -> ProbeResult:
+    """
+    Wartet bis host einen SSH-Banner sendet oder timeout abgelaufen ist.
+
+    Args:
+        host: IP oder Hostname
+        port: SSH-Port
+        timeout: Maximale Wartezeit (Sekunden)
+        max_delay: Obergrenze fuer den Backoff (Sekunden)
+        vmid, node: Aktiviert den Guest Agent als zusaetzliches Signal
+    """
+    started = time.monotonic()
+    deadline = started + timeout
+    delay = SSH_PROBE_INITIAL_DELAY
+    attempts = 0
+    use_agent = vmid is not None and node is not None
+    agent_ready = False
+    agent_checked = 0.0
+
+    while True:
+        attempts += 1
+        banner = await probe_ssh(host, port)
+        if banner:
+            elapsed_ms = int((time.monotonic() - started) * 1000)
+            logger.info(f"SSH auf {host}:{port} bereit nach {elapsed_ms} ms ({attempts} Versuche)")
+            return ProbeResult(host, True, elapsed_ms, attempts, banner, agent_ready)
+
+        # Agent hoechstens alle max_delay Sekunden abfragen (API-Call)
+        if use_agent and not agent_ready and time.monotonic() - agent_checked >= max_delay:
+            agent_checked = time.monotonic()
+            if await _agent_ready(vmid, node, host):
+                # Netz im Gast ist oben - sshd folgt in der Regel gleich
+                agent_ready = True
+                delay = SSH_PROBE_INITIAL_DELAY
+                logger.debug(f"Guest Agent meldet {host} (VM {vmid}), SSH-Probe beschleunigt")
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        await asyncio.sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
+
+    elapsed_ms = int((time.monotonic() - started) * 1000)
+    logger.warning(f"SSH auf {host}:{port} nach {elapsed_ms} ms nicht erreichbar")
+    return ProbeResult(
+        host, False, elapsed_ms, attempts,
+        agent_ready=agent_ready,
+        error=f"Timeout nach {timeout:g}s",
+    )
+
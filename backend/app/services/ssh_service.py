@@ -6,22 +6,130 @@ Dieser Service bietet Funktionen fuer:
 - Import/Upload/Generierung von SSH-Keys
 - Testen von SSH-Verbindungen
 - Lesen/Aktualisieren der SSH-Konfiguration
+
+Typ, Fingerprint und Public Key werden mit cryptography im Prozess
+berechnet (kein ssh-keygen pro Key) und nach Pfad, mtime und Groesse
+gecacht. Datei-I/O (Keys, Metadaten) laeuft in Worker-Threads.
 """
 import asyncio
+import base64
+import hashlib
+import json
 import logging
 import os
-import re
 import shutil
 import subprocess
+import threading
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, List
+from typing import Dict, Optional, List, Tuple
 from pydantic import BaseModel
 
+from cryptography.exceptions import UnsupportedAlgorithm
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import dsa, ec, ed25519, rsa
+
 from app.config import settings, reload_settings
 
 logger = logging.getLogger(__name__)
 
 
+# =============================================================================
+# Key-Analyse (in-process, gecacht)
+# =============================================================================
+
+@dataclass(frozen=True)
+class KeyMaterial:
+    """Aus einer Key-Datei abgeleitete Daten"""
+    type: str  # "ed25519", "rsa", "ecdsa", "dsa"
+    fingerprint: str  # "SHA256:..." wie ssh-keygen -l
+    public_key: str  # OpenSSH-Format ("ssh-ed25519 AAAA...")
+
+
+# Pfad -> (mtime_ns, size, KeyMaterial oder None)
+_key_cache: Dict[str, Tuple[int, int, Optional[KeyMaterial]]] = {}
+_key_cache_lock = threading.Lock()
+
+
+def _key_type_name(key) -> Optional[str]:
+    """Key-Typ wie ssh-keygen ihn ausgibt (kleingeschrieben)"""
+    if isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+        return "ed25519"
+    if isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+        return "rsa"
+    if isinstance(key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)):
+        return "ecdsa"
+    if isinstance(key, (dsa.DSAPrivateKey, dsa.DSAPublicKey)):
+        return "dsa"
+    return None
+
+
+def _parse_key(data: bytes, pub_path: Path) -> Optional[KeyMaterial]:
+    """
+    Liest einen Private Key (OpenSSH- oder PEM-Format).
+
+    Verschluesselte Keys lassen sich ohne Passphrase nicht laden, dann wird
+    wie bei ssh-keygen -l die zugehoerige .pub Datei verwendet. Von
+    cryptography nicht unterstuetzte Typen (z.B. sk-/FIDO-Keys) ergeben None.
+    """
+    try:
+        if b"BEGIN OPENSSH PRIVATE KEY" in data:
+            key = serialization.load_ssh_private_key(data, password=None).public_key()
+        else:
+            key = serialization.load_pem_private_key(data, password=None).public_key()
+    except (TypeError, ValueError, UnsupportedAlgorithm):
+        try:
+            pub_data = pub_path.read_bytes()
+            # sk-Keys laedt cryptography als normalen Key - Typ und
+            # Fingerprint waeren falsch
+            if pub_data.startswith(b"sk-"):
+                return None
+            key = serialization.load_ssh_public_key(pub_data)
+        except (OSError, ValueError, UnsupportedAlgorithm):
+            return None
+
+    key_type = _key_type_name(key)
+    if key_type is None:
+        return None
+
+    public_key = key.public_bytes(
+        serialization.Encoding.OpenSSH,
+        serialization.PublicFormat.OpenSSH,
+    ).decode()
+    blob = base64.b64decode(public_key.split()[1])
+    digest = base64.b64encode(hashlib.sha256(blob).digest()).decode().rstrip("=")
+    return KeyMaterial(type=key_type, fingerprint=f"SHA256:{digest}", public_key=public_key)
+
+
+def inspect_key(path: Path) -> Optional[KeyMaterial]:
+    """
+    Typ, Fingerprint und Public Key eines Private Keys (blockierend).
+
+    Das Ergebnis wird nach (Pfad, mtime, Groesse) gecacht; ein geaenderter
+    oder ersetzter Key wird beim naechsten Aufruf neu gelesen.
+    """
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+
+    cache_key = str(path)
+    with _key_cache_lock:
+        cached = _key_cache.get(cache_key)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return None
+    material = _parse_key(data, Path(str(path) + ".pub"))
+
+    with _key_cache_lock:
+        _key_cache[cache_key] = (stat.st_mtime_ns, stat.st_size, material)
+    return material
+
+
 # =============================================================================
 # Schemas
 # =============================================================================
@@ -190,9 +298,8 @@ class SSHService:
         """Pfad zur Metadaten-Datei"""
         return self.SSH_KEY_DIR / self.METADATA_FILE
 
-    def _load_metadata(self) -> dict:
-        """Laedt Key-Metadaten aus JSON-Datei"""
-        import json
+    def _read_metadata(self) -> dict:
+        """Laedt Key-Metadaten aus JSON-Datei (blockierend)"""
         if self.metadata_path.exists():
             try:
                 with open(self.metadata_path) as f:
@@ -201,12 +308,21 @@ class SSHService:
                 logger.warning(f"Metadaten konnten nicht geladen werden: {e}")
         return {"keys": {}, "active_key_id": None}
 
-    def _save_metadata(self, metadata: dict) -> None:
-        """Speichert Key-Metadaten in JSON-Datei"""
-        import json
+    def _write_metadata(self, metadata: dict) -> None:
+        """Speichert Key-Metadaten atomar (temp-Datei + rename, blockierend)"""
         self.SSH_KEY_DIR.mkdir(parents=True, exist_ok=True)
-        with open(self.metadata_path, "w") as f:
+        tmp_path = self.metadata_path.with_name(f".{self.METADATA_FILE}.tmp")
+        with open(tmp_path, "w") as f:
             json.dump(metadata, f, indent=2)
+        os.replace(tmp_path, self.metadata_path)
+
+    async def _load_metadata(self) -> dict:
+        """Laedt Key-Metadaten im Worker-Thread"""
+        return await asyncio.to_thread(self._read_metadata)
+
+    async def _save_metadata(self, metadata: dict) -> None:
+        """Speichert Key-Metadaten im Worker-Thread"""
+        await asyncio.to_thread(self._write_metadata, metadata)
 
     def _generate_key_id(self) -> str:
         """Generiert eine eindeutige Key-ID"""
@@ -225,17 +341,7 @@ class SSHService:
         verfuegbaren Private Keys auf. Zeigt auch gespeicherte Keys.
         """
         host_ssh_path = Path(self.HOST_SSH_DIR)
-        available = host_ssh_path.exists() and host_ssh_path.is_dir()
-
-        keys = []
-        if available:
-            # Finde alle Private Keys (ohne .pub Suffix)
-            for item in host_ssh_path.iterdir():
-                if item.is_file() and not item.name.endswith(".pub"):
-                    # Pruefe ob es ein SSH Private Key ist
-                    key_info = await self._analyze_key_file(item)
-                    if key_info:
-                        keys.append(key_info)
+        available, keys = await asyncio.to_thread(self._scan_host_keys, host_ssh_path)
 
         # Gespeicherte Keys laden
         stored_keys = await self._list_stored_keys()
@@ -254,11 +360,28 @@ class SSHService:
             default_user=default_user,
         )
 
+    def _scan_host_keys(self, host_ssh_path: Path) -> Tuple[bool, List[SSHKeyInfo]]:
+        """Findet alle Private Keys im Host-SSH-Verzeichnis (blockierend)"""
+        if not (host_ssh_path.exists() and host_ssh_path.is_dir()):
+            return False, []
+
+        keys = []
+        # Finde alle Private Keys (ohne .pub Suffix)
+        for item in host_ssh_path.iterdir():
+            if item.is_file() and not item.name.endswith(".pub"):
+                # Pruefe ob es ein SSH Private Key ist
+                key_info = self._analyze_key_file_sync(item)
+                if key_info:
+                    keys.append(key_info)
+        return True, keys
+
     async def _list_stored_keys(self) -> List[SSHKeyInfo]:
         """Listet alle gespeicherten Keys auf"""
-        from datetime import datetime
+        metadata = await self._load_metadata()
+        return await asyncio.to_thread(self._stored_key_infos, metadata)
 
-        metadata = self._load_metadata()
+    def _stored_key_infos(self, metadata: dict) -> List[SSHKeyInfo]:
+        """Baut die Key-Infos der gespeicherten Keys (blockierend)"""
         active_key_id = metadata.get("active_key_id")
         stored_keys = []
 
@@ -267,8 +390,8 @@ class SSHService:
             if not key_path.exists():
                 continue
 
-            # Fingerprint berechnen
-            fingerprint = await self._get_key_fingerprint(key_path)
+            material = inspect_key(key_path)
+            fingerprint = material.fingerprint if material else None
 
             stored_keys.append(SSHKeyInfo(
                 id=key_id,
@@ -329,7 +452,7 @@ class SSHService:
         actual_type = await self._get_actual_key_type(key_path) or key_type
 
         # Metadaten aktualisieren
-        metadata = self._load_metadata()
+        metadata = await self._load_metadata()
         metadata["keys"][key_id] = {
             "name": key_name or f"{actual_type.upper()}-Key ({key_id})",
             "filename": filename,
@@ -342,7 +465,7 @@ class SSHService:
             metadata["active_key_id"] = key_id
             await self._create_active_symlink(key_path, actual_type)
 
-        self._save_metadata(metadata)
+        await self._save_metadata(metadata)
 
         logger.info(f"SSH-Key gespeichert: {key_path} (ID: {key_id})")
 
@@ -381,7 +504,7 @@ class SSHService:
         """Aktiviert einen gespeicherten Key"""
         key_id = request.key_id
 
-        metadata = self._load_metadata()
+        metadata = await self._load_metadata()
         if key_id not in metadata.get("keys", {}):
             return SSHKeyActivateResponse(
                 success=False,
@@ -402,7 +525,7 @@ class SSHService:
 
         # Metadaten aktualisieren
         metadata["active_key_id"] = key_id
-        self._save_metadata(metadata)
+        await self._save_metadata(metadata)
 
         # Key-Info zurueckgeben
         fingerprint = await self._get_key_fingerprint(key_path)
@@ -427,7 +550,7 @@ class SSHService:
         """Loescht einen gespeicherten Key"""
         key_id = request.key_id
 
-        metadata = self._load_metadata()
+        metadata = await self._load_metadata()
         if key_id not in metadata.get("keys", {}):
             return SSHKeyDeleteResponse(
                 success=False,
@@ -456,7 +579,7 @@ class SSHService:
 
         # Aus Metadaten entfernen
         del metadata["keys"][key_id]
-        self._save_metadata(metadata)
+        await self._save_metadata(metadata)
 
         return SSHKeyDeleteResponse(
             success=True,
@@ -465,15 +588,19 @@ class SSHService:
 
     async def _analyze_key_file(self, path: Path) -> Optional[SSHKeyInfo]:
         """Analysiert eine Key-Datei und gibt Infos zurueck"""
-        try:
-            content = path.read_text().strip()
+        return await asyncio.to_thread(self._analyze_key_file_sync, path)
 
-            # Pruefe auf Private Key Header
-            if not content.startswith("-----BEGIN"):
+    def _analyze_key_file_sync(self, path: Path) -> Optional[SSHKeyInfo]:
+        """Analysiert eine Key-Datei (blockierend)"""
+        try:
+            # Pruefe auf Private Key Header (nur der Anfang, Dateien koennen gross sein)
+            with open(path, "rb") as f:
+                head = f.read(64).lstrip()
+            if not head.startswith(b"-----BEGIN"):
                 return None
 
             # Bestimme Key-Typ
-            key_type = self._detect_private_key_type(content)
+            key_type = self._detect_private_key_type(head.decode(errors="replace"))
             if not key_type:
                 return None
 
@@ -481,15 +608,15 @@ class SSHService:
             pub_path = path.with_suffix(path.suffix + ".pub") if path.suffix else Path(str(path) + ".pub")
             has_public = pub_path.exists()
 
-            # Fingerprint berechnen
-            fingerprint = await self._get_key_fingerprint(path)
+            # Typ und Fingerprint (gecacht)
+            material = inspect_key(path)
 
             return SSHKeyInfo(
                 name=path.name,
                 path=str(path),
-                type=key_type,
+                type=material.type if material else key_type,
                 has_public=has_public,
-                fingerprint=fingerprint,
+                fingerprint=material.fingerprint if material else None,
             )
         except Exception as e:
             logger.debug(f"Konnte Key-Datei nicht analysieren: {path} - {e}")
@@ -510,31 +637,14 @@ class SSHService:
         return None
 
     async def _get_key_fingerprint(self, key_path: Path) -> Optional[str]:
-        """Berechnet den Fingerprint eines Keys"""
-        try:
-            result = await asyncio.to_thread(
-                subprocess.run,
-                ["ssh-keygen", "-lf", str(key_path)],
-                capture_output=True,
-                text=True,
-                timeout=5,
-            )
-            if result.returncode == 0:
-                # Format: "256 SHA256:xxxx user@host (ED25519)"
-                parts = result.stdout.strip().split()
-                if len(parts) >= 2:
-                    return parts[1]  # SHA256:xxxx
-            return None
-        except Exception as e:
-            logger.debug(f"Konnte Fingerprint nicht berechnen: {e}")
-            return None
+        """Berechnet den Fingerprint eines Keys (SHA256:..., wie ssh-keygen -l)"""
+        material = await asyncio.to_thread(inspect_key, key_path)
+        return material.fingerprint if material else None
 
     async def _get_current_key_info(self) -> Optional[SSHKeyInfo]:
         """Gibt Infos zum aktuell konfigurierten Key zurueck"""
         key_path = Path(settings.ssh_key_path)
-        if key_path.exists():
-            return await self._analyze_key_file(key_path)
-        return None
+        return await self._analyze_key_file(key_path)
 
     async def _get_default_user(self) -> str:
         """Ermittelt den empfohlenen Default-User"""
@@ -679,40 +789,17 @@ class SSHService:
             )
 
     async def _generate_public_from_private(self, private_key_path: Path) -> Optional[str]:
-        """Generiert Public Key aus Private Key"""
-        try:
-            result = await asyncio.to_thread(
-                subprocess.run,
-                ["ssh-keygen", "-y", "-f", str(private_key_path)],
-                capture_output=True,
-                text=True,
-                timeout=10,
-            )
-            if result.returncode == 0:
-                return result.stdout.strip()
-            return None
-        except Exception as e:
-            logger.warning(f"Konnte Public Key nicht generieren: {e}")
+        """Leitet den Public Key (OpenSSH-Format) aus dem Private Key ab"""
+        material = await asyncio.to_thread(inspect_key, private_key_path)
+        if material is None:
+            logger.warning(f"Konnte Public Key nicht generieren: {private_key_path}")
             return None
+        return material.public_key
 
     async def _get_actual_key_type(self, key_path: Path) -> Optional[str]:
-        """Bestimmt den genauen Key-Typ via ssh-keygen"""
-        try:
-            result = await asyncio.to_thread(
-                subprocess.run,
-                ["ssh-keygen", "-lf", str(key_path)],
-                capture_output=True,
-                text=True,
-                timeout=5,
-            )
-            if result.returncode == 0:
-                # Format: "256 SHA256:xxxx user@host (ED25519)"
-                match = re.search(r"\(([A-Z0-9]+)\)$", result.stdout.strip())
-                if match:
-                    return match.group(1).lower()
-            return None
-        except Exception:
-            return None
+        """Bestimmt den genauen Key-Typ (ed25519, rsa, ecdsa, dsa)"""
+        material = await asyncio.to_thread(inspect_key, key_path)
+        return material.type if material else None
 
     # =========================================================================
     # Key Generation
@@ -779,7 +866,7 @@ class SSHService:
             fingerprint = await self._get_key_fingerprint(target_path)
 
             # Metadaten speichern
-            metadata = self._load_metadata()
+            metadata = await self._load_metadata()
             key_name = request.key_name or f"{key_type.upper()}-Key ({key_id})"
             metadata["keys"][key_id] = {
                 "name": key_name,
@@ -791,7 +878,7 @@ class SSHService:
             # Key aktivieren
             metadata["active_key_id"] = key_id
             await self._create_active_symlink(target_path, key_type)
-            self._save_metadata(metadata)
+            await self._save_metadata(metadata)
 
             logger.info(f"SSH-Key generiert: {target_path} (ID: {key_id})")
 
@@ -955,13 +1042,9 @@ class SSHService:
 
             # Public Key lesen
             pub_path = Path(str(key_path) + ".pub")
-            if pub_path.exists():
-                public_key = pub_path.read_text().strip()
-
-            # Genaueren Key-Typ ermitteln
-            actual_type = await self._get_actual_key_type(key_path)
-            if actual_type:
-                key_type = actual_type
+            public_key = await asyncio.to_thread(
+                lambda: pub_path.read_text().strip() if pub_path.exists() else None
+            )
 
         return SSHConfigResponse(
             ssh_user=settings.ansible_remote_user,
@@ -177,7 +177,9 @@ module "{module_name}" {{
 
             # Prüfe ob IP verfügbar
             try:
-                is_available = await netbox_service.check_ip_available(config.ip_address)
+                is_available = await netbox_service.check_ip_available(
+                    config.ip_address, config.vlan, owner=config.name
+                )
                 if not is_available:
                     errors.append(f"IP-Adresse {config.ip_address} ist bereits belegt")
             except Exception as e:
@@ -242,66 +244,71 @@ module "{module_name}" {{
         if config.ip_address:
             ip_address = config.ip_address
         else:
-            # Nächste freie IP aus NetBox holen
-            available = await netbox_service.get_available_ips(config.vlan, limit=1)
-            if not available:
-                raise ValueError(f"Keine freien IPs in VLAN {config.vlan} verfügbar")
+            # Nächste freie IP wählen und lokal sperren (parallele Anfragen
+            # bekommen so nie dieselbe Adresse)
+            available = await netbox_service.allocate_ips(config.vlan, 1, owner=config.name)
             ip_address = available[0]["address"]
 
-        vmid = calculate_vmid(ip_address)
-
-        # HINWEIS: IP wird erst bei erfolgreichem Deploy reserviert (nicht hier)
+        try:
+            vmid = calculate_vmid(ip_address)
 
-        # Cloud-Init generieren und auf NAS schreiben
-        cloud_init_ref = ""
-        if config.cloud_init_profile:
-            try:
-                async with async_session() as db:
-                    # Cloud-Init YAML mit korrektem Hostname generieren
-                    profile = CloudInitProfile(config.cloud_init_profile) if isinstance(config.cloud_init_profile, str) else config.cloud_init_profile
-                    cloud_init_yaml = await cloud_init_service.generate_user_data(
-                        profile=profile,
-                        hostname=config.name,
-                        db=db,
-                        enable_phone_home=True,
-                    )
+            # HINWEIS: IP wird erst bei erfolgreichem Deploy reserviert (nicht hier)
 
-                    # Auf NAS schreiben (verwende gandalf als Standard-Node)
-                    success = await cloud_init_service.write_snippet_to_nas(
-                        vm_name=config.name,
-                        content=cloud_init_yaml,
-                        proxmox_node="gandalf",
-                        db=db,
-                    )
+            # Cloud-Init generieren und auf NAS schreiben
+            cloud_init_ref = ""
+            if config.cloud_init_profile:
+                try:
+                    async with async_session() as db:
+                        # Cloud-Init YAML mit korrektem Hostname generieren
+                        profile = CloudInitProfile(config.cloud_init_profile) if isinstance(config.cloud_init_profile, str) else config.cloud_init_profile
+                        cloud_init_yaml = await cloud_init_service.generate_user_data(
+                            profile=profile,
+                            hostname=config.name,
+                            db=db,
+                            enable_phone_home=True,
+                        )
 
-                    if success:
-                        cloud_init_ref = await cloud_init_service.get_snippet_proxmox_ref(config.name, db=db)
-                        print(f"Cloud-Init fuer {config.name} erstellt: {cloud_init_ref}")
-                    else:
-                        print(f"Warnung: Cloud-Init konnte nicht auf NAS geschrieben werden, verwende Standard")
-            except Exception as e:
-                print(f"Fehler bei Cloud-Init Generierung: {e}")
+                        # Ueber den Ziel-Node auf NAS schreiben (zeitgleich angelegte
+                        # VMs teilen sich eine Uebertragung)
+                        success = await cloud_init_service.write_snippet_batched(
+                            vm_name=config.name,
+                            content=cloud_init_yaml,
+                            proxmox_node=config.target_node.value,
+                        )
 
-        # Terraform-Datei generieren
-        ansible_group = config.ansible_group or ""
-        content = self.generate_tf_content(
-            name=config.name,
-            vmid=vmid,
-            ip_address=ip_address,
-            target_node=config.target_node.value,
-            description=config.description or f"VM {config.name}",
-            cores=config.cores,
-            memory_gb=config.memory_gb,
-            disk_size_gb=config.disk_size_gb,
-            ansible_group=ansible_group,
-            template_id=config.template_id,
-            storage=config.storage,
-            cloud_init_user_data=cloud_init_ref,
-        )
+                        if success:
+                            cloud_init_ref = await cloud_init_service.get_snippet_proxmox_ref(config.name, db=db)
+                            print(f"Cloud-Init fuer {config.name} erstellt: {cloud_init_ref}")
+                        else:
+                            print(f"Warnung: Cloud-Init konnte nicht auf NAS geschrieben werden, verwende Standard")
+                except Exception as e:
+                    print(f"Fehler bei Cloud-Init Generierung: {e}")
+
+            # Terraform-Datei generieren
+            ansible_group = config.ansible_group or ""
+            content = self.generate_tf_content(
+                name=config.name,
+                vmid=vmid,
+                ip_address=ip_address,
+                target_node=config.target_node.value,
+                description=config.description or f"VM {config.name}",
+                cores=config.cores,
+                memory_gb=config.memory_gb,
+                disk_size_gb=config.disk_size_gb,
+                ansible_group=ansible_group,
+                template_id=config.template_id,
+                storage=config.storage,
+                cloud_init_user_data=cloud_init_ref,
+            )
 
-        # Datei schreiben
-        tf_file = self.get_tf_filepath(config.name)
-        tf_file.write_text(content)
+            # Datei schreiben
+            tf_file = self.get_tf_filepath(config.name)
+            tf_file.write_text(content)
+        except Exception:
+            # Lokalen Lease sofort freigeben statt ihn auslaufen zu lassen
+            if not config.ip_address:
+                netbox_service.release_allocation(ip_address)
+            raise
 
         # History-Eintrag erstellen
         await vm_history_service.log_change(
@@ -392,28 +399,31 @@ module "{module_name}" {{
         # Callback für IP-Aktivierung und Ansible-Inventory-Update bei Erfolg
         async def on_deploy_success():
             """Aktiviert die IP in NetBox und fügt VM zu Ansible-Inventory hinzu"""
-            # 1. Beschreibung aktualisieren und IP aktivieren
-            await netbox_service.reserve_ip(
-                ip_address=vm_config.ip_address,
-                description=f"VM: {name}",
-                dns_name=f"{name}.newsxc.net",
-            )
-            await netbox_service.activate_ip(vm_config.ip_address)
-
-            # 2. VM-Objekt in NetBox erstellen und IP verknuepfen
+            # 1.+2. VM-Objekt anlegen, IP aktivieren und verknuepfen
+            # (gleichzeitige Deploys werden zu Bulk-Requests zusammengefasst)
             try:
-                await netbox_service.create_vm_with_ip(
-                    name=name,
-                    ip_address=vm_config.ip_address,
-                    vcpus=vm_config.cores,
-                    memory_mb=vm_config.memory_gb * 1024,
-                    disk_gb=vm_config.disk_size_gb,
-                    cluster_name="Proxmox",
-                    description=f"Deployed via Proxmox Commander (VMID: {vm_config.vmid})",
-                )
+                await netbox_service.register_vm_batched({
+                    "name": name,
+                    "ip_address": vm_config.ip_address,
+                    "vcpus": vm_config.cores,
+                    "memory_mb": vm_config.memory_gb * 1024,
+                    "disk_gb": vm_config.disk_size_gb,
+                    "cluster_name": "Proxmox",
+                    "description": f"Deployed via Proxmox Commander (VMID: {vm_config.vmid})",
+                    "ip_description": f"VM: {name}",
+                    "dns_name": f"{name}.newsxc.net",
+                    "ip_status": "active",
+                })
             except Exception as e:
                 # NetBox VM-Fehler loggen, aber Deploy als erfolgreich werten
                 print(f"Warnung: NetBox VM-Erstellung fehlgeschlagen: {e}")
+                # IP muss trotzdem aktiv sein
+                await netbox_service.reserve_ip(
+                    ip_address=vm_config.ip_address,
+                    description=f"VM: {name}",
+                    dns_name=f"{name}.newsxc.net",
+                )
+                await netbox_service.activate_ip(vm_config.ip_address)
 
             # 3. VM zu Ansible-Inventory hinzufügen (wenn Gruppe konfiguriert)
             if vm_config.ansible_group:
@@ -439,7 +449,8 @@ module "{module_name}" {{
                         ssh_ready = await ansible_service.wait_for_ssh(
                             host=vm_config.ip_address,
                             timeout=300,
-                            interval=10,
+                            vmid=vm_config.vmid,
+                            node=vm_config.target_node,
                         )
                         if not ssh_ready:
                             print(f"Warnung: SSH-Timeout für {vm_config.ip_address}")
@@ -504,7 +515,8 @@ module "{module_name}" {{
 
         # Callback für IP-Freigabe bei Fehler
         async def on_deploy_failure():
-            """Gibt die IP in NetBox frei wenn Deploy fehlschlägt"""
+            """Gibt die IP in NetBox und den lokalen Lease frei wenn Deploy fehlschlägt"""
+            netbox_service.release_allocation(vm_config.ip_address)
             await netbox_service.release_ip(vm_config.ip_address)
 
         # Terraform apply im Hintergrund starten
@@ -594,8 +606,9 @@ module "{module_name}" {{
         # Callback für IP-Freigabe und Ansible-Inventory-Update bei erfolgreichem Destroy
         async def on_destroy_success():
             """Gibt die IP in NetBox frei und entfernt VM aus Ansible-Inventory"""
-            # 1. IP in NetBox freigeben
-            await netbox_service.release_ip(vm_config.ip_address)
+            # 1. IP und VM-Objekt in NetBox entfernen
+            # (gleichzeitige Destroys werden zu Bulk-Requests zusammengefasst)
+            await netbox_service.unregister_vm_batched(name, vm_config.ip_address)
 
             # 2. VM aus Ansible-Inventory entfernen
             try:
@@ -604,7 +617,14 @@ module "{module_name}" {{
                 # Inventory-Fehler loggen, aber Destroy als erfolgreich werten
                 print(f"Warnung: Ansible-Inventory-Update fehlgeschlagen: {e}")
 
-            # 3. History-Eintrag für Destroy erstellen
+            # 3. Cloud-Init Snippet vom NAS loeschen
+            # (gleichzeitige Destroys teilen sich einen Löschbefehl pro Node)
+            try:
+                await cloud_init_service.delete_snippet_batched(name, vm_config.target_node)
+            except Exception as e:
+                print(f"Warnung: Cloud-Init Snippet konnte nicht gelöscht werden: {e}")
+
+            # 4. History-Eintrag für Destroy erstellen
             try:
                 await vm_history_service.log_change(
                     vm_name=name,
@@ -621,7 +641,7 @@ module "{module_name}" {{
             except Exception as e:
                 print(f"Warnung: History-Eintrag konnte nicht erstellt werden: {e}")
 
-            # 4. Benachrichtigung senden
+            # 5. Benachrichtigung senden
             try:
                 async with async_session() as db:
                     notification_service = NotificationService(db)
@@ -697,9 +717,7 @@ module "{module_name}" {{
         source_octets = source_config.ip_address.split(".")
         vlan = int(source_octets[2])
 
-        available_ips = await netbox_service.get_available_ips(vlan, limit=1)
-        if not available_ips:
-            raise ValueError(f"Keine freien IPs in VLAN {vlan} verfügbar")
+        available_ips = await netbox_service.allocate_ips(vlan, 1, owner=target_name)
 
         target_ip = available_ips[0]["address"]
         target_vmid = calculate_vmid(target_ip)
@@ -752,6 +770,7 @@ module "{module_name}" {{
         else:
             # TF-Datei wieder löschen bei Fehler
             tf_file.unlink()
+            netbox_service.release_allocation(target_ip)
             raise ValueError(f"Proxmox Clone fehlgeschlagen: {result.get('error')}")
 
     def delete_vm_config(self, name: str) -> bool:
@@ -816,7 +835,16 @@ module "{module_name}" {{
         except Exception as e:
             result["proxmox"]["error"] = str(e)
 
-        # 2. NetBox: VM löschen
+        # 2. NetBox: IP freigeben (zuerst, primary_ip4 der VM verweist auf sie)
+        try:
+            released = vm_config.ip_address in await netbox_service.release_ips([vm_config.ip_address])
+            result["netbox_ip"]["success"] = released
+            if not released:
+                result["netbox_ip"]["skipped"] = True
+        except Exception as e:
+            result["netbox_ip"]["error"] = str(e)
+
+        # 3. NetBox: VM löschen
         try:
             deleted = await netbox_service.delete_vm(name)
             result["netbox_vm"]["success"] = deleted
@@ -825,15 +853,6 @@ module "{module_name}" {{
         except Exception as e:
             result["netbox_vm"]["error"] = str(e)
 
-        # 3. NetBox: IP freigeben
-        try:
-            released = await netbox_service.release_ip(vm_config.ip_address)
-            result["netbox_ip"]["success"] = released
-            if not released:
-                result["netbox_ip"]["skipped"] = True
-        except Exception as e:
-            result["netbox_ip"]["error"] = str(e)
-
         # 4. Terraform State: Modul entfernen
         try:
             tf_state_result = await self.terraform_service.remove_module_from_state(module_name)
@@ -865,7 +884,10 @@ module "{module_name}" {{
 
         # 7. Cloud-Init Snippet vom NAS loeschen
         try:
-            deleted = await cloud_init_service.delete_snippet_from_nas(name)
+            async with async_session() as db:
+                deleted = await cloud_init_service.delete_snippet_from_nas(
+                    name, proxmox_node=vm_config.target_node, db=db
+                )
             result["cloud_init_snippet"]["success"] = deleted
             if not deleted:
                 result["cloud_init_snippet"]["skipped"] = True
@@ -1223,15 +1245,12 @@ module "{module_name}" {{
                 "error": f"Terraform Import fehlgeschlagen: {import_result.get('error')}",
             }
 
-        # Optional: IP in NetBox registrieren
+        # Optional: VM und IP in NetBox registrieren
         if register_netbox:
             try:
-                await netbox_service.reserve_ip(
-                    ip_address=ip_address,
-                    description=f"VM: {vm_name} (importiert)",
-                    dns_name=f"{vm_name}.newsxc.net",
+                await netbox_service.register_vm_batched(
+                    self._import_netbox_entry(vm_name, ip_address, vmid, cores, memory_gb, disk_size_gb)
                 )
-                await netbox_service.activate_ip(ip_address)
             except Exception as e:
                 # Nicht kritisch, nur warnen
                 print(f"NetBox-Registrierung fehlgeschlagen: {e}")
@@ -1282,6 +1301,76 @@ module "{module_name}" {{
             "disk_size_gb": disk_size_gb,
         }
 
+    def _import_netbox_entry(
+        self,
+        vm_name: str,
+        ip_address: str,
+        vmid: int,
+        cores: int,
+        memory_gb: int,
+        disk_size_gb: int,
+    ) -> dict:
+        """NetBox-Eintrag (für register_vms) einer importierten VM"""
+        return {
+            "name": vm_name,
+            "ip_address": ip_address,
+            "vcpus": cores,
+            "memory_mb": memory_gb * 1024,
+            "disk_gb": disk_size_gb,
+            "cluster_name": "Proxmox",
+            "description": f"Importiert aus Proxmox (VMID: {vmid})",
+            "ip_description": f"VM: {vm_name} (importiert)",
+            "dns_name": f"{vm_name}.newsxc.net",
+            "ip_status": "active",
+        }
+
+    async def import_existing_vms(self, items: list[dict], user_id: int = 1) -> list[dict]:
+        """
+        Importiert mehrere Proxmox-VMs.
+
+        Die Terraform-Imports laufen nacheinander (gemeinsamer State), die
+        NetBox-Registrierung aller erfolgreichen Imports erfolgt danach
+        gesammelt mit wenigen Bulk-Requests.
+
+        Args:
+            items: Dicts mit vmid, node, vm_name, ansible_group, register_netbox
+            user_id: User-ID für Audit
+
+        Returns:
+            Ergebnis pro VM (siehe import_existing_vm)
+        """
+        results = []
+        netbox_entries = []
+
+        for item in items:
+            result = await self.import_existing_vm(
+                vmid=item["vmid"],
+                node=item["node"],
+                vm_name=item["vm_name"],
+                ansible_group=item.get("ansible_group", ""),
+                register_netbox=False,
+                user_id=user_id,
+            )
+            results.append(result)
+            if result.get("success") and item.get("register_netbox", True):
+                netbox_entries.append(self._import_netbox_entry(
+                    result["vm_name"],
+                    result["ip_address"],
+                    result["vmid"],
+                    result["cores"],
+                    result["memory_gb"],
+                    result["disk_size_gb"],
+                ))
+
+        if netbox_entries:
+            try:
+                await netbox_service.register_vms(netbox_entries)
+            except Exception as e:
+                # Nicht kritisch, nur warnen
+                print(f"NetBox-Registrierung fehlgeschlagen: {e}")
+
+        return results
+
     def update_target_node(self, vm_name: str, new_node: str) -> dict:
         """
         Aktualisiert den target_node in der TF-Datei einer VM.
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Kompression der Backup-Archive
+
+Erzeugt ein synthetisches Datenverzeichnis (Playbooks/YAML, Logs, eine
+SQLite-Datenbank, zufaellige Binaerdaten) und schreibt es mit jedem
+Format/Level einmal als Archiv. Ausgegeben werden Durchsatz beim Packen
+und Entpacken sowie das Kompressionsverhaeltnis - Grundlage fuer
+BACKUP_COMPRESS_LEVEL, BACKUP_ZSTD_LEVEL und BACKUP_COMPRESS_THREADS.
+
+Verwendung:
+    python scripts/bench-backup.py --size-mb 200
+    python scripts/bench-backup.py --data-dir /app/data/playbooks
+
+Voraussetzung: zstandard fuer die tar.zst-Messungen (sonst uebersprungen)
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from app.services.backup_archive import (  # noqa: E402
+    ArchiveWriter,
+    TarZstWriter,
+    extract_archive,
+)
+
+WORDS = (
+    "hosts tasks name become true false when register vars apt yum service "
+    "state present started restarted template copy file dest src mode owner "
+    "proxmox vm node storage network bridge vlan ip gateway dns netbox"
+).split()
+
+
+def generate(data_dir: Path, size_mb: int, seed: int = 42) -> None:
+    """Erzeugt ein gemischtes Datenverzeichnis mit etwa size_mb MB"""
+    rng = random.Random(seed)
+    budget = size_mb * 1024 * 1024
+
+    # 40% YAML/Text (gut komprimierbar)
+    playbooks = data_dir / "playbooks"
+    written = 0
+    index = 0
+    while written < budget * 0.4:
+        folder = playbooks / f"role{index % 50}"
+        folder.mkdir(parents=True, exist_ok=True)
+        lines = [
+            f"- name: {' '.join(rng.choices(WORDS, k=4))}\n"
+            f"  {rng.choice(WORDS)}: {rng.choice(WORDS)}_{rng.randint(0, 999)}\n"
+            for _ in range(rng.randint(20, 400))
+        ]
+        text = "".join(lines)
+        (folder / f"task{index}.yml").write_text(text)
+        written += len(text)
+        index += 1
+
+    # 25% Logs (sehr gut komprimierbar)
+    logs = data_dir / "logs"
+    logs.mkdir(parents=True, exist_ok=True)
+    with open(logs / "executions.log", "w") as f:
+        size = 0
+        while size < budget * 0.25:
+            line = (
+                f"2026-01-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00 "
+                f"INFO host{rng.randint(1, 200)} {' '.join(rng.choices(WORDS, k=8))}\n"
+            )
+            f.write(line)
+            size += len(line)
+
+    # 25% SQLite (Seitenstruktur, mittel komprimierbar)
+    db_dir = data_dir / "db"
+    db_dir.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_dir / "commander.db")
+    conn.execute("CREATE TABLE IF NOT EXISTS log (id INTEGER PRIMARY KEY, host TEXT, line TEXT)")
+    rows_per_mb = 4000
+    conn.executemany(
+        "INSERT INTO log (host, line) VALUES (?, ?)",
+        (
+            (f"host{rng.randint(1, 200)}", " ".join(rng.choices(WORDS, k=20)))
+            for _ in range(int(size_mb * 0.25 * rows_per_mb / 2))
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+    # 10% Zufallsdaten (nicht komprimierbar, z.B. Media/Keys)
+    media = data_dir / "media"
+    media.mkdir(parents=True, exist_ok=True)
+    (media / "random.bin").write_bytes(rng.randbytes(int(budget * 0.1)))
+
+
+def collect(data_dir: Path) -> list[tuple[Path, str]]:
+    return [
+        (path, path.relative_to(data_dir).as_posix())
+        for path in sorted(data_dir.rglob("*"))
+        if path.is_file()
+    ]
+
+
+def run_case(name: str, make_writer, files, out_dir: Path, logical: int) -> None:
+    suffix = ".tar.zst" if "zst" in name else ".zip"
+    archive = out_dir / f"bench{suffix}"
+    try:
+        writer = make_writer(archive)
+    except RuntimeError as e:
+        print(f"{name:<22} uebersprungen: {e}")
+        return
+
+    started = time.perf_counter()
+    for src, arcname in files:
+        writer.add_file(src, arcname)
+    writer.close()
+    pack = time.perf_counter() - started
+
+    target = out_dir / "extract"
+    started = time.perf_counter()
+    extract_archive(archive, target)
+    unpack = time.perf_counter() - started
+
+    size = archive.stat().st_size
+    mb = logical / 1024 / 1024
+    print(
+        f"{name:<22} {size / 1024 / 1024:9.1f} MB  ratio {logical / size:5.2f}  "
+        f"pack {mb / pack:7.1f} MB/s  unpack {mb / unpack:7.1f} MB/s"
+    )
+    archive.unlink()
+    shutil.rmtree(target)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kompression der Backup-Archive messen")
+    parser.add_argument("--data-dir", help="Vorhandenes Verzeichnis statt synthetischer Daten")
+    parser.add_argument("--size-mb", type=int, default=100, help="Groesse der synthetischen Daten")
+    parser.add_argument("--threads", type=int, default=0, help="zstd-Threads (0 = alle Kerne)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-backup-") as tmp:
+        tmp_dir = Path(tmp)
+        if args.data_dir:
+            data_dir = Path(args.data_dir)
+        else:
+            data_dir = tmp_dir / "data"
+            print(f"Erzeuge {args.size_mb} MB synthetische Daten ...")
+            generate(data_dir, args.size_mb)
+
+        files = collect(data_dir)
+        logical = sum(src.stat().st_size for src, _ in files)
+        print(f"{len(files)} Dateien, {logical / 1024 / 1024:.1f} MB, {os.cpu_count()} Kerne\n")
+
+        cases = [
+            (f"zip deflate-{level}", lambda path, level=level: ArchiveWriter(path, compress_level=level))
+            for level in (1, 6, 9)
+        ]
+        for level in (1, 3, 9, 19):
+            cases.append((
+                f"tar.zst-{level} 1 Thread",
+                lambda path, level=level: TarZstWriter(path, level=level, threads=1),
+            ))
+            cases.append((
+                f"tar.zst-{level} {args.threads or 'alle'}",
+                lambda path, level=level: TarZstWriter(path, level=level, threads=args.threads),
+            ))
+
+        for name, make_writer in cases:
+            run_case(name, make_writer, files, tmp_dir, logical)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark: API-Latenz unter gleichzeitigen Logins
+
+Misst die Antwortzeit eines leichten Endpunkts (GET /) einmal ohne Last
+und einmal waehrend eines Login-Sturms. Solange bcrypt den Event-Loop
+blockiert, steigt die Latenz des leichten Endpunkts mit jedem Login; laeuft
+das Hashing im Thread-Pool, bleibt sie nahezu konstant.
+
+Verwendung:
+    python scripts/bench-login.py --url http://localhost:8000 \\
+        --user admin --password secret --logins 50
+
+Voraussetzung: httpx (ist im Backend bereits installiert)
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+
+
+def summarize(name: str, samples: list[float]) -> None:
+    """Gibt Kennzahlen einer Messreihe in Millisekunden aus"""
+    if not samples:
+        print(f"{name:<18} keine Messwerte")
+        return
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(
+        f"{name:<18} n={len(samples):<5} "
+        f"p50={statistics.median(samples) * 1000:7.1f} ms  "
+        f"p95={p95 * 1000:7.1f} ms  "
+        f"max={ordered[-1] * 1000:7.1f} ms"
+    )
+
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event, interval: float) -> list[float]:
+    """Fragt GET / wiederholt ab bis stop gesetzt ist"""
+    samples = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get("/")
+        response.raise_for_status()
+        samples.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+    return samples
+
+
+async def login(client: httpx.AsyncClient, user: str, password: str) -> tuple[int, float]:
+    """Ein Login, liefert (HTTP-Status, Dauer)"""
+    started = time.perf_counter()
+    response = await client.post(
+        "/api/auth/login",
+        data={"username": user, "password": password},
+    )
+    return response.status_code, time.perf_counter() - started
+
+
+async def run(args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=args.logins + 10)
+    async with httpx.AsyncClient(base_url=args.url, timeout=120.0, limits=limits) as client:
+        # 1. Baseline ohne Last
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(probe(client, stop, args.interval))
+        await asyncio.sleep(args.baseline)
+        stop.set()
+        baseline = await probe_task
+
+        # 2. Login-Sturm mit paralleler Messung
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(probe(client, stop, args.interval))
+        started = time.perf_counter()
+        results = await asyncio.gather(*[
+            login(client, args.user, args.password) for _ in range(args.logins)
+        ])
+        elapsed = time.perf_counter() - started
+        stop.set()
+        under_load = await probe_task
+
+    statuses: dict[int, int] = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+
+    print(f"\n{args.logins} gleichzeitige Logins in {elapsed:.2f} s, Status: {statuses}\n")
+    summarize("GET / (Baseline)", baseline)
+    summarize("GET / (Logins)", under_load)
+    summarize("POST /login", [duration for _, duration in results])
+
+    if statuses.get(200, 0) == 0:
+        print("\nWarnung: kein Login erfolgreich - Zugangsdaten pruefen")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API-Latenz unter gleichzeitigen Logins messen")
+    parser.add_argument("--url", default="http://localhost:8000", help="Backend-URL")
+    parser.add_argument("--user", default="admin", help="Benutzername")
+    parser.add_argument("--password", required=True, help="Passwort")
+    parser.add_argument("--logins", type=int, default=50, help="Anzahl gleichzeitiger Logins")
+    parser.add_argument("--baseline", type=float, default=3.0, help="Dauer der Baseline-Messung (s)")
+    parser.add_argument("--interval", type=float, default=0.02, help="Abstand der Latenz-Proben (s)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()